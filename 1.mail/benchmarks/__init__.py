@@ -0,0 +1,4 @@
+"""
+Mail Engine Benchmarks
+실행: 1.mail 디렉터리에서 python -m benchmarks.<모듈명>
+"""
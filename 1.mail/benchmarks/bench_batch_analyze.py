@@ -0,0 +1,57 @@
+"""
+배치 분석 처리량 벤치마크: 순차 calculate_score vs 프로세스 풀
+
+워커 수별로 InquiryAnalyzer.batch_analyze 처리량(msg/s)을 측정하고
+결과가 순차 처리와 동일한지(입력 순서 포함) 검증합니다.
+
+    python -m benchmarks.bench_batch_analyze --n 10000 --workers 1 2 4 8
+"""
+
+import os
+import time
+import argparse
+
+from engine.analyzer import InquiryAnalyzer, shutdown_process_pools
+from engine.fake_gmail import FakeGmailService
+from engine.gmail_fetcher import GmailFetcher
+
+KEYWORDS_PATH = 'config/keywords.json'
+JARGON_PATH = 'config/jargon_map.json'
+
+
+def make_emails(n: int):
+    service = FakeGmailService.synthetic(n)
+    return GmailFetcher(service).fetch('is:unread', n)
+
+
+def run(n: int, worker_counts):
+    emails = make_emails(n)
+    serial = InquiryAnalyzer(keywords_path=KEYWORDS_PATH, jargon_path=JARGON_PATH, workers=1)
+
+    start = time.perf_counter()
+    expected = [serial.calculate_score(e) for e in emails]
+    base = time.perf_counter() - start
+    print(f"cpu_count={os.cpu_count()}  n={n}")
+    print(f"{'mode':<12}{'seconds':>10}{'msg/s':>10}{'speedup':>10}")
+    print(f"{'serial':<12}{base:>10.2f}{n / base:>10.0f}{1.0:>9.1f}x")
+
+    for workers in worker_counts:
+        analyzer = InquiryAnalyzer(keywords_path=KEYWORDS_PATH, jargon_path=JARGON_PATH, workers=workers)
+        analyzer.batch_analyze(emails[:analyzer.MIN_PARALLEL_BATCH])   # 워커 기동 (warm-up)
+
+        start = time.perf_counter()
+        results = analyzer.batch_analyze(emails)
+        elapsed = time.perf_counter() - start
+
+        assert results == expected, 'batch result mismatch'
+        print(f"{f'workers={workers}':<12}{elapsed:>10.2f}{n / elapsed:>10.0f}{base / elapsed:>9.1f}x")
+
+    shutdown_process_pools()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--n', type=int, default=10000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    run(args.n, args.workers)
@@ -0,0 +1,97 @@
+"""
+야간 배치 초안 작업 벤치마크 (LocalBatchBackend, 네트워크 없음)
+
+대상 선택 → JSONL 작성 → 배치 처리 → 일괄 저장 처리량을 측정하고
+제출 직후 중단된 작업이 재실행 시 이어서 완료되는지 검증합니다.
+
+    python -m benchmarks.bench_batch_drafting --n 20000 --min-score 60
+"""
+
+import os
+import time
+import tempfile
+import argparse
+from pathlib import Path
+
+from engine.database import DBManager
+from engine.reply_generator import ReplyGenerator
+from engine.batch_drafting import BatchDraftJob
+from engine.fake_openai import LocalBatchBackend
+from benchmarks.bench_db_ingest import make_rows
+
+
+class CrashAfterSubmit(BatchDraftJob):
+    """배치 생성 후 submitted 기록 직전에 중단되는 작업"""
+
+    def _save_state(self, **updates):
+        if updates.get('status') == 'submitted':
+            raise KeyboardInterrupt
+        super()._save_state(**updates)
+
+
+def check_resume(tmp: str, generator: ReplyGenerator):
+    """제출 후 중단 → 새 프로세스(새 작업 객체)에서 재개"""
+    db = DBManager(os.path.join(tmp, 'resume.db'))
+    db.insert_emails_bulk(make_rows(200))
+    state_dir = os.path.join(tmp, 'resume')
+    backend = LocalBatchBackend(Path(state_dir) / 'local')
+    job = BatchDraftJob(db, generator, backend, state_dir, min_score=0, limit=50, poll_interval=0)
+    assert job._prepare()
+    job._submit()           # 여기서 중단되었다고 가정
+
+    resumed = BatchDraftJob(db, generator, backend, state_dir, min_score=0, limit=50, poll_interval=0)
+    state = resumed.run()
+    assert state['job'] == job.job_dir.name and state['status'] == 'done', state
+    assert state['stored'] == 50, state
+    print(f"resume: job {state['job']} completed after restart ({state['stored']} drafts)")
+
+    # 배치 생성 직후 상태 기록 전에 중단 → 재개 시 같은 배치를 찾아 다시 제출하지 않음
+    job = CrashAfterSubmit(db, generator, backend, state_dir, min_score=0, limit=50, poll_interval=0)
+    assert job._prepare()
+    try:
+        job._submit()
+    except KeyboardInterrupt:
+        pass
+    submitted = backend.submitted
+    state = BatchDraftJob(db, generator, backend, state_dir, min_score=0, limit=50, poll_interval=0).run()
+    assert state['job'] == job.job_dir.name and state['stored'] == 50, state
+    assert backend.submitted == submitted, 'batch submitted twice'
+    print(f"resume after crash in submit: job {state['job']} reused its batch (1 submission)")
+
+
+def run(n: int, min_score: float):
+    rows = make_rows(n)
+    for row in rows[1::50]:
+        row['body'] += ' [[FAIL]]'      # 일부 요청 실패 주입
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DBManager(os.path.join(tmp, 'drafts.db'), reply_draft_max=n * 2)
+        db.insert_emails_bulk(rows)
+        generator = ReplyGenerator(model='gpt-4o-mini')
+        state_dir = os.path.join(tmp, 'jobs')
+        job = BatchDraftJob(db, generator, LocalBatchBackend(Path(state_dir) / 'local'), state_dir,
+                            min_score=min_score, poll_interval=0)
+
+        start = time.perf_counter()
+        state = job.run()
+        elapsed = time.perf_counter() - start
+
+        expected = sum(1 for r in rows if not r['is_spam'] and r['score'] >= min_score)
+        assert state['count'] == expected, state
+        assert state['stored'] + state['failed'] == expected, state
+        print(f"n={n}  candidates={state['count']}  stored={state['stored']}  failed={state['failed']}")
+        print(f"elapsed {elapsed:.2f}s  ({state['count'] / elapsed:.0f} drafts/s)")
+
+        # 저장된 초안은 다음 실행 대상에서 제외, 실패분만 다시 선택
+        again = db.get_draft_candidates(min_score, generator.PROMPT_VERSION, generator.model)
+        assert len(again) == state['failed'], len(again)
+
+        check_resume(tmp, generator)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--n', type=int, default=20000)
+    parser.add_argument('--min-score', type=float, default=60.0)
+    args = parser.parse_args()
+    run(args.n, args.min_score)
@@ -0,0 +1,163 @@
+"""
+본문 저장 벤치마크: emails 행에 본문 그대로 저장(스키마 0) vs email_bodies 압축 저장(스키마 1)
+
+회신이 많은 합성 코퍼스(인용이 쌓인 긴 스레드)를 저장한 뒤 이전 레이아웃 DB를 만들어
+DB 크기, 목록 조회(keyset 전체 페이지 순회 / 전체 행 집계) 시간을 비교하고,
+이전 레이아웃 DB를 DBManager로 열었을 때 제자리 변환 후 본문 / 전문 검색 결과가 같은지 검증합니다.
+
+    python -m benchmarks.bench_body_storage --n 10000
+"""
+
+import os
+import time
+import shutil
+import sqlite3
+import tempfile
+import argparse
+
+from engine.database import DBManager, decompress_body
+from benchmarks.corpus import generate_corpus
+
+# 긴 스레드 위주 (회신 비중을 높여 인용이 여러 단계로 쌓이도록)
+THREAD_MIX = {'en_inquiry': 0.25, 'ko_inquiry': 0.1, 'reply': 0.55, 'spam': 0.05, 'newsletter': 0.05}
+PAGE = 50
+QUERIES = ['quotation', 'MOQ lead', 'FOB', 'sample']
+
+
+def thread_bodies(emails):
+    """회신 본문이 같은 스레드의 직전 메일 전체를 인용하도록 (메일 클라이언트 기본 회신 - 스레드가 길수록 본문이 커짐)"""
+    previous = {}
+    for e in sorted(emails, key=lambda e: e['timestamp_ms']):
+        if e['is_reply'] and e['thread_id'] in previous:
+            new_part = e['body'].split('\nOn ', 1)[0]
+            quoted = '\n'.join('> ' + line for line in previous[e['thread_id']]['body'].splitlines())
+            e['body'] = f"{new_part}\nOn {previous[e['thread_id']]['full_date']}, Sales Team wrote:\n{quoted}"
+        previous[e['thread_id']] = e
+    return emails
+
+
+def make_rows(n: int, seed: int):
+    emails = thread_bodies(generate_corpus(n, seed=seed, mix=THREAD_MIX))
+    return [{**e, 'score': (i * 37) % 100, 'intent_score': (i * 7) % 100, 'clarity_score': i % 50,
+             'terms_score': (i * 11) % 100, 'is_spam': e['kind'] in ('spam', 'newsletter'),
+             'keywords': 'quotation, moq', 'reason': '합성', 'language': 'EN'}
+            for i, e in enumerate(emails)]
+
+
+def to_legacy(path: str):
+    """스키마 1 DB → 스키마 0 레이아웃 (body_text가 원래 위치(snippet 다음)에 있는 emails + emails 기준 전문 검색)"""
+    conn = sqlite3.connect(path)
+    conn.create_function('decompress_body', 1, decompress_body)
+    for trigger in ('trg_fts_body_update', 'trg_fts_delete', 'trg_fts_update', 'trg_bodies_delete'):
+        conn.execute(f'DROP TRIGGER {trigger}')
+    conn.execute('DROP TABLE emails_fts')
+    conn.execute('DROP VIEW emails_fts_content')
+
+    # 컬럼 순서가 중요 (본문 뒤의 점수 / 상태 컬럼을 읽으려면 본문 overflow 페이지를 지나야 함)
+    table_sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'emails'").fetchone()[0]
+    dependents = [sql for (sql,) in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE tbl_name = 'emails' AND type IN ('index', 'trigger') AND sql IS NOT NULL")]
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(emails)')]
+    conn.execute(table_sql.replace('CREATE TABLE emails', 'CREATE TABLE emails_legacy', 1)
+                 .replace('body_preview TEXT', 'body_text TEXT', 1))
+    select = ', '.join('(SELECT decompress_body(body) FROM email_bodies WHERE email_id = e.id)'
+                       if c == 'body_preview' else f'e.{c}' for c in columns)
+    conn.execute(f'INSERT INTO emails_legacy SELECT {select} FROM emails e ORDER BY e.rowid')
+    conn.execute('DROP TABLE emails')
+    conn.execute('DROP TABLE email_bodies')
+    conn.execute('ALTER TABLE emails_legacy RENAME TO emails')
+    for sql in dependents:
+        conn.execute(sql)
+
+    cols = ', '.join(DBManager.FTS_COLUMNS)
+    conn.execute(f"CREATE VIRTUAL TABLE emails_fts USING fts5({cols}, content='emails', content_rowid='rowid')")
+    conn.execute("INSERT INTO emails_fts (emails_fts) VALUES ('rebuild')")
+    conn.execute('PRAGMA user_version = 0')
+    conn.commit()
+    conn.execute('VACUUM')
+    conn.close()
+
+
+def list_workload(path: str, columns: str) -> float:
+    """목록 화면 조회: 점수순 keyset 전체 페이지 순회 + 전체 행 집계 (캐시 비운 새 연결)"""
+    conn = sqlite3.connect(path)
+    start = time.perf_counter()
+    cursor = (float('inf'), '')
+    while True:
+        rows = conn.execute(f'''
+            SELECT {columns} FROM emails
+            WHERE status = 'Active' AND is_spam = 0 AND (score, id) < (?, ?)
+            ORDER BY score DESC, id DESC LIMIT ?
+        ''', (*cursor, PAGE)).fetchall()
+        if len(rows) < PAGE:
+            break
+        cursor = (rows[-1][1], rows[-1][0])
+    conn.execute('SELECT sender_email, COUNT(*), MAX(score) FROM emails GROUP BY sender_email').fetchall()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+def best_of(repeat: int, func, *args) -> float:
+    return min(func(*args) for _ in range(repeat))
+
+
+def run(n: int, seed: int, repeat: int):
+    rows = make_rows(n, seed)
+    columns = ', '.join(('id', 'score') + tuple(c for c in DBManager.LIST_COLUMNS if c not in ('id', 'score', 'body_preview')))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        current = os.path.join(tmp, 'current.db')
+        db = DBManager(current)
+        db.insert_emails_bulk(rows)
+        expected = {q: [r['id'] for r in db.search_emails(q, limit=50, include_spam=True)] for q in QUERIES}
+        # 두 레이아웃 모두 검색 인덱스를 한 번에 만든 상태로 비교 (증분 색인의 세그먼트 병합 차이 제외)
+        db.rebuild_search_index()
+        db._get_conn().execute('VACUUM')
+        db._get_conn().close()
+
+        legacy = os.path.join(tmp, 'legacy.db')
+        shutil.copy(current, legacy)
+        to_legacy(legacy)
+
+        avg_body = sum(len(r['body'].encode('utf-8')) for r in rows) / n
+        sizes = {'legacy': os.path.getsize(legacy), 'compressed': os.path.getsize(current)}
+        timings = {'legacy': best_of(repeat, list_workload, legacy, columns),
+                   'compressed': best_of(repeat, list_workload, current, columns)}
+
+        print(f"emails={n}  avg body={avg_body:,.0f} bytes  "
+              f"replies={sum(1 for r in rows if r['is_reply'])}")
+        print(f"{'layout':<12}{'DB size (MB)':>14}{'list pages + scan (ms)':>25}")
+        for name in ('legacy', 'compressed'):
+            print(f"{name:<12}{sizes[name] / 2 ** 20:>14.2f}{timings[name] * 1000:>25.1f}")
+        print(f"size: {sizes['legacy'] / sizes['compressed']:.2f}x smaller  "
+              f"list: {timings['legacy'] / timings['compressed']:.2f}x faster")
+
+        # 이전 레이아웃 DB 제자리 변환 → 본문 / 미리보기 / 검색 결과 확인
+        start = time.perf_counter()
+        migrated = DBManager(legacy)
+        elapsed = time.perf_counter() - start
+        conn = migrated._get_conn()
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        assert conn.execute('PRAGMA user_version').fetchone()[0] == DBManager.SCHEMA_VERSION
+        assert 'body_text' not in {row[1] for row in conn.execute('PRAGMA table_info(emails)')}
+        sample = [r['id'] for r in rows[::max(n // 200, 1)]]
+        bodies = migrated.get_email_bodies(sample)
+        by_id = {r['id']: r for r in rows}
+        assert all(bodies[i] == by_id[i]['body'] for i in sample), 'body mismatch after migration'
+        preview = conn.execute('SELECT body_preview FROM emails WHERE id = ?', (sample[0],)).fetchone()[0]
+        assert preview == by_id[sample[0]]['body'][:DBManager.BODY_PREVIEW_CHARS]
+        for q in QUERIES:
+            found = [r['id'] for r in migrated.search_emails(q, limit=50, include_spam=True)]
+            assert sorted(found) == sorted(expected[q]), f'search mismatch after migration: {q}'
+        print(f"migration: {elapsed:.2f}s → {os.path.getsize(legacy) / 2 ** 20:.2f} MB, "
+              f"bodies + search results match: ok")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--n', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.n, args.seed, args.repeat)
@@ -0,0 +1,46 @@
+"""
+Gmail 수집 처리량 벤치마크 (오프라인)
+
+FakeGmailService로 HTTP 왕복 지연을 시뮬레이션하여
+기존 순차 messages.get 루프와 GmailFetcher(batch) 처리량을 비교합니다.
+
+    python -m benchmarks.bench_gmail_fetch --sizes 1000 10000 --latency 0.002
+"""
+
+import time
+import argparse
+
+from engine.fake_gmail import FakeGmailService
+from engine.gmail_fetcher import GmailFetcher, parse_message
+
+
+def fetch_serial(service, limit: int):
+    """기존 방식: list 후 메시지마다 get 1회"""
+    ids = GmailFetcher(service).list_message_ids('is:unread', limit)
+    return [parse_message(service.users().messages().get(userId='me', id=mid).execute())
+            for mid in ids]
+
+
+def fetch_batched(service, limit: int):
+    return GmailFetcher(service).fetch('is:unread', limit)
+
+
+def run(sizes, latency: float):
+    print(f"{'mode':<10}{'n':>8}{'seconds':>10}{'msg/s':>12}{'round trips':>14}")
+    for n in sizes:
+        for name, func in (('serial', fetch_serial), ('batch', fetch_batched)):
+            service = FakeGmailService.synthetic(n, latency=latency)
+            start = time.perf_counter()
+            emails = func(service, n)
+            elapsed = time.perf_counter() - start
+            assert len(emails) == n
+            print(f"{name:<10}{n:>8}{elapsed:>10.2f}{n / elapsed:>12.0f}{service.round_trips:>14}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--latency', type=float, default=0.002,
+                        help='HTTP 왕복 1회당 지연 (초)')
+    args = parser.parse_args()
+    run(args.sizes, args.latency)
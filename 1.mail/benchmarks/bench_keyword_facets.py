@@ -0,0 +1,108 @@
+"""
+키워드 facet 벤치마크: email_keywords 커버링 인덱스 집계 vs emails.keywords LIKE 스캔
+
+합성 코퍼스를 저장한 뒤 사이드바 키워드 필터가 실행하는 조회를 두 방식으로 측정합니다.
+- LIKE: 쉼표로 이어 붙인 emails.keywords(상위 10개)를 키워드마다 LIKE로 스캔
+- facet: email_keywords (status, mail_day, category, keyword) 인덱스만 읽는 GROUP BY
+집계 건수는 분석 결과의 전체 매칭 키워드로 센 정답과 비교합니다.
+(LIKE는 11번째 이후 키워드 누락 / 'ce'가 'price'에도 걸리는 부분 문자열 오탐으로 어긋남)
+
+    python -m benchmarks.bench_keyword_facets --n 20000
+"""
+
+import os
+import time
+import tempfile
+import argparse
+from collections import Counter
+
+from engine.analyzer import InquiryAnalyzer
+from engine.database import DBManager
+from engine.pipeline import analyze_rows
+from benchmarks.corpus import generate_corpus
+
+KEYWORDS_PATH = 'config/keywords.json'
+JARGON_PATH = 'config/jargon_map.json'
+CHUNK = 1000
+REPEAT = 5
+
+
+def timed(func):
+    best, result = float('inf'), None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def like_facets(db: DBManager, keywords, date_from):
+    """비교 대상: 키워드마다 emails.keywords LIKE 스캔"""
+    conn = db._get_conn()
+    return {k: conn.execute(
+        "SELECT COUNT(*) FROM emails WHERE status = 'Active' AND substr(full_date, 1, 10) >= ? AND keywords LIKE ?",
+        (date_from, f'%{k}%')
+    ).fetchone()[0] for k in keywords}
+
+
+def run(n: int):
+    emails = generate_corpus(n, seed=13)
+    analyzer = InquiryAnalyzer(keywords_path=KEYWORDS_PATH, jargon_path=JARGON_PATH, workers=1)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DBManager(os.path.join(tmp, 'facets.db'))
+        truth = Counter()
+        days = Counter()
+        for i in range(0, n, CHUNK):
+            rows = analyze_rows(analyzer, emails[i:i + CHUNK])
+            db.insert_emails_bulk(rows)
+            for row in rows:
+                days[row['full_date'][:10]] += 1
+                truth.update((row['full_date'][:10], keyword) for keyword, _, _ in row['matched'] or [])
+
+        # 최근 7일
+        date_from = sorted(days)[-7]
+        expected = Counter()
+        for (day, keyword), count in truth.items():
+            if day >= date_from:
+                expected[keyword] += count
+        keywords = list(analyzer.keyword_scorer.categories)
+
+        conn = db._get_conn()
+        plan = [row[3] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT keyword, category, COUNT(*) FROM email_keywords "
+            "WHERE status = ? AND mail_day >= ? GROUP BY keyword", ('Active', date_from))]
+        assert any('COVERING INDEX' in p for p in plan), f'facet query is not index-only: {plan}'
+
+        like_time, like = timed(lambda: like_facets(db, keywords, date_from))
+        facet_time, facets = timed(lambda: db.keyword_facets(date_from=date_from, limit=len(keywords)))
+        category_time, _ = timed(lambda: db.category_facets(date_from=date_from))
+        top = max(expected, key=expected.get)
+        filter_time, _ = timed(lambda: db.list_emails('score', limit=20, keyword=top))
+        day_time, _ = timed(lambda: db.day_facets(keyword=top))
+        facet_counts = {f['keyword']: f['count'] for f in facets}
+
+        like_wrong = sum(1 for k in keywords if like[k] != expected.get(k, 0))
+        facet_wrong = sum(1 for k in keywords if facet_counts.get(k, 0) != expected.get(k, 0))
+        print(f"emails={n}  keywords={len(keywords)}  period >= {date_from}  plan: {plan[0]}")
+        print(f"{'query':<34}{'ms':>10}{'wrong counts':>14}")
+        print(f"{'LIKE scan per keyword':<34}{like_time * 1000:>10.2f}{like_wrong:>14}")
+        print(f"{'keyword_facets (index-only)':<34}{facet_time * 1000:>10.2f}{facet_wrong:>14}")
+        print(f"{'category_facets':<34}{category_time * 1000:>10.2f}")
+        print(f"{f'day_facets({top!r})':<34}{day_time * 1000:>10.2f}")
+        print(f"{f'list_emails(keyword={top!r})':<34}{filter_time * 1000:>10.2f}")
+        print(f"facets: {like_time / max(facet_time, 1e-9):.0f}x faster")
+        assert facet_wrong == 0, 'facet counts differ from full matched keyword counts'
+
+        # 처리 완료 → 트리거로 facet 상태 동기화
+        archived, _ = db.list_emails('score', limit=50, keyword=top, date_from=date_from)
+        db.update_statuses({m['id']: 'Archived' for m in archived})
+        after = {f['keyword']: f['count'] for f in db.keyword_facets(date_from=date_from, limit=len(keywords))}
+        assert after[top] == expected[top] - len(archived), 'facet counts not updated on archive'
+        print(f"archive {len(archived)} → facet count {expected[top]} → {after[top]}: ok")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--n', type=int, default=20000)
+    args = parser.parse_args()
+    run(args.n)
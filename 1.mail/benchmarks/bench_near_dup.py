@@ -0,0 +1,137 @@
+"""
+유사 메일 묶음 벤치마크: 코퍼스 + 반복 발송(blast) 사본
+
+전체 분석 vs 유사 메일 판정(대표 메일만 분석) 소요 시간, 분석 건수, 목록 카드 수를 비교하고
+사본이 원본 묶음으로 모였는지(재현율) / 서로 다른 묶음이 합쳐지지 않았는지 검증합니다.
+
+    python -m benchmarks.bench_near_dup --n 10000 --blasts 50 --copies 20
+"""
+
+import os
+import time
+import tempfile
+import argparse
+from collections import Counter, defaultdict
+
+from engine.analyzer import InquiryAnalyzer
+from engine.database import DBManager
+from engine.near_dup import NearDuplicateIndex
+from engine.pipeline import analyze_rows
+from benchmarks.corpus import generate_corpus, add_blasts
+
+KEYWORDS_PATH = 'config/keywords.json'
+JARGON_PATH = 'config/jargon_map.json'
+CHUNK = 500
+
+
+def ingest(db: DBManager, analyzer: InquiryAnalyzer, emails, near_dup=None) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(emails), CHUNK):
+        db.insert_emails_bulk(analyze_rows(analyzer, emails[i:i + CHUNK], near_dup))
+    return time.perf_counter() - start
+
+
+def count_cards(db: DBManager, collapse: bool) -> int:
+    cards, cursor = 0, None
+    while True:
+        rows, cursor = db.list_emails('score', limit=1000, cursor=cursor, collapse_duplicates=collapse)
+        cards += len(rows)
+        if cursor is None:
+            return cards
+
+
+def run(n: int, blasts: int, copies: int, seed: int):
+    emails = add_blasts(generate_corpus(n, seed=seed), blasts, copies, seed=seed)
+    blast_of = {e['id']: e['blast'] for e in emails if 'blast' in e}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plain = DBManager(os.path.join(tmp, 'plain.db'))
+        analyzer = InquiryAnalyzer(keywords_path=KEYWORDS_PATH, jargon_path=JARGON_PATH, workers=1)
+        plain_seconds = ingest(plain, analyzer, emails)
+
+        db = DBManager(os.path.join(tmp, 'dedup.db'))
+        analyzer = InquiryAnalyzer(keywords_path=KEYWORDS_PATH, jargon_path=JARGON_PATH, workers=1)
+        near_dup = NearDuplicateIndex(db)
+        dedup_seconds = ingest(db, analyzer, emails, near_dup)
+
+        conn = db._get_conn()
+        clusters = dict(conn.execute('SELECT id, cluster_id FROM emails'))
+
+        # dup_count (트리거 유지) == 실제 묶음 크기
+        sizes = Counter(c for c in clusters.values() if c is not None)
+        stored_counts = dict(conn.execute('SELECT id, dup_count FROM emails WHERE cluster_id = id'))
+        assert all(stored_counts[c] == size for c, size in sizes.items()), 'dup_count mismatch'
+
+        # 재현율: 같은 blast 사본이 하나의 묶음에 모인 비율 (묶음별 최다 대표 기준)
+        by_blast = defaultdict(list)
+        for email_id, blast in blast_of.items():
+            by_blast[blast].append(clusters[email_id])
+        grouped = sum(Counter(c).most_common(1)[0][1] for c in by_blast.values())
+        # 서로 다른 인콰이어리 blast가 합쳐진 묶음 (스팸은 원본끼리 같은 템플릿이라 제외)
+        inquiry_blasts = {e['blast'] for e in emails if e.get('source_kind') == 'en_inquiry'}
+        members = defaultdict(set)
+        for email_id, blast in blast_of.items():
+            if blast in inquiry_blasts:
+                members[clusters[email_id]].add(blast)
+        mixed = sum(1 for m in members.values() if len(m) > 1)
+
+        print(f"emails={len(emails)}  (corpus {n} + {blasts} blasts x {copies} copies)")
+        print(f"{'mode':<10}{'ingest (s)':>12}{'analyzed':>10}{'cards':>8}")
+        print(f"{'plain':<10}{plain_seconds:>12.2f}{len(emails):>10}{count_cards(plain, False):>8}")
+        print(f"{'near-dup':<10}{dedup_seconds:>12.2f}{len(emails) - near_dup.stats['duplicates']:>10}"
+              f"{count_cards(db, True):>8}")
+        print(f"near-duplicates reused: {near_dup.stats['duplicates']}  "
+              f"blast recall: {grouped / len(blast_of):.1%}  merged inquiry blasts: {mixed}")
+        assert mixed == 0, 'distinct inquiry blasts merged'
+
+        check_cluster_status(db)
+        check_sender_verdict(db, analyzer, near_dup, emails)
+
+
+def check_cluster_status(db: DBManager):
+    """대표 메일만 처리(Gmail 읽음 동기화)되어도 묶음 전체가 같은 상태 → Active 사본이 목록에서 사라지지 않음"""
+    conn = db._get_conn()
+    canonical = conn.execute(
+        "SELECT id FROM emails WHERE cluster_id = id AND dup_count > 1 AND status = 'Active' AND is_spam = 0"
+    ).fetchone()[0]
+    copy = conn.execute('SELECT id FROM emails WHERE cluster_id = ? AND id != ?', (canonical, canonical)).fetchone()[0]
+    members = {r[0] for r in conn.execute('SELECT id FROM emails WHERE cluster_id = ?', (canonical,))}
+
+    def listed() -> set:
+        rows, _ = db.list_emails('score', limit=100000, status='Active', collapse_duplicates=True)
+        return {r['id'] for r in rows} & members
+
+    def statuses() -> set:
+        return {r[0] for r in conn.execute('SELECT status FROM emails WHERE cluster_id = ?', (canonical,))}
+
+    db.update_statuses({canonical: 'Archived'})
+    assert statuses() == {'Archived'} and not listed(), 'archiving the canonical left active copies hidden'
+    db.update_statuses({copy: 'Active'})
+    assert statuses() == {'Active'} and listed() == {canonical}, 'reactivated copy not listed'
+    print(f"cluster status: archive canonical / reactivate copy apply to all {len(members)} members: ok")
+
+
+def check_sender_verdict(db: DBManager, analyzer: InquiryAnalyzer, near_dup: NearDuplicateIndex, emails):
+    """의심 도메인에서 온 사본은 대표 메일 판정을 물려받지 않고 개별 판정"""
+    conn = db._get_conn()
+    canonical_ids = [r[0] for r in conn.execute(
+        'SELECT id FROM emails WHERE cluster_id = id AND dup_count > 1 AND is_spam = 0')]
+    by_id = {e['id']: e for e in emails}
+    copies = [{**by_id[i], 'id': f"{i}-xyz", 'sender_email': 'sales@promo-deals.xyz',
+               'body': by_id[i]['body'] + ' Click here and act now.'} for i in canonical_ids[:20]]
+    rows = analyze_rows(analyzer, copies, near_dup)
+    expected = [analyzer.calculate_score(e)['is_spam'] for e in copies]
+    assert [row['is_spam'] for row in rows] == expected, 'copy inherited the canonical spam verdict'
+    kept = sum(1 for row in rows if row['cluster_id'] is not None)
+    print(f"suspicious-domain copies: {sum(expected)}/{len(copies)} spam by own verdict "
+          f"({kept} still grouped): ok")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--n', type=int, default=10000)
+    parser.add_argument('--blasts', type=int, default=50)
+    parser.add_argument('--copies', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    run(args.n, args.blasts, args.copies, args.seed)
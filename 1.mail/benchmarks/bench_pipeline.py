@@ -0,0 +1,81 @@
+"""
+수집 → 분석 → 저장 벤치마크: 단계별 순차 실행 vs MailPipeline (단계 중첩)
+
+FakeGmailService의 HTTP 왕복 지연으로 수집 단계를 시뮬레이션하고
+전체 소요 시간, 첫 결과 저장까지의 시간, 단계별 처리량을 비교합니다.
+
+    python -m benchmarks.bench_pipeline --n 2000 --latency 0.05
+"""
+
+import os
+import time
+import tempfile
+import argparse
+
+from engine.analyzer import InquiryAnalyzer, shutdown_process_pools
+from engine.database import DBManager
+from engine.fake_gmail import FakeGmailService
+from engine.gmail_fetcher import GmailFetcher
+from engine.near_dup import NearDuplicateIndex
+from engine.pipeline import MailPipeline, analyze_rows
+
+KEYWORDS_PATH = 'config/keywords.json'
+JARGON_PATH = 'config/jargon_map.json'
+
+
+def snapshot(db: DBManager):
+    return {r['id']: (r['score'], r['intent_score'], r['is_spam'])
+            for r in db.get_all_emails(include_spam=True, limit=10 ** 9)}
+
+
+def run(n: int, latency: float, workers: int):
+    service = FakeGmailService.synthetic(n, latency=latency)
+    ids = GmailFetcher(service).list_message_ids('is:unread', n)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # 순차: 전체 수집 → 전체 분석 → 전체 저장
+        db = DBManager(os.path.join(tmp, 'serial.db'))
+        analyzer = InquiryAnalyzer(keywords_path=KEYWORDS_PATH, jargon_path=JARGON_PATH, workers=workers)
+        start = time.perf_counter()
+        emails = GmailFetcher(service).fetch_messages(ids)
+        fetched = time.perf_counter()
+        rows = analyze_rows(analyzer, emails, NearDuplicateIndex(db))
+        analyzed = time.perf_counter()
+        db.insert_emails_bulk(rows)
+        serial = time.perf_counter() - start
+        expected = snapshot(db)
+        print(f"n={n}  latency={latency}s/batch")
+        print(f"{'mode':<10}{'total (s)':>11}{'first lead (s)':>16}   stage msg/s (fetch / analyze / store)")
+        print(f"{'serial':<10}{serial:>11.2f}{serial:>16.2f}   "
+              f"{n / (fetched - start):.0f} / {n / (analyzed - fetched):.0f} / "
+              f"{n / (serial - (analyzed - start)):.0f}")
+
+        # 파이프라인: 단계 중첩 + bounded queue
+        db = DBManager(os.path.join(tmp, 'pipeline.db'))
+        analyzer = InquiryAnalyzer(keywords_path=KEYWORDS_PATH, jargon_path=JARGON_PATH, workers=workers)
+        # 평판 보정은 청크 저장 시점에 따라 달라지므로 순차 실행과 결과 비교를 위해 끔
+        pipeline = MailPipeline(GmailFetcher(service), analyzer, db, reputation=False)
+        first = None
+        start = time.perf_counter()
+        for event in pipeline.run(ids):
+            if first is None:
+                first = event.elapsed
+        total = time.perf_counter() - start
+
+        assert snapshot(db) == expected, 'pipeline result mismatch'
+        s = pipeline.stats
+        print(f"{'pipeline':<10}{total:>11.2f}{first:>16.2f}   "
+              f"{s['fetch'].rate:.0f} / {s['analyze'].rate:.0f} / {s['store'].rate:.0f}")
+        print(f"analyze batches: {s['analyze'].batches} (avg {n / s['analyze'].batches:.0f} msgs, "
+              f"fetch batch {GmailFetcher.BATCH_SIZE}, process pool from {analyzer.MIN_PARALLEL_BATCH})")
+
+    shutdown_process_pools()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--n', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+    run(args.n, args.latency, args.workers)
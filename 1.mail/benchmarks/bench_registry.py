@@ -0,0 +1,136 @@
+"""
+엔진 레지스트리 벤치마크: 재실행마다 엔진 생성(기존 main) vs registry 공유
+
+Streamlit 재실행(클릭)마다 main()이 하던 엔진 준비를 세션 여러 개(스레드)에서 반복하여
+재실행 1회당 준비 시간, 실행 중 늘어난 스레드 수 / 열린 파일 디스크립터 수(SQLite 연결)를 비교합니다.
+- 기존: DBManager(DDL) + InquiryAnalyzer(설정 로드 / 규칙 컴파일 / OpenAI 클라이언트 / ThreadPool) + ReplyGenerator
+- registry: get_db / get_analyzer / get_reply_generator
+각 재실행은 목록 조회와 비동기 분석 1건(calculate_score_async - 분석기 ThreadPool 사용)을 함께 실행합니다.
+마지막으로 설정 파일을 고쳤을 때만 분석기가 다시 컴파일되고 새 규칙이 점수에 반영되는지 검증합니다.
+
+    python -m benchmarks.bench_registry --sessions 8 --reruns 20
+"""
+
+import os
+import gc
+import json
+import time
+import shutil
+import asyncio
+import tempfile
+import argparse
+import threading
+
+from engine import registry
+from engine.analyzer import InquiryAnalyzer
+from engine.database import DBManager
+from engine.reply_generator import ReplyGenerator
+from benchmarks.corpus import generate_corpus
+
+KEYWORDS_PATH = 'config/keywords.json'
+JARGON_PATH = 'config/jargon_map.json'
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)] if ordered else 0.0
+
+
+def open_fds() -> int:
+    try:
+        return len(os.listdir('/proc/self/fd'))
+    except OSError:
+        return -1
+
+
+def legacy_engines(db_path, keywords_path, jargon_path):
+    db = DBManager(db_path)
+    analyzer = InquiryAnalyzer(openai_api_key='test', keywords_path=keywords_path, jargon_path=jargon_path,
+                               workers=1, cache=db)
+    reply_gen = ReplyGenerator(api_key='test', base_url='http://127.0.0.1:9/v1', cache=db)
+    return db, analyzer, reply_gen
+
+
+def registry_engines(db_path, keywords_path, jargon_path):
+    db = registry.get_db(db_path)
+    analyzer = registry.get_analyzer(keywords_path, jargon_path, workers=1, openai_api_key='test', cache=db)
+    reply_gen = registry.get_reply_generator(api_key='test', base_url='http://127.0.0.1:9/v1', cache=db)
+    return db, analyzer, reply_gen
+
+
+def simulate(build, db_path, keywords_path, jargon_path, sessions: int, reruns: int, email):
+    """세션별 스레드에서 재실행 반복 → (준비 시간 목록, 시작 대비 최대 스레드 / fd 증가 수)"""
+    setup, peak = [], {'threads': 0, 'fds': 0}
+    base_threads, base_fds = threading.active_count(), open_fds()
+    lock = threading.Lock()
+
+    def session():
+        for _ in range(reruns):
+            start = time.perf_counter()
+            db, analyzer, _ = build(db_path, keywords_path, jargon_path)
+            elapsed = time.perf_counter() - start
+            db.list_emails(limit=20)
+            asyncio.run(analyzer.calculate_score_async(email))
+            with lock:
+                setup.append(elapsed)
+                peak['threads'] = max(peak['threads'], threading.active_count() - base_threads)
+                peak['fds'] = max(peak['fds'], open_fds() - base_fds)
+
+    threads = [threading.Thread(target=session) for _ in range(sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return setup, peak
+
+
+def run(sessions: int, reruns: int):
+    email = generate_corpus(1, seed=3)[0]
+    with tempfile.TemporaryDirectory() as tmp:
+        keywords_path = shutil.copy(KEYWORDS_PATH, os.path.join(tmp, 'keywords.json'))
+        jargon_path = shutil.copy(JARGON_PATH, os.path.join(tmp, 'jargon_map.json'))
+        DBManager(os.path.join(tmp, 'seed.db')).insert_emails_bulk(generate_corpus(200, seed=1))
+
+        print(f"sessions={sessions}  reruns/session={reruns}")
+        print(f"{'mode':<10}{'setup p50 (ms)':>16}{'p95 (ms)':>10}{'+threads':>10}{'+fds':>8}")
+        results = {}
+        for name, build in (('legacy', legacy_engines), ('registry', registry_engines)):
+            gc.collect()            # 이전 단계에서 버려진 연결 / ThreadPool 정리 후 측정
+            time.sleep(0.2)
+            db_path = shutil.copy(os.path.join(tmp, 'seed.db'), os.path.join(tmp, f'{name}.db'))
+            setup, peak = simulate(build, db_path, keywords_path, jargon_path, sessions, reruns, email)
+            results[name] = percentile(setup, 0.5)
+            print(f"{name:<10}{percentile(setup, 0.5) * 1000:>16.2f}{percentile(setup, 0.95) * 1000:>10.2f}"
+                  f"{peak['threads']:>10}{peak['fds']:>8}")
+        print(f"setup: {results['legacy'] / max(results['registry'], 1e-9):.0f}x faster")
+
+        # 설정 파일 변경 시에만 재컴파일
+        db = registry.get_db(os.path.join(tmp, 'registry.db'))
+        first = registry.get_analyzer(keywords_path, jargon_path, workers=1, cache=db)
+        assert registry.get_analyzer(keywords_path, jargon_path, workers=1, cache=db) is first, 'recompiled without change'
+        probe = {'subject': 'Zebra widget', 'body': 'We need zebrawidget units for our line.'}
+        before = first.calculate_score(probe)['intent']
+        with open(keywords_path, encoding='utf-8') as f:
+            keywords = json.load(f)
+        keywords['buying_intent']['words']['zebrawidget'] = 40
+        with open(keywords_path, 'w', encoding='utf-8') as f:
+            json.dump(keywords, f, ensure_ascii=False)
+        reloaded = registry.get_analyzer(keywords_path, jargon_path, workers=1, cache=db)
+        after = reloaded.calculate_score(probe)['intent']
+        assert reloaded is not first and reloaded.rules_version != first.rules_version, 'config change not reloaded'
+        assert after > before, 'reloaded rules not applied (stale analysis cache?)'
+        assert registry.get_analyzer(keywords_path, jargon_path, workers=1, cache=db) is reloaded
+        # 이전 분석기를 아직 쥐고 있는 세션: 분석은 계속되지만 닫힌 ThreadPool을 다시 만들지 않음
+        asyncio.run(first.calculate_score_async(probe))
+        assert first._executor is None, 'closed analyzer restarted its thread pool'
+        print(f"hot reload: unchanged → same analyzer, keywords.json edited → rules "
+              f"{first.rules_version} → {reloaded.rules_version}, probe intent {before:.0f} → {after:.0f}: ok")
+        registry.clear()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=8)
+    parser.add_argument('--reruns', type=int, default=20)
+    args = parser.parse_args()
+    run(args.sessions, args.reruns)
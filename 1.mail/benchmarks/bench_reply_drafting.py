@@ -0,0 +1,88 @@
+"""
+답장 초안 일괄 생성 벤치마크: 순차 generate_reply vs generate_replies (동시 + 스트리밍)
+
+로컬 FakeOpenAIServer(OpenAI 호환)로 요청 지연을 시뮬레이션하고
+동시 요청 수 제한, 스트리밍 토큰 수신, 실패/타임아웃 시 템플릿 대체를 검증합니다.
+
+    python -m benchmarks.bench_reply_drafting --n 20 --latency 0.5 --concurrency 5 10
+"""
+
+import time
+import argparse
+
+from engine.fake_openai import FakeOpenAIServer
+from engine.reply_generator import ReplyGenerator
+
+
+def make_leads(n: int):
+    return [{
+        'id': f"lead{i:04d}",
+        'subject': f"Inquiry: LED Bulb quotation #{i}",
+        'sender': f"Buyer {i} <buyer{i}@trade.com>",
+        'body_text': 'Please send your best quotation with MOQ and lead time. Target price USD 1.20/pc.'
+    } for i in range(n)]
+
+
+def check_fallback(server: FakeOpenAIServer):
+    """실패(500) / 타임아웃 건은 템플릿으로 대체되고 나머지는 정상 생성"""
+    leads = make_leads(4)
+    leads[1]['body_text'] += ' ' + server.fail_marker
+    leads[2]['body_text'] += ' ' + server.hang_marker
+
+    generator = ReplyGenerator(api_key='test', base_url=server.base_url,
+                               request_timeout=1.0, max_retries=0)
+    start = time.perf_counter()
+    drafts = generator.generate_replies(leads)
+    elapsed = time.perf_counter() - start
+
+    assert [drafts[l['id']].fallback for l in leads] == [False, True, True, False], 'fallback mismatch'
+    assert elapsed < 1.0 + 0.5 + server.latency, f"timeout not enforced ({elapsed:.2f}s)"
+    print(f"fallback: failed/timed-out drafts replaced by template in {elapsed:.2f}s")
+
+
+def run(n: int, latency: float, token_delay: float, concurrency_levels):
+    leads = make_leads(n)
+
+    with FakeOpenAIServer(latency=latency, token_delay=token_delay) as server:
+        serial = ReplyGenerator(api_key='test', base_url=server.base_url, max_retries=0)
+        start = time.perf_counter()
+        expected = {l['id']: serial.generate_reply(l).body for l in leads}
+        base = time.perf_counter() - start
+
+        print(f"n={n}  latency={latency}s  token_delay={token_delay}s")
+        print(f"{'mode':<16}{'seconds':>10}{'first token':>13}{'speedup':>10}{'max in-flight':>15}")
+        print(f"{'serial':<16}{base:>10.2f}{'-':>13}{1.0:>9.1f}x{1:>15}")
+
+        for concurrency in concurrency_levels:
+            generator = ReplyGenerator(api_key='test', base_url=server.base_url,
+                                       max_concurrency=concurrency, max_retries=0)
+            server.max_in_flight = 0
+            streamed = {l['id']: [] for l in leads}
+            first_token = []
+
+            def on_token(email_id, token):
+                if not first_token:
+                    first_token.append(time.perf_counter())
+                streamed[email_id].append(token)
+
+            start = time.perf_counter()
+            drafts = generator.generate_replies(leads, on_token=on_token)
+            elapsed = time.perf_counter() - start
+
+            assert {k: d.body for k, d in drafts.items()} == expected, 'draft mismatch'
+            assert all(''.join(streamed[k]).strip() == v for k, v in expected.items()), 'stream mismatch'
+            assert server.max_in_flight <= concurrency, 'concurrency limit exceeded'
+            print(f"{f'concurrency={concurrency}':<16}{elapsed:>10.2f}{first_token[0] - start:>12.2f}s"
+                  f"{base / elapsed:>9.1f}x{server.max_in_flight:>15}")
+
+        check_fallback(server)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--n', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.5)
+    parser.add_argument('--token-delay', type=float, default=0.0)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[5, 10])
+    args = parser.parse_args()
+    run(args.n, args.latency, args.token_delay, args.concurrency)
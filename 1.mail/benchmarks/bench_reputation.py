@@ -0,0 +1,90 @@
+"""
+발신자 평판 벤치마크: 트리거 증분 집계 vs 동기화마다 GROUP BY 재계산
+
+합성 코퍼스를 청크 단위로 저장하면서 청크마다 평판을 조회하는 비용(PK 조회)과
+전체 테이블 GROUP BY 재계산 비용을 비교하고, 저장 / 재분석 / 삭제 후 증분 집계가
+전체 재계산 결과와 같은지 검증합니다.
+
+    python -m benchmarks.bench_reputation --n 10000
+"""
+
+import os
+import time
+import tempfile
+import argparse
+
+from engine.analyzer import InquiryAnalyzer
+from engine.database import DBManager
+from engine.pipeline import analyze_rows
+from benchmarks.corpus import generate_corpus
+
+KEYWORDS_PATH = 'config/keywords.json'
+JARGON_PATH = 'config/jargon_map.json'
+CHUNK = 500
+# 삭제 시 되돌리지 않는 컬럼 (max_score / last_seen) 제외 비교
+COMPARED = 'entity, messages, spam, scored, score_sum_x10'
+
+
+def snapshot(db: DBManager):
+    conn = db._get_conn()
+    return set(conn.execute(f'SELECT {COMPARED} FROM sender_reputation'))
+
+
+def group_by(db: DBManager):
+    """비교 대상: 평판 전체 재계산 (트리거 없이 동기화마다 실행하는 경우)"""
+    conn = db._get_conn()
+    conn.execute('SAVEPOINT regroup')
+    db._rebuild_reputation(conn.cursor())
+    conn.execute('ROLLBACK TO regroup')
+    conn.execute('RELEASE regroup')
+
+
+def run(n: int, seed: int):
+    emails = generate_corpus(n, seed=seed)
+    analyzer = InquiryAnalyzer(keywords_path=KEYWORDS_PATH, jargon_path=JARGON_PATH, workers=1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DBManager(os.path.join(tmp, 'reputation.db'))
+        lookup = regroup = 0.0
+        adjusted = 0
+        start = time.perf_counter()
+        for i in range(0, len(emails), CHUNK):
+            chunk = emails[i:i + CHUNK]
+            t = time.perf_counter()
+            db.get_sender_reputations([e['sender_email'] for e in chunk])
+            lookup += time.perf_counter() - t
+
+            t = time.perf_counter()
+            group_by(db)
+            regroup += time.perf_counter() - t
+
+            rows = analyze_rows(analyzer, chunk, reputation=db)
+            adjusted += sum(1 for r in rows if r['reputation_adj'])
+            db.insert_emails_bulk(rows)
+        total = time.perf_counter() - start - regroup
+        chunks = -(-len(emails) // CHUNK)
+
+        conn = db._get_conn()
+        entities = conn.execute('SELECT COUNT(*) FROM sender_reputation').fetchone()[0]
+        print(f"emails={n}  chunks={chunks}  reputation rows={entities}  adjusted={adjusted}")
+        print(f"ingest with reputation: {total:.2f}s")
+        print(f"{'per chunk':<22}{'ms':>10}")
+        print(f"{'lookup (PK)':<22}{lookup / chunks * 1000:>10.2f}")
+        print(f"{'GROUP BY recompute':<22}{regroup / chunks * 1000:>10.2f}")
+
+        # 재분석(점수 변경) + 삭제 후에도 증분 집계 == 전체 재계산
+        rescored = [{**e, 'score': 0, 'is_spam': True} for e in db.get_all_emails(limit=n // 10)]
+        db.insert_emails_bulk(rescored, replace=True)
+        db.delete_emails([e['id'] for e in emails[:n // 10]])
+        incremental = snapshot(db)
+        db.rebuild_reputation()
+        assert incremental == snapshot(db), 'incremental reputation mismatch'
+        print("incremental == recomputed after rescore + delete: ok")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--n', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    run(args.n, args.seed)
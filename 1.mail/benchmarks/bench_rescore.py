@@ -0,0 +1,193 @@
+"""
+규칙 변경 재채점 벤치마크: 영향받는 메일만 재채점 vs 전체 재채점
+
+합성 코퍼스를 저장한 DB에서 keywords.json / jargon_map.json을 한 가지씩 고친 뒤
+engine.rescore.run(영향 메일만)과 run(full=True)(전체)의 시간 / 재분석 건수를 비교하고,
+증분 재채점 결과가 같은 DB 사본의 전체 재채점 결과와 모든 메일에서 같은지 검증합니다.
+마지막으로 키워드 색인(email_keywords / email_terms)이 차지하는 DB 크기를 출력합니다.
+
+    python -m benchmarks.bench_rescore --n 20000
+    python -m benchmarks.bench_rescore --n 100000
+"""
+
+import os
+import json
+import time
+import shutil
+import logging
+import sqlite3
+import tempfile
+import argparse
+
+from engine import rescore
+from engine.analyzer import InquiryAnalyzer
+from engine.database import DBManager
+from engine.pipeline import analyze_rows
+from benchmarks.corpus import generate_corpus
+
+KEYWORDS_PATH = 'config/keywords.json'
+JARGON_PATH = 'config/jargon_map.json'
+CHUNK = 1000
+# 평판 보정(reputation_adj)은 재채점 시점의 평판 기준이라 재채점하지 않은 메일은 저장 당시 값 그대로 → 보정 전 점수 비교
+COMPARED = ('id, ROUND(score - reputation_adj, 1), intent_score, terms_score, keywords, reason, is_spam, '
+            'rules_version')
+
+
+def edit_reweight(keywords, jargon):
+    word = next(iter(keywords['buying_intent']['words']))
+    keywords['buying_intent']['words'][word] += 5
+    return f"reweight {word!r}"
+
+
+def edit_add(keywords, jargon):
+    keywords['trade_terms']['words']['sample order'] = 6
+    return "add 'sample order'"
+
+
+def edit_add_fragment(keywords, jargon):
+    keywords['buying_intent']['words']['quot'] = 4
+    return "add 'quot' (substring of words)"
+
+
+def edit_remove(keywords, jargon):
+    words = keywords['trade_terms']['words']
+    word = list(words)[-1]
+    words.pop(word)
+    return f"remove {word!r}"
+
+
+def edit_spam_reweight(keywords, jargon):
+    words = keywords['spam_keywords']['words']
+    word = list(words)[-1]
+    words[word] -= 50
+    return f"spam reweight {word!r}"
+
+
+def edit_bonus(keywords, jargon):
+    keywords['bonus']['has_attachment'] = keywords['bonus'].get('has_attachment', 0) + 5
+    return "bonus has_attachment"
+
+
+def edit_jargon(keywords, jargon):
+    word = next(iter(jargon['korean_jargon']))
+    jargon['korean_jargon'][word] = 'bulk order'
+    return f"jargon {word!r} → 'bulk order'"
+
+
+EDITS = (edit_reweight, edit_add, edit_add_fragment, edit_remove, edit_spam_reweight, edit_bonus, edit_jargon)
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def stored(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {row[0]: row for row in conn.execute(f'SELECT {COMPARED} FROM emails')}
+    finally:
+        conn.close()
+
+
+def copy(source, target):
+    """WAL에 남은 변경까지 포함한 DB 사본"""
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+def index_size(path):
+    """키워드 색인 테이블 크기 (dbstat 미지원 빌드는 None)"""
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute("SELECT name, SUM(pgsize) FROM dbstat "
+                            "WHERE name LIKE 'email_keywords%' OR name LIKE 'email_terms%' "
+                            "OR name = 'idx_email_keywords_email' GROUP BY name").fetchall()
+        return sum(size for _, size in rows)
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+
+
+def run(n: int):
+    emails = generate_corpus(n, seed=11)
+    with tempfile.TemporaryDirectory() as tmp:
+        keywords_path = shutil.copy(KEYWORDS_PATH, os.path.join(tmp, 'keywords.json'))
+        jargon_path = shutil.copy(JARGON_PATH, os.path.join(tmp, 'jargon_map.json'))
+        path = os.path.join(tmp, 'rescore.db')
+        db = DBManager(path)
+        analyzer = InquiryAnalyzer(keywords_path=keywords_path, jargon_path=jargon_path, workers=1, cache=db)
+        start = time.perf_counter()
+        for i in range(0, n, CHUNK):
+            db.insert_emails_bulk(analyze_rows(analyzer, emails[i:i + CHUNK], reputation=db))
+        print(f"emails={n}  ingest {time.perf_counter() - start:.1f}s  "
+              f"keyword index {(index_size(path) or 0) / 1e6:.1f} MB / db {os.path.getsize(path) / 1e6:.1f} MB")
+        print(f"{'edit':<36}{'affected':>10}{'changed':>9}{'incr (s)':>10}{'full (s)':>10}{'speedup':>9}")
+
+        for edit in EDITS:
+            keywords, jargon = load(keywords_path), load(jargon_path)
+            label = edit(keywords, jargon)
+            save(keywords_path, keywords)
+            save(jargon_path, jargon)
+            analyzer.close()
+            analyzer = InquiryAnalyzer(keywords_path=keywords_path, jargon_path=jargon_path, workers=1, cache=db)
+
+            # 기준: 같은 상태의 사본을 전체 재채점
+            reference_path = os.path.join(tmp, 'reference.db')
+            copy(path, reference_path)
+            reference = DBManager(reference_path)
+            full = rescore.run(reference, InquiryAnalyzer(keywords_path=keywords_path, jargon_path=jargon_path,
+                                                          workers=1, cache=reference), full=True)
+
+            incremental = rescore.run(db, analyzer)
+            versions = db.count_rules_versions()
+            assert list(versions) == [analyzer.rules_version], f'stale rules versions left: {versions}'
+            got, expected = stored(path), stored(reference_path)
+            mismatched = [i for i in expected if expected[i] != got[i]]
+            assert not mismatched, f'{label}: {len(mismatched)} emails differ from full rescore, e.g. {mismatched[:3]}'
+            print(f"{label:<36}{incremental['rescored']:>10}{incremental['changed']:>9}"
+                  f"{incremental['duration']:>10.2f}{full['duration']:>10.2f}"
+                  f"{full['duration'] / max(incremental['duration'], 1e-3):>8.1f}x")
+            os.remove(reference_path)
+        print("incremental rescore == full rescore for every edit: ok")
+        analyzer.close()
+
+        check_own_reputation(tmp, emails, keywords_path, jargon_path)
+
+
+def check_own_reputation(tmp: str, emails, keywords_path: str, jargon_path: str):
+    """같은 발신자 메일 2건을 차례로 저장 → 규칙 변경 없이 재채점해도 자기 자신이 평판에 들어가지 않음"""
+    db = DBManager(os.path.join(tmp, 'reputation.db'))
+    analyzer = InquiryAnalyzer(keywords_path=keywords_path, jargon_path=jargon_path, workers=1, cache=db)
+    source = max((e for e in emails if not analyzer.calculate_score(e)['is_spam']),
+                 key=lambda e: analyzer.calculate_score(e)['total'])
+    for i in range(2):
+        copy = {**source, 'id': f'own{i}', 'sender_email': 'buyer@repeat-client.com'}
+        db.insert_emails_bulk(analyze_rows(analyzer, [copy], reputation=db))
+    conn = db._get_conn()
+    before = [tuple(r) for r in conn.execute('SELECT id, score, reputation_adj FROM emails ORDER BY id')]
+    stats = rescore.rescore_emails(db, analyzer, ['own0', 'own1'])
+    after = [tuple(r) for r in conn.execute('SELECT id, score, reputation_adj FROM emails ORDER BY id')]
+    assert after == before, f'rescore changed reputation: {before} → {after}'
+    assert stats['changed'] == 0, stats
+    print(f"rescore without rule change (2 mails, same sender, score {before[0][1]}): "
+          f"reputation unchanged: ok")
+    analyzer.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--n', type=int, default=20000)
+    args = parser.parse_args()
+    run(args.n)
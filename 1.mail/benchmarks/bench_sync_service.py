@@ -0,0 +1,211 @@
+"""
+동기화 서비스 벤치마크: 서비스 프로세스 여러 개 + 읽기 전용 화면 동시 실행
+
+FakeGmailService에 메일이 계속 도착하는 동안 SyncService 여러 개(스레드, 각자 DB 연결)를 상주시키고
+읽기 전용 화면 조회(목록 / 통계 / 동기화 상태)를 반복하여
+- 메시지별 수집(messages.get) 횟수가 1회인지 (lease로 중복 수집 없음)
+- 동기화 실행 횟수가 주기 / 요청 수에 맞는지
+- 동기화 중 화면 조회 지연 (읽기 전용 연결은 쓰기와 서로 막지 않음)
+을 확인합니다. 마지막으로 lease를 가진 서비스가 멈췄을 때 만료 후 다른 서비스가 이어받는지,
+서비스 heartbeat 만료 시간보다 긴 동기화 중에도 화면에 서비스가 실행 중으로 보이는지,
+historyId 만료로 전체 재동기화해도 처리 상태 / 답장·보관 시각이 유지되는지 검증합니다.
+
+    python -m benchmarks.bench_sync_service --services 3 --duration 6
+"""
+
+import os
+import time
+import tempfile
+import argparse
+import threading
+from collections import Counter
+from datetime import datetime
+
+from engine.analyzer import InquiryAnalyzer
+from engine.database import DBManager
+from engine.fake_gmail import FakeGmailService
+from engine import sync_service
+from engine.sync_service import SyncService, LEASE_NAME, HEARTBEAT_KEY, MODE_COUNT, read_sync_state, request_sync
+from benchmarks.corpus import generate_corpus
+
+KEYWORDS_PATH = 'config/keywords.json'
+JARGON_PATH = 'config/jargon_map.json'
+
+
+class CountingGmail(FakeGmailService):
+    """messages.get 호출을 메시지별로 집계"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.gets = Counter()
+        self._lock = threading.Lock()
+
+    def _get(self, msg_id):
+        with self._lock:
+            self.gets[msg_id] += 1
+        return super()._get(msg_id)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)] if ordered else 0.0
+
+
+def run(services: int, duration: float, initial: int, arrivals: int, interval: float, latency: float):
+    corpus = generate_corpus(initial + arrivals, seed=7)
+    for e in corpus:
+        e.pop('timestamp_ms')      # 도착 순서대로 internalDate 부여
+    gmail = CountingGmail(corpus[:initial], latency=latency)
+    analyzer = InquiryAnalyzer(keywords_path=KEYWORDS_PATH, jargon_path=JARGON_PATH, workers=1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'sync.db')
+        store = DBManager(path)
+        viewer = DBManager(path, read_only=True)
+        stop = threading.Event()
+        runs = Counter()
+
+        def serve(i):
+            service = SyncService(DBManager(path), analyzer, lambda: gmail, limit=initial + arrivals,
+                                  interval=interval, lease_ttl=5.0, owner=f"service-{i}")
+            original = service.run_once
+
+            def counted(request=None):
+                status = original(request)
+                if status is not None:
+                    runs[service.owner] += 1
+                return status
+            service.run_once = counted
+            service.run_forever(poll=0.05, stop=stop)
+
+        threads = [threading.Thread(target=serve, args=(i,), daemon=True) for i in range(services)]
+        for t in threads:
+            t.start()
+
+        # 메일 도착 + 화면 조회 + 중간에 여러 사용자의 동기화 요청
+        latencies, requests = [], 0
+        pending = corpus[initial:]
+        start = time.perf_counter()
+        next_arrival = start
+        while time.perf_counter() - start < duration:
+            now = time.perf_counter()
+            if pending and now >= next_arrival:
+                gmail.add_email(pending.pop(0))
+                next_arrival = now + duration / max(arrivals, 1) * 0.8
+            if int((now - start) / (duration / 3)) > requests and requests < 2:
+                for _ in range(services):       # 사용자 여러 명이 동시에 요청 버튼
+                    request_sync(store)
+                requests += 1
+            t = time.perf_counter()
+            viewer.list_emails(limit=20)
+            viewer.get_statistics()
+            read_sync_state(viewer)
+            latencies.append(time.perf_counter() - t)
+            time.sleep(0.01)
+
+        # 남은 도착분까지 반영 후 종료
+        for email in pending:
+            gmail.add_email(email)
+        request_sync(store)
+        deadline = time.perf_counter() + 10
+        while read_sync_state(viewer)['pending'] or read_sync_state(viewer)['running']:
+            if time.perf_counter() > deadline:
+                break
+            time.sleep(0.05)
+        stop.set()
+        for t in threads:
+            t.join(timeout=10)
+
+        stored = viewer.get_email_ids([e['id'] for e in corpus])
+        duplicated = sum(1 for c in gmail.gets.values() if c > 1)
+        print(f"services={services}  duration={duration}s  mails={initial}+{arrivals}  interval={interval}s")
+        print(f"sync runs: {sum(runs.values())} ({dict(runs)})  user requests: {requests + 1} x {services}")
+        print(f"messages fetched: {sum(gmail.gets.values())}  stored: {len(stored)}  fetched more than once: {duplicated}")
+        print(f"viewer query (list + stats + sync state): p50 {percentile(latencies, 0.5) * 1000:.2f} ms  "
+              f"p95 {percentile(latencies, 0.95) * 1000:.2f} ms  max {max(latencies) * 1000:.2f} ms")
+        assert duplicated == 0, 'same message fetched by more than one sync'
+        assert len(stored) == initial + arrivals, 'not all arrivals were synced'
+
+        # lease 만료 후 이어받기: service-a가 lease를 잡은 채 멈춤 → ttl 전에는 service-b 대기, 후에는 실행
+        a = SyncService(DBManager(path), analyzer, lambda: gmail, interval=0, lease_ttl=0.5, owner='service-a')
+        b = SyncService(DBManager(path), analyzer, lambda: gmail, interval=0, lease_ttl=0.5, owner='service-b')
+        assert store.acquire_lease(LEASE_NAME, a.owner, a.lease_ttl)
+        assert b.run_once() is None, 'lease held by a stalled service was ignored'
+        time.sleep(0.6)
+        assert b.run_once() is not None, 'expired lease was not taken over'
+        print("stalled lease: blocked until expiry, then taken over: ok")
+
+        check_long_sync(tmp, analyzer, corpus)
+        check_expired_history(tmp, analyzer, corpus[:initial], corpus[initial])
+
+
+def check_long_sync(tmp: str, analyzer: InquiryAnalyzer, corpus, stale_after: float = 2.5):
+    """heartbeat 만료 시간보다 긴 동기화 중에도 화면의 service_alive 유지 (run_forever처럼 시작 전 1회 기록)"""
+    path = os.path.join(tmp, 'long.db')
+    gmail = FakeGmailService(corpus, latency=0.25)
+    service = SyncService(DBManager(path), analyzer, lambda: gmail, limit=len(corpus), interval=0)
+    viewer = DBManager(path, read_only=True)
+    default, sync_service.SERVICE_STALE_AFTER = sync_service.SERVICE_STALE_AFTER, stale_after
+    try:
+        service.db.set_sync_state(HEARTBEAT_KEY, datetime.now().isoformat())
+        worker = threading.Thread(target=service.run_once, args=({'mode': MODE_COUNT},))
+        start = time.perf_counter()
+        worker.start()
+        samples = []
+        while worker.is_alive():
+            samples.append(read_sync_state(viewer)['service_alive'])
+            time.sleep(0.05)
+        worker.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        sync_service.SERVICE_STALE_AFTER = default
+    assert elapsed > 2 * stale_after, f'sync too short to check ({elapsed:.1f}s)'
+    assert all(samples), f'service shown as stopped during a sync ({samples.count(False)}/{len(samples)} samples)'
+    print(f"long sync ({elapsed:.1f}s, heartbeat stale after {stale_after}s): service shown alive throughout: ok")
+
+
+def check_expired_history(tmp: str, analyzer: InquiryAnalyzer, corpus, arrival):
+    """historyId 만료 → 전체 재동기화: 저장된 메일은 다시 수집하지 않고 처리 상태 / 답장·보관 시각 유지"""
+    path = os.path.join(tmp, 'expired.db')
+    gmail = CountingGmail(corpus)
+    service = SyncService(DBManager(path), analyzer, lambda: gmail, limit=len(corpus) + 10, interval=0)
+    store = service.db
+    assert service.run_once({'mode': MODE_COUNT})['mode'] == 'full'
+
+    # 묶음이 자기 자신뿐인 메일로 확인 (update_statuses는 묶음 전체에 적용)
+    singles = [row[0] for row in store._get_conn().execute(
+        "SELECT id FROM emails GROUP BY COALESCE(cluster_id, id) HAVING COUNT(*) = 1 ORDER BY id LIMIT 3")]
+    replied, handled, read_elsewhere = singles
+    store.mark_replied(replied)
+    store.update_cluster_status(handled, 'Archived')
+    gmail.users().messages().modify(userId='me', id=read_elsewhere, body={'removeLabelIds': ['UNREAD']}).execute()
+    before = {row[0]: tuple(row[1:]) for row in store._get_conn().execute(
+        'SELECT id, status, replied_at, archived_at, created_at FROM emails')}
+
+    gmail.expire_history()
+    new_id = gmail.add_email(dict(arrival))
+    gmail.gets.clear()
+    result = service.run_once({'mode': MODE_COUNT})
+    after = {row[0]: tuple(row[1:]) for row in store._get_conn().execute(
+        'SELECT id, status, replied_at, archived_at, created_at FROM emails')}
+
+    assert result['mode'] == 'full' and result['added'] == 1, result
+    assert dict(gmail.gets) == {new_id: 1}, f'stored mail fetched again: {sum(gmail.gets.values())} gets'
+    assert after[read_elsewhere][0] == 'Archived' and result['archived'] == 1, 'mail read in Gmail still Active'
+    kept = [i for i in before if i != read_elsewhere and after.get(i) != before[i]]
+    assert not kept, f'{len(kept)} stored mails changed by the full resync (e.g. {kept[0]}: {before[kept[0]]} -> {after.get(kept[0])})'
+    assert before[replied][1] and before[handled][2], 'replied_at / archived_at not recorded'
+    print(f"expired history: full resync kept {len(before)} stored mails (status, replied/archived time), "
+          f"fetched 1 new, archived 1 read elsewhere: ok")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--services', type=int, default=3)
+    parser.add_argument('--duration', type=float, default=6.0)
+    parser.add_argument('--initial', type=int, default=1000)
+    parser.add_argument('--arrivals', type=int, default=200)
+    parser.add_argument('--interval', type=float, default=1.0, help='정기 동기화 간격(초)')
+    parser.add_argument('--latency', type=float, default=0.01, help='Gmail HTTP 왕복 지연(초)')
+    args = parser.parse_args()
+    run(args.services, args.duration, args.initial, args.arrivals, args.interval, args.latency)
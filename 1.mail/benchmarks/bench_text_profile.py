@@ -0,0 +1,150 @@
+"""
+문자 구성 분석 벤치마크: 기존 소비자별 정규식 vs 단일 패스 TextProfile
+
+합성 코퍼스(영어 / 한국어 / 기타 언어 / Gibberish 포함)에 대해 언어 감지(분석기 / 답장 생성기)와
+Gibberish 탐지 결과가 기존 구현과 같은지 검증하고, 메일 1건당 전체 텍스트 정규식 스캔 횟수와 처리 시간을 비교합니다.
+
+    python -m benchmarks.bench_text_profile --n 10000
+"""
+
+import re
+import time
+import argparse
+from typing import List, Tuple
+
+from engine.analyzer import InquiryAnalyzer, GibberishDetector
+from engine.reply_generator import ReplyGenerator
+from engine.text_profile import profile_text
+from benchmarks.corpus import generate_corpus
+
+KEYWORDS_PATH = 'config/keywords.json'
+JARGON_PATH = 'config/jargon_map.json'
+
+# 메일 1건당 전체 텍스트 정규식 스캔 (Gibberish의 키보드 패턴 / 반복 문자 검사는 양쪽 공통이라 제외)
+LEGACY_SCANS = {'analyzer.detect_language': 3, 'GibberishDetector.detect': 4, 'ReplyGenerator.detect_language': 1}
+
+
+def profile_scans(text: str) -> int:
+    """profile_text의 정규식 스캔 수 (ASCII: 영단어 + 기호 2회, 그 외: 구간 정규식 1회)"""
+    return 2 if text.strip().isascii() else 1
+
+
+def legacy_detect_language(text: str) -> str:
+    """기존 InquiryAnalyzer.detect_language 구현 (비교 기준)"""
+    if not text:
+        return 'EN'
+    korean_chars = len(re.findall(r'[\uac00-\ud7a3ㄱ-ㅎㅏ-ㅣ]', text))
+    total = len(text.replace(' ', ''))
+    if total == 0:
+        return 'EN'
+    chinese_chars = len(re.findall(r'[\u4e00-\u9fff]', text))
+    japanese_chars = len(re.findall(r'[\u3040-\u30ff]', text))
+    if korean_chars / total > 0.1:
+        return 'KO'
+    elif chinese_chars / total > 0.1:
+        return 'OTHER'
+    elif japanese_chars / total > 0.05:
+        return 'OTHER'
+    return 'EN'
+
+
+def legacy_reply_language(text: str) -> str:
+    """기존 ReplyGenerator.detect_language 구현 (비교 기준)"""
+    if not text:
+        return 'EN'
+    korean_chars = len(re.findall(r'[\uac00-\ud7a3]', text))
+    total = len(text.replace(' ', ''))
+    if total == 0:
+        return 'EN'
+    return 'KO' if korean_chars / total > 0.1 else 'EN'
+
+
+def legacy_gibberish(text: str) -> Tuple[int, List[str], bool]:
+    """기존 GibberishDetector.detect 구현 (비교 기준)"""
+    if not text or len(text.strip()) < 5:
+        return 100, ['empty_content'], True
+    text = text.strip()
+    reasons, score = [], 0
+    korean_syllables = len(re.findall(r'[\uac00-\ud7a3]', text))
+    if korean_syllables / max(len(text.replace(' ', '')), 1) >= 0.3:
+        return 0, [], False
+    jamo_pattern = re.findall(r'[ㄱ-ㅎㅏ-ㅣ]{3,}', text)
+    if jamo_pattern:
+        score += min(30, len(jamo_pattern) * 10)
+        reasons.append('consecutive_jamo')
+    text_lower = text.lower()
+    for pattern in GibberishDetector.KEYBOARD_PATTERNS:
+        if pattern in text_lower:
+            score += 15
+            reasons.append('keyboard_pattern')
+            break
+    if re.search(r'(.)\1{4,}', text):
+        score += 15
+        reasons.append('repeated_chars')
+    if len(re.findall(r'[^\w\s\uac00-\ud7a3]', text)) / max(len(text), 1) > 0.3:
+        score += 15
+        reasons.append('excessive_special_chars')
+    english_words = re.findall(r'[a-zA-Z]{3,}', text)
+    common_words = {'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all',
+                    'can', 'had', 'her', 'was', 'one', 'our', 'out', 'has',
+                    'dear', 'please', 'thank', 'regards', 'order', 'price',
+                    'shipment', 'delivery', 'payment', 'product', 'inquiry'}
+    if english_words:
+        matched = sum(1 for w in english_words if w.lower() in common_words)
+        if matched / len(english_words) < 0.1 and len(english_words) > 5:
+            score += 20
+            reasons.append('no_meaningful_words')
+    return score, reasons, score >= GibberishDetector.SPAM_THRESHOLD
+
+
+def run(n: int, seed: int, repeat: int):
+    emails = generate_corpus(n, seed=seed)
+    texts = [f"{e['subject']}\n{e['body']}" for e in emails]
+    analyzer = InquiryAnalyzer(keywords_path=KEYWORDS_PATH, jargon_path=JARGON_PATH, workers=1)
+    gibberish = GibberishDetector()
+    reply_gen = ReplyGenerator(api_key=None)
+
+    def legacy():
+        for text in texts:
+            legacy_detect_language(text)
+            legacy_gibberish(text)
+            legacy_reply_language(text)
+
+    def profiled():
+        profile_text.cache_clear()          # 메일마다 1회 계산 + 나머지 소비자는 캐시 적중
+        for text in texts:
+            analyzer.detect_language(text)
+            gibberish.detect(text)
+            reply_gen.detect_language(text)
+
+    mismatches = sum(
+        (legacy_detect_language(t), legacy_gibberish(t), legacy_reply_language(t))
+        != (analyzer.detect_language(t), gibberish.detect(t), reply_gen.detect_language(t))
+        for t in texts
+    )
+
+    timings = {}
+    for name, func in (('legacy', legacy), ('profile', profiled)):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best / len(texts) * 1e6
+
+    print(f"emails={n}  mismatches={mismatches}")
+    print(f"{'mode':<10}{'regex scans/email':>19}{'µs/email':>11}")
+    print(f"{'legacy':<10}{sum(LEGACY_SCANS.values()):>19.2f}{timings['legacy']:>11.1f}")
+    scans = sum(map(profile_scans, texts)) / len(texts)
+    print(f"{'profile':<10}{scans:>19.2f}{timings['profile']:>11.1f}")
+    print(f"speedup: {timings['legacy'] / timings['profile']:.2f}x")
+    assert mismatches == 0, 'profile-based detection differs from legacy implementation'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--n', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.n, args.seed, args.repeat)
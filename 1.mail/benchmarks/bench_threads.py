@@ -0,0 +1,144 @@
+"""
+대화(스레드) 색인 벤치마크: email_threads 집계 / (thread_id, 날짜) 인덱스 vs emails GROUP BY 스캔
+
+합성 코퍼스를 저장하면서 스레드 집계 트리거가 저장 시간에 더하는 비용을 측정하고,
+대화별 목록 첫 페이지 / 대화 펼치기를 emails를 매번 GROUP BY 하는 방식과 비교합니다.
+검증:
+- Gmail threadId 없이 Message-ID / In-Reply-To / References 헤더만으로(FakeGmail → parse_message,
+  답장이 부모보다 먼저 오는 역순 저장) 묶은 대화가 threadId로 묶은 대화와 같은지
+- 처리 완료 / 삭제 / 재채점 후에도 email_threads가 처음부터 다시 집계한 결과와 같은지
+
+    python -m benchmarks.bench_threads --n 20000
+    python -m benchmarks.bench_threads --n 100000
+"""
+
+import os
+import time
+import random
+import tempfile
+import argparse
+
+from engine.analyzer import InquiryAnalyzer
+from engine.database import DBManager
+from engine.fake_gmail import FakeGmailService
+from engine.gmail_fetcher import parse_message
+from engine.pipeline import analyze_rows
+from benchmarks.corpus import generate_corpus
+
+KEYWORDS_PATH = 'config/keywords.json'
+JARGON_PATH = 'config/jargon_map.json'
+CHUNK = 1000
+REPEAT = 5
+HEADER_KEYS = ('message_id', 'in_reply_to', 'references', 'is_reply')
+THREAD_TRIGGERS = ('trg_threads_insert', 'trg_threads_delete', 'trg_threads_update', 'trg_threads_move')
+
+# 비교 대상: 색인 없이 emails를 스레드별로 집계 (인덱스 사용 금지 +thread_id)
+SCAN_PAGE = '''
+    SELECT thread_id, COUNT(*) AS message_count, MAX(score) AS score, MAX(intent_score) AS intent_score
+    FROM emails WHERE is_spam = 0
+    GROUP BY +thread_id HAVING SUM(status = 'Active') > 0
+    ORDER BY score DESC, thread_id DESC LIMIT 30
+'''
+SCAN_THREAD = 'SELECT id FROM emails WHERE +thread_id = ? AND is_spam = 0 ORDER BY full_date, mail_date, id'
+# 정답: 처음부터 다시 집계
+EXPECTED = '''
+    SELECT thread_id, COUNT(*), SUM(status = 'Active'), MAX(score), MAX(intent_score), ROUND(AVG(intent_score), 6),
+           MIN(full_date), MAX(full_date)
+    FROM emails WHERE is_spam = 0 GROUP BY thread_id ORDER BY thread_id
+'''
+INDEXED = '''
+    SELECT thread_id, message_count, active_count, score, intent_score, ROUND(avg_intent, 6), first_date, last_date
+    FROM email_threads ORDER BY thread_id
+'''
+
+
+def timed(func):
+    best, result = float('inf'), None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def ingest(db: DBManager, rows) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(rows), CHUNK):
+        db.insert_emails_bulk(rows[i:i + CHUNK])
+    return time.perf_counter() - start
+
+
+def groups(db: DBManager):
+    members = {}
+    for email_id, thread_id in db._get_conn().execute('SELECT id, thread_id FROM emails'):
+        members.setdefault(thread_id, []).append(email_id)
+    return sorted(sorted(m) for m in members.values())
+
+
+def consistent(db: DBManager) -> bool:
+    conn = db._get_conn()
+    return [tuple(r) for r in conn.execute(EXPECTED)] == [tuple(r) for r in conn.execute(INDEXED)]
+
+
+def run(n: int):
+    emails = generate_corpus(n, seed=21)
+    analyzer = InquiryAnalyzer(keywords_path=KEYWORDS_PATH, jargon_path=JARGON_PATH, workers=1)
+    rows = []
+    for i in range(0, n, CHUNK):
+        rows.extend(analyze_rows(analyzer, emails[i:i + CHUNK]))
+
+    # 헤더만 있는 메일: FakeGmail 메시지 리소스 → parse_message (threadId 제거, 역순)
+    service = FakeGmailService(emails)
+    parsed = {row['id']: parse_message(service._messages[row['id']]) for row in rows}
+    header_rows = [{**row, **{k: parsed[row['id']][k] for k in HEADER_KEYS}, 'thread_id': None} for row in rows[::-1]]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DBManager(os.path.join(tmp, 'threads.db'))
+        plain = DBManager(os.path.join(tmp, 'plain.db'))
+        for trigger in THREAD_TRIGGERS:
+            plain._get_conn().execute(f'DROP TRIGGER {trigger}')
+        plain_seconds = ingest(plain, rows)
+        thread_seconds = ingest(db, rows)
+        headers = DBManager(os.path.join(tmp, 'headers.db'))
+        ingest(headers, header_rows)
+
+        conn = db._get_conn()
+        threads = conn.execute('SELECT COUNT(*), MAX(message_count) FROM email_threads').fetchone()
+        print(f"emails={n}  threads={threads[0]} (largest {threads[1]} messages)  "
+              f"ingest {plain_seconds:.1f}s → {thread_seconds:.1f}s with thread triggers")
+
+        assert groups(headers) == groups(db), 'header-only threading differs from Gmail threadId'
+        print("headers only (Message-ID / In-Reply-To / References, reversed order) == threadId: ok")
+
+        scan_page, expected_page = timed(lambda: conn.execute(SCAN_PAGE).fetchall())
+        index_page, (page, _) = timed(lambda: db.list_threads(limit=30))
+        assert [t['thread_id'] for t in page] == [r['thread_id'] for r in expected_page], 'thread ranking differs'
+        largest = page[0]['thread_id'] if page[0]['message_count'] > 1 else conn.execute(
+            'SELECT thread_id FROM email_threads ORDER BY message_count DESC LIMIT 1').fetchone()[0]
+        scan_thread, expected_ids = timed(lambda: conn.execute(SCAN_THREAD, (largest,)).fetchall())
+        index_thread, messages = timed(lambda: db.get_thread_messages(largest))
+        assert [m['id'] for m in messages] == [r['id'] for r in expected_ids], 'thread messages differ'
+
+        print(f"{'query':<30}{'scan (ms)':>12}{'index (ms)':>12}{'speedup':>10}")
+        for label, scan, index in (('ranked threads, first page', scan_page, index_page),
+                                   (f'open thread ({len(messages)} messages)', scan_thread, index_thread)):
+            print(f"{label:<30}{scan * 1000:>12.2f}{index * 1000:>12.3f}{scan / max(index, 1e-9):>9.0f}x")
+
+        # 처리 / 삭제 / 재채점 후 증분 갱신 검증
+        rng = random.Random(3)
+        ids = [row['id'] for row in rows]
+        db.update_statuses({i: 'Archived' for i in rng.sample(ids, n // 5)})
+        db.delete_emails(rng.sample(ids, n // 50))
+        conn.executemany('UPDATE emails SET score = ?, intent_score = ? WHERE id = ?',
+                         [(rng.uniform(0, 100), rng.uniform(0, 100), i) for i in rng.sample(ids, n // 20)])
+        conn.commit()
+        assert consistent(db), 'email_threads drifted from emails'
+        print("archive / delete / rescore → email_threads == full regroup: ok")
+    analyzer.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--n', type=int, default=20000)
+    args = parser.parse_args()
+    run(args.n)
@@ -0,0 +1,317 @@
+"""
+합성 인콰이어리 코퍼스 생성기
+
+영어 / 한국어(무역 은어 포함) 인콰이어리, 회신 스레드, 스팸, 뉴스레터,
+Gibberish, 기타 언어 메일을 지정 비율로 섞어 N건 생성합니다.
+GmailFetcher.parse_message 결과와 같은 키를 가지므로 분석기 / DB / FakeGmailService에 바로 넣을 수 있습니다.
+
+    from benchmarks.corpus import generate_corpus
+    emails = generate_corpus(10000, seed=42)
+
+    python -m benchmarks.corpus --n 1000 --output corpus.jsonl
+"""
+
+import re
+import json
+import random
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+KST = timezone(timedelta(hours=9))
+
+# 메일 유형별 기본 비율
+DEFAULT_MIX = {
+    'en_inquiry': 0.34,
+    'ko_inquiry': 0.22,
+    'reply': 0.14,
+    'spam': 0.10,
+    'newsletter': 0.07,
+    'gibberish': 0.06,
+    'vague': 0.04,
+    'other_language': 0.03,
+}
+
+PRODUCTS = ['LED bulbs', 'solar panels', 'PCB assemblies', 'stainless steel valves', 'lithium batteries',
+            'cotton T-shirts', 'ceramic tiles', 'hydraulic pumps', 'USB-C cables', 'injection molds']
+KO_PRODUCTS = ['LED 전구', '태양광 패널', 'PCB 어셈블리', '스테인리스 밸브', '리튬 배터리',
+               '면 티셔츠', '세라믹 타일', '유압 펌프', 'USB-C 케이블', '사출 금형']
+PORTS = ['Shenzhen', 'Busan', 'Hamburg', 'Rotterdam', 'Los Angeles', 'Ho Chi Minh', 'Jebel Ali']
+INCOTERMS = ['FOB', 'CIF', 'CFR', 'DDP', 'DAP', 'EXW']
+PAYMENTS = ['T/T 30% advance, 70% before shipment', 'L/C at sight', 'Net 30', 'Net 60',
+            'letter of credit', 'telegraphic transfer']
+FIRST_NAMES = ['John', 'Maria', 'Ahmed', 'Wei', 'Olga', 'Carlos', 'Priya', 'Kenji', 'Fatima', 'Lucas']
+LAST_NAMES = ['Smith', 'Garcia', 'Hassan', 'Chen', 'Ivanova', 'Silva', 'Patel', 'Tanaka', 'Ali', 'Muller']
+KO_NAMES = ['김철수', '이영희', '박민수', '정수진', '최동훈', '한지민']
+TITLES = ['Purchasing Manager', 'Procurement Director', 'CEO', 'Sourcing Specialist', 'Buyer']
+DOMAINS = ['globaltrading.com', 'euroimport.de', 'gulfsupply.ae', 'asiasource.co.kr', 'usdistrib.com',
+           'latamcomercial.com.br', 'nordicparts.se', 'indiamart-buyer.in']
+SPAM_DOMAINS = ['promo-deals.xyz', 'winner-notice.tk', 'free-gift.ml', 'bestprice.buzz', 'mailer.ga']
+
+EN_OPENERS = ['Dear Sir/Madam,', 'Hello,', 'Dear Sales Team,', 'Hi there,', 'Good day,']
+EN_INTENT = ['We are ready to place order', 'This is an urgent requirement', 'Please quote your best price ASAP',
+             'We plan a trial order followed by bulk order', 'Our target price is USD {price}/pc',
+             'We need the proforma invoice by {date}', 'Our budget for this project is USD {budget}',
+             'Please confirm the lead time and delivery date', 'We are a distributor with a retail network']
+EN_CLARITY = ['Model No: {model}', 'Part number {model}, see attached drawing', 'Specification: {spec}',
+              'Material grade SUS304, tolerance +/-0.05mm', 'OEM packaging with custom logo',
+              'Please refer to the attached data sheet', 'HS code 8539.52']
+EN_TERMS = ['Price term: {incoterm} {port}', 'Payment terms: {payment}', 'MOQ and quotation please',
+            'Certificate of Origin and MSDS required', 'Port of discharge: {port}', '1x40ft FCL per month',
+            'Inspection by SGS before shipment']
+EN_FILLER = ['We found your company on Alibaba.', 'Our company has been importing for 15 years.',
+             'Looking forward to your prompt reply.', 'Kindly send your catalog as well.',
+             'We have been sourcing this item from other suppliers.']
+
+KO_INTENT = ['{product} 발주 예정입니다.', '단가 네고 가능 여부 알려주세요.', '급하게 필요합니다, 납기 확인 부탁드립니다.',
+             '샘플 테스트 후 오더 진행하려고 합니다.', '바이어 측 요청으로 견적 요청드립니다.', '리드타임 확인 부탁드립니다.']
+KO_TERMS = ['인코텀즈는 {incoterm} {port} 기준입니다.', '결제는 티티 선금 30% 조건입니다.', '엘씨 오픈 예정입니다.',
+            '원산지증명서와 패킹리스트 필요합니다.', '포워더는 저희 쪽에서 지정합니다.', '컨테이너 1대 분량 수량입니다.',
+            '통관 서류 준비 부탁드립니다.']
+KO_OPENERS = ['안녕하세요,', '안녕하십니까,', '담당자님 안녕하세요,']
+KO_CLOSERS = ['감사합니다.', '회신 부탁드립니다.', '좋은 하루 되세요.']
+
+SPAM_LINES = ['Congratulations! You have won a $1,000 gift card.', 'Click here to claim your prize now!',
+              'Act now - limited time special offer.', '100% FREE shipping on all orders!!!',
+              'You are our lucky winner of the lottery.', 'Nigerian prince needs your help to transfer funds.',
+              'Claim your reward before it expires.']
+NEWSLETTER_LINES = ['Our monthly newsletter is here.', 'New marketing promotion for Q3.',
+                    'Special discount for subscribers.', 'Click here to unsubscribe from this list.',
+                    'Read our latest industry insights on the blog.']
+OTHER_LANGUAGE = [
+    ('询价 - LED灯泡', '您好，我们需要五万个LED灯泡，请提供报价和交货期。谢谢。'),
+    ('見積依頼', 'お世話になっております。LED電球の見積もりをお願いいたします。納期も教えてください。'),
+    ('询盘', '请发送产品目录和价格表，我们是经销商。'),
+]
+VAGUE_BODIES = ['Hi, are you available?', 'Please call me back.', 'Interested. Send info.',
+                'Hello, what do you sell?', '연락 부탁드립니다.']
+
+
+class CorpusGenerator:
+    """시드 고정 합성 메일 생성기 (같은 seed → 같은 코퍼스)"""
+
+    def __init__(self, seed: int = 0, mix: Optional[Dict[str, float]] = None,
+                 start: Optional[datetime] = None):
+        self.rng = random.Random(seed)
+        self.mix = mix or DEFAULT_MIX
+        self.kinds = list(self.mix)
+        self.weights = [self.mix[k] for k in self.kinds]
+        self.now = start or datetime(2026, 2, 3, 18, 0, tzinfo=KST)
+        self._threads: List[Dict] = []     # 회신 대상이 될 수 있는 이전 인콰이어리
+
+    # ------------------------------------------------------------------
+    # 구성 요소
+    # ------------------------------------------------------------------
+    def _fill(self, template: str) -> str:
+        r = self.rng
+        return template.format(
+            price=f"{r.uniform(0.5, 50):.2f}", budget=f"{r.randint(10, 500) * 1000:,}",
+            date=(self.now + timedelta(days=r.randint(3, 30))).strftime('%b %d'),
+            model=f"{r.choice('ABCDEFGHJK')}{r.choice('LMNPRSTUV')}-{r.randint(100, 9999)}",
+            spec=f"{r.randint(5, 200)}W, {r.choice(['IP65', 'IP67', '220V', '12V DC'])}",
+            incoterm=r.choice(INCOTERMS), port=r.choice(PORTS), payment=r.choice(PAYMENTS),
+            product=r.choice(KO_PRODUCTS),
+        )
+
+    def _pick(self, pool: List[str], low: int, high: int) -> List[str]:
+        return [self._fill(t) for t in self.rng.sample(pool, self.rng.randint(low, min(high, len(pool))))]
+
+    def _person(self) -> Dict[str, str]:
+        r = self.rng
+        first, last = r.choice(FIRST_NAMES), r.choice(LAST_NAMES)
+        email = f"{first.lower()}.{last.lower()}{r.randint(1, 99)}@{r.choice(DOMAINS)}"
+        return {'name': f"{first} {last}", 'email': email}
+
+    def _ko_person(self) -> Dict[str, str]:
+        r = self.rng
+        return {'name': r.choice(KO_NAMES), 'email': f"buyer{r.randint(1, 500)}@{r.choice(DOMAINS)}"}
+
+    # ------------------------------------------------------------------
+    # 유형별 생성
+    # ------------------------------------------------------------------
+    def _en_inquiry(self) -> Dict:
+        r = self.rng
+        product = r.choice(PRODUCTS)
+        person = self._person()
+        lines = (self._pick(EN_INTENT, 1, 3) + self._pick(EN_CLARITY, 0, 2)
+                 + self._pick(EN_TERMS, 1, 3) + self._pick(EN_FILLER, 0, 2))
+        r.shuffle(lines)
+        body = '\n'.join([r.choice(EN_OPENERS), '',
+                          f"We are interested in purchasing {r.randint(1, 100) * 500:,} pcs of {product}."]
+                         + lines + ['', 'Best regards,', person['name'], r.choice(TITLES)])
+        subject = r.choice([f"Inquiry: {product}", f"RFQ - {product} {r.choice(INCOTERMS)} {r.choice(PORTS)}",
+                            f"Quotation request for {product}", f"Purchase order inquiry - {product}",
+                            f"URGENT: {product} order"])
+        return {'subject': subject, 'person': person, 'body': body,
+                'has_attachment': r.random() < 0.4}
+
+    def _ko_inquiry(self) -> Dict:
+        r = self.rng
+        person = self._ko_person()
+        product = r.choice(KO_PRODUCTS)
+        lines = self._pick(KO_INTENT, 1, 3) + self._pick(KO_TERMS, 1, 3)
+        r.shuffle(lines)
+        body = '\n'.join([r.choice(KO_OPENERS), f"{product} {r.randint(1, 50) * 100}개 관련 문의드립니다."]
+                         + lines + [r.choice(KO_CLOSERS), person['name'] + ' 드림'])
+        subject = r.choice([f"{product} 견적 요청", f"[발주] {product}", f"{product} 단가 문의",
+                            f"RE: {product} 샘플 건", f"{product} 오더 관련"])
+        return {'subject': subject, 'person': person, 'body': body,
+                'has_attachment': r.random() < 0.3}
+
+    def _reply(self) -> Dict:
+        """이전 인콰이어리에 대한 회신 (인용문 포함, 같은 스레드)"""
+        r = self.rng
+        if not self._threads:
+            return self._en_inquiry()
+        parent = r.choice(self._threads)
+        depth = parent.get('depth', 0) + 1
+        quoted = '\n'.join('> ' + line for line in parent['body'].splitlines())
+        new_lines = self._pick(EN_INTENT, 1, 2) + self._pick(EN_TERMS, 0, 2)
+        body = '\n'.join(['Hi,', ''] + new_lines + ['', 'Thanks,', parent['person']['name'], '',
+                          f"On {parent['full_date']}, Sales Team wrote:", quoted])
+        prefix = r.choice(['Re: ', 'RE: ', 'Fwd: ']) if depth == 1 else 'Re: '
+        return {'subject': prefix + parent['subject'], 'person': parent['person'], 'body': body,
+                'has_attachment': r.random() < 0.25, 'thread_id': parent['thread_id'],
+                'in_reply_to': parent['message_id'], 'references': parent['references'] + [parent['message_id']],
+                'is_reply': True, 'depth': depth}
+
+    def _spam(self) -> Dict:
+        r = self.rng
+        lines = r.sample(SPAM_LINES, r.randint(2, 4))
+        subject = r.choice(['YOU HAVE WON A PRIZE', 'Congratulations!!!! Claim now!!!!',
+                            'Limited time special offer', 'Free gift for you'])
+        return {'subject': subject, 'person': {'name': 'Promo Team', 'email': f"noreply@{r.choice(SPAM_DOMAINS)}"},
+                'body': '\n'.join(lines), 'has_attachment': False}
+
+    def _newsletter(self) -> Dict:
+        r = self.rng
+        lines = r.sample(NEWSLETTER_LINES, r.randint(2, 4))
+        return {'subject': r.choice(['Weekly Newsletter', 'Industry update - March edition', 'Our latest promotion']),
+                'person': {'name': 'News Desk', 'email': f"news@{r.choice(DOMAINS)}"},
+                'body': '\n'.join(lines), 'has_attachment': False}
+
+    def _gibberish(self) -> Dict:
+        r = self.rng
+        kind = r.randint(0, 3)
+        if kind == 0:
+            body = ' '.join(''.join(r.choices('qwrtypsdfghjklzxcvbnm', k=r.randint(4, 9))) for _ in range(r.randint(8, 20)))
+        elif kind == 1:
+            body = 'ㅋㅋㅋㅋ ㅎㅎㅎ ' + ''.join(r.choices('ㄱㄴㄷㄹㅁㅂㅅㅇㅈㅊㅋㅌㅍㅎㅏㅑㅓㅕ', k=r.randint(10, 30)))
+        elif kind == 2:
+            body = ('asdfasdf qwerty ' + ' '.join(''.join(r.choices('qwrtypsdfghjklzxcvbnm', k=5)) for _ in range(6))
+                    + ' ' + r.choice('!@#$%') * r.randint(6, 20))
+        else:
+            body = ''.join(r.choices('#$%^&*()_+=-~', k=r.randint(20, 60)))
+        return {'subject': r.choice(['asdf', 'ㅁㄴㅇㄹ', '???', 'xxxxx test']), 'person': self._person(),
+                'body': body, 'has_attachment': False}
+
+    def _other_language(self) -> Dict:
+        subject, body = self.rng.choice(OTHER_LANGUAGE)
+        return {'subject': subject, 'person': self._person(), 'body': body, 'has_attachment': False}
+
+    def _vague(self) -> Dict:
+        return {'subject': self.rng.choice(['Hello', 'Question', '문의']), 'person': self._person(),
+                'body': self.rng.choice(VAGUE_BODIES), 'has_attachment': False}
+
+    # ------------------------------------------------------------------
+    # 생성
+    # ------------------------------------------------------------------
+    def email(self, index: int) -> Dict:
+        """index번째 메일 (최신순 - index가 클수록 오래된 메일)"""
+        kind = self.rng.choices(self.kinds, self.weights)[0]
+        spec = getattr(self, f"_{kind}")()
+        sent = self.now - timedelta(minutes=index * 7 + self.rng.randint(0, 6))
+        msg_id = f"syn{index:08d}"
+        person = spec['person']
+
+        email = {
+            'id': msg_id,
+            'thread_id': spec.get('thread_id', msg_id),
+            'subject': spec['subject'],
+            'sender': f"{person['name']} <{person['email']}>",
+            'sender_email': person['email'],
+            'body': spec['body'],
+            'snippet': spec['body'][:100].replace('\n', ' '),
+            'has_attachment': spec['has_attachment'],
+            'is_reply': spec.get('is_reply', False),
+            'message_id': f"{msg_id}@{person['email'].split('@')[-1]}",
+            'in_reply_to': spec.get('in_reply_to'),
+            'references': spec.get('references', []),
+            'mail_date': sent.strftime('%m-%d %H:%M'),
+            'full_date': sent.strftime('%Y-%m-%d %H:%M'),
+            'timestamp_ms': int(sent.timestamp() * 1000),
+            'kind': kind,
+        }
+        if kind in ('en_inquiry', 'ko_inquiry', 'reply'):
+            self._threads.append({**spec, 'thread_id': email['thread_id'], 'full_date': email['full_date'],
+                                  'message_id': email['message_id'], 'references': email['references']})
+            if len(self._threads) > 200:
+                self._threads.pop(0)
+        return email
+
+    def generate(self, n: int) -> List[Dict]:
+        return [self.email(i) for i in range(n)]
+
+
+def generate_corpus(n: int, seed: int = 0, mix: Optional[Dict[str, float]] = None) -> List[Dict]:
+    """합성 메일 n건 (kind 키로 생성 유형 표시)"""
+    return CorpusGenerator(seed, mix).generate(n)
+
+
+def _blast_variant(source: Dict, rng: random.Random, blast: int, copy: int) -> Dict:
+    """반복 발송 사본 1건 - 숫자 / 인사말 / 서명 / 제목 접두어만 조금씩 다름"""
+    body = re.sub(r'\d', lambda _: str(rng.randint(0, 9)), source['body'])
+    lines = body.split('\n')
+    if lines and lines[0] in EN_OPENERS:
+        lines[0] = rng.choice(EN_OPENERS)
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    if rng.random() < 0.5:
+        lines.append('Sent from my iPhone')
+    sender_email = f"{first.lower()}.{last.lower()}{rng.randint(1, 99)}@{rng.choice(DOMAINS + SPAM_DOMAINS)}"
+    body = '\n'.join(lines)
+    return {
+        **source,
+        'id': f"blast{blast:04d}x{copy:03d}",
+        'thread_id': f"blast{blast:04d}x{copy:03d}",
+        'subject': rng.choice(['', 'Fwd: ', 'RE: ']) + source['subject'] if copy else source['subject'],
+        'sender': f"{first} {last} <{sender_email}>",
+        'sender_email': sender_email,
+        'body': body,
+        'snippet': body[:100].replace('\n', ' '),
+        'kind': 'blast',
+        'blast': blast,
+        'source_kind': source['kind'],
+    }
+
+
+def add_blasts(emails: List[Dict], blasts: int, copies: int, seed: int = 0) -> List[Dict]:
+    """
+    같은 문의를 조금씩 바꿔 반복 발송한 메일 묶음 추가 (유사 메일 판정 벤치마크용)
+
+    en_inquiry / spam 메일 blasts건을 골라 각각 copies건의 사본을 만들어 무작위 위치에 섞습니다.
+    사본은 blast 키(원본 묶음 번호)와 source_kind 키(원본 유형)를 가집니다.
+    """
+    rng = random.Random(seed)
+    sources = [e for e in emails if e['kind'] in ('en_inquiry', 'spam')]
+    mixed = list(emails)
+    for blast, source in enumerate(rng.sample(sources, min(blasts, len(sources)))):
+        for copy in range(copies):
+            mixed.insert(rng.randint(0, len(mixed)), _blast_variant(source, rng, blast, copy))
+    return mixed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--n', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='-', help='JSONL 출력 경로 (- = stdout)')
+    args = parser.parse_args()
+
+    emails = generate_corpus(args.n, args.seed)
+    lines = (json.dumps(e, ensure_ascii=False) for e in emails)
+    if args.output == '-':
+        for line in lines:
+            print(line)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.writelines(line + '\n' for line in lines)
@@ -0,0 +1,177 @@
+"""
+메일 엔진 벤치마크 모음 (합성 코퍼스 1k / 10k / 100k)
+
+분석기(문자 구성 TextProfile / GibberishDetector / SpamDetector / MinHash 지문 / calculate_score)와 DB 계층(일괄 저장, 목록 / 검색 / 통계 / 발신자 평판 조회)을
+코퍼스 크기별로 측정하여 JSON으로 저장합니다. --compare로 이전 결과와 비교하면 느려진 항목을 표시합니다.
+
+    python -m benchmarks.suite --sizes 1000 10000 100000 --output bench_results.json
+    python -m benchmarks.suite --sizes 1000 10000 --compare bench_results.json
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import platform
+import tempfile
+import argparse
+import subprocess
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from engine.analyzer import InquiryAnalyzer, GibberishDetector, SpamDetector
+from engine.database import DBManager
+from engine.near_dup import email_minhash
+from engine.text_profile import profile_text
+from engine.pipeline import build_row
+from benchmarks.corpus import generate_corpus
+
+KEYWORDS_PATH = 'config/keywords.json'
+JARGON_PATH = 'config/jargon_map.json'
+
+# 이 비율 이상 느려지면 회귀로 표시
+REGRESSION_THRESHOLD = 1.2
+
+
+def timed(func: Callable, repeat: int = 1) -> float:
+    """repeat회 실행 중 최소 시간 (초)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def record(results: List[Dict], size: int, name: str, seconds: float, ops: int):
+    results.append({
+        'size': size,
+        'name': name,
+        'ops': ops,
+        'seconds': round(seconds, 6),
+        'us_per_op': round(seconds / ops * 1e6, 3) if ops else None,
+        'ops_per_s': round(ops / seconds, 1) if seconds > 0 else None,
+    })
+    print(f"{size:>8}  {name:<22}{seconds:>10.3f}s{ops:>9}{results[-1]['us_per_op']:>12.1f} µs/op")
+
+
+def bench_analyzer(results: List[Dict], size: int, emails: List[Dict]) -> List[Dict]:
+    """분석기 단계별 측정 → 분석 결과 반환"""
+    texts = [f"{e['subject']}\n{e['body']}" for e in emails]
+
+    # 문자 구성 분석은 텍스트별로 캐시되므로 단계마다 비우고 측정
+    profile_text.cache_clear()
+    record(results, size, 'text_profile', timed(lambda: [profile_text(t) for t in texts]), len(texts))
+
+    profile_text.cache_clear()
+    gibberish = GibberishDetector()
+    record(results, size, 'gibberish_detect', timed(lambda: [gibberish.detect(t) for t in texts]), len(texts))
+
+    spam = SpamDetector()
+    record(results, size, 'spam_detect',
+           timed(lambda: [spam.detect(e, t) for e, t in zip(emails, texts)]), len(texts))
+
+    record(results, size, 'minhash', timed(lambda: [email_minhash(e) for e in emails]), len(emails))
+
+    analyzer = InquiryAnalyzer(keywords_path=KEYWORDS_PATH, jargon_path=JARGON_PATH, workers=1)
+    profile_text.cache_clear()
+    scored = []
+    seconds = timed(lambda: scored.extend(analyzer.calculate_score(e) for e in emails))
+    record(results, size, 'calculate_score', seconds, len(emails))
+    return scored
+
+
+def bench_database(results: List[Dict], size: int, rows: List[Dict], tmp: str, repeat: int):
+    """DB 일괄 저장 + 조회 측정"""
+    db = DBManager(os.path.join(tmp, f"bench_{size}.db"))
+    record(results, size, 'bulk_insert', timed(lambda: db.insert_emails_bulk(rows)), len(rows))
+
+    record(results, size, 'list_top10', timed(lambda: db.list_emails('score', limit=10), repeat), 1)
+    record(results, size, 'list_hot20', timed(lambda: db.list_emails('intent_score', limit=20), repeat), 1)
+
+    def walk_pages(pages: int = 20):
+        cursor = None
+        for _ in range(pages):
+            _, cursor = db.list_emails('score', limit=50, cursor=cursor)
+            if cursor is None:
+                break
+    record(results, size, 'list_20_pages', timed(walk_pages, repeat), 20)
+    record(results, size, 'get_statistics', timed(db.get_statistics, repeat), 1)
+    record(results, size, 'search', timed(lambda: db.search_emails('quotation fob', limit=20), repeat), 1)
+    record(results, size, 'keyword_facets', timed(lambda: db.keyword_facets(limit=30), repeat), 1)
+    record(results, size, 'category_facets', timed(db.category_facets, repeat), 1)
+    record(results, size, 'list_keyword_filter',
+           timed(lambda: db.list_emails('score', limit=20, keyword='l/c'), repeat), 1)
+    record(results, size, 'list_threads', timed(lambda: db.list_threads(limit=30), repeat), 1)
+    thread_id = db.list_threads(limit=1)[0][0]['thread_id']
+    record(results, size, 'thread_messages', timed(lambda: db.get_thread_messages(thread_id), repeat), 1)
+    senders = [r['sender_email'] for r in rows[:500]]
+    record(results, size, 'reputation_lookup', timed(lambda: db.get_sender_reputations(senders), repeat),
+           len(senders))
+
+
+def environment() -> Dict:
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                             text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        rev = None
+    return {
+        'git_rev': rev,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare(results: List[Dict], baseline_path: str) -> int:
+    """이전 결과 대비 변화 출력 - Returns: 회귀 항목 수"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['size'], r['name']): r for r in json.load(f)['results']}
+
+    regressions = 0
+    print(f"\n{'size':>8}  {'name':<22}{'baseline (ms)':>15}{'current (ms)':>15}{'ratio':>9}")
+    for r in results:
+        old = baseline.get((r['size'], r['name']))
+        if not old or not old['seconds']:
+            continue
+        ratio = r['seconds'] / old['seconds']
+        flag = '  ⚠ REGRESSION' if ratio >= REGRESSION_THRESHOLD else ''
+        regressions += bool(flag)
+        print(f"{r['size']:>8}  {r['name']:<22}{old['seconds'] * 1000:>15.2f}{r['seconds'] * 1000:>15.2f}"
+              f"{ratio:>8.2f}x{flag}")
+    return regressions
+
+
+def run(sizes: List[int], seed: int, repeat: int, output: Optional[str], baseline: Optional[str]) -> int:
+    results: List[Dict] = []
+    print(f"{'size':>8}  {'name':<22}{'seconds':>11}{'ops':>9}{'per op':>15}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            emails = generate_corpus(size, seed=seed)
+            scored = bench_analyzer(results, size, emails)
+            rows = [build_row(e, r) for e, r in zip(emails, scored)]
+            bench_database(results, size, rows, tmp, repeat)
+
+    report = {'environment': environment(), 'seed': seed, 'results': results}
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nresults written to {output}")
+
+    return compare(results, baseline) if baseline else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=5, help='조회 벤치마크 반복 횟수 (최솟값 기록)')
+    parser.add_argument('--output', help='결과 JSON 경로')
+    parser.add_argument('--compare', help='비교할 이전 결과 JSON 경로')
+    args = parser.parse_args()
+    sys.exit(1 if run(args.sizes, args.seed, args.repeat, args.output, args.compare) else 0)
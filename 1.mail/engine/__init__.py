@@ -5,6 +5,7 @@ AI Trade Assistant Engine Module
 from .database import DBManager
 from .analyzer import InquiryAnalyzer, GibberishDetector, SpamDetector, AnalysisResult
 from .reply_generator import ReplyGenerator, ReplyDraft
+from .gmail_fetcher import GmailFetcher
 
 __all__ = [
     'DBManager',
@@ -13,5 +14,6 @@ __all__ = [
     'SpamDetector',
     'AnalysisResult',
     'ReplyGenerator',
-    'ReplyDraft'
+    'ReplyDraft',
+    'GmailFetcher'
 ]
@@ -3,17 +3,26 @@ Inquiry Analyzer Module (v2.0 - Async Support)
 무역 인콰이어리 메일 분석 엔진
 
 가중치: Intent(50%) + Terms(35%) + Clarity(15%)
-비동기 처리 지원
+비동기 처리 지원 / 프로세스 풀 배치 분석 지원
 """
 
+import os
 import re
 import json
+import hashlib
 import logging
 import asyncio
-from typing import Dict, List, Tuple, Optional, Any
+import threading
+from typing import Dict, List, Tuple, Optional, Any, Iterator
 from pathlib import Path
 from dataclasses import dataclass
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .keyword_matcher import KeywordScorer
+from .jargon import load_jargon_replacer
+from .lead_model import LeadScorer
+from .text_profile import profile_text
 
 logger = logging.getLogger(__name__)
 
@@ -43,28 +52,32 @@ class GibberishDetector:
     
     KEYBOARD_PATTERNS = ['qwert', 'asdf', 'zxcv', '12345', 'abcde']
     SPAM_THRESHOLD = 50
+    COMMON_WORDS = frozenset({
+        'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all',
+        'can', 'had', 'her', 'was', 'one', 'our', 'out', 'has',
+        'dear', 'please', 'thank', 'regards', 'order', 'price',
+        'shipment', 'delivery', 'payment', 'product', 'inquiry'
+    })
     
     def detect(self, text: str) -> Tuple[int, List[str], bool]:
         """Gibberish 탐지 - Returns: (score, reasons, is_gibberish)"""
         if not text or len(text.strip()) < 5:
             return 100, ['empty_content'], True
         
+        profile = profile_text(text)
         text = text.strip()
         reasons = []
         score = 0
         
         # 한글 완성형 비율 체크 (30% 이상이면 정상)
-        korean_syllables = len(re.findall(r'[\uac00-\ud7a3]', text))
-        total_chars = len(text.replace(' ', ''))
-        korean_ratio = korean_syllables / max(total_chars, 1)
+        korean_ratio = profile.hangul / max(profile.non_space, 1)
         
         if korean_ratio >= 0.3:
             return 0, [], False
         
         # 자음/모음만 연속 체크
-        jamo_pattern = re.findall(r'[ㄱ-ㅎㅏ-ㅣ]{3,}', text)
-        if jamo_pattern:
-            score += min(30, len(jamo_pattern) * 10)
+        if profile.jamo_runs:
+            score += min(30, profile.jamo_runs * 10)
             reasons.append('consecutive_jamo')
         
         # 키보드 패턴
@@ -81,20 +94,15 @@ class GibberishDetector:
             reasons.append('repeated_chars')
         
         # 특수문자 과다
-        special_ratio = len(re.findall(r'[^\w\s\uac00-\ud7a3]', text)) / max(len(text), 1)
-        if special_ratio > 0.3:
+        if profile.special_ratio > 0.3:
             score += 15
             reasons.append('excessive_special_chars')
         
         # 의미있는 영어 단어 체크
-        english_words = re.findall(r'[a-zA-Z]{3,}', text)
-        common_words = {'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 
-                       'can', 'had', 'her', 'was', 'one', 'our', 'out', 'has',
-                       'dear', 'please', 'thank', 'regards', 'order', 'price',
-                       'shipment', 'delivery', 'payment', 'product', 'inquiry'}
+        english_words = profile.english_words
         
         if english_words:
-            matched = sum(1 for w in english_words if w.lower() in common_words)
+            matched = sum(map(self.COMMON_WORDS.__contains__, map(str.lower, english_words)))
             if matched / len(english_words) < 0.1 and len(english_words) > 5:
                 score += 20
                 reasons.append('no_meaningful_words')
@@ -121,6 +129,11 @@ class SpamDetector:
     def __init__(self):
         self.patterns = [(re.compile(p, re.I), n, s) for p, n, s in self.SPAM_PATTERNS]
     
+    def suspicious_sender(self, email_data: Dict) -> bool:
+        """의심 도메인 발신 여부"""
+        sender_email = email_data.get('sender_email', '') or ''
+        return isinstance(sender_email, str) and sender_email.lower().endswith(tuple(self.SUSPICIOUS_DOMAINS))
+    
     def detect(self, email_data: Dict, text: str, gibberish_score: int = 0) -> Tuple[int, List[str], bool]:
         """스팸 탐지 - Returns: (score, reasons, is_spam)"""
         if not text:
@@ -136,13 +149,9 @@ class SpamDetector:
                 reasons.append(name)
         
         # 의심 도메인 체크
-        sender_email = email_data.get('sender_email', '') or ''
-        if isinstance(sender_email, str):
-            for domain in self.SUSPICIOUS_DOMAINS:
-                if sender_email.lower().endswith(domain):
-                    score += 25
-                    reasons.append('suspicious_domain')
-                    break
+        if self.suspicious_sender(email_data):
+            score += 25
+            reasons.append('suspicious_domain')
         
         # 제목 체크
         subject = email_data.get('subject', '') or ''
@@ -168,28 +177,61 @@ class InquiryAnalyzer:
         'terms': 0.35
     }
     
+    # 이 건수 미만이면 프로세스 풀 기동/전송 비용이 더 커서 현재 프로세스에서 처리
+    MIN_PARALLEL_BATCH = 200
+    
+    # 분석 결과 형식 버전 (결과 dict 필드가 바뀌면 올려서 이전 캐시 무효화)
+    # 2: matched / rules_version 추가, 3: matched 항목에 카테고리 / 점수 추가, 4: matched에 스팸 키워드 추가,
+    # 5: 프로세스 풀 분석에서 빠졌던 is_reply 답장 보너스 반영
+    RESULT_FORMAT = 5
+    
+    # 발신자 평판 보정 기준 (이전 메일 수 / 기존 거래처 평균 점수 / 스팸 발신자 비율)
+    REPUTATION_MIN_MESSAGES = 2
+    KNOWN_SENDER_MIN_AVG = 40
+    SPAM_SENDER_RATIO = 0.5
+    # 도메인 단위 평판을 적용하지 않는 무료 메일 도메인 (서로 무관한 발신자가 섞임)
+    FREE_MAIL_DOMAINS = frozenset({
+        'gmail.com', 'yahoo.com', 'hotmail.com', 'outlook.com', 'live.com', 'icloud.com', 'aol.com',
+        'naver.com', 'daum.net', 'hanmail.net', 'nate.com', 'qq.com', '163.com', '126.com',
+    })
+    
     def __init__(self, openai_api_key: str = None, keywords_path: str = "config/keywords.json",
-                 jargon_path: str = "config/jargon_map.json"):
+                 jargon_path: str = "config/jargon_map.json", workers: int = None,
+                 cache=None, lead_model_path: Optional[str] = None):
         
         self.openai_key = openai_api_key
-        self.client = None
+        self._client = None
         self._demo_mode = not OPENAI_AVAILABLE or not openai_api_key
         
-        if not self._demo_mode:
-            try:
-                self.client = OpenAI(api_key=openai_api_key)
-            except Exception as e:
-                logger.error(f"OpenAI init failed: {e}")
-                self._demo_mode = True
-        
+        self.keywords_path = keywords_path
+        self.jargon_path = jargon_path
         self.keywords = self._load_json(keywords_path)
         self.jargon_map = self._load_json(jargon_path)
         
+        # 키워드 설정을 Aho-Corasick 오토마톤으로 1회 컴파일
+        self.keyword_scorer = KeywordScorer(self.keywords)
+        # 은어 치환기도 생성 시점 설정으로 고정 (rules_version과 같은 설정 - 메일마다 파일 mtime 확인 안 함)
+        self.jargon_replacer = load_jargon_replacer(jargon_path)
+        
         self.gibberish_detector = GibberishDetector()
         self.spam_detector = SpamDetector()
         
-        # 비동기 처리용 ThreadPool
-        self._executor = ThreadPoolExecutor(max_workers=5)
+        # 비동기 처리용 ThreadPool (calculate_score_async 최초 호출 시 생성)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._closed = False
+        
+        # 배치 분석용 프로세스 수 (None이면 CPU 코어 수)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        
+        # 분석 결과 캐시 (DBManager - get_cached_analyses / put_cached_analyses / put_rules_snapshot)
+        self.cache = cache
+        self.cache_stats = {'hits': 0, 'misses': 0}
+        self.rules_version = self._compute_rules_version()
+        self._rules_recorded = False
+        
+        # 처리 이력 학습 리드 점수 (선택 - 모델 파일이 있고 numpy가 설치된 경우만, 첫 채점 시 로드)
+        self.lead_scorer = LeadScorer(lead_model_path) if lead_model_path else None
     
     def _load_json(self, path: str) -> Dict:
         """JSON 로드"""
@@ -203,73 +245,127 @@ class InquiryAnalyzer:
     def is_demo_mode(self) -> bool:
         return self._demo_mode
     
+    @property
+    def client(self):
+        """OpenAI 클라이언트 (최초 사용 시 생성, Demo 모드면 None)"""
+        if self._client is None and not self._demo_mode:
+            try:
+                self._client = OpenAI(api_key=self.openai_key)
+            except Exception as e:
+                logger.error(f"OpenAI init failed: {e}")
+                self._demo_mode = True
+        return self._client
+    
+    def _get_executor(self) -> Optional[ThreadPoolExecutor]:
+        """비동기 처리용 ThreadPool (close() 후에는 None - 이벤트 루프 기본 executor 사용)"""
+        with self._executor_lock:
+            if self._closed:
+                return None
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=5, thread_name_prefix='analyzer')
+            return self._executor
+    
+    def close(self):
+        """
+        비동기 처리용 ThreadPool 종료 (진행 중인 작업은 마저 처리)
+        
+        규칙 변경으로 교체된 분석기를 다른 세션이 아직 쓰고 있을 수 있어 분석 자체는 계속 가능하며,
+        이후 비동기 분석은 새 ThreadPool을 만들지 않고 이벤트 루프 기본 executor에서 실행합니다.
+        """
+        with self._executor_lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+    
+    def _compute_rules_version(self) -> str:
+        """키워드/은어 설정 버전 (설정이 바뀌면 캐시 키가 달라짐)"""
+        payload = json.dumps([self.RESULT_FORMAT, self.keywords, self.jargon_map], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+    
+    def rules_snapshot(self) -> Dict:
+        """현재 규칙 설정 (rules_version 계산 대상과 동일)"""
+        return {'format': self.RESULT_FORMAT, 'keywords': self.keywords, 'jargon': self.jargon_map}
+    
+    def _record_rules(self):
+        """현재 설정 스냅샷을 DB에 1회 기록 (저장된 메일의 rules_version → 당시 설정 - 재채점 시 규칙 비교)"""
+        if self._rules_recorded or self.cache is None:
+            return
+        try:
+            self.cache.put_rules_snapshot(self.rules_version, self.rules_snapshot())
+            self._rules_recorded = True
+        except Exception as e:
+            logger.warning(f"Rules snapshot save failed: {e}")
+    
+    def content_hash(self, email_data: Dict) -> str:
+        """분석 캐시 키 - 분석에 영향을 주는 필드 + 설정 버전"""
+        body = email_data.get('body', '') or email_data.get('snippet', '') or ''
+        payload = json.dumps([
+            self.rules_version,
+            email_data.get('subject', '') or '',
+            body,
+            bool(email_data.get('has_attachment', False)),
+            email_data.get('sender_email', '') or '',    # 의심 도메인 판정에 사용
+            bool(email_data.get('is_reply', False))      # In-Reply-To / References 헤더 (회신 보너스)
+        ], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
     def detect_language(self, text: str) -> str:
         """언어 감지"""
         if not text:
             return 'EN'
         
-        korean_chars = len(re.findall(r'[\uac00-\ud7a3ㄱ-ㅎㅏ-ㅣ]', text))
-        total = len(text.replace(' ', ''))
+        profile = profile_text(text)
+        total = profile.raw_non_space
         
         if total == 0:
             return 'EN'
         
-        korean_ratio = korean_chars / total
-        
-        chinese_chars = len(re.findall(r'[\u4e00-\u9fff]', text))
-        japanese_chars = len(re.findall(r'[\u3040-\u30ff]', text))
+        korean_ratio = (profile.hangul + profile.jamo) / total
         
         if korean_ratio > 0.1:
             return 'KO'
-        elif chinese_chars / total > 0.1:
+        elif profile.cjk / total > 0.1:
             return 'OTHER'
-        elif japanese_chars / total > 0.05:
+        elif profile.kana / total > 0.05:
             return 'OTHER'
         
         return 'EN'
     
+    def analysis_text(self, email_data: Dict, language: Optional[str] = None) -> str:
+        """키워드 / 스팸 판정 대상 텍스트 (제목 + 본문, 한국어면 은어 치환)"""
+        body = email_data.get('body', '') or email_data.get('snippet', '') or ''
+        full_text = f"{email_data.get('subject', '') or ''}\n{body}"
+        if (language or self.detect_language(full_text)) == 'KO':
+            return self.replace_jargon(full_text)
+        return full_text
+    
+    def index_text(self, row: Dict) -> Optional[str]:
+        """
+        키워드 변경 영향 색인용 텍스트 (분석 결과가 포함된 저장 행 - 키워드 점수를 계산한 메일만, 아니면 None)
+        
+        미지원 언어 / Gibberish / 스팸은 키워드 점수 전에 판정이 끝나 키워드 설정과 무관합니다.
+        """
+        if row['is_spam'] or row['language'] == 'OTHER':
+            return None
+        return self.analysis_text(row, row['language'])
+    
     def replace_jargon(self, text: str) -> str:
-        """한국어 무역 은어 치환"""
-        jargon = self.jargon_map.get('korean_jargon', {})
-        
-        for ko, en in jargon.items():
-            text = re.sub(re.escape(ko), en, text, flags=re.IGNORECASE)
-        
-        return text
+        """한국어 무역 은어 치환 (단일 패스, 긴 용어 우선)"""
+        return self.jargon_replacer.replace(text)
     
     def calculate_keyword_scores(self, text: str) -> Tuple[Dict[str, float], List[str]]:
-        """키워드 매칭 스코어 계산"""
-        text_lower = text.lower()
-        
-        scores = {'clarity': 0, 'intent': 0, 'terms': 0}
-        matched_keywords = []
-        
-        category_map = {
-            'product_clarity': 'clarity',
-            'buying_intent': 'intent',
-            'trade_terms': 'terms'
-        }
-        
-        for cat_key, score_key in category_map.items():
-            cat_data = self.keywords.get(cat_key, {})
-            words = cat_data.get('words', {})
-            
-            for word, points in words.items():
-                if word.lower() in text_lower:
-                    scores[score_key] += points
-                    matched_keywords.append(word)
-        
-        # 스팸 키워드 체크 (감점)
-        spam_words = self.keywords.get('spam_keywords', {}).get('words', {})
-        for word, points in spam_words.items():
-            if word.lower() in text_lower:
-                for key in scores:
-                    scores[key] = max(0, scores[key] + points)
-        
-        return scores, matched_keywords
+        """키워드 매칭 스코어 계산 (단일 패스)"""
+        return self.keyword_scorer.score(text)
     
     def calculate_score(self, email_data: Dict) -> Dict[str, Any]:
-        """메일 분석 및 스코어 계산 (동기)"""
+        """메일 분석 및 스코어 계산 (동기, 캐시 사용)"""
+        if self.cache is None:
+            return self._calculate_score(email_data)
+        return self.batch_analyze([email_data])[0]
+    
+    def _calculate_score(self, email_data: Dict) -> Dict[str, Any]:
+        """메일 분석 및 스코어 계산"""
         body = email_data.get('body', '') or email_data.get('snippet', '') or ''
         subject = email_data.get('subject', '') or ''
         has_attachment = email_data.get('has_attachment', False)
@@ -284,7 +380,8 @@ class InquiryAnalyzer:
             return {
                 'total': 0, 'clarity': 0, 'intent': 0, 'terms': 0,
                 'reason': '지원되지 않는 언어입니다 (영어/한국어만 지원)',
-                'keywords': '', 'is_spam': False, 'language': language
+                'keywords': '', 'is_spam': False, 'language': language,
+                'matched': [], 'rules_version': self.rules_version
             }
         
         # 3. Gibberish 탐지
@@ -294,13 +391,12 @@ class InquiryAnalyzer:
             return {
                 'total': 0, 'clarity': 0, 'intent': 0, 'terms': 0,
                 'reason': f'의미없는 콘텐츠 (Gibberish): {", ".join(gib_reasons)}',
-                'keywords': '', 'is_spam': True, 'language': language
+                'keywords': '', 'is_spam': True, 'language': language,
+                'matched': [], 'rules_version': self.rules_version
             }
         
         # 4. 한국어면 은어 치환
-        analysis_text = full_text
-        if language == 'KO':
-            analysis_text = self.replace_jargon(full_text)
+        analysis_text = self.analysis_text(email_data, language)
         
         # 5. 스팸 탐지
         spam_score, spam_reasons, is_spam = self.spam_detector.detect(
@@ -311,16 +407,18 @@ class InquiryAnalyzer:
             return {
                 'total': 0, 'clarity': 0, 'intent': 0, 'terms': 0,
                 'reason': f'스팸으로 판정: {", ".join(spam_reasons[:3])}',
-                'keywords': '', 'is_spam': True, 'language': language
+                'keywords': '', 'is_spam': True, 'language': language,
+                'matched': [], 'rules_version': self.rules_version
             }
         
         # 6. 키워드 스코어 계산
-        kw_scores, matched_keywords = self.calculate_keyword_scores(analysis_text)
+        kw_scores, matched_keywords, spam_keywords = self.keyword_scorer.match(analysis_text)
         
         # 7. 보너스 점수
         bonus = self.keywords.get('bonus', {})
         
-        if subject.lower().startswith(('re:', 'fwd:')):
+        # 회신: In-Reply-To / References 헤더(is_reply) 또는 제목 접두어 (헤더 없는 메일)
+        if email_data.get('is_reply') or subject.lower().startswith(('re:', 'fwd:')):
             kw_scores['intent'] += bonus.get('thread_reply', 20)
         
         if has_attachment:
@@ -350,22 +448,154 @@ class InquiryAnalyzer:
             'reason': reason,
             'keywords': ', '.join(matched_keywords[:10]),
             'is_spam': False,
-            'language': language
+            'language': language,
+            # 전체 매칭 키워드 [키워드, 카테고리, 점수] (키워드 색인 / 필터용)
+            # 스팸 키워드는 카테고리 'spam' (집계 / 필터에서 제외, 감점 변경 시 재채점 대상 조회용)
+            'matched': ([[word, *self.keyword_scorer.categories[word]] for word in dict.fromkeys(matched_keywords)] +
+                        [[word, 'spam', self.keyword_scorer.spam_words[word]] for word in dict.fromkeys(spam_keywords)
+                         if word not in self.keyword_scorer.categories]),
+            'rules_version': self.rules_version
         }
     
+    def reputation_adjustment(self, sender: Optional[Dict] = None, domain: Optional[Dict] = None,
+                              domain_name: str = '') -> float:
+        """
+        발신자 평판 점수 보정값 (DBManager.get_sender_reputations 항목)
+        
+        - 발신 주소의 스팸 비율 SPAM_SENDER_RATIO 이상: -bonus.spam_sender
+          (발신 주소 이력이 부족하면 도메인 스팸 비율로 판정)
+        - 발신 주소의 평균 점수 KNOWN_SENDER_MIN_AVG 이상: +bonus.known_sender (기존 거래처)
+          (같은 회사라도 담당자마다 문의 품질이 달라 도메인 평균은 가점에 쓰지 않음)
+        """
+        bonus = self.keywords.get('bonus', {})
+        
+        def enough(rep: Optional[Dict]) -> bool:
+            return bool(rep) and rep['messages'] >= self.REPUTATION_MIN_MESSAGES
+        
+        if enough(sender):
+            if sender['spam'] / sender['messages'] >= self.SPAM_SENDER_RATIO:
+                return -bonus.get('spam_sender', 20)
+            if sender['scored'] and sender['avg_score'] >= self.KNOWN_SENDER_MIN_AVG:
+                return bonus.get('known_sender', 15)
+            return 0
+        if enough(domain) and domain_name not in self.FREE_MAIL_DOMAINS:
+            if domain['spam'] / domain['messages'] >= self.SPAM_SENDER_RATIO:
+                return -bonus.get('spam_sender', 20)
+        return 0
+    
+    def apply_reputation(self, result: Dict[str, Any], sender: Optional[Dict] = None,
+                         domain: Optional[Dict] = None, domain_name: str = '') -> Dict[str, Any]:
+        """
+        분석 결과에 발신자 평판 보정 적용 → 새 결과 (reputation_adj = 적용된 보정값)
+        
+        분석 결과 자체는 내용만으로 계산하여 분석 캐시 / 유사 메일 재사용과 분리하고,
+        저장 직전에 발신자별로 보정합니다. 스팸 / 미지원 언어 결과는 보정하지 않습니다.
+        """
+        if result['is_spam'] or result['language'] == 'OTHER':
+            return result
+        adjustment = self.reputation_adjustment(sender, domain, domain_name)
+        if not adjustment:
+            return result
+        total = round(min(100, max(0, result['total'] + adjustment)), 1)
+        return {**result, 'total': total, 'reputation_adj': round(total - result['total'], 1)}
+    
     async def calculate_score_async(self, email_data: Dict) -> Dict[str, Any]:
         """메일 분석 (비동기)"""
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(
-            self._executor,
+            self._get_executor(),
             self.calculate_score,
             email_data
         )
     
     async def batch_analyze_async(self, emails: List[Dict]) -> List[Dict[str, Any]]:
-        """배치 분석 (비동기)"""
-        tasks = [self.calculate_score_async(email) for email in emails]
-        return await asyncio.gather(*tasks)
+        """배치 분석 (비동기) - 프로세스 풀 배치 엔진을 이벤트 루프 밖에서 실행"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self.batch_analyze, emails)
+    
+    def batch_analyze(self, emails: List[Dict], chunk_size: int = None) -> List[Dict[str, Any]]:
+        """배치 분석 - 결과는 입력 순서와 동일"""
+        results = []
+        for chunk_results in self.iter_batch_analyze(emails, chunk_size):
+            results.extend(chunk_results)
+        return results
+    
+    def iter_batch_analyze(self, emails: List[Dict], chunk_size: int = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        청크 단위 배치 분석 (진행률 표시용)
+        
+        캐시에 있는 결과는 재계산하지 않고, 나머지만 분석한 뒤 캐시에 저장합니다.
+        
+        Yields:
+            청크별 분석 결과 목록 (입력 순서 유지)
+        """
+        if not emails:
+            return
+        if self.cache is None:
+            yield from self._iter_compute(emails, chunk_size)
+            return
+        self._record_rules()
+        
+        hashes = [self.content_hash(e) for e in emails]
+        cached = self.cache.get_cached_analyses(list(set(hashes)))
+        results = [cached.get(h) for h in hashes]
+        miss_idx = [i for i, r in enumerate(results) if r is None]
+        
+        self.cache_stats['hits'] += len(emails) - len(miss_idx)
+        self.cache_stats['misses'] += len(miss_idx)
+        
+        emitted = 0
+        filled = 0
+        for chunk_results in self._iter_compute([emails[i] for i in miss_idx], chunk_size):
+            new_entries = {}
+            for result in chunk_results:
+                idx = miss_idx[filled]
+                results[idx] = result
+                new_entries[hashes[idx]] = result
+                filled += 1
+            self.cache.put_cached_analyses(new_entries)
+            
+            # 앞에서부터 결과가 채워진 구간만 순서대로 반환
+            end = miss_idx[filled] if filled < len(miss_idx) else len(results)
+            if end > emitted:
+                yield results[emitted:end]
+                emitted = end
+        
+        if emitted < len(results):
+            yield results[emitted:]
+    
+    def _iter_compute(self, emails: List[Dict], chunk_size: int = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        캐시 없이 청크 단위 분석
+        
+        calculate_score는 순수 Python 연산이라 GIL 때문에 스레드로는 병렬화되지 않으므로
+        워커 프로세스마다 컴파일된 분석기를 두고 청크를 나눠 처리합니다.
+        """
+        if not emails:
+            return
+        
+        if chunk_size is None:
+            # 워커당 4개 청크 정도로 나눠 부하 분산
+            chunk_size = min(500, max(20, -(-len(emails) // (self.workers * 4))))
+        chunks = [[_score_fields(e) for e in emails[i:i + chunk_size]]
+                  for i in range(0, len(emails), chunk_size)]
+        
+        if self.workers <= 1 or len(emails) < self.MIN_PARALLEL_BATCH:
+            for chunk in chunks:
+                yield [self._calculate_score(e) for e in chunk]
+            return
+        
+        done = 0
+        try:
+            pool = _get_process_pool(self.workers, self.keywords_path, self.jargon_path, self.rules_version)
+            for chunk_results in pool.map(_score_chunk, chunks):
+                done += 1
+                yield chunk_results
+        except BrokenProcessPool as e:
+            logger.error(f"Process pool failed, falling back to serial: {e}")
+            _discard_process_pool(self.workers, self.keywords_path, self.jargon_path)
+            for chunk in chunks[done:]:
+                yield [self._calculate_score(e) for e in chunk]
     
     def _generate_reason(self, clarity: float, intent: float, terms: float, 
                         keywords: List[str]) -> str:
@@ -394,3 +624,74 @@ class InquiryAnalyzer:
             reasons.append(f"주요 키워드: {key_str}")
         
         return ' | '.join(reasons) if reasons else "추가 분석 필요"
+
+
+
+# ==============================================================================
+# 프로세스 풀 배치 분석
+# ==============================================================================
+# calculate_score / SpamDetector가 참조하는 필드만 워커로 전송
+_SCORE_FIELDS = ('subject', 'body', 'snippet', 'has_attachment', 'sender_email', 'is_reply')
+
+# 워커 프로세스 전역 분석기 (워커마다 1회 생성 - 탐지기/키워드 테이블 사전 컴파일)
+_worker_analyzer: Optional[InquiryAnalyzer] = None
+
+# (workers, keywords_path, jargon_path) → (rules_version, 공유 프로세스 풀)
+_process_pools: Dict[tuple, Tuple[str, ProcessPoolExecutor]] = {}
+_pool_lock = threading.Lock()
+
+
+def _score_fields(email_data: Dict) -> Dict:
+    return {k: email_data.get(k) for k in _SCORE_FIELDS}
+
+
+def _init_worker(keywords_path: str, jargon_path: str):
+    global _worker_analyzer
+    _worker_analyzer = InquiryAnalyzer(keywords_path=keywords_path, jargon_path=jargon_path, workers=1)
+
+
+def _score_chunk(chunk: List[Dict]) -> List[Dict[str, Any]]:
+    return [_worker_analyzer._calculate_score(e) for e in chunk]
+
+
+def _get_process_pool(workers: int, keywords_path: str, jargon_path: str,
+                      rules_version: Optional[str] = None) -> ProcessPoolExecutor:
+    """
+    설정별 프로세스 풀 (프로세스 내 공유, 최초 사용 시 생성)
+    
+    워커는 기동 시점의 설정 파일로 분석기를 만들므로 설정이 바뀌면(rules_version 변경)
+    이전 풀을 종료하고 새로 만듭니다. (진행 중인 작업은 이전 설정으로 마저 처리)
+    """
+    key = (workers, os.path.abspath(keywords_path), os.path.abspath(jargon_path))
+    stale = None
+    with _pool_lock:
+        version, pool = _process_pools.get(key, (None, None))
+        if pool is not None and rules_version is not None and version != rules_version:
+            stale, pool = pool, None
+        if pool is None:
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=key[1:]
+            )
+            _process_pools[key] = (rules_version, pool)
+    if stale is not None:
+        stale.shutdown(wait=False)
+    return pool
+
+
+def _discard_process_pool(workers: int, keywords_path: str, jargon_path: str):
+    key = (workers, os.path.abspath(keywords_path), os.path.abspath(jargon_path))
+    with _pool_lock:
+        _, pool = _process_pools.pop(key, (None, None))
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_process_pools():
+    """모든 배치 분석 프로세스 풀 종료"""
+    with _pool_lock:
+        pools = [pool for _, pool in _process_pools.values()]
+        _process_pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True)
@@ -0,0 +1,309 @@
+"""
+Batch Drafting Module
+야간 답장 초안 일괄 생성 작업 (headless)
+
+Active / 비스팸 / 점수 기준 이상이면서 초안이 없는 메일을 골라
+하나의 배치 LLM 작업으로 제출하고, 결과를 reply_drafts에 일괄 저장합니다.
+
+작업 디렉터리(state_dir/job_*) 구성 - 단계마다 state.json에 기록하여 중단 후 재개
+    emails.jsonl   대상 메일 (초안 변환용)
+    input.jsonl    OpenAI Batch API 입력 (custom_id = email_id)
+    output.jsonl   배치 결과
+    state.json     prepared → submitting → submitted → downloaded → done
+                   (submitting: 제출 직전 기록 - 재개 시 작업 ID(metadata job_id)로 이미 만든 배치를 찾아 중복 제출 방지)
+
+    python -m engine.batch_drafting --min-score 60 --backend openai
+    python -m engine.batch_drafting --backend local --db /tmp/check.db   # 네트워크 없이 파이프라인 점검
+        (로컬 대역은 정해진 문구를 반환하므로 운영 DB 대신 별도 DB 필요, 초안 모델도 'local-fake'로 기록)
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import argparse
+from pathlib import Path
+from dataclasses import asdict
+from datetime import datetime
+from typing import Dict, Optional, Iterator
+
+from .database import DBManager
+from .reply_generator import ReplyGenerator
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_DB = BASE_DIR / 'data' / 'trade_emails.db'
+
+ENDPOINT = '/v1/chat/completions'
+# 로컬 대역(--backend local) 초안의 모델 태그 - 실제 초안과 섞이지 않도록 별도 키로 저장
+LOCAL_MODEL = 'local-fake'
+
+
+def _write_jsonl(path: Path, records: Iterator[Dict]) -> int:
+    """임시 파일에 쓴 뒤 rename (중단 시 반쯤 쓰인 파일이 남지 않음)"""
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    count = 0
+    with open(tmp, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            count += 1
+    os.replace(tmp, path)
+    return count
+
+
+def _read_jsonl(path: Path) -> Iterator[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+# ==========================================
+# 배치 백엔드
+# ==========================================
+class OpenAIBatchBackend:
+    """OpenAI Batch API (24시간 완료 창, 파일 업로드 → 배치 생성 → 결과 파일 다운로드)"""
+
+    TERMINAL = ('completed', 'failed', 'expired', 'cancelled')
+    # 중복 제출 확인 시 살펴볼 최근 배치 수
+    LOOKUP_LIMIT = 500
+
+    def __init__(self, client):
+        self.client = client
+
+    def submit(self, input_path: Path, job_id: str) -> str:
+        with open(input_path, 'rb') as f:
+            uploaded = self.client.files.create(file=f, purpose='batch')
+        batch = self.client.batches.create(input_file_id=uploaded.id, endpoint=ENDPOINT,
+                                           completion_window='24h', metadata={'job_id': job_id})
+        return batch.id
+
+    def find(self, job_id: str) -> Optional[str]:
+        """job_id로 제출된 배치 ID (최근 LOOKUP_LIMIT건 중, 없으면 None)"""
+        for i, batch in enumerate(self.client.batches.list(limit=100)):
+            if i >= self.LOOKUP_LIMIT:
+                break
+            if (batch.metadata or {}).get('job_id') == job_id:
+                return batch.id
+        return None
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def download(self, batch_id: str, output_path: Path):
+        batch = self.client.batches.retrieve(batch_id)
+        lines = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                lines.append(self.client.files.content(file_id).text)
+        tmp = output_path.with_suffix(output_path.suffix + '.tmp')
+        tmp.write_text(''.join(lines), encoding='utf-8')
+        os.replace(tmp, output_path)
+
+
+# ==========================================
+# 배치 작업
+# ==========================================
+class BatchDraftJob:
+    """야간 답장 초안 배치 작업 (단계별 상태 저장 → 재실행 시 이어서 진행)"""
+
+    def __init__(self, db: DBManager, generator: ReplyGenerator, backend, state_dir: str,
+                 min_score: float = 60.0, limit: Optional[int] = None,
+                 poll_interval: float = 60.0, max_wait: Optional[float] = None):
+        """
+        Args:
+            db: DBManager
+            generator: 프롬프트 / 모델 / 초안 변환에 사용할 ReplyGenerator
+            backend: OpenAIBatchBackend / fake_openai.LocalBatchBackend
+            state_dir: 작업 디렉터리 상위 경로
+            min_score: 대상 최소 점수
+            limit: 작업당 최대 메일 수
+            poll_interval: 배치 상태 확인 간격 (초)
+            max_wait: 이 시간 내 완료되지 않으면 종료 (다음 실행 시 재개, None = 무제한)
+        """
+        self.db = db
+        self.generator = generator
+        self.backend = backend
+        self.state_dir = Path(state_dir)
+        self.min_score = min_score
+        self.limit = limit
+        self.poll_interval = poll_interval
+        self.max_wait = max_wait
+
+        self.job_dir: Optional[Path] = None
+        self.state: Dict = {}
+
+    # ------------------------------------------------------------------
+    # 상태 관리
+    # ------------------------------------------------------------------
+    def _save_state(self, **updates):
+        self.state.update(updates, updated_at=datetime.now().isoformat())
+        path = self.job_dir / 'state.json'
+        tmp = path.with_suffix('.json.tmp')
+        tmp.write_text(json.dumps(self.state, ensure_ascii=False, indent=2), encoding='utf-8')
+        os.replace(tmp, path)
+
+    def _find_unfinished(self) -> Optional[Path]:
+        if not self.state_dir.exists():
+            return None
+        for job_dir in sorted(self.state_dir.glob('job_*'), reverse=True):
+            state_path = job_dir / 'state.json'
+            if state_path.exists():
+                state = json.loads(state_path.read_text(encoding='utf-8'))
+                if state.get('status') != 'done':
+                    return job_dir
+        return None
+
+    # ------------------------------------------------------------------
+    # 단계
+    # ------------------------------------------------------------------
+    def _prepare(self) -> bool:
+        """대상 메일 선택 → emails.jsonl / input.jsonl 작성 (대상 없으면 False)"""
+        candidates = self.db.get_draft_candidates(self.min_score, self.generator.PROMPT_VERSION,
+                                                  self.generator.model, self.limit)
+        if not candidates:
+            return False
+
+        self.job_dir = self.state_dir / f"job_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        self.job_dir.mkdir(parents=True)
+        _write_jsonl(self.job_dir / 'emails.jsonl', iter(candidates))
+        count = _write_jsonl(self.job_dir / 'input.jsonl', (
+            {'custom_id': e['id'], 'method': 'POST', 'url': ENDPOINT, 'body': self.generator.build_request(e)}
+            for e in candidates
+        ))
+        # 상태 기록은 입력 파일 완성 후 (중간 중단 시 작업 디렉터리는 무시됨)
+        self.state = {}
+        self._save_state(status='prepared', count=count, prompt_version=self.generator.PROMPT_VERSION,
+                         model=self.generator.model, created_at=datetime.now().isoformat())
+        return True
+
+    def _submit(self):
+        """배치 제출 (submitting 상태에서 재개하면 같은 작업 ID의 배치가 이미 있는지 먼저 확인)"""
+        job_id = self.job_dir.name
+        batch_id = None
+        if self.state['status'] == 'submitting':
+            batch_id = self.backend.find(job_id)
+            if batch_id:
+                logger.info(f"Batch {batch_id} was already submitted for {job_id}")
+        else:
+            self._save_state(status='submitting')
+        if batch_id is None:
+            batch_id = self.backend.submit(self.job_dir / 'input.jsonl', job_id)
+        self._save_state(status='submitted', batch_id=batch_id)
+        logger.info(f"Batch submitted: {batch_id} ({self.state['count']} requests)")
+
+    def _wait_and_download(self) -> bool:
+        """배치 완료 대기 → output.jsonl 다운로드 (max_wait 초과 시 False)"""
+        batch_id = self.state['batch_id']
+        start = time.monotonic()
+        while True:
+            status = self.backend.status(batch_id)
+            if status in self.backend.TERMINAL:
+                break
+            if self.max_wait is not None and time.monotonic() - start >= self.max_wait:
+                logger.info(f"Batch {batch_id} still {status} - resume on next run")
+                return False
+            time.sleep(self.poll_interval)
+
+        if status != 'completed':
+            # 실패/만료 - 결과 없이 종료 (초안이 없으므로 다음 실행 때 다시 대상이 됨)
+            logger.error(f"Batch {batch_id} ended with status {status}")
+            self._save_state(status='done', batch_status=status, stored=0, failed=self.state['count'])
+            return False
+
+        self.backend.download(batch_id, self.job_dir / 'output.jsonl')
+        self._save_state(status='downloaded', batch_status=status)
+        return True
+
+    def _write_back(self):
+        """output.jsonl → ReplyDraft → reply_drafts 일괄 저장 (재실행해도 같은 키 덮어쓰기)"""
+        emails = {e['id']: e for e in _read_jsonl(self.job_dir / 'emails.jsonl')}
+        drafts = {}
+
+        for result in _read_jsonl(self.job_dir / 'output.jsonl'):
+            email = emails.get(result.get('custom_id'))
+            response = result.get('response') or {}
+            if email is None or result.get('error') or response.get('status_code') != 200:
+                continue
+            text = response['body']['choices'][0]['message']['content']
+            draft = self.generator.draft_from_text(email, text)
+            if not draft.fallback:
+                drafts[email['id']] = asdict(draft)
+
+        # 오류 / 빈 응답 / 결과 누락 - 초안이 없으므로 다음 실행 때 다시 대상이 됨
+        failed = len(emails) - len(drafts)
+        self.db.put_reply_drafts(drafts, self.state['prompt_version'], self.state['model'])
+        self._save_state(status='done', stored=len(drafts), failed=failed)
+        logger.info(f"Batch drafts stored: {len(drafts)} (failed {failed})")
+
+    # ------------------------------------------------------------------
+    # 실행
+    # ------------------------------------------------------------------
+    def run(self) -> Dict:
+        """
+        미완료 작업이 있으면 이어서, 없으면 새 작업 실행
+
+        Returns:
+            state dict (status, count, stored, failed, ...) - 대상이 없으면 {'status': 'idle'}
+        """
+        self.job_dir = self._find_unfinished()
+        if self.job_dir:
+            self.state = json.loads((self.job_dir / 'state.json').read_text(encoding='utf-8'))
+            logger.info(f"Resuming batch job {self.job_dir.name} ({self.state['status']})")
+        elif not self._prepare():
+            return {'status': 'idle'}
+
+        if self.state['status'] in ('prepared', 'submitting'):
+            self._submit()
+        if self.state['status'] == 'submitted' and not self._wait_and_download():
+            return dict(self.state, job=self.job_dir.name)
+        if self.state['status'] == 'downloaded':
+            self._write_back()
+        return dict(self.state, job=self.job_dir.name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="야간 답장 초안 일괄 생성")
+    parser.add_argument('--db', default=None, help=f'기본값 {DEFAULT_DB} (--backend local은 지정 필수)')
+    parser.add_argument('--state-dir', default=str(BASE_DIR / 'data' / 'batch_jobs'))
+    parser.add_argument('--backend', choices=['openai', 'local'], default='openai')
+    parser.add_argument('--min-score', type=float, default=60.0)
+    parser.add_argument('--limit', type=int, default=None)
+    parser.add_argument('--model', default='gpt-3.5-turbo')
+    parser.add_argument('--poll-interval', type=float, default=60.0)
+    parser.add_argument('--max-wait', type=float, default=None,
+                        help='완료 대기 최대 시간(초) - 초과 시 종료 후 다음 실행에서 재개')
+    args = parser.parse_args()
+    if args.backend == 'local':
+        if args.db is None or Path(args.db).resolve() == DEFAULT_DB:
+            parser.error("--backend local writes canned drafts - pass --db with a scratch database")
+        args.model = LOCAL_MODEL
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+
+    db = DBManager(args.db or str(DEFAULT_DB))
+    generator = ReplyGenerator(api_key=os.getenv("OPENAI_API_KEY"), base_url=os.getenv("OPENAI_BASE_URL"),
+                               model=args.model)
+
+    if args.backend == 'openai':
+        if generator.is_demo_mode():
+            parser.error("OpenAI backend requires the openai package and OPENAI_API_KEY")
+        backend = OpenAIBatchBackend(generator.client)
+    else:
+        from .fake_openai import LocalBatchBackend
+        backend = LocalBatchBackend(Path(args.state_dir) / 'local')
+
+    job = BatchDraftJob(db, generator, backend, args.state_dir, min_score=args.min_score,
+                        limit=args.limit, poll_interval=args.poll_interval, max_wait=args.max_wait)
+    print(json.dumps(job.run(), ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -3,31 +3,144 @@ Database Manager Module
 SQLite 기반 영구 저장소
 """
 
+import re
+import zlib
+import time
 import sqlite3
 import json
 import logging
 from datetime import datetime
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 from pathlib import Path
 import threading
 
 logger = logging.getLogger(__name__)
 
 
+def compress_body(text: Optional[str]) -> Optional[bytes]:
+    """본문 → zlib 압축 BLOB (SQL 함수 compress_body로도 등록)"""
+    if text is None:
+        return None
+    return zlib.compress(text.encode('utf-8'), 6)
+
+
+def decompress_body(blob: Optional[bytes]) -> Optional[str]:
+    """zlib 압축 BLOB → 본문 (SQL 함수 decompress_body로도 등록)"""
+    if blob is None:
+        return None
+    return zlib.decompress(blob).decode('utf-8')
+
+
 class DBManager:
     """SQLite 데이터베이스 관리자"""
     
-    def __init__(self, db_path: str = "data/trade_emails.db"):
+    # email_stats 카운터 정의 (컬럼 → 행 조건), {r}는 NEW / OLD / emails
+    STAT_COUNTERS = {
+        'active': "{r}.status = 'Active' AND {r}.is_spam = 0",
+        'spam': "{r}.is_spam = 1",
+        'archived': "{r}.status = 'Archived'",
+        'scored': "{r}.is_spam = 0 AND {r}.score IS NOT NULL",
+        'high_priority': "{r}.score >= 70 AND {r}.is_spam = 0",
+    }
+    # 전문 검색 대상 컬럼 (emails_fts 컬럼 순서 = bm25 가중치 순서)
+    FTS_COLUMNS = ('subject', 'sender', 'body_text', 'keywords')
+    FTS_WEIGHTS = (5.0, 2.0, 1.0, 3.0)
+    
+    # 평균 점수용 합계 - 소수점 1자리 점수를 정수(x10)로 누적하여 오차 없이 유지
+    STAT_SCORE_SUM = "CASE WHEN {r}.is_spam = 0 THEN CAST(ROUND(COALESCE({r}.score, 0) * 10) AS INTEGER) ELSE 0 END"
+    
+    # 분석 캐시 최대 보관 건수 (초과 시 오래 사용되지 않은 항목부터 삭제)
+    ANALYSIS_CACHE_MAX = 50000
+    # 답장 초안 최대 보관 건수 (LLM 호출 결과, 초과 시 LRU 삭제)
+    REPLY_DRAFT_MAX = 5000
+    
+    # 유사 메일 LSH 밴드 인덱스 (MinHash 서명 96바이트 = 12바이트(값 6개) × 8밴드)
+    MINHASH_BANDS = 8
+    MINHASH_BAND_BYTES = 12
+    
+    # 발신자 평판 집계 키 (발신 주소 / '@도메인'), {r}는 NEW / OLD / emails
+    REPUTATION_KEYS = (
+        "lower({r}.sender_email)",
+        "'@' || lower(substr({r}.sender_email, instr({r}.sender_email, '@') + 1))",
+    )
+    REPUTATION_ROW = "{r}.sender_email LIKE '%_@_%'"
+    # 평판 평균 점수 - 평판 보정 전 점수로 누적 (보정이 다시 평균을 올리는 순환 방지)
+    REPUTATION_SCORE = "COALESCE({r}.score, 0) - COALESCE({r}.reputation_adj, 0)"
+    
+    # 스키마 버전 (PRAGMA user_version) - 1: 본문을 email_bodies에 압축 저장
+    SCHEMA_VERSION = 1
+    # emails에 함께 저장하는 본문 앞부분 길이 (전체 본문은 email_bodies)
+    BODY_PREVIEW_CHARS = 200
+    
+    # 기존 DB에 없으면 추가하는 emails 컬럼 (컬럼 → 타입)
+    EMAIL_MIGRATIONS = {
+        'body_preview': 'TEXT',
+        'minhash': 'BLOB',
+        'cluster_id': 'TEXT',
+        'dup_count': 'INTEGER NOT NULL DEFAULT 1',
+        'reputation_adj': 'REAL NOT NULL DEFAULT 0',
+        'rules_version': 'TEXT',
+        'ml_score': 'REAL',
+        'replied_at': 'TEXT',
+        'archived_at': 'TEXT',
+        'message_id': 'TEXT',
+        'in_reply_to': 'TEXT',
+        'reference_ids': 'TEXT',
+        'thread_id': 'TEXT',
+    }
+    
+    # 규칙 변경 재채점 대상 조건 (키워드 외 설정 항목 → 영향받는 메일)
+    RESCORE_CONDITIONS = {
+        'all': "1",
+        'reply': "(is_reply = 1 OR subject LIKE 're:%' OR subject LIKE 'fwd:%')",    # bonus.thread_reply
+        'attachment': "has_attachment = 1",                          # bonus.has_attachment
+        'korean': "language = 'KO'",                                 # 은어 치환 (jargon_map.json)
+    }
+    
+    def __init__(self, db_path: str = "data/trade_emails.db", analysis_cache_max: int = ANALYSIS_CACHE_MAX,
+                 reply_draft_max: int = REPLY_DRAFT_MAX, read_only: bool = False):
+        """
+        Args:
+            read_only: 읽기 전용 연결 (화면 전용 - 스키마 생성 / 마이그레이션은 동기화 서비스가 담당,
+                       쓰기 메서드는 sqlite3.OperationalError)
+        """
         self.db_path = Path(db_path)
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.analysis_cache_max = analysis_cache_max
+        self.reply_draft_max = reply_draft_max
+        self.read_only = read_only
         self._local = threading.local()
-        self._init_database()
+        if read_only:
+            conn = self._get_conn()
+            self.fts_enabled = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'emails_fts'"
+            ).fetchone() is not None
+            self.terms_enabled = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'email_terms'"
+            ).fetchone() is not None
+        else:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._init_database()
     
     def _get_conn(self) -> sqlite3.Connection:
         """스레드별 연결"""
         if not hasattr(self._local, 'conn') or self._local.conn is None:
-            self._local.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
-            self._local.conn.row_factory = sqlite3.Row
+            if self.read_only:
+                # mode=ro: 파일이 없으면 생성하지 않고 실패, 쓰기 잠금을 잡지 않음 (WAL 모드는 DB에 저장되어 유지)
+                # autocommit: 실패한 쓰기 시도가 트랜잭션을 열어 두어 이후 조회가 옛 스냅샷을 보는 일 방지
+                conn = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True,
+                                       check_same_thread=False, timeout=10, isolation_level=None)
+            else:
+                conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=10)
+                # WAL: 읽기/쓰기 동시 진행, 커밋마다 fsync 하지 않음 (체크포인트 시에만)
+                conn.execute('PRAGMA journal_mode=WAL')
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA cache_size=-16000')     # 16MB
+            conn.execute('PRAGMA temp_store=MEMORY')
+            # 압축 본문을 SQL(검색 인덱스 트리거 / 뷰)에서 읽기 위한 함수
+            conn.create_function('compress_body', 1, compress_body, deterministic=True)
+            conn.create_function('decompress_body', 1, decompress_body, deterministic=True)
+            self._local.conn = conn
         return self._local.conn
     
     def _init_database(self):
@@ -42,7 +155,7 @@ class DBManager:
                 sender TEXT,
                 sender_email TEXT,
                 snippet TEXT,
-                body_text TEXT,
+                body_preview TEXT,
                 
                 score REAL DEFAULT 0,
                 clarity_score REAL DEFAULT 0,
@@ -60,54 +173,778 @@ class DBManager:
                 status TEXT DEFAULT 'Active',
                 mail_date TEXT,
                 full_date TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                
+                minhash BLOB,
+                cluster_id TEXT,
+                dup_count INTEGER NOT NULL DEFAULT 1,
+                reputation_adj REAL NOT NULL DEFAULT 0,
+                rules_version TEXT,
+                ml_score REAL,
+                replied_at TEXT,
+                archived_at TEXT,
+                
+                message_id TEXT,
+                in_reply_to TEXT,
+                reference_ids TEXT,
+                thread_id TEXT
             )
         ''')
+        self._migrate_columns(cursor)
+        
+        # 본문 압축 저장소 (이전 버전 DB는 emails.body_text를 옮긴 뒤 VACUUM)
+        self._init_bodies(cursor)
+        self._migrate_bodies(conn)
         
         # 인덱스 생성
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_status ON emails(status)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_score ON emails(score DESC)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_intent ON emails(intent_score DESC)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_spam ON emails(is_spam)')
+        # 목록 페이지네이션용 복합 인덱스 (필터 → 정렬 키 → keyset 보조 키)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_list_score ON emails(status, is_spam, score DESC, id DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_list_intent ON emails(status, is_spam, intent_score DESC, id DESC)')
+        
+        # 통계 (트리거로 갱신되는 단일 행)
+        self._init_statistics(cursor)
+        
+        # 유사 메일 묶음 (MinHash 밴드 인덱스 + 묶음 크기)
+        self._init_clusters(cursor)
+        
+        # 발신자 / 도메인 평판 (트리거로 갱신되는 집계)
+        self._init_reputation(cursor)
+        
+        # 전문 검색 인덱스 (FTS5)
+        self.fts_enabled = self._init_fulltext(cursor)
+        
+        # 키워드 변경 영향 색인 (매칭 키워드 → 메일, 분석 텍스트 단어 → 메일)
+        self.terms_enabled = self._init_keyword_index(cursor)
+        
+        # 학습 리드 점수 특징 (메일 → 해시 버킷 목록)
+        self._init_features(cursor)
         
+        # 대화(스레드) 색인 (Gmail threadId / Message-ID 헤더 → 스레드별 집계)
+        self._init_threads(cursor)
+        
+        # 동기화 상태 (Gmail historyId 등)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sync_state (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # 분석 결과 캐시 (본문/설정 해시 → AnalysisResult JSON)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                content_hash TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                created_at TEXT,
+                last_used TEXT
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_cache_last_used ON analysis_cache(last_used)')
+        
+        # 답장 초안 (메일 × 프롬프트 버전 × 모델 × 추가 컨텍스트 해시 → ReplyDraft JSON)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS reply_drafts (
+                email_id TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                model TEXT NOT NULL,
+                context_hash TEXT NOT NULL DEFAULT '',
+                draft TEXT NOT NULL,
+                created_at TEXT,
+                last_used TEXT,
+                PRIMARY KEY (email_id, prompt_version, model, context_hash)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_drafts_last_used ON reply_drafts(last_used)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_drafts_version ON reply_drafts(prompt_version)')
+        
+        cursor.execute(f'PRAGMA user_version = {self.SCHEMA_VERSION}')
         conn.commit()
         logger.info(f"Database initialized: {self.db_path}")
     
+    def _migrate_columns(self, cursor: sqlite3.Cursor):
+        """이전 버전 DB에 추가된 컬럼 생성"""
+        existing = {row[1] for row in cursor.execute('PRAGMA table_info(emails)')}
+        for column, decl in self.EMAIL_MIGRATIONS.items():
+            if column not in existing:
+                cursor.execute(f'ALTER TABLE emails ADD COLUMN {column} {decl}')
+                logger.info(f"Migrated emails: added column {column}")
+    
+    def _init_bodies(self, cursor: sqlite3.Cursor):
+        """
+        본문 저장 테이블 (메일 ID → zlib 압축 본문)
+        
+        목록 / 통계 / 정렬 조회가 긴 본문(인용이 쌓인 회신 스레드 등)이 들어 있는 페이지를 읽지 않도록
+        emails에는 앞부분(body_preview)만 두고, 전체 본문은 카드 확장 / 답장 생성 시 get_email_body로 조회합니다.
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS email_bodies (
+                email_id TEXT PRIMARY KEY,
+                body BLOB
+            )
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_bodies_delete AFTER DELETE ON emails BEGIN
+                DELETE FROM email_bodies WHERE email_id = old.id;
+            END
+        ''')
+    
+    def _init_features(self, cursor: sqlite3.Cursor):
+        """
+        학습 리드 점수 특징 저장 테이블 (메일 ID → 해시 버킷 목록 BLOB, engine/lead_model.featurize)
+        
+        재학습 / 재채점이 본문을 다시 풀어 토큰화하지 않고 저장된 버킷으로 바로 행렬을 만듭니다.
+        version이 현재 특징 형식과 다른 행은 lead_model이 다시 만듭니다.
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS email_features (
+                email_id TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                features BLOB NOT NULL
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_features_delete AFTER DELETE ON emails BEGIN
+                DELETE FROM email_features WHERE email_id = old.id;
+            END
+        ''')
+    
+    @staticmethod
+    def _thread_refresh_sql(ref: str) -> str:
+        """
+        스레드 집계 1건 재계산 (트리거 본문 - ref: new / old, 스팸 메일은 집계 제외, 모두 스팸이면 행 없음)
+        
+        +is_spam: 스팸 여부 인덱스(idx_spam)로 비스팸 메일 전체를 훑지 않고 (thread_id, 날짜) 인덱스 범위만 읽도록
+        """
+        thread = f"{ref}.thread_id"
+        return f'''
+            DELETE FROM email_threads WHERE thread_id = {thread};
+            INSERT INTO email_threads (thread_id, subject, message_count, active_count, status,
+                                       score, intent_score, avg_intent, first_date, last_date, latest_id)
+            SELECT thread_id,
+                   (SELECT subject FROM emails WHERE thread_id = {thread} AND +is_spam = 0
+                    ORDER BY full_date, mail_date, id LIMIT 1),
+                   COUNT(*), SUM(status = 'Active'),
+                   CASE WHEN SUM(status = 'Active') > 0 THEN 'Active' ELSE 'Archived' END,
+                   MAX(score), MAX(intent_score), AVG(intent_score), MIN(full_date), MAX(full_date),
+                   (SELECT id FROM emails WHERE thread_id = {thread} AND +is_spam = 0
+                    ORDER BY full_date DESC, mail_date DESC, id DESC LIMIT 1)
+            FROM emails WHERE thread_id = {thread} AND +is_spam = 0
+            GROUP BY thread_id;
+        '''
+    
+    def _init_threads(self, cursor: sqlite3.Cursor):
+        """
+        대화(스레드) 색인 (스레드 → 메일 수 / 최고 점수 / 구매 의도 / 최근 메일, 트리거로 갱신)
+        
+        메일의 thread_id는 저장 시 _resolve_threads가 정하고(Gmail threadId 우선, 없으면 thread_messages로 헤더 연결),
+        메일이 추가 / 삭제 / 재채점 / 처리될 때마다 해당 스레드 1건만 (thread_id, 날짜) 인덱스로 다시 집계합니다.
+        대화별 목록은 email_threads의 (status, score) 인덱스만 읽습니다.
+        """
+        created = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'email_threads'"
+        ).fetchone() is None
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS email_threads (
+                thread_id TEXT PRIMARY KEY,
+                subject TEXT,
+                message_count INTEGER NOT NULL,
+                active_count INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                score REAL,
+                intent_score REAL,
+                avg_intent REAL,
+                first_date TEXT,
+                last_date TEXT,
+                latest_id TEXT
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_threads_rank ON email_threads(status, score DESC, thread_id DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_thread ON emails(thread_id, full_date, mail_date, id)')
+        # Message-ID → 스레드 (저장한 메일 + 그 메일의 In-Reply-To / References가 가리키는 메일 - 아직 수집 전이어도)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS thread_messages (
+                message_id TEXT PRIMARY KEY,
+                thread_id TEXT NOT NULL
+            ) WITHOUT ROWID
+        ''')
+        
+        if created:
+            # 헤더를 저장하기 전 메일은 1건짜리 대화 (트리거 생성 전에 일괄 집계)
+            cursor.execute('UPDATE emails SET thread_id = id WHERE thread_id IS NULL')
+            cursor.execute('''
+                INSERT INTO email_threads (thread_id, subject, message_count, active_count, status,
+                                           score, intent_score, avg_intent, first_date, last_date, latest_id)
+                SELECT thread_id, subject, COUNT(*), SUM(status = 'Active'),
+                       CASE WHEN SUM(status = 'Active') > 0 THEN 'Active' ELSE 'Archived' END,
+                       MAX(score), MAX(intent_score), AVG(intent_score), MIN(full_date), MAX(full_date), MAX(id)
+                FROM emails WHERE is_spam = 0
+                GROUP BY thread_id
+            ''')
+        
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_threads_insert AFTER INSERT ON emails
+            WHEN new.thread_id IS NOT NULL BEGIN
+                {self._thread_refresh_sql('new')}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_threads_delete AFTER DELETE ON emails
+            WHEN old.thread_id IS NOT NULL BEGIN
+                {self._thread_refresh_sql('old')}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_threads_update
+            AFTER UPDATE OF thread_id, subject, status, is_spam, score, intent_score, full_date, mail_date ON emails
+            BEGIN
+                {self._thread_refresh_sql('old')}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_threads_move AFTER UPDATE OF thread_id ON emails
+            WHEN new.thread_id IS NOT old.thread_id AND new.thread_id IS NOT NULL BEGIN
+                {self._thread_refresh_sql('new')}
+            END
+        ''')
+    
+    def _migrate_bodies(self, conn: sqlite3.Connection):
+        """
+        스키마 0 → 1: emails.body_text를 email_bodies로 압축 이동 (제자리 변환)
+        
+        body_text를 참조하던 검색 인덱스(FTS) / 트리거를 지우고 본문을 옮긴 뒤 컬럼을 삭제하고
+        VACUUM으로 공간을 회수합니다. (VACUUM으로 rowid가 바뀔 수 있어 검색 인덱스는 이후 _init_fulltext에서 재생성)
+        """
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(emails)')}
+        if version >= 1 or 'body_text' not in columns:
+            return
+        
+        logger.info("Migrating emails.body_text → email_bodies (compressed)")
+        for trigger in ('trg_fts_insert', 'trg_fts_delete', 'trg_fts_update'):
+            conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        conn.execute('DROP TABLE IF EXISTS emails_fts')
+        
+        conn.execute('''
+            INSERT OR IGNORE INTO email_bodies (email_id, body)
+            SELECT id, compress_body(COALESCE(body_text, '')) FROM emails
+        ''')
+        conn.execute(f'''
+            UPDATE emails SET body_preview = substr(body_text, 1, {self.BODY_PREVIEW_CHARS})
+            WHERE body_preview IS NULL
+        ''')
+        if sqlite3.sqlite_version_info >= (3, 35, 0):
+            conn.execute('ALTER TABLE emails DROP COLUMN body_text')
+        else:
+            conn.execute('UPDATE emails SET body_text = NULL')
+        conn.execute('PRAGMA user_version = 1')
+        conn.commit()
+        
+        conn.execute('VACUUM')
+        logger.info("Migrated bodies to email_bodies")
+    
+    @classmethod
+    def _band_key_sql(cls, row: str, band: int) -> str:
+        """트리거용 밴드 키 식 (서명의 band번째 구간)"""
+        size = cls.MINHASH_BAND_BYTES
+        return f"substr({row}.minhash, {band * size + 1}, {size})"
+    
+    @classmethod
+    def minhash_band_keys(cls, signature: bytes) -> List[bytes]:
+        """MinHash 서명 → LSH 밴드 키 목록 (트리거의 _band_key_sql과 같은 값)"""
+        size = cls.MINHASH_BAND_BYTES
+        return [signature[band * size:(band + 1) * size] for band in range(cls.MINHASH_BANDS)]
+    
+    def _init_clusters(self, cursor: sqlite3.Cursor):
+        """
+        유사 메일 밴드 인덱스 + 묶음 트리거 생성
+        
+        - email_minhash_bands: 서명이 있는 대표 메일마다 밴드 키 8개 (트리거로 유지, 유사 메일은 후보가 아니므로 제외)
+        - dup_count: 대표 메일(cluster_id = id)의 묶음 크기 (자신 포함, 트리거로 유지)
+        - 대표 메일이 삭제되면 묶음을 풀어 남은 메일이 각자 표시되게 함
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS email_minhash_bands (
+                band_key BLOB NOT NULL,
+                email_id TEXT NOT NULL,
+                PRIMARY KEY (band_key, email_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_cluster ON emails(cluster_id)')
+        
+        new_keys = ', '.join(f'({self._band_key_sql("new", b)})' for b in range(self.MINHASH_BANDS))
+        old_keys = ', '.join(self._band_key_sql('old', b) for b in range(self.MINHASH_BANDS))
+        insert_bands = f'''
+            INSERT OR IGNORE INTO email_minhash_bands (band_key, email_id)
+            SELECT column1, new.id FROM (VALUES {new_keys})
+            WHERE new.minhash IS NOT NULL AND new.cluster_id = new.id;
+        '''
+        delete_bands = f'''
+            DELETE FROM email_minhash_bands WHERE email_id = old.id AND band_key IN ({old_keys});
+        '''
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_cluster_insert AFTER INSERT ON emails BEGIN
+                {insert_bands}
+                UPDATE emails SET dup_count = dup_count + 1
+                WHERE id = new.cluster_id AND new.cluster_id != new.id;
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_cluster_delete AFTER DELETE ON emails BEGIN
+                {delete_bands}
+                UPDATE emails SET dup_count = dup_count - 1
+                WHERE id = old.cluster_id AND old.cluster_id != old.id;
+                UPDATE emails SET cluster_id = NULL WHERE cluster_id = old.id;
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_bands_update AFTER UPDATE OF minhash, cluster_id ON emails
+            WHEN old.minhash IS NOT new.minhash OR old.cluster_id IS NOT new.cluster_id BEGIN
+                {delete_bands}
+                {insert_bands}
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_cluster_update AFTER UPDATE OF cluster_id ON emails
+            WHEN old.cluster_id IS NOT new.cluster_id BEGIN
+                UPDATE emails SET dup_count = dup_count - 1
+                WHERE id = old.cluster_id AND old.cluster_id != old.id;
+                UPDATE emails SET dup_count = dup_count + 1
+                WHERE id = new.cluster_id AND new.cluster_id != new.id;
+            END
+        ''')
+    
+    @classmethod
+    def _stat_delta(cls, row: str, sign: str) -> str:
+        """트리거용 카운터 증감 SET 절"""
+        parts = [f"{col} = {col} {sign} (CASE WHEN {cond.format(r=row)} THEN 1 ELSE 0 END)"
+                 for col, cond in cls.STAT_COUNTERS.items()]
+        parts.append(f"score_sum_x10 = score_sum_x10 {sign} ({cls.STAT_SCORE_SUM.format(r=row)})")
+        return ', '.join(parts)
+    
+    def _init_statistics(self, cursor: sqlite3.Cursor):
+        """통계 테이블 + 트리거 생성 (최초 생성 시 기존 데이터로 재계산)"""
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'email_stats'"
+        ).fetchone()
+        
+        counter_cols = ',\n'.join(f'{col} INTEGER NOT NULL DEFAULT 0' for col in self.STAT_COUNTERS)
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS email_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                {counter_cols},
+                score_sum_x10 INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_stats_insert AFTER INSERT ON emails BEGIN
+                UPDATE email_stats SET {self._stat_delta('NEW', '+')} WHERE id = 1;
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_stats_delete AFTER DELETE ON emails BEGIN
+                UPDATE email_stats SET {self._stat_delta('OLD', '-')} WHERE id = 1;
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_stats_update AFTER UPDATE OF status, is_spam, score ON emails BEGIN
+                UPDATE email_stats SET {self._stat_delta('OLD', '-')} WHERE id = 1;
+                UPDATE email_stats SET {self._stat_delta('NEW', '+')} WHERE id = 1;
+            END
+        ''')
+        
+        if not exists:
+            self._rebuild_statistics(cursor)
+    
+    def _rebuild_statistics(self, cursor: sqlite3.Cursor):
+        counters = ', '.join(f'COALESCE(SUM(CASE WHEN {cond.format(r="emails")} THEN 1 ELSE 0 END), 0)'
+                             for cond in self.STAT_COUNTERS.values())
+        cursor.execute(f'''
+            INSERT OR REPLACE INTO email_stats (id, {', '.join(self.STAT_COUNTERS)}, score_sum_x10)
+            SELECT 1, {counters}, COALESCE(SUM({self.STAT_SCORE_SUM.format(r="emails")}), 0)
+            FROM emails
+        ''')
+    
+    def rebuild_statistics(self):
+        """통계 전체 재계산 (단일 쿼리)"""
+        conn = self._get_conn()
+        self._rebuild_statistics(conn.cursor())
+        conn.commit()
+    
+    @classmethod
+    def _reputation_sql(cls, row: str) -> Dict[str, str]:
+        """트리거용 평판 집계 식 (행 1건의 기여분)"""
+        score = cls.REPUTATION_SCORE.format(r=row)
+        return {
+            'keys': ', '.join(key.format(r=row) for key in cls.REPUTATION_KEYS),
+            'values': ', '.join(f'({key.format(r=row)})' for key in cls.REPUTATION_KEYS),
+            'row': cls.REPUTATION_ROW.format(r=row),
+            'spam': f"(CASE WHEN {row}.is_spam = 1 THEN 1 ELSE 0 END)",
+            'scored': f"(CASE WHEN {row}.is_spam = 0 THEN 1 ELSE 0 END)",
+            'score_sum_x10': f"(CASE WHEN {row}.is_spam = 0 THEN CAST(ROUND(({score}) * 10) AS INTEGER) ELSE 0 END)",
+            'max_score': f"(CASE WHEN {row}.is_spam = 0 THEN {score} END)",
+        }
+    
+    def _init_reputation(self, cursor: sqlite3.Cursor):
+        """
+        발신자 평판 테이블 + 트리거 생성 (최초 생성 시 기존 데이터로 재계산)
+        
+        발신 주소와 '@도메인' 각각 1행: 메일 수 / 스팸 수 / 평균 점수(합계) / 최고 점수 / 최근 저장 시각.
+        저장·삭제·재분석 시 트리거가 해당 2행만 증감하므로 분석 중에는 PK 조회 1회로 읽습니다.
+        (최고 점수와 최근 저장 시각은 삭제 시 되돌리지 않음)
+        """
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sender_reputation'"
+        ).fetchone()
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sender_reputation (
+                entity TEXT PRIMARY KEY,
+                messages INTEGER NOT NULL DEFAULT 0,
+                spam INTEGER NOT NULL DEFAULT 0,
+                scored INTEGER NOT NULL DEFAULT 0,
+                score_sum_x10 INTEGER NOT NULL DEFAULT 0,
+                max_score REAL,
+                last_seen TEXT
+            ) WITHOUT ROWID
+        ''')
+        
+        new, old = self._reputation_sql('new'), self._reputation_sql('old')
+        add = f'''
+            INSERT INTO sender_reputation (entity, messages, spam, scored, score_sum_x10, max_score, last_seen)
+            SELECT column1, 1, {new['spam']}, {new['scored']}, {new['score_sum_x10']}, {new['max_score']}, new.created_at
+            FROM (VALUES {new['values']}) WHERE {new['row']}
+            ON CONFLICT(entity) DO UPDATE SET
+                messages = messages + 1,
+                spam = spam + excluded.spam,
+                scored = scored + excluded.scored,
+                score_sum_x10 = score_sum_x10 + excluded.score_sum_x10,
+                max_score = CASE WHEN max_score IS NULL OR excluded.max_score > max_score
+                                 THEN excluded.max_score ELSE max_score END,
+                last_seen = CASE WHEN last_seen IS NULL OR excluded.last_seen > last_seen
+                                 THEN excluded.last_seen ELSE last_seen END;
+        '''
+        subtract = f'''
+            UPDATE sender_reputation SET
+                messages = messages - 1,
+                spam = spam - {old['spam']},
+                scored = scored - {old['scored']},
+                score_sum_x10 = score_sum_x10 - {old['score_sum_x10']}
+            WHERE entity IN ({old['keys']}) AND {old['row']};
+            DELETE FROM sender_reputation WHERE entity IN ({old['keys']}) AND messages <= 0;
+        '''
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_reputation_insert AFTER INSERT ON emails BEGIN
+                {add}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_reputation_delete AFTER DELETE ON emails BEGIN
+                {subtract}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_reputation_update
+            AFTER UPDATE OF sender_email, score, is_spam, reputation_adj ON emails
+            WHEN old.sender_email IS NOT new.sender_email OR old.score IS NOT new.score
+                 OR old.is_spam IS NOT new.is_spam OR old.reputation_adj IS NOT new.reputation_adj BEGIN
+                {subtract}
+                {add}
+            END
+        ''')
+        
+        if not exists:
+            self._rebuild_reputation(cursor)
+    
+    def _rebuild_reputation(self, cursor: sqlite3.Cursor):
+        keyed = ' UNION ALL '.join(f"SELECT {key.format(r='emails')} AS entity, emails.* FROM emails "
+                                   f"WHERE {self.REPUTATION_ROW.format(r='emails')}" for key in self.REPUTATION_KEYS)
+        agg = self._reputation_sql('e')
+        cursor.execute('DELETE FROM sender_reputation')
+        cursor.execute(f'''
+            INSERT INTO sender_reputation (entity, messages, spam, scored, score_sum_x10, max_score, last_seen)
+            SELECT entity, COUNT(*), SUM({agg['spam']}), SUM({agg['scored']}), SUM({agg['score_sum_x10']}),
+                   MAX({agg['max_score']}), MAX(e.created_at)
+            FROM ({keyed}) AS e
+            GROUP BY entity
+        ''')
+    
+    def rebuild_reputation(self):
+        """발신자 평판 전체 재계산 (단일 쿼리 - 평소에는 트리거가 증분 갱신)"""
+        conn = self._get_conn()
+        self._rebuild_reputation(conn.cursor())
+        conn.commit()
+    
+    @classmethod
+    def reputation_keys(cls, sender_email: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        """발신 주소 → (발신자 키, '@도메인' 키) - REPUTATION_KEYS / REPUTATION_ROW와 같은 정규화"""
+        if not sender_email or '@' not in sender_email[1:-1]:
+            return None, None
+        address = sender_email.lower()
+        return address, '@' + address.split('@', 1)[1]
+    
+    def get_sender_reputations(self, sender_emails: List[str]) -> Dict[str, Dict]:
+        """
+        발신자 / 도메인 평판 일괄 조회 (PK 조회)
+        
+        Returns:
+            {평판 키: {'messages', 'spam', 'scored', 'score_sum_x10', 'avg_score', 'max_score', 'last_seen'}}
+            키는 reputation_keys()의 발신자 키 / '@도메인' 키
+        """
+        keys = sorted({key for sender_email in sender_emails
+                       for key in self.reputation_keys(sender_email) if key})
+        conn = self._get_conn()
+        found = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(f'SELECT * FROM sender_reputation WHERE entity IN ({placeholders})', chunk)
+            for row in rows:
+                found[row['entity']] = {
+                    'messages': row['messages'],
+                    'spam': row['spam'],
+                    'scored': row['scored'],
+                    'score_sum_x10': row['score_sum_x10'],
+                    'avg_score': round(row['score_sum_x10'] / 10 / row['scored'], 1) if row['scored'] else 0,
+                    'max_score': row['max_score'],
+                    'last_seen': row['last_seen'],
+                }
+        return found
+    
+    def _init_fulltext(self, cursor: sqlite3.Cursor) -> bool:
+        """
+        FTS5 검색 인덱스 + 동기화 트리거 생성
+        
+        emails + 압축 본문(email_bodies)을 합친 뷰를 content 테이블로 쓰는 external content 방식이라
+        본문을 중복 저장하지 않습니다. (새 메일은 저장 시 압축 전 본문으로 색인하고,
+        본문 변경 / 삭제 / 발췌 시에만 decompress_body SQL 함수로 풀어서 사용)
+        (rowid 기준 연결 - VACUUM 등으로 rowid가 바뀌면 rebuild_search_index 필요)
+        
+        Returns:
+            FTS5 사용 가능 여부 (미지원 SQLite 빌드면 False → LIKE 검색으로 대체)
+        """
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'emails_fts'"
+        ).fetchone()
+        
+        cols = ', '.join(self.FTS_COLUMNS)
+        body = "(SELECT decompress_body(body) FROM email_bodies WHERE email_id = {r}.id)"
+        email_cols = ', '.join(f'{{r}}.{c}' if c != 'body_text' else body for c in self.FTS_COLUMNS)
+        view_cols = ', '.join(f'e.{c}' if c != 'body_text' else 'decompress_body(b.body) AS body_text'
+                              for c in self.FTS_COLUMNS)
+        try:
+            cursor.execute(f'''
+                CREATE VIEW IF NOT EXISTS emails_fts_content AS
+                SELECT e.rowid AS rowid, {view_cols}
+                FROM emails e LEFT JOIN email_bodies b ON b.email_id = e.id
+            ''')
+            cursor.execute(f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS emails_fts USING fts5(
+                    {cols}, content='emails_fts_content', content_rowid='rowid'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 unavailable, falling back to LIKE search: {e}")
+            return False
+        
+        # 새 메일 색인은 _store_bodies가 압축 전 본문으로 직접 추가 (방금 압축한 본문을 트리거가 다시 풀지 않음)
+        # 본문 변경은 email_bodies 기준, 삭제는 본문 행이 지워지기 전(BEFORE DELETE)에 색인된 값으로 제거
+        cursor.execute('DROP TRIGGER IF EXISTS trg_fts_insert')
+        body_cols = ', '.join('decompress_body(new.body)' if c == 'body_text' else f'e.{c}'
+                              for c in self.FTS_COLUMNS)
+        old_body_cols = ', '.join('decompress_body(old.body)' if c == 'body_text' else f'e.{c}'
+                                  for c in self.FTS_COLUMNS)
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_fts_body_update AFTER UPDATE OF body ON email_bodies BEGIN
+                INSERT INTO emails_fts (emails_fts, rowid, {cols})
+                SELECT 'delete', e.rowid, {old_body_cols} FROM emails e WHERE e.id = old.email_id;
+                INSERT INTO emails_fts (rowid, {cols})
+                SELECT e.rowid, {body_cols} FROM emails e WHERE e.id = new.email_id;
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_fts_delete BEFORE DELETE ON emails BEGIN
+                INSERT INTO emails_fts (emails_fts, rowid, {cols})
+                VALUES ('delete', old.rowid, {email_cols.format(r='old')});
+            END
+        ''')
+        text_cols = [c for c in self.FTS_COLUMNS if c != 'body_text']
+        changed = ' OR '.join(f'old.{c} IS NOT new.{c}' for c in text_cols)
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_fts_update AFTER UPDATE OF {', '.join(text_cols)} ON emails
+            WHEN {changed} BEGIN
+                INSERT INTO emails_fts (emails_fts, rowid, {cols})
+                VALUES ('delete', old.rowid, {email_cols.format(r='old')});
+                INSERT INTO emails_fts (rowid, {cols})
+                VALUES (new.rowid, {email_cols.format(r='new')});
+            END
+        ''')
+        
+        if not exists:
+            cursor.execute("INSERT INTO emails_fts (emails_fts) VALUES ('rebuild')")
+        return True
+    
+    def rebuild_search_index(self):
+        """검색 인덱스 전체 재생성"""
+        if not self.fts_enabled:
+            return
+        conn = self._get_conn()
+        conn.execute("INSERT INTO emails_fts (emails_fts) VALUES ('rebuild')")
+        conn.commit()
+    
+    def _init_keyword_index(self, cursor: sqlite3.Cursor) -> bool:
+        """
+        키워드 색인 (키워드 / 카테고리 / 기간별 집계 필터, 규칙 변경 재채점 대상 계산)
+        
+        email_keywords: 분석 시 매칭된 키워드 → 메일 (카테고리 / 점수, 메일 날짜 / 상태는 트리거로 emails와 동기화)
+            facet 집계는 (status, mail_day, category, keyword) 커버링 인덱스만 읽습니다.
+            키워드 삭제 / 점수 변경 시 영향받는 메일도 여기서 조회
+        email_terms: 분석 대상 텍스트(은어 치환 후)의 단어 → 메일 (키워드 추가 시 후보 메일)
+            문서 목록만 저장하는 contentless FTS5 (content='', detail=none)라 본문을 중복 저장하지 않고,
+            재분석 / 삭제된 메일의 이전 항목은 지우지 않습니다. (후보를 넓힐 뿐 재분석으로 확정하므로 결과에 영향 없음)
+            emails.rowid 기준 연결 - VACUUM 등으로 rowid가 바뀌면 python -m engine.rescore --full 필요
+        
+        Returns:
+            email_terms 사용 가능 여부 (FTS5 미지원이면 False → 키워드 추가 시 해당 버전 메일 전체 재채점)
+        """
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(email_keywords)')}
+        if columns and 'category' not in columns:
+            # 키워드만 있던 이전 색인 → 다시 만들고 규칙 버전을 비워 다음 재채점(engine.rescore)에서 채움
+            logger.info("Rebuilding email_keywords with category / date columns (run python -m engine.rescore)")
+            cursor.execute('DROP TABLE email_keywords')
+            cursor.execute('UPDATE emails SET rules_version = NULL')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS email_keywords (
+                keyword TEXT NOT NULL,
+                email_id TEXT NOT NULL,
+                category TEXT,
+                points REAL,
+                mail_day TEXT,
+                status TEXT,
+                PRIMARY KEY (keyword, email_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_email_keywords_email ON email_keywords(email_id)')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_email_keywords_facet
+            ON email_keywords(status, mail_day, category, keyword)
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_keywords_delete AFTER DELETE ON emails BEGIN
+                DELETE FROM email_keywords WHERE email_id = old.id;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_keywords_sync AFTER UPDATE OF status, full_date ON emails
+            WHEN new.status IS NOT old.status OR new.full_date IS NOT old.full_date BEGIN
+                UPDATE email_keywords SET status = new.status, mail_day = substr(new.full_date, 1, 10)
+                WHERE email_id = new.id;
+            END
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_rules_version ON emails(rules_version)')
+        
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS email_terms USING fts5(
+                    text, content='', detail=none, tokenize='unicode61 remove_diacritics 0'
+                )
+            ''')
+            cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS email_terms_vocab USING fts5vocab(email_terms, 'row')")
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 unavailable, keyword changes will rescore whole rule versions: {e}")
+            return False
+        return True
+    
+    # 목록 화면 조회 컬럼 (본문은 미리보기만 - 전체 본문은 get_email_body로 필요할 때 압축 해제)
+    LIST_COLUMNS = (
+        'id', 'subject', 'sender', 'sender_email', 'snippet', 'body_preview',
+        'score', 'clarity_score', 'intent_score', 'terms_score',
+        'reason', 'keywords', 'language', 'is_spam', 'has_attachment', 'is_reply',
+        'status', 'mail_date', 'full_date', 'cluster_id', 'dup_count', 'reputation_adj', 'ml_score', 'thread_id'
+    )
+    # keyset 페이지네이션 정렬 키
+    LIST_SORT_COLUMNS = ('score', 'intent_score')
+    
+    # insert_email_full / insert_emails_bulk 공통 컬럼 순서
+    EMAIL_COLUMNS = (
+        'id', 'subject', 'sender', 'sender_email', 'snippet', 'body_preview',
+        'score', 'clarity_score', 'intent_score', 'terms_score',
+        'reason', 'keywords', 'language', 'is_spam', 'has_attachment', 'is_reply',
+        'status', 'mail_date', 'full_date', 'created_at', 'minhash', 'cluster_id', 'reputation_adj',
+        'rules_version', 'ml_score', 'message_id', 'in_reply_to', 'reference_ids', 'thread_id'
+    )
+    # 기존 메일 갱신 시 유지하는 컬럼 (사용자 처리 상태, 최초 저장 시각)
+    PRESERVED_COLUMNS = ('id', 'status', 'created_at')
+    
+    @staticmethod
+    def _email_body(email_data: Dict) -> Optional[str]:
+        """이메일 dict의 전체 본문 (없으면 None - 저장된 본문 유지)"""
+        body = email_data.get('body_text') or email_data.get('body')
+        return body if isinstance(body, str) else None
+    
+    @classmethod
+    def _email_row(cls, email_data: Dict, created_at: str) -> tuple:
+        """이메일 dict → EMAIL_COLUMNS 순서의 행"""
+        body = cls._email_body(email_data)
+        return (
+            email_data.get('id'),
+            email_data.get('subject'),
+            email_data.get('sender'),
+            email_data.get('sender_email'),
+            email_data.get('snippet'),
+            body[:cls.BODY_PREVIEW_CHARS] if body is not None else email_data.get('body_preview'),
+            email_data.get('score', 0),
+            email_data.get('clarity_score', 0),
+            email_data.get('intent_score', 0),
+            email_data.get('terms_score', 0),
+            email_data.get('reason', ''),
+            email_data.get('keywords', ''),
+            email_data.get('language', 'EN'),
+            1 if email_data.get('is_spam') else 0,
+            1 if email_data.get('has_attachment') else 0,
+            1 if email_data.get('is_reply') else 0,
+            email_data.get('status', 'Active'),
+            email_data.get('mail_date'),
+            email_data.get('full_date'),
+            created_at,
+            email_data.get('minhash'),
+            email_data.get('cluster_id'),
+            email_data.get('reputation_adj', 0),
+            # 영향 색인(index_text)과 함께 저장하는 행만 버전 기록 - 색인 없는 메일은 재채점 시 전체 대상
+            email_data.get('rules_version') if 'index_text' in email_data else None,
+            email_data.get('ml_score'),
+            email_data.get('message_id'),
+            email_data.get('in_reply_to'),
+            ' '.join(email_data.get('references') or []) or None,
+            # 저장 시 _resolve_threads가 정한 스레드로 교체 (마지막 컬럼)
+            email_data.get('thread_id')
+        )
+    
     def insert_email_full(self, email_data: Dict) -> bool:
         """이메일 전체 데이터 저장"""
         try:
             conn = self._get_conn()
             cursor = conn.cursor()
             
-            cursor.execute('''
-                INSERT OR REPLACE INTO emails 
-                (id, subject, sender, sender_email, snippet, body_text,
-                 score, clarity_score, intent_score, terms_score,
-                 reason, keywords, language, is_spam, has_attachment, is_reply,
-                 status, mail_date, full_date, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                email_data.get('id'),
-                email_data.get('subject'),
-                email_data.get('sender'),
-                email_data.get('sender_email'),
-                email_data.get('snippet'),
-                email_data.get('body_text') or email_data.get('body'),
-                email_data.get('score', 0),
-                email_data.get('clarity_score', 0),
-                email_data.get('intent_score', 0),
-                email_data.get('terms_score', 0),
-                email_data.get('reason', ''),
-                email_data.get('keywords', ''),
-                email_data.get('language', 'EN'),
-                1 if email_data.get('is_spam') else 0,
-                1 if email_data.get('has_attachment') else 0,
-                1 if email_data.get('is_reply') else 0,
-                email_data.get('status', 'Active'),
-                email_data.get('mail_date'),
-                email_data.get('full_date'),
-                datetime.now().isoformat()
-            ))
+            # INSERT OR REPLACE는 삭제 트리거 없이 행을 지우므로 통계가 어긋남 → UPSERT 사용
+            columns = ', '.join(self.EMAIL_COLUMNS)
+            placeholders = ', '.join('?' * len(self.EMAIL_COLUMNS))
+            assignments = ', '.join(f'{c} = excluded.{c}' for c in self.EMAIL_COLUMNS if c != 'id')
+            cursor.execute(
+                f'''INSERT INTO emails ({columns}) VALUES ({placeholders})
+                    ON CONFLICT(id) DO UPDATE SET {assignments}''',
+                self._email_row(email_data, datetime.now().isoformat())[:-1]
+                + (self._resolve_threads(conn, [email_data])[email_data.get('id')],)
+            )
+            self._store_bodies(conn, {email_data.get('id'): self._email_body(email_data)})
+            self._store_keyword_index(conn, [email_data])
+            self._store_features(conn, [email_data])
             
             conn.commit()
             return True
@@ -115,6 +952,198 @@ class DBManager:
             logger.error(f"Insert full failed: {e}")
             return False
     
+    @staticmethod
+    def _email_values(conn: sqlite3.Connection, email_ids: List[str], columns: List[str]) -> Dict[str, tuple]:
+        """저장된 메일 행의 지정 컬럼 값 (메일 ID → 값 tuple, 저장 트랜잭션 안에서 색인 행 생성용)"""
+        found = {}
+        for start in range(0, len(email_ids), 500):
+            chunk = email_ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(f"SELECT id, {', '.join(columns)} FROM emails WHERE id IN ({placeholders})", chunk)
+            found.update((row[0], tuple(row[1:])) for row in rows)
+        return found
+    
+    def _store_bodies(self, conn: sqlite3.Connection, bodies: Dict[str, Optional[str]]):
+        """
+        본문 압축 저장 + 새 메일 검색 색인 (메일 행 저장 후 호출 - 색인에 메일 행의 rowid / 제목 등 사용)
+        
+        새 메일은 압축 전 본문으로 바로 색인합니다. (방금 압축한 본문을 색인 트리거가 다시 풀지 않음)
+        본문이 None이면 새 메일은 빈 본문으로 저장하고, 기존 메일은 저장된 본문을 유지합니다.
+        같은 본문이면 갱신하지 않습니다. (압축 결과가 같으면 검색 인덱스 재색인 생략)
+        """
+        email_ids = list(bodies)
+        stored = set()
+        for start in range(0, len(email_ids), 500):
+            chunk = email_ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(f'SELECT email_id FROM email_bodies WHERE email_id IN ({placeholders})', chunk)
+            stored.update(row[0] for row in rows)
+        new = {email_id: body or '' for email_id, body in bodies.items() if email_id not in stored}
+        
+        conn.executemany('INSERT INTO email_bodies (email_id, body) VALUES (?, ?)',
+                         [(email_id, compress_body(body)) for email_id, body in new.items()])
+        if self.fts_enabled:
+            # 메일 행 값을 먼저 읽어 VALUES로 추가 (가상 테이블에 INSERT ... SELECT를 행마다 실행하면 몇 배 느림)
+            text_cols = [c for c in self.FTS_COLUMNS if c != 'body_text']
+            stored_rows = self._email_values(conn, list(new), ['rowid'] + text_cols)
+            indexed = []
+            for email_id, (rowid, *texts) in stored_rows.items():
+                values = dict(zip(text_cols, texts), body_text=new[email_id])
+                indexed.append((rowid, *(values[c] for c in self.FTS_COLUMNS)))
+            placeholders = ', '.join('?' * (len(self.FTS_COLUMNS) + 1))
+            conn.executemany(f"INSERT INTO emails_fts (rowid, {', '.join(self.FTS_COLUMNS)}) VALUES ({placeholders})",
+                             indexed)
+        # 기존 메일 본문 변경 → trg_fts_body_update가 재색인
+        conn.executemany('''
+            INSERT INTO email_bodies (email_id, body) VALUES (?, ?)
+            ON CONFLICT(email_id) DO UPDATE SET body = excluded.body
+            WHERE body IS NOT excluded.body
+        ''', [(email_id, compress_body(body)) for email_id, body in bodies.items()
+              if email_id in stored and body is not None])
+    
+    def _store_keyword_index(self, conn: sqlite3.Connection, emails: List[Dict]):
+        """
+        매칭 키워드 / 분석 텍스트 단어 색인 (메일 행 저장 후 호출)
+        
+        분석 결과의 matched가 있는 메일만 키워드 목록을 교체하고, index_text가 있는 메일만 단어를 색인합니다.
+        메일 행의 rowid / 날짜 / 상태는 한 번에 읽어 VALUES로 추가합니다. (행마다 INSERT ... SELECT 생략)
+        """
+        matched = [e for e in emails if e.get('matched') is not None]
+        indexed = [e for e in emails if e.get('index_text')] if self.terms_enabled else []
+        stored = self._email_values(conn, list({e['id']: None for e in matched + indexed}),
+                                    ['rowid', 'substr(full_date, 1, 10)', 'status'])
+        
+        conn.executemany('DELETE FROM email_keywords WHERE email_id = ?', [(e['id'],) for e in matched])
+        conn.executemany('''
+            INSERT OR IGNORE INTO email_keywords (keyword, email_id, category, points, mail_day, status)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(keyword, e['id'], category, points, *stored[e['id']][1:])
+              for e in matched if e['id'] in stored for keyword, category, points in e['matched']])
+        conn.executemany('INSERT INTO email_terms (rowid, text) VALUES (?, ?)',
+                         [(stored[e['id']][0], e['index_text']) for e in indexed if e['id'] in stored])
+    
+    def _resolve_threads(self, conn: sqlite3.Connection, emails: List[Dict]) -> Dict[str, str]:
+        """
+        저장할 메일의 스레드 결정 {메일 ID: thread_id} + thread_messages 기록 (저장 트랜잭션 안에서 호출)
+        
+        1. Gmail threadId (email['thread_id'])
+        2. 답장 대상(In-Reply-To) → References 역순 → 이 메일의 Message-ID 중
+           이미 스레드가 정해진 Message-ID (같은 배치 → thread_messages)
+           - 답장이 부모보다 먼저 수집되어도 답장이 참조한 부모 Message-ID가 기록되어 있어 같은 스레드
+        3. 이미 저장된 메일이면 기존 스레드, 아니면 메일 ID (새 대화)
+        """
+        threads = {}
+        by_message = {}     # 배치 안에서 정해진 Message-ID → 스레드
+        
+        def linked_ids(email: Dict) -> List[str]:
+            return [m for m in (email.get('in_reply_to'), *reversed(email.get('references') or []),
+                                email.get('message_id')) if m]
+        
+        def stored(message_id: str) -> Optional[str]:
+            row = conn.execute('SELECT thread_id FROM thread_messages WHERE message_id = ?', (message_id,)).fetchone()
+            return row[0] if row else None
+        
+        for email in emails:
+            if email.get('thread_id'):
+                threads[email['id']] = email['thread_id']
+                for message_id in linked_ids(email):
+                    by_message.setdefault(message_id, email['thread_id'])
+        
+        for email in emails:
+            if email['id'] in threads:
+                continue
+            linked = linked_ids(email)
+            thread = next((by_message[m] for m in linked if m in by_message), None)
+            if thread is None:
+                thread = next(filter(None, map(stored, linked)), None)
+            if thread is None:
+                row = conn.execute('SELECT thread_id FROM emails WHERE id = ?', (email['id'],)).fetchone()
+                thread = (row and row[0]) or email['id']
+            threads[email['id']] = thread
+            for message_id in linked:
+                by_message.setdefault(message_id, thread)
+        
+        conn.executemany('INSERT OR IGNORE INTO thread_messages (message_id, thread_id) VALUES (?, ?)',
+                         by_message.items())
+        return threads
+    
+    def _store_features(self, conn: sqlite3.Connection, emails: List[Dict]):
+        """학습 리드 점수 특징 저장 (파이프라인이 ml_features = (형식 버전, 버킷 BLOB)을 붙인 메일만)"""
+        conn.executemany(
+            'INSERT OR REPLACE INTO email_features (email_id, version, features) VALUES (?, ?, ?)',
+            [(e['id'], *e['ml_features']) for e in emails if e.get('ml_features')]
+        )
+    
+    def insert_emails_bulk(self, emails: List[Dict], replace: bool = False) -> Dict[str, int]:
+        """
+        이메일 일괄 저장 (단일 트랜잭션 + executemany)
+        
+        Args:
+            emails: 분석 결과가 포함된 이메일 dict 목록
+            replace: True면 이미 저장된 메일의 분석 결과를 갱신 (처리 상태는 유지)
+                     False면 이미 저장된 메일은 건너뜀
+        
+        Returns:
+            {'inserted': n, 'updated': n, 'skipped': n}
+        """
+        counts = {'inserted': 0, 'updated': 0, 'skipped': 0}
+        now = datetime.now().isoformat()
+        
+        rows = {}
+        bodies = {}
+        sources = {}
+        for email_data in emails:
+            email_id = email_data.get('id')
+            if not email_id or email_id in rows:
+                counts['skipped'] += 1
+                continue
+            rows[email_id] = self._email_row(email_data, now)
+            bodies[email_id] = self._email_body(email_data)
+            sources[email_id] = email_data
+        
+        if not rows:
+            return counts
+        
+        conn = self._get_conn()
+        columns = ', '.join(self.EMAIL_COLUMNS)
+        placeholders = ', '.join('?' * len(self.EMAIL_COLUMNS))
+        update_idx = [i for i, c in enumerate(self.EMAIL_COLUMNS) if c not in self.PRESERVED_COLUMNS]
+        assignments = ', '.join(f'{self.EMAIL_COLUMNS[i]} = ?' for i in update_idx)
+        
+        try:
+            # 존재 여부 조회와 저장 사이에 다른 쓰기가 끼어들지 않도록 즉시 쓰기 잠금
+            conn.execute('BEGIN IMMEDIATE')
+            existing = self.get_email_ids(list(rows))
+            stored = [email_data for email_id, email_data in sources.items() if replace or email_id not in existing]
+            threads = self._resolve_threads(conn, stored)
+            rows = {email_id: row[:-1] + (threads[email_id],) if email_id in threads else row
+                    for email_id, row in rows.items()}
+            
+            new_rows = [row for email_id, row in rows.items() if email_id not in existing]
+            conn.executemany(f'INSERT INTO emails ({columns}) VALUES ({placeholders})', new_rows)
+            counts['inserted'] = len(new_rows)
+            
+            if replace:
+                conn.executemany(
+                    f'UPDATE emails SET {assignments} WHERE id = ?',
+                    [tuple(rows[email_id][i] for i in update_idx) + (email_id,) for email_id in existing]
+                )
+                counts['updated'] = len(existing)
+            else:
+                counts['skipped'] += len(existing)
+            self._store_bodies(conn, {email_id: body for email_id, body in bodies.items()
+                                      if replace or email_id not in existing})
+            self._store_keyword_index(conn, stored)
+            self._store_features(conn, stored)
+            
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Bulk insert failed: {e}")
+            raise
+        
+        return counts
+    
     def get_active_emails(self, sort_by: str = "score", limit: int = 50) -> List[Dict]:
         """활성 이메일 목록 (스팸 제외)"""
         conn = self._get_conn()
@@ -137,6 +1166,110 @@ class DBManager:
         
         return [dict(row) for row in cursor.fetchall()]
     
+    def list_emails(self, sort_by: str = "score", limit: int = 20, cursor: Optional[tuple] = None,
+                    status: Optional[str] = 'Active', include_spam: bool = False,
+                    collapse_duplicates: bool = True, keyword: Optional[str] = None,
+                    category: Optional[str] = None, date_from: Optional[str] = None,
+                    date_to: Optional[str] = None) -> Tuple[List[Dict], Optional[tuple]]:
+        """
+        목록 조회 (keyset 페이지네이션)
+        
+        OFFSET 없이 (정렬값, id) 커서 이후만 읽으므로 페이지 위치와 메일함 크기에 관계없이
+        인덱스에서 limit 건만 읽습니다.
+        
+        Args:
+            sort_by: 'score' | 'intent_score'
+            limit: 페이지 크기
+            cursor: 이전 페이지가 반환한 next_cursor (첫 페이지는 None)
+            status: 상태 필터 (None이면 전체)
+            include_spam: 스팸 포함 여부
+            collapse_duplicates: True면 유사 메일 묶음은 대표 메일 1건만 (dup_count = 묶음 크기)
+            keyword / category: 해당 키워드 / 카테고리 키워드가 매칭된 메일만 (email_keywords)
+            date_from / date_to: 메일 날짜 범위 'YYYY-MM-DD' (양 끝 포함)
+        
+        Returns:
+            (이메일 목록, next_cursor) - 마지막 페이지면 next_cursor는 None
+        """
+        if sort_by not in self.LIST_SORT_COLUMNS:
+            raise ValueError(f"Unsupported sort column: {sort_by}")
+        
+        where, params = [], []
+        if status is not None:
+            where.append('status = ?')
+            params.append(status)
+        if not include_spam:
+            where.append('is_spam = 0')
+        if collapse_duplicates:
+            where.append('(cluster_id IS NULL OR cluster_id = id)')
+        if keyword is not None:
+            where.append("id IN (SELECT email_id FROM email_keywords WHERE keyword = ? AND +category <> 'spam')")
+            params.append(keyword)
+        if category is not None:
+            facet_where, facet_params = self._facet_where(status, date_from, date_to, category)
+            where.append(f'id IN (SELECT email_id FROM email_keywords {facet_where})')
+            params.extend(facet_params)
+        if date_from is not None:
+            where.append('substr(full_date, 1, 10) >= ?')
+            params.append(date_from)
+        if date_to is not None:
+            where.append('substr(full_date, 1, 10) <= ?')
+            params.append(date_to)
+        if cursor is not None:
+            where.append(f'({sort_by}, id) < (?, ?)')
+            params.extend(cursor)
+        
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ''
+        conn = self._get_conn()
+        rows = conn.execute(f'''
+            SELECT {', '.join(self.LIST_COLUMNS)} FROM emails
+            {where_sql}
+            ORDER BY {sort_by} DESC, id DESC
+            LIMIT ?
+        ''', params + [limit]).fetchall()
+        
+        emails = [dict(row) for row in rows]
+        next_cursor = (emails[-1][sort_by], emails[-1]['id']) if len(emails) == limit else None
+        return emails, next_cursor
+    
+    def get_draft_candidates(self, min_score: float, prompt_version: str, model: str,
+                             limit: Optional[int] = None) -> List[Dict]:
+        """답장 초안이 없는 Active / 비스팸 / min_score 이상 대표 메일 (점수 높은 순, 유사 메일 제외)"""
+        conn = self._get_conn()
+        rows = conn.execute('''
+            SELECT id, subject, sender, sender_email, snippet, language, score,
+                   (SELECT decompress_body(body) FROM email_bodies WHERE email_id = e.id) AS body_text
+            FROM emails e
+            WHERE status = 'Active' AND is_spam = 0 AND score >= ?
+              AND (cluster_id IS NULL OR cluster_id = id)
+              AND NOT EXISTS (
+                  SELECT 1 FROM reply_drafts d
+                  WHERE d.email_id = e.id AND d.prompt_version = ? AND d.model = ? AND d.context_hash = ''
+              )
+            ORDER BY score DESC, id DESC
+            LIMIT ?
+        ''', (min_score, prompt_version, model, -1 if limit is None else limit))
+        return [dict(row) for row in rows]
+    
+    def get_email_body(self, email_id: str) -> str:
+        """본문 조회 (카드 확장 / 답장 생성 시 압축 해제)"""
+        return self.get_email_bodies([email_id]).get(email_id, '')
+    
+    def get_email_bodies(self, email_ids: List[str]) -> Dict[str, str]:
+        """본문 일괄 조회 (본문이 비어 있으면 snippet)"""
+        conn = self._get_conn()
+        found = {}
+        for start in range(0, len(email_ids), 500):
+            chunk = email_ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(f'''
+                SELECT e.id, e.snippet, b.body FROM emails e
+                LEFT JOIN email_bodies b ON b.email_id = e.id
+                WHERE e.id IN ({placeholders})
+            ''', chunk)
+            for row in rows:
+                found[row['id']] = decompress_body(row['body']) or row['snippet'] or ''
+        return found
+    
     def get_all_emails(self, include_spam: bool = False, limit: int = 100) -> List[Dict]:
         """전체 이메일 목록"""
         conn = self._get_conn()
@@ -149,6 +1282,74 @@ class DBManager:
         
         return [dict(row) for row in cursor.fetchall()]
     
+    @staticmethod
+    def _to_fts_query(query: str) -> str:
+        """사용자 검색어 → FTS5 MATCH 식 ("따옴표 구문" 유지, 단어는 접두어 검색, 모두 AND)"""
+        terms = []
+        for phrase, word in re.findall(r'"([^"]+)"|(\S+)', query or ''):
+            if word == 'OR' and terms:
+                terms.append('OR')
+                continue
+            text = (phrase or word).replace('"', '""')
+            terms.append(f'"{text}"' if phrase else f'"{text}"*')
+        if terms and terms[-1] == 'OR':
+            terms.pop()
+        return ' '.join(terms)
+    
+    def search_emails(self, query: str, limit: int = 20, include_spam: bool = False,
+                      mark: tuple = ('<mark>', '</mark>')) -> List[Dict]:
+        """
+        전문 검색 (BM25 순위 + 본문 하이라이트)
+        
+        Args:
+            query: 검색어 (예: 'FOB Busan MOQ', '"letter of credit"', 'FOB OR CIF')
+            limit: 최대 결과 수
+            include_spam: 스팸 포함 여부
+            mark: 하이라이트 시작/끝 표시
+        
+        Returns:
+            이메일 목록 (match_snippet: 하이라이트된 본문 발췌)
+        """
+        fts_query = self._to_fts_query(query)
+        if not fts_query:
+            return []
+        
+        conn = self._get_conn()
+        spam_filter = '' if include_spam else 'AND e.is_spam = 0'
+        
+        if self.fts_enabled:
+            weights = ', '.join(str(w) for w in self.FTS_WEIGHTS)
+            body_col = self.FTS_COLUMNS.index('body_text')
+            rows = conn.execute(f'''
+                SELECT e.id, e.subject, e.sender, e.score, e.intent_score, e.keywords,
+                       e.language, e.status, e.is_spam, e.mail_date,
+                       snippet(emails_fts, {body_col}, ?, ?, '…', 16) AS match_snippet
+                FROM emails_fts
+                JOIN emails e ON e.rowid = emails_fts.rowid
+                WHERE emails_fts MATCH ? {spam_filter}
+                ORDER BY bm25(emails_fts, {weights})
+                LIMIT ?
+            ''', (mark[0], mark[1], fts_query, limit)).fetchall()
+            return [dict(row) for row in rows]
+        
+        # FTS5 미지원 시 LIKE 검색 (점수순)
+        words = [w.strip('"*') for w in fts_query.split() if w != 'OR']
+        conditions = ' AND '.join(
+            "(e.subject LIKE ? OR e.sender LIKE ? OR e.keywords LIKE ? OR decompress_body(b.body) LIKE ?)"
+            for _ in words
+        )
+        params = [f'%{w}%' for w in words for _ in range(4)]
+        rows = conn.execute(f'''
+            SELECT e.id, e.subject, e.sender, e.score, e.intent_score, e.keywords,
+                   e.language, e.status, e.is_spam, e.mail_date,
+                   substr(decompress_body(b.body), 1, 200) AS match_snippet
+            FROM emails e LEFT JOIN email_bodies b ON b.email_id = e.id
+            WHERE {conditions} {spam_filter}
+            ORDER BY e.score DESC
+            LIMIT ?
+        ''', params + [limit]).fetchall()
+        return [dict(row) for row in rows]
+    
     def get_email_by_id(self, email_id: str) -> Optional[Dict]:
         """ID로 이메일 조회"""
         conn = self._get_conn()
@@ -157,13 +1358,452 @@ class DBManager:
         row = cursor.fetchone()
         return dict(row) if row else None
     
+    # 메일과 같은 유사 메일 묶음 전체 (목록은 대표 메일만 보여주므로 상태는 묶음 단위로 유지)
+    CLUSTER_MEMBERS = 'id = ? OR cluster_id = (SELECT cluster_id FROM emails WHERE id = ?)'
+    
     def update_status(self, email_id: str, status: str):
-        """상태 업데이트"""
+        """상태 업데이트 (유사 메일 묶음 전체)"""
+        self.update_statuses({email_id: status})
+    
+    def update_cluster_status(self, email_id: str, status: str) -> List[str]:
+        """
+        메일이 속한 묶음 전체 상태 업데이트 (UI 처리 완료 버튼) - Returns: 변경된 메일 ID 목록
+        
+        처리 완료 시각(archived_at)은 여기서만 기록합니다. (Gmail 읽음 동기화로 처리된 메일은
+        Gmail에서 직접 답장했을 수 있어 학습 리드 모델의 '답장 없이 처리' 라벨에서 제외)
+        """
         conn = self._get_conn()
-        cursor = conn.cursor()
-        cursor.execute('UPDATE emails SET status = ? WHERE id = ?', (status, email_id))
+        ids = [row[0] for row in conn.execute(
+            f'SELECT id FROM emails WHERE {self.CLUSTER_MEMBERS}', (email_id, email_id)
+        )]
+        conn.execute(f'''
+            UPDATE emails SET status = ?,
+                archived_at = CASE WHEN ? = 'Archived' THEN COALESCE(archived_at, ?) END
+            WHERE {self.CLUSTER_MEMBERS}
+        ''', (status, status, datetime.now().isoformat(), email_id, email_id))
+        conn.commit()
+        return ids
+    
+    def mark_replied(self, email_id: str) -> List[str]:
+        """답장 발송 완료 기록 + 처리 완료 (묶음 전체, 학습 리드 모델의 '답장함' 라벨) - Returns: 변경된 메일 ID 목록"""
+        conn = self._get_conn()
+        ids = [row[0] for row in conn.execute(
+            f'SELECT id FROM emails WHERE {self.CLUSTER_MEMBERS}', (email_id, email_id)
+        )]
+        conn.execute(
+            f"UPDATE emails SET status = 'Archived', replied_at = COALESCE(replied_at, ?) WHERE {self.CLUSTER_MEMBERS}",
+            (datetime.now().isoformat(), email_id, email_id)
+        )
+        conn.commit()
+        return ids
+    
+    def update_statuses(self, status_by_id: Dict[str, str]):
+        """
+        상태 일괄 업데이트 (유사 메일 묶음 전체)
+        
+        Gmail에서 묶음의 한 메일만 읽음 / 안읽음으로 바뀌어도 묶음 전체에 적용합니다.
+        (대표 메일만 처리되면 Active 사본이 목록에서 사라짐)
+        """
+        if not status_by_id:
+            return
+        conn = self._get_conn()
+        conn.executemany(
+            f'UPDATE emails SET status = ? WHERE {self.CLUSTER_MEMBERS}',
+            [(status, email_id, email_id) for email_id, status in status_by_id.items()]
+        )
+        conn.commit()
+    
+    def delete_emails(self, email_ids: List[str]):
+        """이메일 삭제"""
+        if not email_ids:
+            return
+        conn = self._get_conn()
+        conn.executemany('DELETE FROM emails WHERE id = ?', [(i,) for i in email_ids])
+        conn.commit()
+    
+    def get_email_ids(self, email_ids: List[str]) -> set:
+        """저장된 ID만 반환"""
+        conn = self._get_conn()
+        found = set()
+        # SQLite 변수 개수 제한 (999) 대비 분할 조회
+        for start in range(0, len(email_ids), 500):
+            chunk = email_ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(f'SELECT id FROM emails WHERE id IN ({placeholders})', chunk)
+            found.update(row[0] for row in rows)
+        return found
+    
+    def get_active_clusters(self) -> Dict[str, str]:
+        """Active 메일의 유사 메일 묶음 (id → cluster_id, 묶음이 없으면 자기 id)"""
+        conn = self._get_conn()
+        rows = conn.execute("SELECT id, COALESCE(cluster_id, id) FROM emails WHERE status = 'Active'")
+        return {row[0]: row[1] for row in rows}
+    
+    def get_cluster_assignments(self, email_ids: List[str]) -> Dict[str, Tuple[Optional[bytes], Optional[str]]]:
+        """저장된 메일의 (minhash, cluster_id)"""
+        conn = self._get_conn()
+        found = {}
+        for start in range(0, len(email_ids), 500):
+            chunk = email_ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(f'SELECT id, minhash, cluster_id FROM emails WHERE id IN ({placeholders})', chunk)
+            found.update((row[0], (row[1], row[2])) for row in rows)
+        return found
+    
+    def find_minhash_candidates(self, band_keys: List[bytes], per_key: int = 16,
+                                max_rowid: Optional[int] = None) -> Dict[bytes, List[Tuple[str, bytes]]]:
+        """
+        밴드 키가 일치하는 대표 메일 (밴드 키 → [(id, minhash)])
+        
+        정형 문구(문의 양식, 서명)가 같은 메일이 몰리는 키는 최근 저장된 per_key건만 반환합니다.
+        max_rowid가 있으면 그 시점까지 저장된 메일만 검색합니다.
+        """
+        if max_rowid is not None and max_rowid <= 0:
+            return {}
+        rowid_filter, rowid_params = ('AND e.rowid <= ?', [max_rowid]) if max_rowid is not None else ('', [])
+        conn = self._get_conn()
+        found: Dict[bytes, List[Tuple[str, bytes]]] = {}
+        for start in range(0, len(band_keys), 500):
+            chunk = band_keys[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(f'''
+                SELECT band_key, id, minhash FROM (
+                    SELECT b.band_key, e.id, e.minhash,
+                           ROW_NUMBER() OVER (PARTITION BY b.band_key ORDER BY e.rowid DESC) AS rank
+                    FROM email_minhash_bands b JOIN emails e ON e.id = b.email_id
+                    WHERE b.band_key IN ({placeholders}) AND e.cluster_id = e.id {rowid_filter}
+                ) WHERE rank <= ?
+            ''', chunk + rowid_params + [per_key])
+            for key, email_id, signature in rows:
+                found.setdefault(key, []).append((email_id, signature))
+        return found
+    
+    def max_email_rowid(self) -> int:
+        """마지막으로 저장된 메일의 rowid (없으면 0)"""
+        conn = self._get_conn()
+        return conn.execute('SELECT COALESCE(MAX(rowid), 0) FROM emails').fetchone()[0]
+    
+    def get_analysis_results(self, email_ids: List[str]) -> Dict[str, Dict]:
+        """저장된 분석 결과 (InquiryAnalyzer 결과 형식, 평판 보정 전 점수) - 유사 메일 재사용용"""
+        conn = self._get_conn()
+        found = {}
+        for start in range(0, len(email_ids), 500):
+            chunk = email_ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(f'''
+                SELECT id, score - reputation_adj AS score, clarity_score, intent_score, terms_score,
+                       reason, keywords, language, is_spam, rules_version
+                FROM emails WHERE id IN ({placeholders})
+            ''', chunk)
+            for row in rows:
+                found[row['id']] = {
+                    'total': row['score'],
+                    'clarity': row['clarity_score'],
+                    'intent': row['intent_score'],
+                    'terms': row['terms_score'],
+                    'reason': row['reason'],
+                    'keywords': row['keywords'],
+                    'is_spam': bool(row['is_spam']),
+                    'language': row['language'],
+                    'matched': [],
+                    'rules_version': row['rules_version'],
+                }
+            for keyword, email_id, category, points in conn.execute(f'''
+                SELECT keyword, email_id, category, points FROM email_keywords WHERE email_id IN ({placeholders})
+            ''', chunk):
+                found[email_id]['matched'].append([keyword, category, points])
+        return found
+    
+    # ------------------------------------------------------------------
+    # 키워드 facet 집계 (email_keywords 커버링 인덱스만 읽음 - emails 테이블 미접근)
+    # ------------------------------------------------------------------
+    # 카테고리 표시 이름 (KeywordScorer.CATEGORY_MAP 값)
+    KEYWORD_CATEGORIES = {'clarity': '제품 명확성', 'intent': '구매 의도', 'terms': '무역 조건'}
+    
+    @staticmethod
+    def _facet_where(status: Optional[str], date_from: Optional[str], date_to: Optional[str],
+                     category: Optional[str] = None, keyword: Optional[str] = None) -> Tuple[str, list]:
+        """
+        idx_email_keywords_facet (status, mail_day, category, keyword) 순서의 조건
+        
+        keyword가 있으면 키워드 PK 범위만 읽도록 나머지 조건은 인덱스 선택에서 제외('+' 단항 연산자)합니다.
+        스팸 키워드(category 'spam', 재채점 대상 조회용)는 집계 / 필터에서 제외합니다.
+        """
+        where, params = [], []
+        prefix = ''
+        if keyword is not None:
+            where.append('keyword = ?')
+            params.append(keyword)
+            prefix = '+'
+        for condition, value in ((f'{prefix}status = ?', status), (f'{prefix}mail_day >= ?', date_from),
+                                 (f'{prefix}mail_day <= ?', date_to), (f'{prefix}category = ?', category)):
+            if value is not None:
+                where.append(condition)
+                params.append(value)
+        if category is None:
+            where.append(f"{prefix}category <> 'spam'")
+        return (f"WHERE {' AND '.join(where)}" if where else ''), params
+    
+    def keyword_facets(self, category: Optional[str] = None, date_from: Optional[str] = None,
+                       date_to: Optional[str] = None, status: Optional[str] = 'Active',
+                       limit: int = 30) -> List[Dict]:
+        """
+        키워드별 매칭 메일 수 (많은 순)
+        
+        유사 메일 묶음의 메일도 각각 셉니다. (스팸은 매칭 키워드를 저장하지 않아 제외)
+        
+        Returns:
+            [{'keyword', 'category', 'count'}]
+        """
+        where_sql, params = self._facet_where(status, date_from, date_to, category)
+        conn = self._get_conn()
+        rows = conn.execute(f'''
+            SELECT keyword, category, COUNT(*) AS count FROM email_keywords
+            {where_sql}
+            GROUP BY keyword
+            ORDER BY count DESC, keyword
+            LIMIT ?
+        ''', params + [limit])
+        return [dict(row) for row in rows]
+    
+    def category_facets(self, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                        status: Optional[str] = 'Active') -> Dict[str, int]:
+        """카테고리별 매칭 메일 수 {category: 메일 수} (한 메일의 같은 카테고리 키워드 여러 개는 1건)"""
+        where_sql, params = self._facet_where(status, date_from, date_to)
+        conn = self._get_conn()
+        return dict(conn.execute(f'''
+            SELECT category, COUNT(DISTINCT email_id) FROM email_keywords
+            {where_sql}
+            GROUP BY category
+        ''', params).fetchall())
+    
+    def day_facets(self, keyword: Optional[str] = None, category: Optional[str] = None,
+                   date_from: Optional[str] = None, date_to: Optional[str] = None,
+                   status: Optional[str] = 'Active') -> Dict[str, int]:
+        """날짜별 매칭 메일 수 {'YYYY-MM-DD': 메일 수} (keyword 지정 시 키워드 PK 범위만 읽음)"""
+        where_sql, params = self._facet_where(status, date_from, date_to, category, keyword)
+        conn = self._get_conn()
+        return dict(conn.execute(f'''
+            SELECT mail_day, COUNT(DISTINCT email_id) FROM email_keywords
+            {where_sql}
+            GROUP BY mail_day
+            ORDER BY mail_day
+        ''', params).fetchall())
+    
+    # ------------------------------------------------------------------
+    # 학습 리드 점수 (engine/lead_model.py)
+    # ------------------------------------------------------------------
+    def get_triage_history(self, limit: Optional[int] = None) -> List[Dict]:
+        """
+        학습 데이터: 답장한 메일(replied = 1) / 답장 없이 처리 완료한 메일(replied = 0)
+        
+        처리 완료는 UI에서 처리한 메일(archived_at)만 씁니다. Gmail 읽음 동기화로 Archived가 된 메일은
+        Gmail에서 직접 답장했을 수 있어 제외합니다.
+        스팸과 유사 메일 묶음의 사본은 제외합니다. (같은 문의가 여러 번 학습되지 않도록 대표 메일만)
+        특징은 get_ml_features로 따로 조회합니다. (본문을 풀지 않음)
+        """
+        conn = self._get_conn()
+        rows = conn.execute('''
+            SELECT id, score, replied_at IS NOT NULL AS replied
+            FROM emails
+            WHERE is_spam = 0 AND (replied_at IS NOT NULL OR (status = 'Archived' AND archived_at IS NOT NULL))
+              AND (cluster_id IS NULL OR cluster_id = id)
+            ORDER BY created_at DESC
+            LIMIT ?
+        ''', (-1 if limit is None else limit,))
+        return [dict(row) for row in rows]
+    
+    def get_ml_score_targets(self) -> List[str]:
+        """학습 점수 대상 메일 ID (스팸 제외)"""
+        conn = self._get_conn()
+        return [row[0] for row in conn.execute('SELECT id FROM emails WHERE is_spam = 0')]
+    
+    def get_ml_features(self, email_ids: List[str], version: int) -> Dict[str, bytes]:
+        """저장된 특징 {메일 ID: 버킷 BLOB} (형식 버전이 다른 행 제외, 결과 순서 = email_ids 순서)"""
+        conn = self._get_conn()
+        found = {}
+        for start in range(0, len(email_ids), 500):
+            chunk = email_ids[start:start + 500]
+            found.update(conn.execute(f'''
+                SELECT email_id, features FROM email_features
+                WHERE email_id IN ({','.join('?' * len(chunk))}) AND version = ?
+            ''', (*chunk, version)).fetchall())
+        return {email_id: found[email_id] for email_id in email_ids if email_id in found}
+    
+    def put_ml_features(self, features: Dict[str, bytes], version: int):
+        """특징 일괄 저장 (이전 형식이거나 특징 없이 저장된 메일 보완)"""
+        if not features:
+            return
+        conn = self._get_conn()
+        conn.executemany('INSERT OR REPLACE INTO email_features (email_id, version, features) VALUES (?, ?, ?)',
+                         [(email_id, version, blob) for email_id, blob in features.items()])
+        conn.commit()
+    
+    def update_ml_scores(self, scores: Dict[str, Optional[float]]):
+        """학습 점수 일괄 갱신 (모델 재학습 후 저장된 메일 재채점)"""
+        if not scores:
+            return
+        conn = self._get_conn()
+        conn.executemany('UPDATE emails SET ml_score = ? WHERE id = ?',
+                         [(score, email_id) for email_id, score in scores.items()])
         conn.commit()
     
+    # ------------------------------------------------------------------
+    # 규칙 변경 재채점 (engine/rescore.py)
+    # ------------------------------------------------------------------
+    def count_rules_versions(self) -> Dict[Optional[str], int]:
+        """분석 규칙 버전별 메일 수 (None = 버전 미상 - 색인 도입 전 저장 등)"""
+        conn = self._get_conn()
+        return dict(conn.execute('SELECT rules_version, COUNT(*) FROM emails GROUP BY rules_version').fetchall())
+    
+    def find_rescore_emails(self, rules_version: Optional[str], condition: str = 'all') -> set:
+        """규칙 버전이 rules_version인 메일 중 RESCORE_CONDITIONS[condition]에 해당하는 메일 ID"""
+        conn = self._get_conn()
+        rows = conn.execute(
+            f'SELECT id FROM emails WHERE rules_version IS ? AND {self.RESCORE_CONDITIONS[condition]}',
+            (rules_version,)
+        )
+        return {row[0] for row in rows}
+    
+    def find_keyword_emails(self, keywords: List[str], rules_version: str) -> set:
+        """분석 시 keywords 중 하나라도 매칭된 메일 ID (규칙 버전 rules_version)"""
+        conn = self._get_conn()
+        found = set()
+        for start in range(0, len(keywords), 500):
+            chunk = keywords[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(f'''
+                SELECT DISTINCT k.email_id FROM email_keywords k JOIN emails e ON e.id = k.email_id
+                WHERE k.keyword IN ({placeholders}) AND e.rules_version = ?
+            ''', (*chunk, rules_version))
+            found.update(row[0] for row in rows)
+        return found
+    
+    def find_term_emails(self, fts_query: str, rules_version: str) -> set:
+        """분석 텍스트 단어 색인(email_terms) 검색 결과 메일 ID (규칙 버전 rules_version)"""
+        conn = self._get_conn()
+        rows = conn.execute('''
+            SELECT id FROM emails
+            WHERE rowid IN (SELECT rowid FROM email_terms WHERE email_terms MATCH ?) AND rules_version = ?
+        ''', (fts_query, rules_version))
+        return {row[0] for row in rows}
+    
+    def find_index_terms(self, like_pattern: str) -> List[str]:
+        """분석 텍스트 단어 색인의 단어 중 LIKE 패턴에 맞는 단어 (부분 문자열 키워드 후보 확장)"""
+        conn = self._get_conn()
+        return [row[0] for row in conn.execute(
+            "SELECT term FROM email_terms_vocab WHERE term LIKE ? ESCAPE '\\'", (like_pattern,)
+        )]
+    
+    def get_analysis_inputs(self, email_ids: List[str]) -> List[Dict]:
+        """
+        재분석 입력 (InquiryAnalyzer가 참조하는 필드 + 압축 해제한 전체 본문)
+        
+        현재 저장된 결과도 함께 반환: base_score (평판 보정 전 점수), reputation_adj, stored_spam
+        """
+        conn = self._get_conn()
+        found = []
+        for start in range(0, len(email_ids), 500):
+            chunk = email_ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(f'''
+                SELECT e.id, e.subject, e.sender_email, e.snippet, e.has_attachment, e.is_reply,
+                       e.score - COALESCE(e.reputation_adj, 0) AS base_score,
+                       COALESCE(e.reputation_adj, 0) AS reputation_adj, e.is_spam AS stored_spam,
+                       decompress_body(b.body) AS body
+                FROM emails e LEFT JOIN email_bodies b ON b.email_id = e.id
+                WHERE e.id IN ({placeholders})
+            ''', chunk)
+            found.extend({**dict(row), 'has_attachment': bool(row['has_attachment']),
+                          'is_reply': bool(row['is_reply']), 'stored_spam': bool(row['stored_spam'])}
+                         for row in rows)
+        return found
+    
+    # 재채점 시 갱신하는 분석 결과 컬럼 (build_row 키)
+    ANALYSIS_COLUMNS = ('score', 'clarity_score', 'intent_score', 'terms_score', 'reason', 'keywords',
+                        'language', 'is_spam', 'reputation_adj', 'rules_version')
+    
+    def update_analyses(self, rows: List[Dict]) -> int:
+        """분석 결과만 일괄 갱신 (처리 상태 / 본문 / 유사 메일 묶음 유지) + 키워드 색인 갱신"""
+        if not rows:
+            return 0
+        conn = self._get_conn()
+        assignments = ', '.join(f'{c} = ?' for c in self.ANALYSIS_COLUMNS)
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            updated = conn.executemany(
+                f'UPDATE emails SET {assignments} WHERE id = ?',
+                [tuple(int(bool(r[c])) if c == 'is_spam' else r.get(c) for c in self.ANALYSIS_COLUMNS) + (r['id'],)
+                 for r in rows]
+            ).rowcount
+            self._store_keyword_index(conn, rows)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Analysis update failed: {e}")
+            raise
+        return updated
+    
+    def set_rules_version(self, old_version: Optional[str], new_version: str) -> int:
+        """규칙 버전 old_version 메일을 new_version으로 표시 (재채점 대상이 아니었던 메일 - 점수 변화 없음)"""
+        conn = self._get_conn()
+        updated = conn.execute('UPDATE emails SET rules_version = ? WHERE rules_version IS ?',
+                               (new_version, old_version)).rowcount
+        conn.commit()
+        return updated
+    
+    def get_cluster_members(self, cluster_id: str, limit: int = 20) -> List[Dict]:
+        """묶음에 속한 유사 메일 (대표 메일 제외, 최근 저장 순)"""
+        conn = self._get_conn()
+        rows = conn.execute('''
+            SELECT id, subject, sender, sender_email, mail_date, status FROM emails
+            WHERE cluster_id = ? AND id != ?
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        ''', (cluster_id, cluster_id, limit))
+        return [dict(row) for row in rows]
+    
+    def list_threads(self, limit: int = 30, cursor: Optional[tuple] = None,
+                     status: Optional[str] = 'Active') -> Tuple[List[Dict], Optional[tuple]]:
+        """
+        대화별 목록 (스레드 최고 점수 순, keyset 페이지네이션 - email_threads 인덱스만 읽음)
+        
+        Args:
+            status: 'Active' = 처리 안 된 메일이 남은 대화, 'Archived' = 모두 처리한 대화, None = 전체
+        
+        Returns:
+            (스레드 목록, next_cursor) - 스레드: thread_id / subject / message_count / active_count /
+            score(최고 종합 점수) / intent_score(최고 구매 의도) / avg_intent / first_date / last_date / latest_id
+        """
+        where, params = [], []
+        if status is not None:
+            where.append('status = ?')
+            params.append(status)
+        if cursor is not None:
+            where.append('(score, thread_id) < (?, ?)')
+            params.extend(cursor)
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ''
+        conn = self._get_conn()
+        rows = conn.execute(f'''
+            SELECT * FROM email_threads
+            {where_sql}
+            ORDER BY score DESC, thread_id DESC
+            LIMIT ?
+        ''', params + [limit]).fetchall()
+        threads = [dict(row) for row in rows]
+        next_cursor = (threads[-1]['score'], threads[-1]['thread_id']) if len(threads) == limit else None
+        return threads, next_cursor
+    
+    def get_thread_messages(self, thread_id: str, include_spam: bool = False) -> List[Dict]:
+        """대화에 속한 메일 (오래된 순, 목록 컬럼 - (thread_id, 날짜) 인덱스 범위만 읽음)"""
+        conn = self._get_conn()
+        rows = conn.execute(f'''
+            SELECT {', '.join(self.LIST_COLUMNS)}, message_id, in_reply_to FROM emails
+            WHERE thread_id = ? {'' if include_spam else 'AND +is_spam = 0'}
+            ORDER BY full_date, mail_date, id
+        ''', (thread_id,))
+        return [dict(row) for row in rows]
+    
     def email_exists(self, email_id: str) -> bool:
         """이메일 존재 여부"""
         conn = self._get_conn()
@@ -172,33 +1812,225 @@ class DBManager:
         return cursor.fetchone() is not None
     
     def get_statistics(self) -> Dict:
-        """통계"""
+        """통계 (트리거로 유지되는 email_stats 단일 행 조회)"""
         conn = self._get_conn()
-        cursor = conn.cursor()
+        row = conn.execute('SELECT * FROM email_stats WHERE id = 1').fetchone()
+        if row is None:
+            self.rebuild_statistics()
+            row = conn.execute('SELECT * FROM email_stats WHERE id = 1').fetchone()
         
-        stats = {}
+        avg = row['score_sum_x10'] / 10 / row['scored'] if row['scored'] else 0
+        return {
+            'active': row['active'],
+            'spam': row['spam'],
+            'archived': row['archived'],
+            'avg_score': round(avg, 1) if avg else 0,
+            'high_priority': row['high_priority']
+        }
+    
+    # 동기화 서비스 lease 키 접두어 (clear_all에서도 유지 - 동기화 도중 초기화해도 다른 프로세스가 끼어들지 않음)
+    LEASE_PREFIX = 'lease:'
+    # 분석 규칙 설정 스냅샷 (sync_state 키 = 접두어 + rules_version)
+    RULES_PREFIX = 'rules:'
+    
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """
+        lease 획득 / 연장 (heartbeat)
+        
+        비어 있거나 만료되었거나 이미 owner가 가진 lease만 갱신합니다.
+        UPSERT 1문장의 조건부 갱신이라 여러 프로세스가 동시에 시도해도 1곳만 성공합니다.
+        
+        Returns:
+            owner가 lease를 가졌는지 (expires_at = 지금 + ttl초)
+        """
+        now = time.time()
+        value = json.dumps({'owner': owner, 'expires_at': now + ttl})
+        conn = self._get_conn()
+        cursor = conn.execute('''
+            INSERT INTO sync_state (key, value, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+            WHERE json_extract(value, '$.owner') = ? OR json_extract(value, '$.expires_at') < ?
+        ''', (self.LEASE_PREFIX + name, value, datetime.now().isoformat(), owner, now))
+        conn.commit()
+        return cursor.rowcount == 1
+    
+    def release_lease(self, name: str, owner: str):
+        """lease 반납 (owner가 가진 경우만)"""
+        conn = self._get_conn()
+        conn.execute("DELETE FROM sync_state WHERE key = ? AND json_extract(value, '$.owner') = ?",
+                     (self.LEASE_PREFIX + name, owner))
+        conn.commit()
+    
+    def get_lease(self, name: str) -> Optional[Dict]:
+        """유효한 lease ({owner, expires_at}) - 없거나 만료되었으면 None"""
+        value = self.get_sync_state(self.LEASE_PREFIX + name)
+        lease = json.loads(value) if value else None
+        return lease if lease and lease['expires_at'] >= time.time() else None
+    
+    def get_rules_snapshot(self, rules_version: Optional[str]) -> Optional[Dict]:
+        """분석 규칙 버전의 설정 스냅샷 (InquiryAnalyzer.rules_snapshot, 없으면 None)"""
+        if rules_version is None:
+            return None
+        value = self.get_sync_state(self.RULES_PREFIX + rules_version)
+        return json.loads(value) if value else None
+    
+    def put_rules_snapshot(self, rules_version: str, snapshot: Dict):
+        """분석 규칙 설정 스냅샷 저장 (버전별 1회 - 이미 있으면 유지)"""
+        conn = self._get_conn()
+        conn.execute('INSERT OR IGNORE INTO sync_state (key, value, updated_at) VALUES (?, ?, ?)',
+                     (self.RULES_PREFIX + rules_version, json.dumps(snapshot, ensure_ascii=False),
+                      datetime.now().isoformat()))
+        conn.commit()
+    
+    def get_sync_state(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """동기화 상태 조회"""
+        conn = self._get_conn()
+        row = conn.execute('SELECT value FROM sync_state WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+    
+    def set_sync_state(self, key: str, value: Optional[str]):
+        """동기화 상태 저장 (None이면 삭제)"""
+        conn = self._get_conn()
+        if value is None:
+            conn.execute('DELETE FROM sync_state WHERE key = ?', (key,))
+        else:
+            conn.execute('''
+                INSERT OR REPLACE INTO sync_state (key, value, updated_at)
+                VALUES (?, ?, ?)
+            ''', (key, str(value), datetime.now().isoformat()))
+        conn.commit()
+    
+    def get_cached_analyses(self, content_hashes: List[str]) -> Dict[str, Dict]:
+        """분석 캐시 일괄 조회 (적중 항목은 last_used 갱신)"""
+        conn = self._get_conn()
+        found = {}
+        for start in range(0, len(content_hashes), 500):
+            chunk = content_hashes[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(
+                f'SELECT content_hash, result FROM analysis_cache WHERE content_hash IN ({placeholders})',
+                chunk
+            )
+            for content_hash, result in rows:
+                found[content_hash] = json.loads(result)
         
-        cursor.execute('SELECT COUNT(*) FROM emails WHERE status = "Active" AND is_spam = 0')
-        stats['active'] = cursor.fetchone()[0]
+        if found:
+            now = datetime.now().isoformat()
+            conn.executemany('UPDATE analysis_cache SET last_used = ? WHERE content_hash = ?',
+                             [(now, h) for h in found])
+            conn.commit()
+        return found
+    
+    def put_cached_analyses(self, results: Dict[str, Dict]):
+        """분석 캐시 일괄 저장 + LRU 정리"""
+        if not results:
+            return
+        conn = self._get_conn()
+        now = datetime.now().isoformat()
+        conn.executemany('''
+            INSERT OR REPLACE INTO analysis_cache (content_hash, result, created_at, last_used)
+            VALUES (?, ?, ?, ?)
+        ''', [(h, json.dumps(r, ensure_ascii=False), now, now) for h, r in results.items()])
         
-        cursor.execute('SELECT COUNT(*) FROM emails WHERE is_spam = 1')
-        stats['spam'] = cursor.fetchone()[0]
+        count = conn.execute('SELECT COUNT(*) FROM analysis_cache').fetchone()[0]
+        if count > self.analysis_cache_max:
+            conn.execute('''
+                DELETE FROM analysis_cache WHERE content_hash IN (
+                    SELECT content_hash FROM analysis_cache ORDER BY last_used LIMIT ?
+                )
+            ''', (count - self.analysis_cache_max,))
+        conn.commit()
+    
+    def clear_analysis_cache(self):
+        """분석 캐시 전체 삭제"""
+        conn = self._get_conn()
+        conn.execute('DELETE FROM analysis_cache')
+        conn.commit()
+    
+    def get_reply_drafts(self, email_ids: List[str], prompt_version: str, model: str,
+                         context_hash: str = '') -> Dict[str, Dict]:
+        """답장 초안 일괄 조회 (적중 항목은 last_used 갱신) - Returns: {email_id: draft dict}"""
+        conn = self._get_conn()
+        found = {}
+        for start in range(0, len(email_ids), 500):
+            chunk = email_ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(f'''
+                SELECT email_id, draft FROM reply_drafts
+                WHERE prompt_version = ? AND model = ? AND context_hash = ?
+                  AND email_id IN ({placeholders})
+            ''', [prompt_version, model, context_hash, *chunk])
+            for email_id, draft in rows:
+                found[email_id] = json.loads(draft)
         
-        cursor.execute('SELECT COUNT(*) FROM emails WHERE status = "Archived"')
-        stats['archived'] = cursor.fetchone()[0]
+        if found:
+            now = datetime.now().isoformat()
+            conn.executemany('''
+                UPDATE reply_drafts SET last_used = ?
+                WHERE email_id = ? AND prompt_version = ? AND model = ? AND context_hash = ?
+            ''', [(now, e, prompt_version, model, context_hash) for e in found])
+            conn.commit()
+        return found
+    
+    def put_reply_drafts(self, drafts: Dict[str, Dict], prompt_version: str, model: str,
+                         context_hash: str = ''):
+        """답장 초안 일괄 저장 (같은 키는 덮어쓰기) + LRU 정리"""
+        if not drafts:
+            return
+        conn = self._get_conn()
+        now = datetime.now().isoformat()
+        conn.executemany('''
+            INSERT OR REPLACE INTO reply_drafts
+                (email_id, prompt_version, model, context_hash, draft, created_at, last_used)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [(e, prompt_version, model, context_hash, json.dumps(d, ensure_ascii=False), now, now)
+              for e, d in drafts.items()])
         
-        cursor.execute('SELECT AVG(score) FROM emails WHERE is_spam = 0')
-        avg = cursor.fetchone()[0]
-        stats['avg_score'] = round(avg, 1) if avg else 0
+        count = conn.execute('SELECT COUNT(*) FROM reply_drafts').fetchone()[0]
+        if count > self.reply_draft_max:
+            conn.execute('''
+                DELETE FROM reply_drafts WHERE rowid IN (
+                    SELECT rowid FROM reply_drafts ORDER BY last_used LIMIT ?
+                )
+            ''', (count - self.reply_draft_max,))
+        conn.commit()
+    
+    def invalidate_reply_drafts(self, keep_version: Optional[str] = None,
+                                email_ids: Optional[List[str]] = None) -> int:
+        """
+        답장 초안 일괄 무효화
         
-        cursor.execute('SELECT COUNT(*) FROM emails WHERE score >= 70 AND is_spam = 0')
-        stats['high_priority'] = cursor.fetchone()[0]
+        Args:
+            keep_version: 지정 시 이 프롬프트 버전이 아닌 초안 모두 삭제
+            email_ids: 지정 시 해당 메일의 초안 삭제 (둘 다 없으면 전체 삭제)
         
-        return stats
+        Returns:
+            삭제 건수
+        """
+        conn = self._get_conn()
+        deleted = 0
+        if keep_version is not None:
+            deleted += conn.execute('DELETE FROM reply_drafts WHERE prompt_version != ?',
+                                    (keep_version,)).rowcount
+        if email_ids is not None:
+            for start in range(0, len(email_ids), 500):
+                chunk = email_ids[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                deleted += conn.execute(f'DELETE FROM reply_drafts WHERE email_id IN ({placeholders})',
+                                        chunk).rowcount
+        if keep_version is None and email_ids is None:
+            deleted = conn.execute('DELETE FROM reply_drafts').rowcount
+        conn.commit()
+        return deleted
     
     def clear_all(self):
-        """모든 데이터 삭제"""
+        """모든 데이터 삭제 (동기화 상태 포함, 분석 캐시 / 답장 초안 / lease / 규칙 스냅샷은 유지)"""
         conn = self._get_conn()
         cursor = conn.cursor()
         cursor.execute('DELETE FROM emails')
+        cursor.execute('DELETE FROM thread_messages')
+        if self.terms_enabled:
+            cursor.execute("INSERT INTO email_terms (email_terms) VALUES ('delete-all')")
+        cursor.execute('DELETE FROM sync_state WHERE key NOT LIKE ? AND key NOT LIKE ?',
+                       (self.LEASE_PREFIX + '%', self.RULES_PREFIX + '%'))
         conn.commit()
@@ -0,0 +1,298 @@
+"""
+Fake Gmail Service Module
+오프라인 테스트 / 벤치마크용 로컬 Gmail API 대역
+
+googleapiclient 서비스 객체에서 사용하는 호출 형태만 흉내냅니다.
+    service.users().messages().list(...).execute()
+    service.users().messages().get(...).execute()
+    service.users().history().list(...).execute()
+    service.users().getProfile(...).execute()
+    service.new_batch_http_request(callback=...)
+latency 옵션으로 HTTP 왕복 지연을 시뮬레이션합니다.
+"""
+
+import re
+import time
+import base64
+import itertools
+from typing import Dict, List, Optional, Callable
+
+
+class FakeHttpError(Exception):
+    """googleapiclient.errors.HttpError 대역 (resp.status 제공)"""
+
+    class _Resp:
+        def __init__(self, status: int):
+            self.status = status
+
+    def __init__(self, status: int, message: str = ''):
+        super().__init__(f"<HttpError {status}: {message}>")
+        self.resp = self._Resp(status)
+
+
+class _Request:
+    """지연 실행 요청 (execute() 호출 시 응답 생성)"""
+
+    def __init__(self, service: 'FakeGmailService', func: Callable, *args):
+        self._service = service
+        self._func = func
+        self._args = args
+
+    def _run(self):
+        return self._func(*self._args)
+
+    def execute(self):
+        self._service._round_trip()
+        return self._run()
+
+
+class _Batch:
+    """BatchHttpRequest 대역 - execute() 1회 = HTTP 왕복 1회"""
+
+    MAX_REQUESTS = 100
+
+    def __init__(self, service: 'FakeGmailService', callback: Callable):
+        self._service = service
+        self._callback = callback
+        self._requests = []
+
+    def add(self, request: _Request, callback: Callable = None, request_id: str = None):
+        if len(self._requests) >= self.MAX_REQUESTS:
+            raise ValueError(f"Batch limit exceeded ({self.MAX_REQUESTS})")
+        request_id = request_id or str(len(self._requests) + 1)
+        self._requests.append((request_id, request, callback or self._callback))
+
+    def execute(self):
+        self._service._round_trip()
+        for request_id, request, callback in self._requests:
+            try:
+                response, exception = request._run(), None
+            except Exception as e:
+                response, exception = None, e
+            callback(request_id, response, exception)
+
+
+class _Messages:
+    def __init__(self, service: 'FakeGmailService'):
+        self._service = service
+
+    def list(self, userId: str = 'me', q: str = '', maxResults: int = 100,
+             pageToken: str = None, **kwargs) -> _Request:
+        return _Request(self._service, self._service._list, q, maxResults, pageToken)
+
+    def get(self, userId: str = 'me', id: str = None, **kwargs) -> _Request:
+        return _Request(self._service, self._service._get, id)
+
+    def modify(self, userId: str = 'me', id: str = None, body: Dict = None) -> _Request:
+        return _Request(self._service, self._service._modify, id, body or {})
+
+
+class _History:
+    def __init__(self, service: 'FakeGmailService'):
+        self._service = service
+
+    def list(self, userId: str = 'me', startHistoryId: str = None, historyTypes: List[str] = None,
+             maxResults: int = 100, pageToken: str = None, **kwargs) -> _Request:
+        return _Request(self._service, self._service._list_history,
+                        startHistoryId, maxResults, pageToken)
+
+
+class _Users:
+    def __init__(self, service: 'FakeGmailService'):
+        self._service = service
+
+    def messages(self) -> _Messages:
+        return _Messages(self._service)
+
+    def history(self) -> _History:
+        return _History(self._service)
+
+    def getProfile(self, userId: str = 'me') -> _Request:
+        return _Request(self._service, self._service._profile)
+
+
+class FakeGmailService:
+    """인메모리 Gmail 서비스 대역"""
+
+    def __init__(self, emails: List[Dict] = None, latency: float = 0.0):
+        """
+        Args:
+            emails: {id, subject, sender, body, has_attachment, timestamp(optional)} 목록
+            latency: HTTP 왕복 1회당 지연 시간 (초)
+        """
+        self.latency = latency
+        self.round_trips = 0
+        self._messages: Dict[str, Dict] = {}
+        self._order: List[str] = []
+        self._next_internal_ms = int(time.time() * 1000)
+        self._history: List[Dict] = []
+        self._history_id = 1000
+        self._history_floor = 0     # 이보다 오래된 startHistoryId는 만료(404)
+
+        for email in emails or []:
+            self.add_email(email)
+
+    # ------------------------------------------------------------------
+    # 데이터 관리
+    # ------------------------------------------------------------------
+    def add_email(self, email: Dict, labels: Optional[List[str]] = None) -> str:
+        """이메일 dict를 Gmail 메시지 리소스로 변환하여 추가"""
+        msg_id = email.get('id') or f"fake{len(self._order):08d}"
+        internal_ms = email.get('timestamp_ms')
+        if internal_ms is None:
+            internal_ms = self._next_internal_ms
+            self._next_internal_ms -= 60_000
+
+        body = email.get('body', '') or ''
+        encoded = base64.urlsafe_b64encode(body.encode('utf-8')).decode('ascii')
+        parts = [{'mimeType': 'text/plain', 'filename': '', 'body': {'data': encoded}}]
+        if email.get('has_attachment'):
+            parts.append({'mimeType': 'application/pdf', 'filename': 'spec.pdf',
+                          'body': {'attachmentId': f"att_{msg_id}", 'size': 20480}})
+
+        headers = [
+            {'name': 'Subject', 'value': email.get('subject', '')},
+            {'name': 'From', 'value': email.get('sender', '')},
+            {'name': 'Message-ID', 'value': f"<{email.get('message_id') or msg_id + '@mail.gmail.com'}>"},
+        ]
+        if email.get('in_reply_to'):
+            headers.append({'name': 'In-Reply-To', 'value': f"<{email['in_reply_to']}>"})
+        if email.get('references'):
+            headers.append({'name': 'References', 'value': ' '.join(f"<{r}>" for r in email['references'])})
+
+        self._messages[msg_id] = {
+            'id': msg_id,
+            'threadId': email.get('thread_id') or msg_id,
+            'labelIds': list(labels or ['INBOX', 'UNREAD']),
+            'internalDate': str(internal_ms),
+            'snippet': body[:100],
+            'payload': {
+                'mimeType': 'multipart/mixed',
+                'filename': '',
+                'headers': headers,
+                'body': {'size': 0},
+                'parts': parts
+            }
+        }
+        self._order.insert(0, msg_id)   # Gmail은 최신순 반환
+        self._record('messagesAdded', {'message': {'id': msg_id,
+                                                  'labelIds': list(self._messages[msg_id]['labelIds'])}})
+        return msg_id
+
+    def delete_message(self, msg_id: str):
+        """메시지 영구 삭제"""
+        if self._messages.pop(msg_id, None) is not None:
+            self._order.remove(msg_id)
+            self._record('messagesDeleted', {'message': {'id': msg_id}})
+
+    def expire_history(self):
+        """현재까지의 history를 만료 처리 (이후 이전 historyId로 조회 시 404)"""
+        self._history_floor = self._history_id + 1
+        self._history.clear()
+
+    @classmethod
+    def synthetic(cls, n: int, latency: float = 0.0) -> 'FakeGmailService':
+        """간단한 합성 인콰이어리 n건으로 채운 서비스"""
+        templates = [
+            ('Inquiry: LED Bulb quotation FOB Shenzhen',
+             'Dear Sir,\nPlease send your best quotation with MOQ and lead time.\nTarget price USD 1.20/pc, payment T/T.\nBest regards'),
+            ('견적 요청 - 전자부품 발주',
+             '안녕하세요,\n발주 관련 견적 요청드립니다. 단가 네고 가능 여부와 납기 알려주세요.\n감사합니다.'),
+            ('RE: L/C Amendment',
+             'Please find the amended L/C details. Port of discharge Hamburg, CIF.\nCertificate of Origin required.'),
+            ('Newsletter - special offer',
+             'Click here to unsubscribe. Limited time special offer, act now!'),
+        ]
+        emails = []
+        for i, (subject, body) in zip(range(n), itertools.cycle(templates)):
+            emails.append({
+                'id': f"msg{i:08d}",
+                'subject': f"{subject} #{i}",
+                'sender': f"Buyer {i % 97} <buyer{i % 97}@trade{i % 13}.com>",
+                'body': body,
+                'has_attachment': i % 3 == 0
+            })
+        return cls(emails, latency=latency)
+
+    # ------------------------------------------------------------------
+    # googleapiclient 호환 인터페이스
+    # ------------------------------------------------------------------
+    def users(self) -> _Users:
+        return _Users(self)
+
+    def new_batch_http_request(self, callback: Callable = None) -> _Batch:
+        return _Batch(self, callback)
+
+    # ------------------------------------------------------------------
+    # 내부 구현
+    # ------------------------------------------------------------------
+    def _round_trip(self):
+        self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _record(self, kind: str, item: Dict):
+        self._history_id += 1
+        self._history.append({'id': str(self._history_id), kind: [item]})
+
+    def _profile(self) -> Dict:
+        return {'emailAddress': 'me@example.com', 'messagesTotal': len(self._messages),
+                'historyId': str(self._history_id)}
+
+    def _list_history(self, start_history_id: str, max_results: int, page_token: Optional[str]) -> Dict:
+        start = int(start_history_id)
+        if start < self._history_floor:
+            raise FakeHttpError(404, f"Requested entity was not found: history {start}")
+
+        records = [r for r in self._history if int(r['id']) > start]
+        offset = int(page_token) if page_token else 0
+        page = records[offset:offset + max_results]
+
+        result = {'historyId': str(self._history_id)}
+        if page:
+            result['history'] = page
+        if offset + len(page) < len(records):
+            result['nextPageToken'] = str(offset + len(page))
+        return result
+
+    def _matches(self, msg: Dict, query: str) -> bool:
+        if 'is:unread' in query and 'UNREAD' not in msg['labelIds']:
+            return False
+        internal_s = int(msg['internalDate']) // 1000
+        after = re.search(r'after:(\d+)', query)
+        if after and internal_s < int(after.group(1)):
+            return False
+        before = re.search(r'before:(\d+)', query)
+        if before and internal_s >= int(before.group(1)):
+            return False
+        return True
+
+    def _list(self, query: str, max_results: int, page_token: Optional[str]) -> Dict:
+        start = int(page_token) if page_token else 0
+        matched = [mid for mid in self._order if self._matches(self._messages[mid], query or '')]
+        page = matched[start:start + min(max_results, 500)]
+
+        result = {'messages': [{'id': mid, 'threadId': self._messages[mid]['threadId']}
+                               for mid in page]}
+        if start + len(page) < len(matched):
+            result['nextPageToken'] = str(start + len(page))
+        return result
+
+    def _get(self, msg_id: str) -> Dict:
+        if msg_id not in self._messages:
+            raise FakeHttpError(404, f"Message not found: {msg_id}")
+        return self._messages[msg_id]
+
+    def _modify(self, msg_id: str, body: Dict) -> Dict:
+        msg = self._get(msg_id)
+        removed = [l for l in body.get('removeLabelIds', []) if l in msg['labelIds']]
+        added = [l for l in body.get('addLabelIds', []) if l not in msg['labelIds']]
+        for label in removed:
+            msg['labelIds'].remove(label)
+        msg['labelIds'].extend(added)
+
+        if removed:
+            self._record('labelsRemoved', {'message': {'id': msg_id}, 'labelIds': removed})
+        if added:
+            self._record('labelsAdded', {'message': {'id': msg_id}, 'labelIds': added})
+        return {'id': msg_id, 'labelIds': msg['labelIds']}
@@ -0,0 +1,237 @@
+"""
+Fake OpenAI Server Module
+오프라인 테스트 / 벤치마크용 로컬 OpenAI 호환 서버
+
+POST /v1/chat/completions 만 구현합니다 (stream=True 시 SSE 청크 전송).
+openai 클라이언트에 base_url=server.base_url 을 넘겨 사용합니다.
+
+    with FakeOpenAIServer(latency=0.3) as server:
+        gen = ReplyGenerator(api_key='test', base_url=server.base_url)
+
+프롬프트에 fail_marker가 있으면 500, hang_marker가 있으면 응답 지연(타임아웃 테스트)
+
+LocalBatchBackend: OpenAI Batch API 대역 (engine.batch_drafting --backend local / 벤치마크)
+"""
+
+import os
+import json
+import time
+import uuid
+import threading
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List, Optional
+
+from .batch_drafting import OpenAIBatchBackend, _read_jsonl, _write_jsonl
+
+
+def fake_reply_text(prompt: str) -> str:
+    """프롬프트의 원본 제목을 포함한 결정적(deterministic) 답장"""
+    subject = ''
+    for line in prompt.splitlines():
+        if line.startswith('Subject:'):
+            subject = line[len('Subject:'):].strip()
+            break
+    return (f"Dear Sir/Madam,\n\nThank you for your email regarding '{subject}'. "
+            f"We are reviewing your request and will send a detailed reply shortly.\n\n"
+            f"Best regards,\nExport Sales Team")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: '_Server'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: Dict):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        fake = self.server.fake
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': f"Unknown path {self.path}"}})
+            return
+
+        prompt = '\n'.join(m.get('content', '') for m in request.get('messages', []))
+        fake._enter()
+        try:
+            if fake.fail_marker in prompt:
+                self._send_json(500, {'error': {'message': 'Injected failure', 'type': 'server_error'}})
+                return
+            time.sleep(fake.hang_seconds if fake.hang_marker in prompt else fake.latency)
+
+            tokens = fake.reply_tokens(prompt)
+            model = request.get('model', 'fake-model')
+            if request.get('stream'):
+                self._stream(tokens, model, fake.token_delay)
+            else:
+                self._send_json(200, {
+                    'id': 'chatcmpl-fake', 'object': 'chat.completion', 'created': int(time.time()),
+                    'model': model,
+                    'choices': [{'index': 0, 'finish_reason': 'stop',
+                                 'message': {'role': 'assistant', 'content': ''.join(tokens)}}],
+                    'usage': {'prompt_tokens': len(prompt.split()), 'completion_tokens': len(tokens),
+                              'total_tokens': len(prompt.split()) + len(tokens)}
+                })
+        except (BrokenPipeError, ConnectionResetError):
+            pass    # 클라이언트 타임아웃으로 연결 종료
+        finally:
+            fake._leave()
+
+    def _stream(self, tokens: List[str], model: str, token_delay: float):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def send(payload: str):
+            data = f"data: {payload}\n\n".encode('utf-8')
+            self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+            self.wfile.flush()
+
+        base = {'id': 'chatcmpl-fake', 'object': 'chat.completion.chunk',
+                'created': int(time.time()), 'model': model}
+        send(json.dumps({**base, 'choices': [{'index': 0, 'delta': {'role': 'assistant', 'content': ''},
+                                               'finish_reason': None}]}))
+        for token in tokens:
+            if token_delay:
+                time.sleep(token_delay)
+            send(json.dumps({**base, 'choices': [{'index': 0, 'delta': {'content': token},
+                                                   'finish_reason': None}]}))
+        send(json.dumps({**base, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]}))
+        send('[DONE]')
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    fake: 'FakeOpenAIServer'
+
+
+class FakeOpenAIServer:
+    """백그라운드 스레드에서 동작하는 OpenAI 호환 HTTP 서버"""
+
+    def __init__(self, latency: float = 0.0, token_delay: float = 0.0,
+                 fail_marker: str = '[[FAIL]]', hang_marker: str = '[[HANG]]', hang_seconds: float = 30.0):
+        """
+        Args:
+            latency: 요청당 첫 토큰까지의 지연 (초)
+            token_delay: 스트리밍 토큰 간 지연 (초)
+            fail_marker: 프롬프트에 포함 시 HTTP 500 응답
+            hang_marker: 프롬프트에 포함 시 hang_seconds 만큼 지연
+        """
+        self.latency = latency
+        self.token_delay = token_delay
+        self.fail_marker = fail_marker
+        self.hang_marker = hang_marker
+        self.hang_seconds = hang_seconds
+
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> 'FakeOpenAIServer':
+        self._server = _Server(('127.0.0.1', 0), _Handler)
+        self._server.fake = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> 'FakeOpenAIServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reply_tokens(self, prompt: str) -> List[str]:
+        """fake_reply_text를 스트리밍용 토큰으로 분할"""
+        words = fake_reply_text(prompt).split(' ')
+        return [w if i == len(words) - 1 else w + ' ' for i, w in enumerate(words)]
+
+    def _enter(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+class LocalBatchBackend:
+    """
+    네트워크 없는 로컬 대역 - OpenAI Batch 출력 형식 그대로 생성
+    (fail_marker가 포함된 요청은 오류 행으로 기록)
+    """
+
+    TERMINAL = OpenAIBatchBackend.TERMINAL
+
+    def __init__(self, work_dir: Path, latency: float = 0.0, fail_marker: str = '[[FAIL]]'):
+        self.work_dir = Path(work_dir)
+        self.latency = latency
+        self.fail_marker = fail_marker
+        self.submitted = 0      # submit 호출 횟수 (중복 제출 확인용)
+
+    def _output_path(self, batch_id: str) -> Path:
+        return self.work_dir / f"{batch_id}.output.jsonl"
+
+    def submit(self, input_path: Path, job_id: str) -> str:
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        batch_id = f"batch_local_{job_id}"
+        self.submitted += 1
+        _write_jsonl(self._output_path(batch_id),
+                     (self._respond(r) for r in _read_jsonl(input_path)))
+        return batch_id
+
+    def find(self, job_id: str) -> Optional[str]:
+        batch_id = f"batch_local_{job_id}"
+        return batch_id if self._output_path(batch_id).exists() else None
+
+    def _respond(self, request: Dict) -> Dict:
+        if self.latency:
+            time.sleep(self.latency)
+        body = request['body']
+        prompt = '\n'.join(m.get('content', '') for m in body.get('messages', []))
+        result = {'id': f"batch_req_{uuid.uuid4().hex[:12]}", 'custom_id': request['custom_id']}
+
+        if self.fail_marker in prompt:
+            result.update(response=None, error={'code': 'server_error', 'message': 'Injected failure'})
+            return result
+
+        result.update(error=None, response={'status_code': 200, 'body': {
+            'object': 'chat.completion', 'model': body.get('model'),
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': fake_reply_text(prompt)}}]
+        }})
+        return result
+
+    def status(self, batch_id: str) -> str:
+        return 'completed' if self._output_path(batch_id).exists() else 'failed'
+
+    def download(self, batch_id: str, output_path: Path):
+        os.replace(self._output_path(batch_id), output_path)
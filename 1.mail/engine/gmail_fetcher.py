@@ -0,0 +1,285 @@
+"""
+Gmail Fetcher Module
+Gmail 메시지 일괄(batch) 수집
+
+messages.get 을 한 건씩 호출하지 않고 Gmail batch 요청으로 묶어서 가져옵니다.
+fields 파라미터로 헤더 / 본문 파트 / 첨부 여부 판단에 필요한 필드만 받습니다.
+대화(스레드) 색인용으로 threadId와 Message-ID / In-Reply-To / References 헤더를 함께 보관합니다.
+"""
+
+import os
+import re
+import time
+import base64
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Iterator
+
+# Gmail API (optional)
+try:
+    from googleapiclient.discovery import build
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    GMAIL_AVAILABLE = True
+except ImportError:
+    GMAIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ['https://www.googleapis.com/auth/gmail.modify']
+
+KST = timezone(timedelta(hours=9))
+
+# Message-ID / In-Reply-To / References 헤더의 <id>
+MESSAGE_ID_PATTERN = re.compile(r'<([^<>\s]+)>')
+
+# messages.get 응답에서 실제로 사용하는 필드만 요청 (partial response)
+MESSAGE_FIELDS = (
+    "id,threadId,labelIds,internalDate,snippet,"
+    "payload(mimeType,filename,headers(name,value),body/data,parts)"
+)
+
+
+# ==============================================================================
+# Payload 파싱
+# ==============================================================================
+def extract_body_text(payload: Dict) -> str:
+    """Gmail 메시지 payload에서 본문 텍스트 추출 (text/plain 우선)"""
+    if 'parts' in payload:
+        for part in payload['parts']:
+            if part['mimeType'] == 'text/plain':
+                data = part.get('body', {}).get('data', '')
+                if data:
+                    return base64.urlsafe_b64decode(data).decode('utf-8', errors='ignore')
+            elif part['mimeType'].startswith('multipart/'):
+                result = extract_body_text(part)
+                if result:
+                    return result
+    else:
+        data = payload.get('body', {}).get('data', '')
+        if data:
+            return base64.urlsafe_b64decode(data).decode('utf-8', errors='ignore')
+    return ''
+
+
+def has_real_attachment(payload: Dict) -> bool:
+    """실제 첨부파일 존재 여부 (multipart 구조 ≠ 첨부파일)"""
+    for part in payload.get('parts', []):
+        if part.get('filename'):
+            return True
+        if part['mimeType'].startswith('multipart/') and has_real_attachment(part):
+            return True
+    return False
+
+
+def message_ids(value: str) -> List[str]:
+    """헤더 값 → 메시지 ID 목록 (꺾쇠 제외, 꺾쇠 없는 비표준 값은 값 전체)"""
+    found = MESSAGE_ID_PATTERN.findall(value or '')
+    if not found and value and value.strip():
+        found = [value.strip()]
+    return found
+
+
+def parse_message(m: Dict) -> Dict:
+    """messages.get 응답 → 분석기 입력용 이메일 dict"""
+    date_raw = int(m['internalDate']) / 1000
+    dt_obj = datetime.fromtimestamp(date_raw, tz=KST)
+
+    # 헤더 이름 대소문자는 발신 서버마다 다름 (Message-ID / Message-Id)
+    headers = {h['name'].lower(): h['value'] for h in m['payload'].get('headers', [])}
+    subject = headers.get('subject', "No Subject")
+    sender = headers.get('from', "Unknown")
+    message_id = (message_ids(headers.get('message-id')) or [None])[0]
+    in_reply_to = (message_ids(headers.get('in-reply-to')) or [None])[0]
+    references = message_ids(headers.get('references'))
+
+    email_match = re.search(r'<(.+?)>', sender)
+    sender_email = email_match.group(1) if email_match else sender
+
+    # 본문 전체 추출 (snippet 대신 실제 body)
+    body_text = extract_body_text(m['payload']) or m.get('snippet', '')
+
+    return {
+        'id': m['id'],
+        'subject': subject,
+        'sender': sender,
+        'sender_email': sender_email,
+        'body': body_text,
+        'snippet': m.get('snippet', ''),
+        'has_attachment': has_real_attachment(m['payload']),
+        'is_reply': bool(in_reply_to or references),
+        'mail_date': dt_obj.strftime('%m-%d %H:%M'),
+        'full_date': dt_obj.strftime('%Y-%m-%d'),
+        'thread_id': m.get('threadId'),
+        'message_id': message_id,
+        'in_reply_to': in_reply_to,
+        'references': references
+    }
+
+
+# ==============================================================================
+# Fetcher
+# ==============================================================================
+def load_gmail_service(token_path: str = 'token.json', credentials_path: str = 'credentials.json',
+                       interactive: bool = True):
+    """
+    Gmail API 서비스 생성 (token.json 재사용 / 만료 시 갱신)
+
+    Args:
+        interactive: 토큰이 없을 때 브라우저 OAuth 인증 진행 (headless 서비스는 False)
+
+    Returns:
+        서비스 객체 (라이브러리 미설치 / 인증 정보 없음이면 None, 토큰 갱신 실패는 예외)
+    """
+    if not GMAIL_AVAILABLE:
+        return None
+
+    creds = None
+    if os.path.exists(token_path):
+        try:
+            creds = Credentials.from_authorized_user_file(token_path, SCOPES)
+        except Exception as e:
+            logger.error(f"Token load error: {e}")
+
+    if not creds or not creds.valid:
+        if creds and creds.expired and creds.refresh_token:
+            creds.refresh(Request())
+        else:
+            if not interactive or not os.path.exists(credentials_path):
+                return None
+            flow = InstalledAppFlow.from_client_secrets_file(credentials_path, SCOPES)
+            creds = flow.run_local_server(port=0)
+
+        with open(token_path, 'w') as token:
+            token.write(creds.to_json())
+
+    return build('gmail', 'v1', credentials=creds)
+
+
+class GmailFetcher:
+    """Gmail 메시지 수집기 (batch 요청 + partial response)"""
+
+    # Gmail 권장 batch 크기 (API 최대 100, 50 초과 시 rate limit 빈발)
+    BATCH_SIZE = 50
+    # messages.list 페이지당 최대 건수
+    LIST_PAGE_SIZE = 500
+
+    def __init__(self, service, batch_size: int = BATCH_SIZE, user_id: str = 'me',
+                 max_retries: int = 2, retry_delay: float = 1.0):
+        self.service = service
+        self.batch_size = max(1, min(batch_size, 100))
+        self.user_id = user_id
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+    def list_message_ids(self, query: str, limit: int) -> List[str]:
+        """검색 쿼리에 맞는 메시지 ID 목록 (페이지네이션 포함)"""
+        ids = []
+        seen = set()
+        page_token = None
+
+        while len(ids) < limit:
+            params = {
+                'userId': self.user_id,
+                'q': query,
+                'maxResults': min(self.LIST_PAGE_SIZE, limit - len(ids)),
+                'fields': 'messages/id,nextPageToken'
+            }
+            if page_token:
+                params['pageToken'] = page_token
+
+            results = self.service.users().messages().list(**params).execute()
+            # 목록 조회 중 새 메일이 도착하면 페이지 경계가 밀려 같은 ID가 다음 페이지에 다시 나올 수 있음
+            for msg in results.get('messages', []):
+                if msg['id'] not in seen:
+                    seen.add(msg['id'])
+                    ids.append(msg['id'])
+
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                break
+
+        return ids[:limit]
+
+    def fetch(self, query: str, limit: int) -> List[Dict]:
+        """검색 쿼리로 메시지를 조회하여 파싱된 이메일 목록 반환"""
+        return self.fetch_messages(self.list_message_ids(query, limit))
+
+    def fetch_messages(self, ids: List[str]) -> List[Dict]:
+        """메시지 ID 목록 → 파싱된 이메일 목록 (입력 순서 유지)"""
+        emails = []
+        for chunk in self.iter_messages(ids):
+            emails.extend(chunk)
+        return emails
+
+    def iter_messages(self, ids: List[str]) -> Iterator[List[Dict]]:
+        """batch 단위로 파싱된 이메일 목록을 순차 반환"""
+        for start in range(0, len(ids), self.batch_size):
+            chunk = ids[start:start + self.batch_size]
+            raw = self._fetch_chunk(chunk)
+            parsed = []
+            for msg_id in chunk:
+                if msg_id not in raw:
+                    continue
+                try:
+                    parsed.append(parse_message(raw[msg_id]))
+                except Exception as e:
+                    logger.error(f"Parse failed ({msg_id}): {e}")
+            yield parsed
+
+    def _get_request(self, msg_id: str):
+        return self.service.users().messages().get(
+            userId=self.user_id, id=msg_id, format='full', fields=MESSAGE_FIELDS
+        )
+
+    def _fetch_chunk(self, chunk: List[str]) -> Dict[str, Dict]:
+        """한 batch 조회 - 실패분(429 등)은 backoff 후 재시도"""
+        results = {}
+        pending = list(chunk)
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.retry_delay * (2 ** (attempt - 1)))
+
+            failed = self._execute_batch(pending, results)
+            if not failed:
+                break
+            pending = failed
+        else:
+            logger.warning(f"Fetch failed after retries: {len(pending)} messages skipped")
+
+        return results
+
+    def _execute_batch(self, ids: List[str], results: Dict[str, Dict]) -> List[str]:
+        """batch 요청 1회 실행 - Returns: 실패한 ID 목록"""
+        failed = []
+
+        # batch 미지원 서비스 객체면 순차 조회
+        if not hasattr(self.service, 'new_batch_http_request'):
+            for msg_id in ids:
+                try:
+                    results[msg_id] = self._get_request(msg_id).execute()
+                except Exception as e:
+                    logger.error(f"Get failed ({msg_id}): {e}")
+                    failed.append(msg_id)
+            return failed
+
+        def _callback(request_id, response, exception):
+            if exception is not None:
+                logger.debug(f"Batch item failed ({request_id}): {exception}")
+                failed.append(request_id)
+            else:
+                results[request_id] = response
+
+        batch = self.service.new_batch_http_request(callback=_callback)
+        for msg_id in ids:
+            batch.add(self._get_request(msg_id), request_id=msg_id)
+
+        try:
+            batch.execute()
+        except Exception as e:
+            logger.error(f"Batch execute failed: {e}")
+            return [msg_id for msg_id in ids if msg_id not in results]
+
+        return failed
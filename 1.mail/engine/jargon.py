@@ -0,0 +1,81 @@
+"""
+Jargon Replacer Module
+한국어 무역 은어 단일 패스 치환
+
+jargon_map.json을 하나의 정규식 alternation으로 컴파일하여
+본문을 한 번만 훑으면서 긴 용어 우선(longest-match-first)으로 치환합니다.
+컴파일 결과는 파일 mtime 기준으로 캐시되어 파일이 바뀔 때만 다시 만듭니다.
+"""
+
+import os
+import re
+import json
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class JargonReplacer:
+    """은어 → 표준 용어 치환기"""
+
+    def __init__(self, mapping: Dict[str, str]):
+        # 대소문자 무시 매칭 → 소문자 키로 치환어 조회 (먼저 정의된 항목 우선)
+        self._lookup: Dict[str, str] = {}
+        for ko, en in mapping.items():
+            self._lookup.setdefault(ko.lower(), en)
+
+        # 같은 위치에서 긴 용어가 먼저 매칭되도록 길이 역순 정렬
+        terms = sorted((t for t in mapping if t), key=len, reverse=True)
+        self._pattern = (re.compile('|'.join(map(re.escape, terms)), re.IGNORECASE)
+                         if terms else None)
+
+    def __len__(self) -> int:
+        return len(self._lookup)
+
+    def _substitute(self, match: re.Match) -> str:
+        found = match.group(0)
+        return self._lookup.get(found.lower(), found)
+
+    def replace(self, text: str) -> str:
+        """한 번의 스캔으로 모든 은어 치환"""
+        if not self._pattern or not text:
+            return text
+        return self._pattern.sub(self._substitute, text)
+
+
+_cache: Dict[str, Tuple[Optional[int], JargonReplacer]] = {}
+_cache_lock = threading.Lock()
+
+
+def load_jargon_replacer(path: str, section: str = 'korean_jargon') -> JargonReplacer:
+    """jargon_map.json → JargonReplacer (mtime 변경 시에만 재컴파일)"""
+    key = f"{os.path.abspath(path)}#{section}"
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+
+    cached = _cache.get(key)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        mapping = {}
+        if mtime is not None:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    mapping = json.load(f).get(section, {})
+            except (OSError, ValueError) as e:
+                logger.error(f"Jargon map load failed ({path}): {e}")
+        else:
+            logger.warning(f"File not found: {path}")
+
+        replacer = JargonReplacer(mapping)
+        _cache[key] = (mtime, replacer)
+        return replacer
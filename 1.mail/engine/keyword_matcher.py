@@ -0,0 +1,166 @@
+"""
+Keyword Matcher Module
+Aho-Corasick 기반 다중 키워드 매칭
+
+keywords.json 전체를 한 번 오토마톤으로 컴파일해 두고,
+본문을 한 번만 훑어서 모든 카테고리 점수와 매칭 키워드를 계산합니다.
+(키워드 수 × 본문 길이 → 본문 길이 + 매칭 수)
+"""
+
+from collections import deque
+from typing import Dict, List, Tuple, Set
+
+
+class AhoCorasick:
+    """Aho-Corasick 다중 패턴 오토마톤 (부분 문자열 포함 여부 판정)"""
+
+    def __init__(self, patterns: List[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+        # 빈 패턴은 항상 매칭 ('' in text == True)
+        self._always = tuple(i for i, p in enumerate(patterns) if not p)
+
+        for idx, pattern in enumerate(patterns):
+            if pattern:
+                self._add(pattern, idx)
+        self._build_failure_links()
+        # 상태별 전이 캐시 - 패턴에 나오는 문자만 저장 (상태 수 × 패턴 문자 수로 제한,
+        # 그 밖의 문자는 어느 상태에서든 루트로 돌아가므로 캐시하지 않음)
+        self._alphabet = frozenset(''.join(patterns))
+        self._delta: List[Dict[str, int]] = [dict(g) for g in self._goto]
+
+    def _add(self, pattern: str, idx: int):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+                self._goto[state][ch] = nxt
+            state = nxt
+        self._out[state] += (idx,)
+
+    def _build_failure_links(self):
+        """BFS로 failure link 생성 + 접미사 패턴 출력 병합"""
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def _transition(self, state: int, ch: str) -> int:
+        """failure link를 따라 다음 상태 계산"""
+        goto, fail = self._goto, self._fail
+        while state and ch not in goto[state]:
+            state = fail[state]
+        return goto[state].get(ch, 0)
+
+    def find(self, text: str) -> Set[int]:
+        """text에 포함된 패턴 인덱스 집합 (한 번의 순회)"""
+        # 계산한 전이를 상태별로 캐시 (failure link 반복 순회 제거, 패턴에 없는 문자는 루트로)
+        delta, out, alphabet = self._delta, self._out, self._alphabet
+        hit_states = set()
+        state = 0
+
+        for ch in text:
+            nxt = delta[state].get(ch)
+            if nxt is None:
+                if ch in alphabet:
+                    nxt = delta[state][ch] = self._transition(state, ch)
+                else:
+                    nxt = 0
+            state = nxt
+            if out[state]:
+                hit_states.add(state)
+
+        found = set(self._always)
+        for state in hit_states:
+            found.update(out[state])
+        return found
+
+
+class KeywordScorer:
+    """keywords.json → 컴파일된 카테고리 점수 계산기"""
+
+    CATEGORY_MAP = {
+        'product_clarity': 'clarity',
+        'buying_intent': 'intent',
+        'trade_terms': 'terms'
+    }
+
+    def __init__(self, keywords: Dict):
+        # (score_key, word, points) - 스팸 키워드는 score_key = None
+        # 기존 루프와 동일한 적용 순서를 유지하기 위해 설정 파일 순서대로 번호 부여
+        self._entries: List[Tuple[str, str, float]] = []
+
+        for cat_key, score_key in self.CATEGORY_MAP.items():
+            words = keywords.get(cat_key, {}).get('words', {})
+            for word, points in words.items():
+                self._entries.append((score_key, word, points))
+
+        spam_words = keywords.get('spam_keywords', {}).get('words', {})
+        for word, points in spam_words.items():
+            self._entries.append((None, word, points))
+
+        # 매칭 키워드 → (score_key, points) (여러 카테고리에 있으면 설정 파일에서 먼저 나온 항목)
+        self.categories: Dict[str, Tuple[str, float]] = {}
+        for score_key, word, points in self._entries:
+            if score_key is not None:
+                self.categories.setdefault(word, (score_key, points))
+        # 스팸 키워드 → 감점 (설정 파일에서 먼저 나온 항목)
+        self.spam_words: Dict[str, float] = {}
+        for score_key, word, points in self._entries:
+            if score_key is None:
+                self.spam_words.setdefault(word, points)
+
+        # 소문자 패턴 중복 제거 (패턴 → 엔트리 번호 목록)
+        pattern_ids: Dict[str, int] = {}
+        self._pattern_entries: List[List[int]] = []
+        for idx, (_, word, _) in enumerate(self._entries):
+            pattern = word.lower()
+            if pattern not in pattern_ids:
+                pattern_ids[pattern] = len(self._pattern_entries)
+                self._pattern_entries.append([])
+            self._pattern_entries[pattern_ids[pattern]].append(idx)
+
+        self._automaton = AhoCorasick(list(pattern_ids))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def score(self, text: str) -> Tuple[Dict[str, float], List[str]]:
+        """키워드 매칭 스코어 계산 - Returns: (scores, matched_keywords)"""
+        scores, matched_keywords, _ = self.match(text)
+        return scores, matched_keywords
+
+    def match(self, text: str) -> Tuple[Dict[str, float], List[str], List[str]]:
+        """키워드 매칭 스코어 계산 - Returns: (scores, matched_keywords, spam_keywords)"""
+        hits = self._automaton.find(text.lower())
+        entry_ids = sorted(i for p in hits for i in self._pattern_entries[p])
+
+        scores = {'clarity': 0, 'intent': 0, 'terms': 0}
+        matched_keywords = []
+        spam_keywords = []
+
+        for idx in entry_ids:
+            score_key, word, points = self._entries[idx]
+            if score_key is not None:
+                scores[score_key] += points
+                matched_keywords.append(word)
+            else:
+                # 스팸 키워드 (감점)
+                for key in scores:
+                    scores[key] = max(0, scores[key] + points)
+                spam_keywords.append(word)
+
+        return scores, matched_keywords, spam_keywords
@@ -0,0 +1,383 @@
+"""
+Lead Model Module
+우리 팀의 처리 이력(답장함 / 답장 없이 처리 완료)으로 학습하는 리드 점수 (선택 기능, numpy 필요)
+
+규칙 점수(InquiryAnalyzer.WEIGHTS 50/35/15)와 별도로 "실제로 답장한 메일과 비슷한가"를 0-100으로 매깁니다.
+    특징: 제목 / 본문 단어 1-gram + 2-gram, 제목 단어, 발신 도메인, 첨부 / 회신 여부
+          → feature hashing (CRC32 하위 18비트 버킷 + 부호 비트, 어휘 사전 없음) → 행 L2 정규화
+          메일별 버킷 목록은 저장 시 email_features에 보관 (재학습 / 재채점 때 본문을 다시 토큰화하지 않음)
+    모델: L2 정규화 로지스틱 회귀 (클래스 균형 가중치, 전체 배치 Adagrad - numpy만 사용)
+    채점: 배치 전체를 CSR 배열(indptr / indices / data)로 만들어 가중치 gather + bincount 한 번으로 계산
+
+모델 파일은 data/lead_model.npy (가중치 float32, 마지막 값 = 절편) + data/lead_model.json (학습 정보)입니다.
+LeadScorer는 첫 채점 때 np.load(mmap_mode='r')로 열어 배치에 나온 버킷 페이지만 읽고,
+파일이 바뀌면(재학습) 다음 배치에서 다시 엽니다. (프로세스마다 가중치 사본을 메모리에 올리지 않음)
+
+    python -m engine.lead_model train      # 학습 + 저장된 메일 학습 점수 갱신
+    python -m engine.lead_model score      # 현재 모델로 저장된 메일 학습 점수만 갱신
+"""
+
+import os
+import re
+import sys
+import json
+import zlib
+import time
+import logging
+import argparse
+import threading
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# numpy import (optional)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# 특징 형식 버전 (특징 추출 / 해시가 바뀌면 올려서 이전 모델 파일 무시)
+# 2: m:reply에 is_reply 헤더 반영
+FEATURE_VERSION = 2
+# 해시 버킷 수 (2^18 - float32 가중치 1MB)
+HASH_BITS = 18
+N_FEATURES = 1 << HASH_BITS
+# 본문 앞부분만 사용 (서명 / 인용 / 긴 첨부 설명이 특징을 희석하지 않도록)
+MAX_BODY_CHARS = 3000
+# 학습 최소 예시 수 (클래스별)
+MIN_EXAMPLES = 20
+
+_TOKEN_RE = re.compile(r'[^\W_]+')
+_MASK = N_FEATURES - 1
+
+# 특징 문자열 → 부호 있는 버킷 (음수 = ~버킷, 부호 -1) 캐시 (같은 단어가 메일마다 반복되므로 CRC32 계산을 한 번만)
+_buckets: Dict[str, int] = {}
+_BUCKET_CACHE_MAX = 500_000
+
+
+def email_features(email: Dict) -> set:
+    """메일 → 특징 문자열 집합"""
+    subject = (email.get('subject') or '').lower()
+    body = (email.get('body') or email.get('snippet') or '')[:MAX_BODY_CHARS].lower()
+    subject_words = _TOKEN_RE.findall(subject)
+    words = subject_words + _TOKEN_RE.findall(body)
+
+    features = set(words)
+    features.update(map(' '.join, zip(words, words[1:])))
+    features.update('s:' + w for w in subject_words)
+    sender = (email.get('sender_email') or '').lower()
+    if '@' in sender:
+        features.add('d:' + sender.rsplit('@', 1)[1])
+    if email.get('has_attachment'):
+        features.add('m:attachment')
+    if email.get('is_reply') or subject.startswith(('re:', 'fwd:')):
+        features.add('m:reply')
+    return features
+
+
+def _bucket(feature: str) -> int:
+    h = zlib.crc32(feature.encode('utf-8'))
+    code = h & _MASK if h >> 31 else ~(h & _MASK)
+    if len(_buckets) >= _BUCKET_CACHE_MAX:
+        _buckets.clear()
+    _buckets[feature] = code
+    return code
+
+
+def featurize(emails: List[Dict]) -> List[bytes]:
+    """메일 → 부호 있는 버킷 목록 (int32 little-endian BLOB, email_features 저장 형식)"""
+    encoded = []
+    for email in emails:
+        codes = array('i', [_buckets[f] if f in _buckets else _bucket(f) for f in email_features(email)])
+        if sys.byteorder != 'little':
+            codes.byteswap()
+        encoded.append(codes.tobytes())
+    return encoded
+
+
+def to_matrix(encoded: List[bytes]) -> Tuple['np.ndarray', 'np.ndarray', 'np.ndarray']:
+    """
+    버킷 목록 BLOB 배치 → CSR 희소 행렬 (indptr, indices, data)
+
+    행마다 특징 수의 제곱근으로 나눠 L2 정규화 (긴 메일이 점수를 독점하지 않도록)
+    """
+    lengths = np.fromiter((len(blob) >> 2 for blob in encoded), dtype=np.int64, count=len(encoded))
+    indptr = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    codes = np.frombuffer(b''.join(encoded), dtype='<i4')
+    negative = codes < 0
+    indices = np.where(negative, ~codes, codes)
+    norms = np.repeat((1.0 / np.sqrt(np.maximum(lengths, 1))).astype(np.float32), lengths)
+    data = np.where(negative, -norms, norms)
+    return indptr, indices, data
+
+
+def vectorize(emails: List[Dict]) -> Tuple['np.ndarray', 'np.ndarray', 'np.ndarray']:
+    """메일 배치 → CSR 희소 행렬"""
+    return to_matrix(featurize(emails))
+
+
+def _row_ids(indptr: 'np.ndarray') -> 'np.ndarray':
+    """CSR 값마다 행 번호"""
+    return np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+
+
+def decision(weights: 'np.ndarray', matrix: Tuple['np.ndarray', 'np.ndarray', 'np.ndarray'],
+             row_ids: Optional['np.ndarray'] = None) -> 'np.ndarray':
+    """희소 행렬 × 가중치 + 절편 (weights[-1]) → 행별 logit"""
+    indptr, indices, data = matrix
+    if row_ids is None:
+        row_ids = _row_ids(indptr)
+    products = weights[indices] * data
+    return np.bincount(row_ids, weights=products, minlength=len(indptr) - 1) + float(weights[-1])
+
+
+def probabilities(weights: 'np.ndarray', matrix) -> 'np.ndarray':
+    return 1.0 / (1.0 + np.exp(-decision(weights, matrix)))
+
+
+def auc(scores, labels) -> Optional[float]:
+    """ROC AUC (동점은 평균 순위) - 한 클래스만 있으면 None"""
+    scores = np.asarray(scores, dtype=np.float64)
+    labels = np.asarray(labels, dtype=bool)
+    positives, negatives = int(labels.sum()), int((~labels).sum())
+    if not positives or not negatives:
+        return None
+    _, inverse, counts = np.unique(scores, return_inverse=True, return_counts=True)
+    ranks = (np.cumsum(counts) - (counts - 1) / 2.0)[inverse]
+    return float((ranks[labels].sum() - positives * (positives + 1) / 2.0) / (positives * negatives))
+
+
+def train(matrix, labels, epochs: int = 150, learning_rate: float = 0.5, l2: float = 1e-4) -> 'np.ndarray':
+    """
+    로지스틱 회귀 학습 (전체 배치 Adagrad)
+
+    기울기도 CSR 값 단위 bincount로 계산하므로 메일별 파이썬 루프가 없습니다.
+    답장 메일이 적어도 한쪽으로 쏠리지 않도록 두 클래스의 가중치 합을 같게 맞춥니다.
+
+    Returns:
+        가중치 (N_FEATURES + 1, 마지막 값 = 절편)
+    """
+    indptr, indices, data = matrix
+    labels = np.asarray(labels, dtype=np.float64)
+    rows = len(labels)
+    row_ids = _row_ids(indptr)
+    positive = labels.mean()
+    sample_weight = np.where(labels > 0, 0.5 / positive, 0.5 / (1.0 - positive)) / rows
+
+    weights = np.zeros(N_FEATURES + 1)
+    squared = np.full(N_FEATURES + 1, 1e-8)
+    for _ in range(epochs):
+        p = 1.0 / (1.0 + np.exp(-decision(weights, matrix, row_ids)))
+        residual = (p - labels) * sample_weight
+        gradient = np.empty_like(weights)
+        gradient[:-1] = np.bincount(indices, weights=residual[row_ids] * data, minlength=N_FEATURES)
+        gradient[:-1] += l2 * weights[:-1]
+        gradient[-1] = residual.sum()
+        squared += gradient * gradient
+        weights -= learning_rate * gradient / np.sqrt(squared)
+    return weights
+
+
+def model_paths(model_path: str) -> Tuple[str, str]:
+    """모델 경로 (확장자 제외) → (가중치 .npy, 학습 정보 .json)"""
+    return f"{model_path}.npy", f"{model_path}.json"
+
+
+def save_model(model_path: str, weights: 'np.ndarray', meta: Dict):
+    """가중치 / 학습 정보 저장 (임시 파일 → rename: 이미 mmap으로 연 프로세스는 이전 파일을 계속 읽음)"""
+    weights_path, meta_path = model_paths(model_path)
+    os.makedirs(os.path.dirname(os.path.abspath(weights_path)), exist_ok=True)
+    with open(weights_path + '.tmp', 'wb') as f:
+        np.save(f, weights.astype(np.float32))
+    with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({**meta, 'feature_version': FEATURE_VERSION, 'n_features': N_FEATURES}, f,
+                  ensure_ascii=False, indent=2)
+    os.replace(weights_path + '.tmp', weights_path)
+    os.replace(meta_path + '.tmp', meta_path)
+
+
+class LeadScorer:
+    """학습된 리드 모델 채점기 (첫 채점 시 mmap 로드, 모델 파일이 바뀌면 다시 로드)"""
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+        self.meta: Optional[Dict] = None
+        self._weights = None
+        self._signature = None
+        self._lock = threading.Lock()
+        self._warned = False
+
+    def _file_signature(self) -> tuple:
+        signature = []
+        for path in model_paths(self.model_path):
+            try:
+                st = os.stat(path)
+                signature.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _load(self):
+        """현재 모델 가중치 (mmap 배열, 모델 없음 / numpy 미설치면 None)"""
+        signature = self._file_signature()
+        if signature == self._signature:
+            return self._weights
+
+        with self._lock:
+            if signature == self._signature:
+                return self._weights
+            weights, meta = None, None
+            if not NUMPY_AVAILABLE:
+                if not self._warned and None not in signature:
+                    logger.warning("numpy is not installed, learned lead scores are disabled")
+                    self._warned = True
+            elif None not in signature:
+                weights_path, meta_path = model_paths(self.model_path)
+                try:
+                    with open(meta_path, encoding='utf-8') as f:
+                        meta = json.load(f)
+                    if meta.get('feature_version') != FEATURE_VERSION:
+                        logger.warning(f"Lead model {weights_path} has feature version {meta.get('feature_version')}, "
+                                       f"expected {FEATURE_VERSION} - retrain with python -m engine.lead_model train")
+                    else:
+                        weights = np.load(weights_path, mmap_mode='r')
+                        logger.info(f"Lead model loaded: {weights_path} (trained {meta.get('trained_at')})")
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Lead model load failed: {e}")
+                    weights, meta = None, None
+            self._weights, self.meta, self._signature = weights, meta, signature
+        return weights
+
+    @property
+    def available(self) -> bool:
+        return self._load() is not None
+
+    def score_encoded(self, encoded: List[bytes]) -> List[Optional[float]]:
+        """버킷 목록(featurize 결과) 배치 → 학습 점수 0-100 (모델이 없으면 모두 None)"""
+        weights = self._load()
+        if weights is None or not encoded:
+            return [None] * len(encoded)
+        scores = np.round(probabilities(weights, to_matrix(encoded)) * 100.0, 1)
+        return scores.tolist()
+
+    def score_batch(self, emails: List[Dict]) -> List[Optional[float]]:
+        """메일 배치 → 학습 점수 0-100 (모델이 없으면 모두 None)"""
+        if self._load() is None:
+            return [None] * len(emails)
+        return self.score_encoded(featurize(emails))
+
+
+# ------------------------------------------------------------------
+# 학습 / 저장된 메일 채점
+# ------------------------------------------------------------------
+def _holdout(email_id: str) -> bool:
+    """평가용 20% (메일 ID 기준 고정 분할)"""
+    return zlib.crc32(email_id.encode('utf-8')) % 5 == 0
+
+
+def stored_features(db, email_ids: List[str]) -> Dict[str, bytes]:
+    """저장된 버킷 목록 (없거나 이전 특징 형식인 메일은 저장된 본문으로 만들어 저장)"""
+    found = db.get_ml_features(email_ids, FEATURE_VERSION)
+    missing = [i for i in email_ids if i not in found]
+    if missing:
+        emails = db.get_analysis_inputs(missing)
+        created = dict(zip((e['id'] for e in emails), featurize(emails)))
+        db.put_ml_features(created, FEATURE_VERSION)
+        found.update(created)
+    return found
+
+
+def train_from_db(db, model_path: str, epochs: int = 150, min_examples: int = MIN_EXAMPLES) -> Dict:
+    """
+    처리 이력으로 학습 → 모델 파일 저장
+
+    평가용 20%로 학습 모델과 규칙 점수의 AUC(답장 메일을 더 높게 매기는 비율)를 비교한 뒤
+    전체 이력으로 다시 학습해 저장합니다.
+
+    Returns:
+        학습 정보 (모델 .json과 같은 내용)
+    """
+    history = db.get_triage_history()
+    features = stored_features(db, [e['id'] for e in history])
+    history = [e for e in history if e['id'] in features]
+    labels = np.array([bool(e['replied']) for e in history], dtype=bool)
+    replied, archived = int(labels.sum()), int((~labels).sum())
+    if replied < min_examples or archived < min_examples:
+        raise ValueError(f"학습 데이터가 부족합니다: 답장 {replied}건 / 답장 없이 처리 {archived}건 "
+                         f"(각 {min_examples}건 이상 필요)")
+
+    started = time.perf_counter()
+    test = np.array([_holdout(e['id']) for e in history])
+    metrics = {}
+    if len(set(labels[~test])) == 2 and len(set(labels[test])) == 2:
+        weights = train(to_matrix([features[e['id']] for e, t in zip(history, test) if not t]), labels[~test],
+                        epochs=epochs)
+        holdout = [e for e, t in zip(history, test) if t]
+        metrics = {
+            'holdout': len(holdout),
+            'model_auc': round(auc(probabilities(weights, to_matrix([features[e['id']] for e in holdout])),
+                                   labels[test]), 4),
+            'rule_auc': round(auc([e['score'] for e in holdout], labels[test]), 4),
+        }
+
+    weights = train(to_matrix([features[e['id']] for e in history]), labels, epochs=epochs)
+    meta = {
+        'trained_at': datetime.now().isoformat(timespec='seconds'),
+        'examples': {'replied': replied, 'archived': archived},
+        'metrics': metrics,
+        'train_seconds': round(time.perf_counter() - started, 2),
+    }
+    save_model(model_path, weights, meta)
+    logger.info(f"Lead model trained: {meta}")
+    return meta
+
+
+def score_stored(db, scorer: LeadScorer, chunk_size: int = 10000) -> int:
+    """저장된 메일(스팸 제외) 학습 점수 갱신 (저장된 버킷 목록으로 배치 채점) - Returns: 갱신 건수"""
+    if not scorer.available:
+        return 0
+    ids = db.get_ml_score_targets()
+    for start in range(0, len(ids), chunk_size):
+        features = stored_features(db, ids[start:start + chunk_size])
+        db.update_ml_scores(dict(zip(features, scorer.score_encoded(list(features.values())))))
+    return len(ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="처리 이력 기반 리드 점수 모델 학습 / 채점")
+    parser.add_argument('command', choices=['train', 'score'])
+    parser.add_argument('--db', default=str(BASE_DIR / 'data' / 'trade_emails.db'))
+    parser.add_argument('--model', default=str(BASE_DIR / 'data' / 'lead_model'), help='모델 경로 (확장자 제외)')
+    parser.add_argument('--epochs', type=int, default=150)
+    parser.add_argument('--min-examples', type=int, default=MIN_EXAMPLES, help='클래스별 최소 학습 메일 수')
+    parser.add_argument('--no-score', action='store_true', help='학습 후 저장된 메일 채점 생략')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    if not NUMPY_AVAILABLE:
+        parser.error("numpy가 필요합니다: pip install numpy")
+
+    from . import registry
+    db = registry.get_db(args.db)
+    summary = {}
+    if args.command == 'train':
+        try:
+            summary['model'] = train_from_db(db, args.model, epochs=args.epochs, min_examples=args.min_examples)
+        except ValueError as e:
+            parser.exit(1, f"{e}\n")
+    if args.command == 'score' or not args.no_score:
+        started = time.perf_counter()
+        summary['scored'] = score_stored(db, LeadScorer(args.model))
+        summary['score_seconds'] = round(time.perf_counter() - started, 2)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""
+Mail Sync Module
+Gmail historyId 기반 증분 동기화
+
+마지막 동기화 시점의 historyId를 DB에 저장해 두고, 이후에는
+history.list로 추가 / 삭제 / 라벨 변경된 메시지만 반영합니다.
+historyId가 없거나 만료(404)된 경우에만 전체 재동기화합니다. (저장된 메일은 유지)
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Callable, Optional
+
+from .gmail_fetcher import GmailFetcher
+
+logger = logging.getLogger(__name__)
+
+# 수집 대상에서 제외되는 라벨 (is:unread 기본 검색 범위와 동일)
+EXCLUDED_LABELS = {'SPAM', 'TRASH', 'DRAFT'}
+
+HISTORY_TYPES = ['messageAdded', 'messageDeleted', 'labelAdded', 'labelRemoved']
+
+
+@dataclass
+class SyncResult:
+    """동기화 결과"""
+    mode: str                       # 'full' | 'incremental'
+    added: int = 0
+    deleted: int = 0
+    archived: int = 0
+    reactivated: int = 0
+    history_id: Optional[str] = None
+    emails: List[Dict] = field(default_factory=list)
+
+
+def is_history_expired(error: Exception) -> bool:
+    """history.list 404 (startHistoryId 만료) 여부"""
+    resp = getattr(error, 'resp', None)
+    return getattr(resp, 'status', None) == 404
+
+
+class MailSync:
+    """Gmail 증분 동기화 엔진"""
+
+    HISTORY_KEY = 'gmail_history_id'
+
+    def __init__(self, service, db, query: str = 'is:unread', user_id: str = 'me',
+                 fetcher: GmailFetcher = None):
+        self.service = service
+        self.db = db
+        self.query = query
+        self.user_id = user_id
+        self.fetcher = fetcher or GmailFetcher(service, user_id=user_id)
+
+    def sync(self, ingest: Optional[Callable[[List[Dict]], None]] = None, limit: int = 100,
+             ingest_ids: Optional[Callable[[List[str]], int]] = None) -> SyncResult:
+        """
+        동기화 실행
+
+        Args:
+            ingest: 새로 수집한 이메일 목록을 분석/저장하는 함수
+            limit: 전체 재동기화 시 최대 수집 건수
+            ingest_ids: 지정 시 메시지 ID 목록을 넘겨 수집까지 맡김 (MailPipeline 등)
+                        - 저장한 건수 반환, SyncResult.emails는 비어 있음
+
+        Returns:
+            SyncResult
+        """
+        history_id = self.db.get_sync_state(self.HISTORY_KEY)
+        ingest = self._ingester(ingest, ingest_ids)
+
+        if history_id:
+            try:
+                return self._incremental_sync(history_id, ingest)
+            except Exception as e:
+                if not is_history_expired(e):
+                    raise
+                logger.warning(f"History {history_id} expired - full resync")
+
+        return self._full_sync(ingest, limit)
+
+    def _ingester(self, ingest, ingest_ids) -> Callable[[List[str]], tuple]:
+        """ID 목록 → (저장 건수, 수집한 이메일 목록)"""
+        if ingest_ids is not None:
+            return lambda ids: (ingest_ids(ids) if ids else 0, [])
+
+        def fetch_and_ingest(ids: List[str]):
+            emails = self.fetcher.fetch_messages(ids)
+            if emails:
+                ingest(emails)
+            return len(emails), emails
+        return fetch_and_ingest
+
+    def _current_history_id(self) -> str:
+        profile = self.service.users().getProfile(userId=self.user_id).execute()
+        return str(profile['historyId'])
+
+    def _full_sync(self, ingest: Callable[[List[str]], tuple], limit: int) -> SyncResult:
+        """
+        전체 재동기화 - 목록 조회 전에 historyId를 먼저 확보하여 누락 방지
+
+        저장된 메일은 지우지 않습니다. (처리 상태, 답장/보관 시각, 묶음 유지)
+        검색 결과에 없는 새 메일만 수집하고, 목록이 limit 미만으로 끝까지 조회된 경우에만
+        더 이상 검색 조건에 맞지 않는 Active 메일(다른 기기에서 읽음 등)을 Archived로 바꿉니다.
+        """
+        history_id = self._current_history_id()
+        ids = self.fetcher.list_message_ids(self.query, limit)
+        known = self.db.get_email_ids(ids)
+        result = SyncResult(mode='full', history_id=history_id)
+
+        to_fetch = [i for i in ids if i not in known]
+        if to_fetch:
+            result.added, result.emails = ingest(to_fetch)
+
+        if len(ids) < limit:
+            # 검색 결과에 남은 메일과 같은 묶음은 유지 (update_statuses는 묶음 전체에 적용)
+            listed_clusters = {cluster_id or msg_id for msg_id, (_, cluster_id)
+                               in self.db.get_cluster_assignments(ids).items()}
+            statuses = {msg_id: 'Archived' for msg_id, cluster_id in self.db.get_active_clusters().items()
+                        if cluster_id not in listed_clusters}
+            self.db.update_statuses(statuses)
+            result.archived = len(statuses)
+
+        self.db.set_sync_state(self.HISTORY_KEY, history_id)
+        logger.info(f"Full sync: +{result.added} archived={result.archived} "
+                    f"({len(known)} already stored, history {history_id})")
+        return result
+
+    def _list_history(self, start_history_id: str):
+        """history.list 전체 페이지 조회 - Returns: (records, latest_history_id)"""
+        records = []
+        page_token = None
+        latest = start_history_id
+
+        while True:
+            params = {
+                'userId': self.user_id,
+                'startHistoryId': start_history_id,
+                'historyTypes': HISTORY_TYPES,
+                'maxResults': 500
+            }
+            if page_token:
+                params['pageToken'] = page_token
+
+            response = self.service.users().history().list(**params).execute()
+            records.extend(response.get('history', []))
+            latest = str(response.get('historyId', latest))
+
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+
+        return records, latest
+
+    @staticmethod
+    def _collect_changes(records: List[Dict]) -> Dict[str, str]:
+        """history 레코드 → 메시지별 최종 변경 ('add' | 'delete' | 'read' | 'unread')"""
+        changes = {}
+
+        for record in records:
+            for item in record.get('messagesAdded', []):
+                msg = item['message']
+                labels = set(msg.get('labelIds', []))
+                if 'UNREAD' in labels and not labels & EXCLUDED_LABELS:
+                    changes[msg['id']] = 'add'
+
+            for item in record.get('messagesDeleted', []):
+                changes[item['message']['id']] = 'delete'
+
+            for item in record.get('labelsAdded', []):
+                msg_id = item['message']['id']
+                added = set(item.get('labelIds', []))
+                if added & EXCLUDED_LABELS:
+                    changes[msg_id] = 'delete'
+                elif 'UNREAD' in added and changes.get(msg_id) != 'add':
+                    changes[msg_id] = 'unread'
+
+            for item in record.get('labelsRemoved', []):
+                msg_id = item['message']['id']
+                if 'UNREAD' in item.get('labelIds', []) and changes.get(msg_id) != 'delete':
+                    changes[msg_id] = 'read'
+
+        return changes
+
+    def _incremental_sync(self, history_id: str, ingest: Callable[[List[str]], tuple]) -> SyncResult:
+        """historyId 이후 변경분만 반영"""
+        records, latest = self._list_history(history_id)
+        changes = self._collect_changes(records)
+        result = SyncResult(mode='incremental', history_id=latest)
+
+        if changes:
+            known = self.db.get_email_ids(list(changes))
+
+            to_fetch = [i for i, c in changes.items()
+                        if (c == 'add' or c == 'unread') and i not in known]
+            to_delete = [i for i, c in changes.items() if c == 'delete' and i in known]
+            statuses = {}
+            for msg_id, change in changes.items():
+                if msg_id not in known:
+                    continue
+                if change == 'read':
+                    statuses[msg_id] = 'Archived'
+                    result.archived += 1
+                elif change == 'unread':
+                    statuses[msg_id] = 'Active'
+                    result.reactivated += 1
+
+            if to_fetch:
+                result.added, result.emails = ingest(to_fetch)
+
+            self.db.delete_emails(to_delete)
+            self.db.update_statuses(statuses)
+            result.deleted = len(to_delete)
+
+        self.db.set_sync_state(self.HISTORY_KEY, latest)
+        logger.info(f"Incremental sync: +{result.added} -{result.deleted} "
+                    f"archived={result.archived} (history {history_id} → {latest})")
+        return result
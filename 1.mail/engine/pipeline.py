@@ -0,0 +1,338 @@
+"""
+Mail Pipeline Module
+수집 → 분석 → 저장 단계별 스트리밍 파이프라인
+
+    [수집 스레드] GmailFetcher batch ─▶ queue ─▶ [분석 스레드] InquiryAnalyzer ─▶ queue ─▶ [저장] DBManager
+
+단계 사이의 큐 크기를 제한하여(backpressure) 느린 단계가 메모리를 쌓지 않게 하고,
+저장 단계는 호출한 스레드에서 실행하며 청크마다 이벤트를 yield 합니다.
+(UI는 첫 청크가 저장되는 즉시 결과를 표시할 수 있음)
+
+분석 단계는 유사 메일 묶음(NearDuplicateIndex)을 먼저 판정하여 대표 메일만 분석하고,
+저장 직전에 발신자 평판(sender_reputation) 보정과 학습 리드 점수(lead_model, 선택)를 적용합니다.
+"""
+
+import time
+import queue
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Iterator, Optional, Tuple
+
+from .near_dup import NearDuplicateIndex
+from .lead_model import FEATURE_VERSION, featurize
+
+logger = logging.getLogger(__name__)
+
+
+def build_row(email: Dict, result: Dict) -> Dict:
+    """이메일 + 분석 결과 → DB 저장 행"""
+    return {
+        **email,
+        'score': result['total'],
+        'clarity_score': result['clarity'],
+        'intent_score': result['intent'],
+        'terms_score': result['terms'],
+        'reason': result['reason'],
+        'keywords': result['keywords'],
+        'language': result['language'],
+        'is_spam': result['is_spam'],
+        'reputation_adj': result.get('reputation_adj', 0),
+        'matched': result.get('matched'),
+        'rules_version': result.get('rules_version'),
+        'status': 'Active'
+    }
+
+
+def index_rows(analyzer, rows: List[Dict]) -> List[Dict]:
+    """저장 행에 키워드 변경 영향 색인 텍스트 추가 (DBManager가 email_terms에 색인)"""
+    for row in rows:
+        row['index_text'] = analyzer.index_text(row)
+    return rows
+
+
+def score_leads(analyzer, rows: List[Dict]) -> List[Dict]:
+    """
+    저장 행에 학습 리드 점수(ml_score) 추가 - 스팸 제외 행을 한 번에 배치 채점 (모델이 없으면 None)
+    
+    해시 버킷 목록(ml_features)도 함께 붙여 저장합니다. (재학습 / 재채점이 본문을 다시 토큰화하지 않도록)
+    """
+    scorer = getattr(analyzer, 'lead_scorer', None)
+    targets = [row for row in rows if not row['is_spam']]
+    if scorer is None or not targets:
+        return rows
+    encoded = featurize(targets)
+    for row, blob, score in zip(targets, encoded, scorer.score_encoded(encoded)):
+        row['ml_features'] = (FEATURE_VERSION, blob)
+        row['ml_score'] = score
+    return rows
+
+
+def _without_email(rep: Optional[Dict], is_spam: bool, score: float) -> Optional[Dict]:
+    """평판 집계에서 메일 1건의 기여분 제외 (DBManager._reputation_sql과 같은 계산)"""
+    if rep is None:
+        return None
+    scored = rep['scored'] - (0 if is_spam else 1)
+    score_sum_x10 = rep['score_sum_x10'] - (0 if is_spam else int(round(score * 10)))
+    return {**rep, 'messages': rep['messages'] - 1, 'spam': rep['spam'] - (1 if is_spam else 0),
+            'scored': scored, 'score_sum_x10': score_sum_x10,
+            'avg_score': round(score_sum_x10 / 10 / scored, 1) if scored else 0}
+
+
+def apply_reputation(analyzer, db, emails: List[Dict], results: List[Dict],
+                     stored: Optional[Dict[str, Tuple[bool, float]]] = None) -> List[Dict]:
+    """
+    발신자 / 도메인 평판 보정 (배치당 평판 조회 1회, 결과 순서 = emails 순서)
+    
+    stored: 이미 저장된 메일의 {ID: (is_spam, 평판 보정 전 점수)} - 재채점 시 자기 자신의 기여분을 빼고 보정
+        (저장 시점에는 자신이 평판 집계에 들어 있지 않았으므로)
+    """
+    reputations = db.get_sender_reputations([e.get('sender_email') for e in emails])
+    adjusted = []
+    for email, result in zip(emails, results):
+        sender_key, domain_key = db.reputation_keys(email.get('sender_email'))
+        if sender_key is None:
+            adjusted.append(result)
+            continue
+        sender, domain = reputations.get(sender_key), reputations.get(domain_key)
+        if stored is not None and email['id'] in stored:
+            sender, domain = (_without_email(rep, *stored[email['id']]) for rep in (sender, domain))
+        adjusted.append(analyzer.apply_reputation(result, sender, domain, domain_key[1:]))
+    return adjusted
+
+
+def analyze_rows(analyzer, emails: List[Dict], near_dup: Optional[NearDuplicateIndex] = None,
+                 reputation=None) -> List[Dict]:
+    """
+    배치 분석 → DB 저장 행 (입력 순서 유지)
+    
+    near_dup이 있으면 유사 메일은 분석하지 않고 대표 메일의 분석 결과를 재사용하며
+    행에 minhash / cluster_id를 채웁니다. 발신 도메인 스팸 판정이 대표 메일과 다를 수 있는 사본
+    (사본 또는 대표 메일이 의심 도메인 발신)은 개별 분석하고, 스팸 여부가 달라지면 묶음에서 뺍니다.
+    reputation(DBManager)이 있으면 저장된 발신자 평판으로 점수를 보정합니다.
+    """
+    if near_dup is None:
+        results = analyzer.batch_analyze(emails)
+        if reputation is not None:
+            results = apply_reputation(analyzer, reputation, emails, results)
+        rows = [build_row(email, result) for email, result in zip(emails, results)]
+        return score_leads(analyzer, index_rows(analyzer, rows))
+    
+    clusters = near_dup.assign(emails)
+    canonical = [e for e in emails if clusters[e['id']][1] in (None, e['id'])]
+    results = dict(zip((e['id'] for e in canonical), analyzer.batch_analyze(canonical)))
+    near_dup.remember({i: r for i, r in results.items() if clusters[i][1] == i})
+    
+    shared = {cid for _, cid in clusters.values() if cid is not None and cid not in results}
+    results.update(near_dup.canonical_results(list(shared)))
+    
+    # 대표 메일 결과를 찾지 못한 경우(그 사이 삭제 등)는 개별 분석
+    orphans = [e for e in emails if e['id'] not in results and clusters[e['id']][1] not in results]
+    for email, result in zip(orphans, analyzer.batch_analyze(orphans)):
+        results[email['id']] = result
+        clusters[email['id']] = (clusters[email['id']][0], None)
+    
+    # 본문이 같아도 발신자가 다른 사본 - 의심 도메인 판정을 사본마다 다시 적용
+    detector = analyzer.spam_detector
+    resend = [e for e in emails if e['id'] not in results and (
+        detector.suspicious_sender(e) or 'suspicious_domain' in (results[clusters[e['id']][1]]['reason'] or ''))]
+    for email, result in zip(resend, analyzer.batch_analyze(resend)):
+        results[email['id']] = result
+        if result['is_spam'] != results[clusters[email['id']][1]]['is_spam']:
+            clusters[email['id']] = (clusters[email['id']][0], None)
+    
+    ordered = [results.get(e['id']) or results[clusters[e['id']][1]] for e in emails]
+    if reputation is not None:
+        ordered = apply_reputation(analyzer, reputation, emails, ordered)
+    
+    rows = []
+    for email, result in zip(emails, ordered):
+        signature, cluster_id = clusters[email['id']]
+        rows.append({**build_row(email, result), 'minhash': signature, 'cluster_id': cluster_id})
+    return score_leads(analyzer, index_rows(analyzer, rows))
+
+
+@dataclass
+class StageStats:
+    """단계별 처리량 (busy = 큐 대기를 제외한 실제 처리 시간)"""
+    name: str
+    items: int = 0
+    busy: float = 0.0
+    batches: int = 0
+
+    @property
+    def rate(self) -> float:
+        """처리량 (msg/s)"""
+        return self.items / self.busy if self.busy > 0 else 0.0
+
+
+@dataclass
+class PipelineEvent:
+    """저장 청크 1개 완료 이벤트"""
+    rows: List[Dict]                    # 이번 청크에서 저장한 행 (분석 결과 포함)
+    counts: Dict[str, int]              # 이번 청크 inserted / updated / skipped
+    done: int                           # 누적 저장 처리 건수
+    total: int                          # 전체 대상 건수
+    elapsed: float                      # 시작 후 경과 시간 (초)
+    stats: Dict[str, StageStats] = field(default_factory=dict)
+
+
+class _StageError:
+    """하위 단계로 전달되는 상위 단계 예외"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_DONE = object()
+
+
+class MailPipeline:
+    """수집 / 분석 / 저장을 겹쳐서 실행하는 파이프라인"""
+
+    STAGES = ('fetch', 'analyze', 'store')
+
+    def __init__(self, fetcher, analyzer, db, queue_size: int = 4, dedup: bool = True,
+                 reputation: bool = True, min_batch: Optional[int] = None, flush_timeout: float = 0.5):
+        """
+        Args:
+            fetcher: GmailFetcher (iter_messages)
+            analyzer: InquiryAnalyzer (batch_analyze)
+            db: DBManager (insert_emails_bulk)
+            queue_size: 단계 사이 큐에 대기할 수 있는 최대 청크 수
+            dedup: 유사 메일 묶음 판정 (대표 메일 분석 결과 재사용)
+            reputation: 발신자 평판 보정 (이전 청크까지 저장된 메일 기준)
+            min_batch: 분석 단위 (기본 analyzer.MIN_PARALLEL_BATCH - 프로세스 풀 사용 기준)
+            flush_timeout: 덜 모인 분석 단위를 기다리는 최대 시간 (초)
+        """
+        self.fetcher = fetcher
+        self.analyzer = analyzer
+        self.db = db
+        self.queue_size = max(1, queue_size)
+        self.dedup = dedup
+        self.reputation = reputation
+        self.min_batch = max(1, min_batch or getattr(analyzer, 'MIN_PARALLEL_BATCH', 1))
+        self.flush_timeout = flush_timeout
+        self.near_dup: Optional[NearDuplicateIndex] = None
+        self.stats: Dict[str, StageStats] = {}
+
+    def _put(self, q: queue.Queue, item, stop: threading.Event) -> bool:
+        """큐가 가득 차면 대기 (소비자 중단 시 False)"""
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fetch_stage(self, ids: List[str], out_q: queue.Queue, stop: threading.Event):
+        stats = self.stats['fetch']
+        try:
+            batches = self.fetcher.iter_messages(ids)
+            while not stop.is_set():
+                start = time.perf_counter()
+                batch = next(batches, None)
+                stats.busy += time.perf_counter() - start
+                if batch is None:
+                    break
+                stats.items += len(batch)
+                if batch and not self._put(out_q, batch, stop):
+                    return
+        except BaseException as e:
+            self._put(out_q, _StageError(e), stop)
+            return
+        self._put(out_q, _DONE, stop)
+
+    def _analyze_stage(self, in_q: queue.Queue, out_q: queue.Queue, stop: threading.Event):
+        """
+        수집 배치를 min_batch건까지 모아 분석 (수집 배치는 BATCH_SIZE건이라 그대로는 프로세스 풀 기준 미만)
+        
+        첫 배치 도착 후 flush_timeout초가 지나면 덜 모였어도 분석합니다. (수집이 느릴 때 첫 결과 지연 제한)
+        """
+        stats = self.stats['analyze']
+        pending: List[Dict] = []
+        deadline = 0.0
+        while not stop.is_set():
+            timeout = min(0.1, max(0.0, deadline - time.monotonic())) if pending else 0.1
+            try:
+                batch = in_q.get(timeout=timeout)
+            except queue.Empty:
+                batch = None
+            if isinstance(batch, _StageError):
+                self._put(out_q, batch, stop)
+                return
+            if batch is not None and batch is not _DONE:
+                if not pending:
+                    deadline = time.monotonic() + self.flush_timeout
+                pending.extend(batch)
+            if pending and (batch is _DONE or len(pending) >= self.min_batch or time.monotonic() >= deadline):
+                try:
+                    start = time.perf_counter()
+                    rows = analyze_rows(self.analyzer, pending, self.near_dup,
+                                        self.db if self.reputation else None)
+                    stats.busy += time.perf_counter() - start
+                    stats.items += len(rows)
+                    stats.batches += 1
+                except BaseException as e:
+                    self._put(out_q, _StageError(e), stop)
+                    return
+                pending = []
+                if not self._put(out_q, rows, stop):
+                    return
+            if batch is _DONE:
+                self._put(out_q, batch, stop)
+                return
+
+    def run(self, ids: List[str]) -> Iterator[PipelineEvent]:
+        """
+        메시지 ID 목록을 수집 / 분석 / 저장하며 저장 청크마다 이벤트 반환
+
+        수집·분석은 백그라운드 스레드, 저장은 호출 스레드에서 실행됩니다.
+        반복을 중간에 멈추면(generator close) 상위 단계도 정리됩니다.
+        """
+        self.stats = {name: StageStats(name) for name in self.STAGES}
+        self.near_dup = NearDuplicateIndex(self.db) if self.dedup else None
+        if not ids:
+            return
+
+        fetched_q: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        scored_q: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        threads = [
+            threading.Thread(target=self._fetch_stage, args=(ids, fetched_q, stop),
+                             name='pipeline-fetch', daemon=True),
+            threading.Thread(target=self._analyze_stage, args=(fetched_q, scored_q, stop),
+                             name='pipeline-analyze', daemon=True),
+        ]
+        for t in threads:
+            t.start()
+
+        stats = self.stats['store']
+        started = time.perf_counter()
+        done = 0
+        try:
+            while True:
+                rows = scored_q.get()
+                if rows is _DONE:
+                    break
+                if isinstance(rows, _StageError):
+                    raise rows.error
+
+                start = time.perf_counter()
+                counts = self.db.insert_emails_bulk(rows)
+                stats.busy += time.perf_counter() - start
+                stats.items += len(rows)
+                done += len(rows)
+
+                yield PipelineEvent(rows=rows, counts=counts, done=done, total=len(ids),
+                                    elapsed=time.perf_counter() - started, stats=self.stats)
+        finally:
+            stop.set()
+            for t in threads:
+                t.join(timeout=5)
+
+        summary = ", ".join(f"{s.name} {s.items} ({s.rate:.0f} msg/s)" for s in self.stats.values())
+        if self.near_dup:
+            summary += f", near-duplicates {self.near_dup.stats['duplicates']}"
+        logger.info(f"Pipeline: {summary} in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,113 @@
+"""
+Engine Registry Module
+프로세스 단위 엔진 객체 공유
+
+Streamlit은 클릭마다 스크립트 전체를 다시 실행하므로 main()에서 엔진을 만들면
+재실행마다 DB 스키마 DDL, 설정 JSON 로드 / 규칙 컴파일, OpenAI 클라이언트 생성이 반복됩니다.
+여기서 설정별로 1회만 만들어 모든 세션 / 재실행이 같은 객체를 사용합니다.
+(엔진 모듈은 재실행 간에 다시 import되지 않으므로 모듈 전역으로 프로세스 수명 동안 유지)
+
+분석기는 설정 파일(keywords.json / jargon_map.json)의 mtime이 바뀐 경우에만 다시 컴파일합니다.
+새 분석기로 교체해도 진행 중인 분석은 이전 분석기(이전 규칙 + 그 규칙의 rules_version)로 끝까지 처리됩니다.
+"""
+
+import os
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+from .analyzer import InquiryAnalyzer
+from .database import DBManager
+from .reply_generator import ReplyGenerator
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+# (db_path, read_only) → DBManager
+_dbs: Dict[tuple, DBManager] = {}
+# (keywords_path, jargon_path, workers, openai_api_key, cache, lead_model_path) → (설정 파일 mtime, InquiryAnalyzer)
+_analyzers: Dict[tuple, Tuple[tuple, InquiryAnalyzer]] = {}
+# (api_key, base_url, model, max_concurrency, cache) → ReplyGenerator
+_reply_generators: Dict[tuple, ReplyGenerator] = {}
+
+
+def _file_signature(*paths: str) -> tuple:
+    """설정 파일 변경 확인용 (mtime_ns, 크기) - 없는 파일은 None"""
+    signature = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            signature.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def get_db(db_path: str, read_only: bool = False) -> DBManager:
+    """DBManager (경로 / 모드별 1개 - 스키마 초기화는 최초 1회)"""
+    key = (os.path.abspath(db_path), read_only)
+    db = _dbs.get(key)
+    if db is None:
+        with _lock:
+            db = _dbs.get(key)
+            if db is None:
+                db = DBManager(db_path, read_only=read_only)
+                _dbs[key] = db
+    return db
+
+
+def get_analyzer(keywords_path: str = "config/keywords.json", jargon_path: str = "config/jargon_map.json",
+                 workers: Optional[int] = None, openai_api_key: Optional[str] = None,
+                 cache: Optional[DBManager] = None, lead_model_path: Optional[str] = None) -> InquiryAnalyzer:
+    """
+    InquiryAnalyzer (설정별 1개 - 설정 파일 mtime이 바뀌었을 때만 다시 컴파일)
+    
+    학습 리드 모델(lead_model_path)은 분석기의 LeadScorer가 파일 변경을 직접 확인하므로 재학습해도 분석기는 그대로입니다.
+    """
+    key = (os.path.abspath(keywords_path), os.path.abspath(jargon_path), workers, openai_api_key, cache,
+           lead_model_path and os.path.abspath(lead_model_path))
+    signature = _file_signature(keywords_path, jargon_path)
+    cached = _analyzers.get(key)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    with _lock:
+        cached = _analyzers.get(key)
+        if cached and cached[0] == signature:
+            return cached[1]
+        analyzer = InquiryAnalyzer(openai_api_key=openai_api_key, keywords_path=keywords_path,
+                                   jargon_path=jargon_path, workers=workers, cache=cache,
+                                   lead_model_path=lead_model_path)
+        _analyzers[key] = (signature, analyzer)
+
+    if cached:
+        logger.info(f"Analyzer rules reloaded: {cached[1].rules_version} → {analyzer.rules_version}")
+        cached[1].close()
+    return analyzer
+
+
+def get_reply_generator(api_key: Optional[str] = None, base_url: Optional[str] = None,
+                        model: str = "gpt-3.5-turbo", max_concurrency: int = 5,
+                        cache: Optional[DBManager] = None) -> ReplyGenerator:
+    """ReplyGenerator (설정별 1개 - OpenAI 클라이언트 / 이전 프롬프트 초안 정리는 최초 1회)"""
+    key = (api_key, base_url, model, max_concurrency, cache)
+    generator = _reply_generators.get(key)
+    if generator is None:
+        with _lock:
+            generator = _reply_generators.get(key)
+            if generator is None:
+                generator = ReplyGenerator(api_key=api_key, base_url=base_url, model=model,
+                                           max_concurrency=max_concurrency, cache=cache)
+                _reply_generators[key] = generator
+    return generator
+
+
+def clear():
+    """등록된 엔진 객체 모두 해제 (다음 요청 시 새로 생성)"""
+    with _lock:
+        analyzers = [analyzer for _, analyzer in _analyzers.values()]
+        _dbs.clear()
+        _analyzers.clear()
+        _reply_generators.clear()
+    for analyzer in analyzers:
+        analyzer.close()
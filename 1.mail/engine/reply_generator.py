@@ -4,19 +4,24 @@ AI 기반 무역 메일 답장 초안 자동 생성
 
 OpenAI GPT를 활용하여 수신 메일의 언어와 내용에 맞는
 전문적인 무역 답장 초안을 생성합니다.
+여러 건은 generate_replies()로 동시 요청(스트리밍)하여 한 번에 작성합니다.
+생성된 초안은 (메일, 프롬프트 버전, 모델, 추가 컨텍스트) 키로 DB에 저장해 재사용합니다.
 """
 
-import re
 import json
+import asyncio
+import hashlib
 import logging
-from typing import Dict, Optional
-from dataclasses import dataclass
+from typing import Dict, List, Optional, Callable
+from dataclasses import dataclass, asdict
+
+from .text_profile import profile_text
 
 logger = logging.getLogger(__name__)
 
 # OpenAI import (optional)
 try:
-    from openai import OpenAI
+    from openai import OpenAI, AsyncOpenAI
     OPENAI_AVAILABLE = True
 except ImportError:
     OPENAI_AVAILABLE = False
@@ -31,11 +36,50 @@ class ReplyDraft:
     sender_name: str
     key_points: list
     tone: str  # formal, friendly, urgent
+    fallback: bool = False  # GPT 실패/타임아웃으로 템플릿 사용
 
 
 class ReplyGenerator:
     """AI 답장 초안 생성기"""
     
+    # GPT 답장 프롬프트
+    REPLY_PROMPT = """You are a professional export sales representative. 
+Generate a polite and professional reply email {lang_instruction}.
+
+Original Email:
+Subject: {subject}
+Content: {body}
+
+Requirements:
+1. Write the reply {lang_instruction}
+2. Be professional and courteous
+3. Acknowledge receipt of their inquiry
+4. Mention that you are reviewing their request
+5. Promise a detailed follow-up soon
+6. Keep it concise (under 150 words)
+7. Do NOT include email headers like "Subject:" or "To:" - just the body text
+8. Start with appropriate greeting using sender name: {sender_name}
+9. End with "Best regards," or "감사합니다," and "Export Sales Team" or "해외영업팀 드림"
+
+Return ONLY the email body text, nothing else."""
+    
+    # 추가 컨텍스트 반영 재생성 프롬프트
+    CONTEXT_PROMPT = """You are a professional export sales representative.
+Generate a reply email {lang_instruction} incorporating this additional context.
+
+Original Email:
+Subject: {subject}
+Content: {body}
+
+Additional Context/Instructions:
+{additional_context}
+
+Write a professional reply {lang_instruction}. Return ONLY the email body."""
+    
+    # 프롬프트 버전 - 프롬프트 문구가 바뀌면 값이 바뀌어 이전 초안이 무효화됨
+    PROMPT_VERSION = hashlib.sha1(f"{REPLY_PROMPT}\x00{CONTEXT_PROMPT}".encode('utf-8')).hexdigest()[:12]
+    PROMPT_VERSION_KEY = 'reply_prompt_version'
+    
     # 한국어 답장 템플릿
     KO_TEMPLATES = {
         'inquiry': """안녕하세요,
@@ -102,17 +146,38 @@ Best regards,
 Export Sales Team"""
     }
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, base_url: str = None, model: str = "gpt-3.5-turbo",
+                 max_concurrency: int = 5, request_timeout: float = 30.0, max_retries: int = 2,
+                 cache=None):
+        """
+        Args:
+            api_key: OpenAI API 키 (없으면 템플릿 Demo 모드)
+            base_url: OpenAI 호환 서버 주소 (테스트용 FakeOpenAIServer 등)
+            model: 답장 생성 모델
+            max_concurrency: 일괄 생성 시 동시 요청 수
+            request_timeout: 일괄 생성 시 메일 1건당 제한 시간 (초, 초과 시 템플릿)
+            max_retries: 클라이언트 재시도 횟수
+            cache: 답장 초안 저장소 (DBManager - get/put/invalidate_reply_drafts)
+        """
         self.api_key = api_key
+        self.model = model
+        self.max_concurrency = max(1, max_concurrency)
+        self.request_timeout = request_timeout
         self._demo_mode = not OPENAI_AVAILABLE or not api_key
+        self._client_kwargs = {'api_key': api_key, 'base_url': base_url, 'max_retries': max_retries}
         self.client = None
         
         if not self._demo_mode:
             try:
-                self.client = OpenAI(api_key=api_key)
+                self.client = OpenAI(**self._client_kwargs)
             except Exception as e:
                 logger.error(f"OpenAI init failed: {e}")
                 self._demo_mode = True
+        
+        # Demo 모드(템플릿)는 비용이 없으므로 저장하지 않음
+        self.cache = cache if not self._demo_mode else None
+        if self.cache is not None:
+            self._invalidate_stale_drafts()
     
     def is_demo_mode(self) -> bool:
         return self._demo_mode
@@ -122,13 +187,11 @@ Export Sales Team"""
         if not text:
             return 'EN'
         
-        korean_chars = len(re.findall(r'[\uac00-\ud7a3]', text))
-        total = len(text.replace(' ', ''))
-        
-        if total == 0:
+        profile = profile_text(text)
+        if profile.raw_non_space == 0:
             return 'EN'
         
-        return 'KO' if korean_chars / total > 0.1 else 'EN'
+        return 'KO' if profile.hangul / profile.raw_non_space > 0.1 else 'EN'
     
     def extract_sender_name(self, sender: str) -> str:
         """발신자 이름 추출"""
@@ -156,33 +219,55 @@ Export Sales Team"""
         else:
             return 'inquiry'
     
-    def generate_reply(self, email_data: Dict) -> ReplyDraft:
+    def _prepare(self, email_data: Dict) -> Dict:
+        """메일 dict → 답장 생성 입력 (subject, body, sender_name, language, intent)"""
+        subject = email_data.get('subject', '')
+        body = email_data.get('body_text') or email_data.get('body') or email_data.get('snippet', '')
+        sender = email_data.get('sender', '')
+        # 분석기와 같은 텍스트 (제목 + 줄바꿈 + 본문) → 문자 구성 캐시 공유
+        language = email_data.get('language') or self.detect_language(f"{subject}\n{body}")
+        
+        return {
+            'subject': subject,
+            'body': body,
+            'sender_name': self.extract_sender_name(sender),
+            'language': language,
+            'intent': self.detect_intent(subject, body)
+        }
+    
+    def generate_reply(self, email_data: Dict, use_cache: bool = True) -> ReplyDraft:
         """
         AI 답장 초안 생성
         
         Args:
             email_data: {subject, body/snippet, sender, sender_email, language, ...}
+            use_cache: False면 저장된 초안을 무시하고 새로 생성 (재생성)
         
         Returns:
             ReplyDraft with subject, body, language
         """
-        subject = email_data.get('subject', '')
-        body = email_data.get('body_text') or email_data.get('body') or email_data.get('snippet', '')
-        sender = email_data.get('sender', '')
-        language = email_data.get('language') or self.detect_language(f"{subject} {body}")
+        ctx = self._prepare(email_data)
+        subject, body, sender_name = ctx['subject'], ctx['body'], ctx['sender_name']
+        language, intent = ctx['language'], ctx['intent']
+        email_id = email_data.get('id')
         
-        sender_name = self.extract_sender_name(sender)
-        intent = self.detect_intent(subject, body)
-        
-        # OpenAI 모드면 GPT 사용
+        # OpenAI 모드면 GPT 사용 (저장된 초안 우선)
         if not self._demo_mode:
-            return self._generate_with_gpt(
+            if use_cache and email_id:
+                cached = self._load_drafts([email_id])
+                if email_id in cached:
+                    return cached[email_id]
+            
+            draft = self._generate_with_gpt(
                 subject=subject,
                 body=body,
                 sender_name=sender_name,
                 language=language,
                 intent=intent
             )
+            if email_id:
+                self._save_drafts({email_id: draft})
+            return draft
         
         # Demo 모드면 템플릿 사용
         return self._generate_from_template(
@@ -196,30 +281,10 @@ Export Sales Team"""
                           language: str, intent: str) -> ReplyDraft:
         """GPT를 사용한 답장 생성"""
         try:
-            lang_instruction = "한국어로" if language == 'KO' else "in English"
-            
-            prompt = f"""You are a professional export sales representative. 
-Generate a polite and professional reply email {lang_instruction}.
-
-Original Email:
-Subject: {subject}
-Content: {body[:1500]}
-
-Requirements:
-1. Write the reply {lang_instruction}
-2. Be professional and courteous
-3. Acknowledge receipt of their inquiry
-4. Mention that you are reviewing their request
-5. Promise a detailed follow-up soon
-6. Keep it concise (under 150 words)
-7. Do NOT include email headers like "Subject:" or "To:" - just the body text
-8. Start with appropriate greeting using sender name: {sender_name}
-9. End with "Best regards," or "감사합니다," and "Export Sales Team" or "해외영업팀 드림"
-
-Return ONLY the email body text, nothing else."""
+            prompt = self._build_reply_prompt(subject, body, sender_name, language)
 
             response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
+                model=self.model,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.7,
                 max_tokens=500
@@ -241,7 +306,209 @@ Return ONLY the email body text, nothing else."""
             
         except Exception as e:
             logger.error(f"GPT reply generation failed: {e}")
-            return self._generate_from_template(subject, sender_name, language, intent)
+            draft = self._generate_from_template(subject, sender_name, language, intent)
+            draft.fallback = True
+            return draft
+    
+    def _build_reply_prompt(self, subject: str, body: str, sender_name: str, language: str) -> str:
+        """답장 생성 프롬프트"""
+        lang_instruction = "한국어로" if language == 'KO' else "in English"
+        return self.REPLY_PROMPT.format(lang_instruction=lang_instruction, subject=subject,
+                                        body=body[:1500], sender_name=sender_name)
+    
+    def build_request(self, email_data: Dict) -> Dict:
+        """chat.completions 요청 본문 (Batch API 입력 JSONL 용)"""
+        ctx = self._prepare(email_data)
+        prompt = self._build_reply_prompt(ctx['subject'], ctx['body'], ctx['sender_name'], ctx['language'])
+        return {
+            'model': self.model,
+            'messages': [{"role": "user", "content": prompt}],
+            'temperature': 0.7,
+            'max_tokens': 500
+        }
+    
+    def draft_from_text(self, email_data: Dict, reply_body: str) -> ReplyDraft:
+        """모델 응답 텍스트 → ReplyDraft (빈 응답이면 템플릿 대체)"""
+        ctx = self._prepare(email_data)
+        reply_body = (reply_body or '').strip()
+        if not reply_body:
+            draft = self._generate_from_template(ctx['subject'], ctx['sender_name'], ctx['language'], ctx['intent'])
+            draft.fallback = True
+            return draft
+        
+        return ReplyDraft(
+            subject=f"Re: {ctx['subject']}",
+            body=reply_body,
+            language=ctx['language'],
+            sender_name=ctx['sender_name'],
+            key_points=[ctx['intent']],
+            tone='formal'
+        )
+    
+    # ==========================================
+    # 초안 저장소 (read-through 캐시)
+    # ==========================================
+    @staticmethod
+    def context_hash(additional_context: str) -> str:
+        """추가 컨텍스트 키 (컨텍스트 없음 = '')"""
+        if not additional_context:
+            return ''
+        return hashlib.sha256(additional_context.encode('utf-8')).hexdigest()[:16]
+    
+    def _invalidate_stale_drafts(self):
+        """프롬프트 버전이 바뀌었으면 이전 버전 초안 일괄 삭제"""
+        try:
+            if self.cache.get_sync_state(self.PROMPT_VERSION_KEY) != self.PROMPT_VERSION:
+                deleted = self.cache.invalidate_reply_drafts(keep_version=self.PROMPT_VERSION)
+                self.cache.set_sync_state(self.PROMPT_VERSION_KEY, self.PROMPT_VERSION)
+                if deleted:
+                    logger.info(f"Reply drafts invalidated: {deleted} (prompt {self.PROMPT_VERSION})")
+        except Exception as e:
+            logger.warning(f"Reply draft invalidation failed: {e}")
+    
+    def _load_drafts(self, email_ids: List[str], context_hash: str = '') -> Dict[str, ReplyDraft]:
+        if self.cache is None or not email_ids:
+            return {}
+        try:
+            found = self.cache.get_reply_drafts(email_ids, self.PROMPT_VERSION, self.model, context_hash)
+        except Exception as e:
+            logger.warning(f"Reply draft lookup failed: {e}")
+            return {}
+        return {email_id: ReplyDraft(**d) for email_id, d in found.items()}
+    
+    def _save_drafts(self, drafts: Dict[str, ReplyDraft], context_hash: str = ''):
+        # 템플릿 대체 초안은 저장하지 않음 (다음 요청 때 GPT 재시도)
+        drafts = {email_id: asdict(d) for email_id, d in drafts.items() if not d.fallback}
+        if self.cache is None or not drafts:
+            return
+        try:
+            self.cache.put_reply_drafts(drafts, self.PROMPT_VERSION, self.model, context_hash)
+        except Exception as e:
+            logger.warning(f"Reply draft save failed: {e}")
+    
+    def cached_drafts(self, email_ids: List[str]) -> Dict[str, ReplyDraft]:
+        """저장된 초안 조회 (현재 프롬프트 버전 / 모델, 추가 컨텍스트 없음)"""
+        return self._load_drafts(list(email_ids))
+    
+    # ==========================================
+    # 일괄 생성 (비동기 + 스트리밍)
+    # ==========================================
+    def generate_replies(self, emails: List[Dict],
+                         on_token: Optional[Callable[[str, str], None]] = None,
+                         on_complete: Optional[Callable[[str, ReplyDraft], None]] = None,
+                         use_cache: bool = True) -> Dict[str, ReplyDraft]:
+        """
+        여러 메일의 답장 초안을 동시에 생성 (동기 래퍼)
+        
+        Args:
+            emails: 메일 dict 목록 (id 필수)
+            on_token: (email_id, 토큰) - 스트리밍 중 부분 텍스트 수신 시 호출
+            on_complete: (email_id, ReplyDraft) - 1건 완료 시 호출 (템플릿 대체 포함)
+            use_cache: False면 저장된 초안을 무시하고 모두 새로 생성
+        
+        Returns:
+            {email_id: ReplyDraft}
+        """
+        return asyncio.run(self.generate_replies_async(emails, on_token, on_complete, use_cache))
+    
+    async def generate_replies_async(self, emails: List[Dict],
+                                     on_token: Optional[Callable[[str, str], None]] = None,
+                                     on_complete: Optional[Callable[[str, ReplyDraft], None]] = None,
+                                     use_cache: bool = True) -> Dict[str, ReplyDraft]:
+        """max_concurrency 개씩 동시 요청, 1건당 request_timeout 초과/실패 시 템플릿 사용"""
+        if not emails:
+            return {}
+        
+        # 저장된 초안은 바로 반환, 나머지만 모델 호출
+        results = self._load_drafts([e['id'] for e in emails]) if use_cache else {}
+        for email_id, draft in results.items():
+            if on_token:
+                on_token(email_id, draft.body)
+            if on_complete:
+                on_complete(email_id, draft)
+        emails = [e for e in emails if e['id'] not in results]
+        if not emails:
+            return results
+        
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        # 이벤트 루프마다 새 클라이언트 (httpx 연결 풀이 루프에 묶임)
+        client = None if self._demo_mode else AsyncOpenAI(**self._client_kwargs)
+        
+        async def draft_one(email_data: Dict):
+            email_id = email_data['id']
+            async with semaphore:
+                draft = await self._generate_streaming(client, email_id, email_data, on_token)
+            if on_complete:
+                on_complete(email_id, draft)
+            return email_id, draft
+        
+        try:
+            generated = dict(await asyncio.gather(*(draft_one(e) for e in emails)))
+        finally:
+            if client is not None:
+                await client.close()
+        
+        self._save_drafts(generated)
+        results.update(generated)
+        return results
+    
+    async def _generate_streaming(self, client, email_id: str, email_data: Dict,
+                                  on_token: Optional[Callable[[str, str], None]]) -> ReplyDraft:
+        """스트리밍 응답으로 1건 생성 (토큰마다 on_token 호출)"""
+        ctx = self._prepare(email_data)
+        
+        if client is None:
+            draft = self._generate_from_template(ctx['subject'], ctx['sender_name'], ctx['language'], ctx['intent'])
+            if on_token:
+                on_token(email_id, draft.body)
+            return draft
+        
+        prompt = self._build_reply_prompt(ctx['subject'], ctx['body'], ctx['sender_name'], ctx['language'])
+        chunks = []
+        
+        async def consume():
+            stream = await client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.7,
+                max_tokens=500,
+                stream=True
+            )
+            try:
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    token = chunk.choices[0].delta.content
+                    if token:
+                        chunks.append(token)
+                        if on_token:
+                            on_token(email_id, token)
+            finally:
+                await stream.close()
+        
+        try:
+            await asyncio.wait_for(consume(), timeout=self.request_timeout)
+            reply_body = ''.join(chunks).strip()
+            if not reply_body:
+                raise ValueError("empty completion")
+            
+            return ReplyDraft(
+                subject=f"Re: {ctx['subject']}",
+                body=reply_body,
+                language=ctx['language'],
+                sender_name=ctx['sender_name'],
+                key_points=[ctx['intent']],
+                tone='formal'
+            )
+        
+        except asyncio.TimeoutError:
+            logger.warning(f"GPT reply timed out after {self.request_timeout}s ({email_id})")
+        except Exception as e:
+            logger.error(f"GPT streaming reply failed ({email_id}): {e}")
+        
+        draft = self._generate_from_template(ctx['subject'], ctx['sender_name'], ctx['language'], ctx['intent'])
+        draft.fallback = True
+        return draft
     
     def _generate_from_template(self, subject: str, sender_name: str, 
                                 language: str, intent: str) -> ReplyDraft:
@@ -267,7 +534,8 @@ Return ONLY the email body text, nothing else."""
             tone='formal'
         )
     
-    def regenerate_with_context(self, email_data: Dict, additional_context: str) -> ReplyDraft:
+    def regenerate_with_context(self, email_data: Dict, additional_context: str,
+                                use_cache: bool = True) -> ReplyDraft:
         """추가 컨텍스트를 포함한 답장 재생성"""
         if self._demo_mode:
             # Demo 모드에서는 기본 답장에 컨텍스트 추가
@@ -275,35 +543,30 @@ Return ONLY the email body text, nothing else."""
             draft.body = f"{draft.body}\n\n{additional_context}"
             return draft
         
-        subject = email_data.get('subject', '')
-        body = email_data.get('body_text') or email_data.get('body') or email_data.get('snippet', '')
-        sender = email_data.get('sender', '')
-        language = email_data.get('language') or self.detect_language(f"{subject} {body}")
-        sender_name = self.extract_sender_name(sender)
+        ctx = self._prepare(email_data)
+        subject, body = ctx['subject'], ctx['body']
+        language, sender_name = ctx['language'], ctx['sender_name']
+        email_id = email_data.get('id')
+        context_key = self.context_hash(additional_context)
+        
+        if use_cache and email_id:
+            cached = self._load_drafts([email_id], context_key)
+            if email_id in cached:
+                return cached[email_id]
         
         try:
             lang_instruction = "한국어로" if language == 'KO' else "in English"
-            
-            prompt = f"""You are a professional export sales representative.
-Generate a reply email {lang_instruction} incorporating this additional context.
-
-Original Email:
-Subject: {subject}
-Content: {body[:1000]}
-
-Additional Context/Instructions:
-{additional_context}
-
-Write a professional reply {lang_instruction}. Return ONLY the email body."""
+            prompt = self.CONTEXT_PROMPT.format(lang_instruction=lang_instruction, subject=subject,
+                                                body=body[:1000], additional_context=additional_context)
 
             response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
+                model=self.model,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.7,
                 max_tokens=600
             )
             
-            return ReplyDraft(
+            draft = ReplyDraft(
                 subject=f"Re: {subject}",
                 body=response.choices[0].message.content.strip(),
                 language=language,
@@ -311,9 +574,13 @@ Write a professional reply {lang_instruction}. Return ONLY the email body."""
                 key_points=[],
                 tone='formal'
             )
+            if email_id:
+                self._save_drafts({email_id: draft}, context_key)
+            return draft
             
         except Exception as e:
             logger.error(f"GPT regeneration failed: {e}")
             draft = self._generate_from_template(subject, sender_name, language, 'inquiry')
             draft.body = f"{draft.body}\n\n{additional_context}"
+            draft.fallback = True
             return draft
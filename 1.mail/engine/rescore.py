@@ -0,0 +1,277 @@
+"""
+Rescore Module
+키워드 규칙 변경 시 영향받는 메일만 재채점 (headless)
+
+저장된 메일마다 분석 당시 규칙 버전(emails.rules_version)이 있고, 버전별 설정 스냅샷이 sync_state에 남아 있어
+현재 config/keywords.json · jargon_map.json과 비교하면 바뀐 항목을 알 수 있습니다.
+바뀐 항목별로 영향받는 메일만 골라 저장된 본문(email_bodies)으로 다시 분석합니다. (Gmail 재수집 / DB 초기화 불필요)
+
+    키워드 삭제 / 점수·카테고리 변경    email_keywords (분석 시 매칭된 키워드 → 메일, 스팸 키워드 포함)
+    키워드 추가                        email_terms (분석 텍스트 단어 → 메일, 부분 문자열 매칭이라 단어 조각으로 후보 검색)
+    보너스 변경                        답장 제목 / 첨부 / 전체 (bonus 항목별)
+    은어 변경                          한국어 메일
+    분석 결과 형식 변경                 전체 (InquiryAnalyzer.RESULT_FORMAT)
+
+후보는 실제 매칭보다 넓을 수 있지만 모두 재분석하므로 결과는 전체 재채점과 같습니다.
+대상이 아니었던 메일은 점수를 바꾸지 않고 규칙 버전만 올립니다.
+버전이 없거나(색인 도입 전 저장) 스냅샷이 없는 메일은 전체 재채점합니다.
+동기화 서비스와 같은 lease를 잡고 실행하여 재채점 도중 이전 규칙으로 저장되는 메일이 없게 합니다.
+
+    python -m engine.rescore --dry-run     # 버전별 대상 건수만 확인
+    python -m engine.rescore
+    python -m engine.rescore --full        # 규칙 비교 없이 전체 재채점 (rowid가 바뀐 DB 등)
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import socket
+import logging
+import argparse
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from .analyzer import InquiryAnalyzer
+from .database import DBManager
+from .keyword_matcher import KeywordScorer
+from .pipeline import apply_reputation, build_row, index_rows
+from .sync_service import LEASE_NAME, LeaseLostError
+from . import registry
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# 보너스 항목 → 영향받는 메일 조건 (DBManager.RESCORE_CONDITIONS, 목록에 없는 항목은 전체)
+BONUS_CONDITIONS = {
+    'thread_reply': 'reply',
+    'has_attachment': 'attachment',
+    'known_sender': 'all',
+    'spam_sender': 'all',
+}
+# 부분 문자열 조각 검색 시 한 번에 OR로 묶는 색인 단어 수
+TERM_QUERY_CHUNK = 200
+
+# email_terms 토크나이저(unicode61)의 단어 구성 문자
+_PIECE_RE = re.compile(r'[^\W_]+')
+
+
+@dataclass
+class RulesDiff:
+    """규칙 버전 간 변경 항목"""
+    added: List[str] = field(default_factory=list)        # 이전 규칙에 없던 키워드 (단어 색인으로 후보 검색)
+    changed: List[str] = field(default_factory=list)      # 삭제 / 점수·카테고리 변경 키워드 (매칭 기록으로 대상)
+    conditions: List[str] = field(default_factory=list)   # 보너스 / 은어 변경 → RESCORE_CONDITIONS 키
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.conditions)
+
+
+def keyword_entries(keywords: Dict) -> Dict[Tuple[str, str], float]:
+    """keywords.json → {(섹션, 키워드): 점수} (KeywordScorer가 점수에 쓰는 항목만)"""
+    entries = {}
+    for section in (*KeywordScorer.CATEGORY_MAP, 'spam_keywords'):
+        for word, points in keywords.get(section, {}).get('words', {}).items():
+            entries[(section, word)] = points
+    return entries
+
+
+def diff_rules(old: Dict, new: Dict) -> RulesDiff:
+    """설정 스냅샷(InquiryAnalyzer.rules_snapshot) 비교"""
+    diff = RulesDiff()
+    if old.get('format') != new.get('format'):
+        # 분석 방식 / 매칭 기록이 달라져 저장된 색인으로 대상을 좁힐 수 없음
+        diff.conditions.append('all')
+        return diff
+    old_entries = keyword_entries(old.get('keywords', {}))
+    new_entries = keyword_entries(new.get('keywords', {}))
+    old_words = {word for _, word in old_entries}
+
+    for key in sorted(old_entries.keys() | new_entries.keys()):
+        if old_entries.get(key) == new_entries.get(key):
+            continue
+        word = key[1]
+        # 이전에도 다른 섹션에 있던 단어는 매칭 기록이 있으므로 정확한 대상 조회 가능
+        target = diff.changed if word in old_words else diff.added
+        if word not in target:
+            target.append(word)
+
+    old_bonus = old.get('keywords', {}).get('bonus', {})
+    new_bonus = new.get('keywords', {}).get('bonus', {})
+    for name in sorted(old_bonus.keys() | new_bonus.keys()):
+        if old_bonus.get(name) != new_bonus.get(name):
+            condition = BONUS_CONDITIONS.get(name, 'all')
+            if condition not in diff.conditions:
+                diff.conditions.append(condition)
+
+    if old.get('jargon') != new.get('jargon'):
+        diff.conditions.append('korean')
+    return diff
+
+
+def _quote(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _like_escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def term_queries(db: DBManager, keyword: str) -> Optional[List[str]]:
+    """
+    키워드를 포함할 수 있는 메일의 email_terms 검색식 목록 (결과 합집합 = 후보, None이면 색인으로 좁힐 수 없음)
+
+    키워드는 소문자 부분 문자열로 매칭되므로 키워드의 단어 조각이 텍스트의 단어와 어떻게 겹칠지는
+    조각 앞뒤가 구분 문자인지로 정해집니다.
+        앞뒤 모두 구분 문자   → 같은 단어                "l/c at sight"의 "at"  → "at"
+        앞만 구분 문자        → 조각으로 시작하는 단어      "lead time"의 "time"   → "time"*
+        뒤만 구분 문자        → 조각으로 끝나는 단어        "lead time"의 "lead"   → 색인 단어 LIKE '%lead'
+        둘 다 아님            → 조각을 포함하는 단어        "moq"                  → 색인 단어 LIKE '%moq%'
+    앞이 정해진 조각(같은 단어 / 접두어)은 모두 AND로 묶고, 나머지 중 가장 긴 조각은 확장 단어를 OR로 묶어
+    함께 AND로 묶습니다. (확장 단어가 많으면 TERM_QUERY_CHUNK개씩 나눈 검색식, 앞이 정해진 조각이 있으면 생략)
+    """
+    text = keyword.lower()
+    pieces = [(m.group(), m.start() > 0, m.end() < len(text)) for m in _PIECE_RE.finditer(text)]
+    if not pieces:
+        return None
+
+    bounded = [_quote(piece) if right else _quote(piece) + '*' for piece, left, right in pieces if left]
+    free = [(piece, right) for piece, left, right in pieces if not left]
+    if not free:
+        return [' AND '.join(bounded)]
+
+    piece, right = max(free, key=lambda p: len(p[0]))
+    terms = db.find_index_terms('%' + _like_escape(piece) + ('' if right else '%'))
+    if not terms:
+        return []       # 조각을 포함하는 단어가 없으면 키워드가 나올 수 없음
+    if bounded and len(terms) > TERM_QUERY_CHUNK:
+        return [' AND '.join(bounded)]
+    return [' AND '.join(bounded + ['(' + ' OR '.join(map(_quote, terms[i:i + TERM_QUERY_CHUNK])) + ')'])
+            for i in range(0, len(terms), TERM_QUERY_CHUNK)]
+
+
+def find_affected(db: DBManager, diff: RulesDiff, rules_version: str) -> Set[str]:
+    """규칙 버전 rules_version 메일 중 변경 항목의 영향을 받는 메일 ID"""
+    if 'all' in diff.conditions:
+        return db.find_rescore_emails(rules_version, 'all')
+
+    affected = set()
+    for condition in diff.conditions:
+        affected |= db.find_rescore_emails(rules_version, condition)
+    if diff.changed:
+        affected |= db.find_keyword_emails(diff.changed, rules_version)
+    for word in diff.added:
+        queries = term_queries(db, word) if db.terms_enabled else None
+        if queries is None:
+            logger.info(f"Keyword {word!r} cannot be narrowed by the term index, rescoring version {rules_version}")
+            return db.find_rescore_emails(rules_version, 'all')
+        for query in queries:
+            affected |= db.find_term_emails(query, rules_version)
+    return affected
+
+
+def rescore_emails(db: DBManager, analyzer: InquiryAnalyzer, email_ids: List[str], reindex: bool = False,
+                   chunk_size: int = 2000, heartbeat=None) -> Dict[str, int]:
+    """
+    저장된 본문으로 재분석 → 분석 결과 컬럼 / 키워드 색인 일괄 갱신 (발신자 평판 보정 포함)
+
+    Args:
+        reindex: 분석 텍스트 단어도 다시 색인 (버전 미상 메일, 은어 변경 시 - 그 외에는 텍스트가 같아 생략)
+        heartbeat: 청크마다 호출 (lease 연장)
+
+    발신자 평판은 각 메일 자신의 저장된 기여분을 뺀 집계로 보정합니다. (저장 시점과 같은 조건)
+
+    Returns:
+        {'rescored': 재분석 건수, 'changed': 규칙 점수(평판 보정 전 종합 점수) 또는 평판 보정값이 바뀐 건수}
+    """
+    stats = {'rescored': 0, 'changed': 0}
+    for start in range(0, len(email_ids), chunk_size):
+        emails = db.get_analysis_inputs(email_ids[start:start + chunk_size])
+        previous = {e['id']: (round(e.pop('base_score'), 1), round(e.pop('reputation_adj'), 1)) for e in emails}
+        stored = {e['id']: (e.pop('stored_spam'), previous[e['id']][0]) for e in emails}
+        results = apply_reputation(analyzer, db, emails, analyzer.batch_analyze(emails), stored)
+        rows = [build_row(email, result) for email, result in zip(emails, results)]
+        if reindex:
+            index_rows(analyzer, rows)
+        stats['rescored'] += db.update_analyses(rows)
+        stats['changed'] += sum(1 for row in rows if previous[row['id']] != (
+            round(row['score'] - row['reputation_adj'], 1), round(row['reputation_adj'], 1)))
+        if heartbeat is not None:
+            heartbeat()
+    return stats
+
+
+def run(db: DBManager, analyzer: InquiryAnalyzer, full: bool = False, dry_run: bool = False,
+        owner: Optional[str] = None, lease_ttl: float = 120.0) -> Dict:
+    """
+    현재 규칙과 다른 버전으로 분석된 메일 재채점
+
+    Returns:
+        버전별 변경 항목 / 대상 건수와 재채점 결과 요약
+    """
+    started = time.perf_counter()
+    current = analyzer.rules_version
+    owner = owner or f"rescore:{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    summary = {'rules_version': current, 'versions': [], 'rescored': 0, 'changed': 0}
+
+    def heartbeat():
+        if not db.acquire_lease(LEASE_NAME, owner, lease_ttl):
+            raise LeaseLostError(f"Sync lease lost by {owner}")
+
+    if not dry_run:
+        if not db.acquire_lease(LEASE_NAME, owner, lease_ttl):
+            raise RuntimeError("메일 동기화가 진행 중입니다. 잠시 후 다시 실행하세요.")
+        db.put_rules_snapshot(current, analyzer.rules_snapshot())
+    try:
+        for version, count in sorted(db.count_rules_versions().items(), key=lambda item: str(item[0])):
+            if version == current and not full:
+                continue
+            snapshot = None if full else db.get_rules_snapshot(version)
+            if snapshot is None:
+                diff, affected = None, db.find_rescore_emails(version, 'all')
+            else:
+                diff = diff_rules(snapshot, analyzer.rules_snapshot())
+                affected = find_affected(db, diff, version) if diff else set()
+            entry = {'version': version, 'emails': count, 'affected': len(affected),
+                     'diff': asdict(diff) if diff is not None else 'full'}
+            summary['versions'].append(entry)
+            logger.info(f"Rules {version} → {current}: {len(affected)}/{count} emails affected")
+            if dry_run:
+                continue
+
+            reindex = diff is None or 'korean' in diff.conditions
+            stats = rescore_emails(db, analyzer, sorted(affected), reindex=reindex, heartbeat=heartbeat)
+            summary['rescored'] += stats['rescored']
+            summary['changed'] += stats['changed']
+            # 나머지는 새 규칙으로도 결과가 같음 (버전 미상 메일은 모두 재채점되어 남은 메일 없음)
+            if version is not None and version != current:
+                db.set_rules_version(version, current)
+    finally:
+        if not dry_run:
+            db.release_lease(LEASE_NAME, owner)
+
+    summary['duration'] = round(time.perf_counter() - started, 2)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="키워드 규칙 변경 재채점 (영향받는 메일만)")
+    parser.add_argument('--db', default=str(BASE_DIR / 'data' / 'trade_emails.db'))
+    parser.add_argument('--keywords', default=str(BASE_DIR / 'config' / 'keywords.json'))
+    parser.add_argument('--jargon', default=str(BASE_DIR / 'config' / 'jargon_map.json'))
+    parser.add_argument('--workers', type=int, default=int(os.getenv("ANALYZER_WORKERS", "0")) or None)
+    parser.add_argument('--full', action='store_true', help='규칙 비교 없이 전체 재채점')
+    parser.add_argument('--dry-run', action='store_true', help='대상 건수만 출력')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    db = registry.get_db(args.db)
+    analyzer = registry.get_analyzer(args.keywords, args.jargon, workers=args.workers, cache=db)
+    print(json.dumps(run(db, analyzer, full=args.full, dry_run=args.dry_run), ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
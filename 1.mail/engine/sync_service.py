@@ -0,0 +1,334 @@
+"""
+Sync Service Module
+메일 동기화 서비스 (headless 상주 프로세스)
+
+Gmail 폴링 → 분석 → 저장을 Streamlit 화면 밖에서 주기적으로 실행합니다.
+화면(main_final.py)은 DB를 읽기 전용으로 열어 결과와 마지막 동기화 상태만 표시하고,
+'동기화 요청' 버튼은 sync_state에 요청을 기록만 합니다. (여러 사용자가 같은 메일함을 봐도 수집은 서비스에서만)
+
+서비스 프로세스가 여러 개 떠 있어도 lease(sync_state의 소유자 + 만료 시각)를 가진 1곳만 동기화하고,
+동기화 중에는 저장 청크마다 lease를 연장(heartbeat)합니다. 프로세스가 죽으면 lease 만료 후 다른 프로세스가 이어받습니다.
+주기 판정은 DB에 기록된 마지막 동기화 시각 기준이라 프로세스 수와 관계없이 주기당 1회만 수집합니다.
+
+sync_state 키
+    lease:mail_sync          동기화 중인 프로세스 {owner, expires_at}
+    sync_status              마지막 동기화 결과 (시작 / 종료 시각, 건수, 처리량, 오류)
+    sync_request             화면의 동기화 요청 (요청 시각, 수집 모드 / 기간)
+    sync_service_heartbeat   서비스 프로세스 생존 확인 (대기 중에도 주기적으로 갱신)
+
+    python -m engine.sync_service --authorize                # 최초 1회 브라우저 OAuth 인증 (token.json 생성)
+    python -m engine.sync_service --interval 300 --limit 100
+    python -m engine.sync_service --once --backend fake --db /tmp/check.db   # 네트워크 없이 점검
+        (대역 서비스의 historyId / 합성 메일이 기록되므로 운영 DB 대신 별도 DB 필요)
+"""
+
+import os
+import json
+import uuid
+import socket
+import logging
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+from .analyzer import InquiryAnalyzer
+from .database import DBManager
+from .gmail_fetcher import GmailFetcher, load_gmail_service
+from .mail_sync import MailSync
+from .pipeline import MailPipeline
+from . import registry
+
+logger = logging.getLogger(__name__)
+
+KST = timezone(timedelta(hours=9))
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_DB = BASE_DIR / 'data' / 'trade_emails.db'
+
+LEASE_NAME = 'mail_sync'
+STATUS_KEY = 'sync_status'
+REQUEST_KEY = 'sync_request'
+HEARTBEAT_KEY = 'sync_service_heartbeat'
+
+# 수집 모드 (화면의 선택지와 동일)
+MODE_COUNT = '개수 기준'            # historyId 증분 동기화
+MODE_DATE = '날짜 기준'             # 기간 내 전체 (최대 DATE_MODE_LIMIT건)
+MODE_DATE_COUNT = '기간 내 개수 기준'
+MODES = (MODE_COUNT, MODE_DATE, MODE_DATE_COUNT)
+DATE_MODE_LIMIT = 500
+# 마지막 heartbeat가 이보다 오래되면 서비스가 멈춘 것으로 표시
+SERVICE_STALE_AFTER = 60
+
+
+class LeaseLostError(RuntimeError):
+    """동기화 도중 lease를 잃음 (heartbeat 지연으로 만료 → 다른 프로세스가 가져감)"""
+
+
+def build_query(mode: str, start: Optional[str] = None, end: Optional[str] = None) -> str:
+    """
+    수집 검색 쿼리 (읽지 않은 메일, 기간 모드는 KST 자정 기준 epoch 범위)
+
+    Args:
+        start / end: 'YYYY-MM-DD' (end가 없으면 start 하루만)
+    """
+    query = 'is:unread'
+    if mode != MODE_COUNT and start:
+        start_date = datetime.strptime(start, '%Y-%m-%d').replace(tzinfo=KST)
+        end_date = datetime.strptime(end or start, '%Y-%m-%d').replace(tzinfo=KST)
+        # KST(UTC+9) 자정 기준 epoch 초로 변환 → UTC 기반 오프셋 문제 방지
+        query += f" after:{int(start_date.timestamp())} before:{int(end_date.timestamp()) + 86400}"
+    return query
+
+
+def request_sync(db: DBManager, mode: str = MODE_COUNT, limit: Optional[int] = None,
+                 start: Optional[str] = None, end: Optional[str] = None):
+    """화면 → 서비스 동기화 요청 (나중 요청이 덮어씀 - 진행 중이면 끝난 뒤 1회 더 실행)"""
+    if mode not in MODES:
+        raise ValueError(f"Unsupported sync mode: {mode}")
+    db.set_sync_state(REQUEST_KEY, json.dumps({
+        'requested_at': datetime.now().isoformat(), 'mode': mode, 'limit': limit, 'start': start, 'end': end
+    }, ensure_ascii=False))
+
+
+def read_sync_state(db: DBManager) -> Dict:
+    """
+    화면 표시용 동기화 상태
+
+    Returns:
+        {'last': 마지막 동기화 결과 | None, 'running': 진행 중 lease | None,
+         'pending': 아직 처리되지 않은 요청 | None,
+         'service_alive': 서비스 heartbeat가 최근이거나 동기화 lease가 유효한지 (긴 동기화 중 목록 조회 등
+                          heartbeat 간격이 SERVICE_STALE_AFTER를 넘어도 실행 중으로 표시)}
+    """
+    last = _load_json(db.get_sync_state(STATUS_KEY))
+    request = _load_json(db.get_sync_state(REQUEST_KEY))
+    running = db.get_lease(LEASE_NAME)
+    heartbeat = db.get_sync_state(HEARTBEAT_KEY)
+    alive = running is not None or heartbeat is not None and (
+        datetime.now() - datetime.fromisoformat(heartbeat)).total_seconds() <= SERVICE_STALE_AFTER
+    return {
+        'last': last,
+        'running': running,
+        'pending': request if _is_pending(request, last) else None,
+        'service_alive': alive,
+    }
+
+
+def _load_json(value: Optional[str]) -> Optional[Dict]:
+    return json.loads(value) if value else None
+
+
+def _is_pending(request: Optional[Dict], last: Optional[Dict]) -> bool:
+    """마지막 동기화 시작 이후의 요청인지 (ISO 문자열 비교)"""
+    return request is not None and (last is None or request['requested_at'] > last['started_at'])
+
+
+class SyncService:
+    """주기 / 요청 기반 메일 동기화 (lease로 프로세스 간 중복 수집 방지)"""
+
+    def __init__(self, db: DBManager, analyzer: Union[InquiryAnalyzer, Callable[[], InquiryAnalyzer]],
+                 service_factory: Callable,
+                 limit: int = 100, interval: float = 300.0, lease_ttl: float = 120.0,
+                 owner: Optional[str] = None):
+        """
+        Args:
+            db: DBManager (쓰기 가능)
+            analyzer: InquiryAnalyzer 또는 동기화마다 분석기를 돌려주는 함수 (registry.get_analyzer - 설정 변경 반영)
+            service_factory: 동기화마다 Gmail 서비스 객체를 만드는 함수 (토큰 갱신 포함, None이면 연결 실패)
+            limit: 전체 재동기화 / 기간 내 개수 기준 최대 수집 건수
+            interval: 정기 동기화 간격 (초)
+            lease_ttl: lease 유효 시간 (초) - 저장 청크 간격보다 충분히 길게
+            owner: lease 소유자 ID (기본: 호스트:PID:난수)
+        """
+        self.db = db
+        self.analyzer = analyzer
+        self.service_factory = service_factory
+        self.limit = limit
+        self.interval = interval
+        self.lease_ttl = lease_ttl
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._rates: Dict[str, int] = {}
+
+    # ------------------------------------------------------------------
+    # lease
+    # ------------------------------------------------------------------
+    def _heartbeat(self):
+        """
+        lease 연장 (잃었으면 LeaseLostError - 이후 저장을 멈춤)
+
+        서비스 heartbeat도 함께 기록합니다. (SERVICE_STALE_AFTER보다 긴 동기화 중에도 화면에 실행 중으로 표시)
+        """
+        if not self.db.acquire_lease(LEASE_NAME, self.owner, self.lease_ttl):
+            raise LeaseLostError(f"Sync lease lost by {self.owner}")
+        self.db.set_sync_state(HEARTBEAT_KEY, datetime.now().isoformat())
+
+    def _ingest(self, service, ids: List[str]) -> int:
+        """메시지 ID → 수집 / 분석 / 저장 파이프라인 (저장 청크마다 heartbeat)"""
+        analyzer = self.analyzer() if callable(self.analyzer) else self.analyzer
+        pipeline = MailPipeline(GmailFetcher(service), analyzer, self.db)
+        stored = 0
+        for event in pipeline.run(ids):
+            stored = event.done
+            self._heartbeat()
+        self._rates = {name: round(s.rate) for name, s in pipeline.stats.items()}
+        return stored
+
+    # ------------------------------------------------------------------
+    # 동기화
+    # ------------------------------------------------------------------
+    def due(self) -> Optional[Dict]:
+        """
+        지금 실행할 동기화 (없으면 None)
+
+        Returns:
+            화면 요청 dict, 또는 정기 동기화면 {'mode': MODE_COUNT}
+        """
+        last = _load_json(self.db.get_sync_state(STATUS_KEY))
+        request = _load_json(self.db.get_sync_state(REQUEST_KEY))
+        if _is_pending(request, last):
+            return request
+        if last is None or (datetime.now() - datetime.fromisoformat(last['started_at'])).total_seconds() >= self.interval:
+            return {'mode': MODE_COUNT}
+        return None
+
+    def _sync(self, service, request: Dict) -> Dict:
+        """요청 1건 실행 → 결과 건수"""
+        mode = request.get('mode', MODE_COUNT)
+        limit = request.get('limit') or self.limit
+        if mode == MODE_COUNT:
+            result = MailSync(service, self.db).sync(ingest_ids=lambda ids: self._ingest(service, ids), limit=limit)
+            return {'mode': result.mode, 'added': result.added, 'deleted': result.deleted,
+                    'archived': result.archived, 'reactivated': result.reactivated}
+
+        # 기간 모드: 공유 DB를 비우지 않고 기간 내 메일을 추가 수집 (증분 동기화의 historyId 유지)
+        fetch_limit = DATE_MODE_LIMIT if mode == MODE_DATE else limit
+        ids = GmailFetcher(service).list_message_ids(build_query(mode, request.get('start'), request.get('end')),
+                                                     fetch_limit)
+        return {'mode': 'range', 'added': self._ingest(service, ids),
+                'start': request.get('start'), 'end': request.get('end')}
+
+    def run_once(self, request: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        동기화 1회 (다른 프로세스가 진행 중이거나 실행할 동기화가 없으면 None)
+
+        Args:
+            request: 실행할 요청 (None이면 due()로 판정 - lease 획득 후 다시 확인)
+
+        Returns:
+            기록한 동기화 결과 (sync_status)
+        """
+        if not self.db.acquire_lease(LEASE_NAME, self.owner, self.lease_ttl):
+            return None
+        try:
+            # lease를 얻기 직전에 다른 프로세스가 끝냈을 수 있으므로 다시 판정
+            request = request or self.due()
+            if request is None:
+                return None
+
+            started = datetime.now()
+            status = {'owner': self.owner, 'started_at': started.isoformat(), 'error': None}
+            self._rates = {}
+            try:
+                service = self.service_factory()
+                if service is None:
+                    raise RuntimeError("Gmail 서비스 연결 실패 (라이브러리 / token.json 확인)")
+                status.update(self._sync(service, request))
+            except LeaseLostError:
+                raise
+            except Exception as e:
+                logger.exception(f"Sync failed: {e}")
+                status['error'] = str(e)
+
+            status.update(finished_at=datetime.now().isoformat(), rates=self._rates,
+                          duration=round((datetime.now() - started).total_seconds(), 2))
+            self.db.set_sync_state(STATUS_KEY, json.dumps(status, ensure_ascii=False))
+            logger.info(f"Sync done: {status}")
+            return status
+        except LeaseLostError as e:
+            # 다른 프로세스가 이어받았으므로 결과를 기록하지 않음
+            logger.warning(str(e))
+            return None
+        finally:
+            self.db.release_lease(LEASE_NAME, self.owner)
+
+    def run_forever(self, poll: float = 5.0, stop: Optional[threading.Event] = None):
+        """
+        상주 실행 - poll초마다 heartbeat 기록 + 실행할 동기화 확인
+
+        Args:
+            stop: set 되면 현재 동기화를 마친 뒤 종료
+        """
+        stop = stop or threading.Event()
+        logger.info(f"Sync service started ({self.owner}, interval {self.interval}s)")
+        while not stop.is_set():
+            self.db.set_sync_state(HEARTBEAT_KEY, datetime.now().isoformat())
+            if self.due() is not None:
+                self.run_once()
+            stop.wait(poll)
+        logger.info("Sync service stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="메일 동기화 서비스 (Gmail 폴링 → 분석 → 저장)")
+    parser.add_argument('--db', default=None, help=f'기본값 {DEFAULT_DB} (--backend fake는 지정 필수)')
+    parser.add_argument('--interval', type=float, default=300.0, help='정기 동기화 간격(초)')
+    parser.add_argument('--poll', type=float, default=5.0, help='요청 / 주기 확인 간격(초)')
+    parser.add_argument('--limit', type=int, default=100, help='전체 재동기화 최대 수집 건수')
+    parser.add_argument('--lease-ttl', type=float, default=120.0)
+    parser.add_argument('--workers', type=int, default=int(os.getenv("ANALYZER_WORKERS", "0")) or None)
+    parser.add_argument('--backend', choices=['gmail', 'fake'], default='gmail',
+                        help='fake: 합성 메일 대역 서비스 (네트워크 없이 점검)')
+    parser.add_argument('--lead-model', default=str(BASE_DIR / 'data' / 'lead_model'),
+                        help='학습 리드 모델 경로 (확장자 제외, python -m engine.lead_model train으로 생성)')
+    parser.add_argument('--once', action='store_true', help='동기화 1회 실행 후 종료')
+    parser.add_argument('--authorize', action='store_true', help='브라우저 OAuth 인증으로 token.json 생성 후 종료')
+    args = parser.parse_args()
+    if args.backend == 'fake' and (args.db is None or Path(args.db).resolve() == DEFAULT_DB):
+        parser.error("--backend fake stores synthetic mail and its historyId - pass --db with a scratch database")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+
+    if args.authorize:
+        service = load_gmail_service(str(BASE_DIR / 'token.json'), str(BASE_DIR / 'credentials.json'))
+        print("token.json 준비 완료" if service else "Gmail 라이브러리 또는 credentials.json이 없습니다.")
+        return
+
+    db = registry.get_db(args.db or str(DEFAULT_DB))
+    # 상주 프로세스라 동기화마다 분석기를 조회 (설정 파일을 고치면 재시작 없이 다음 동기화부터 반영)
+    analyzer = lambda: registry.get_analyzer(
+        keywords_path=str(BASE_DIR / 'config' / 'keywords.json'),
+        jargon_path=str(BASE_DIR / 'config' / 'jargon_map.json'),
+        workers=args.workers,
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        cache=db,
+        lead_model_path=args.lead_model
+    )
+
+    if args.backend == 'fake':
+        from .fake_gmail import FakeGmailService
+        fake = FakeGmailService.synthetic(args.limit)
+        service_factory = lambda: fake
+    else:
+        # headless - 브라우저 인증 없이 token.json만 사용 (최초 인증은 화면 또는 로컬에서)
+        service_factory = lambda: load_gmail_service(str(BASE_DIR / 'token.json'),
+                                                     str(BASE_DIR / 'credentials.json'), interactive=False)
+
+    service = SyncService(db, analyzer, service_factory, limit=args.limit, interval=args.interval,
+                          lease_ttl=args.lease_ttl)
+    if args.once:
+        print(json.dumps(service.run_once(service.due() or {'mode': MODE_COUNT}), ensure_ascii=False))
+    else:
+        try:
+            service.run_forever(poll=args.poll)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
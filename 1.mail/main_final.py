@@ -19,13 +19,12 @@ AI Trade Assistant v2.0 - Intelligence Decision Support System
 """
 
 import os
-import re
-import base64
+import html
 import urllib.parse
 import logging
 import asyncio
 import json
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta
 import streamlit as st
 
 # ==============================================================================
@@ -73,24 +72,20 @@ except ImportError:
     pass
 
 # 로컬 엔진 모듈
-from engine.analyzer import InquiryAnalyzer
 from engine.database import DBManager
 from engine.reply_generator import ReplyGenerator
-
-# Gmail API (optional)
-try:
-    from googleapiclient.discovery import build
-    from google_auth_oauthlib.flow import InstalledAppFlow
-    from google.auth.transport.requests import Request
-    from google.oauth2.credentials import Credentials
-    GMAIL_AVAILABLE = True
-except ImportError:
-    GMAIL_AVAILABLE = False
+from engine import registry
+from engine.gmail_fetcher import GMAIL_AVAILABLE, load_gmail_service
+from engine.pipeline import analyze_rows
+from engine.near_dup import NearDuplicateIndex
+from engine.sync_service import MODES, MODE_COUNT, request_sync, read_sync_state
 
 # 설정
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-SCOPES = ['https://www.googleapis.com/auth/gmail.modify']
-KST = timezone(timedelta(hours=9))
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # OpenAI 호환 서버 (미설정 시 기본 API)
+REPLY_CONCURRENCY = int(os.getenv("REPLY_CONCURRENCY", "5"))  # 답장 일괄 생성 동시 요청 수
+ANALYZER_WORKERS = int(os.getenv("ANALYZER_WORKERS", "0")) or None  # 배치 분석 프로세스 수 (기본: CPU 코어 수)
+ANALYZE_CHUNK = 500  # 분석 / 저장 청크 크기 (진행률 갱신 단위)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
 logger = logging.getLogger("TradeAssistant")
@@ -99,65 +94,14 @@ logger = logging.getLogger("TradeAssistant")
 # ==============================================================================
 # Gmail API Functions
 # ==============================================================================
-def extract_body_text(payload):
-    """Gmail 메시지 payload에서 본문 텍스트 추출 (text/plain 우선)"""
-    if 'parts' in payload:
-        for part in payload['parts']:
-            if part['mimeType'] == 'text/plain':
-                data = part.get('body', {}).get('data', '')
-                if data:
-                    return base64.urlsafe_b64decode(data).decode('utf-8', errors='ignore')
-            elif part['mimeType'].startswith('multipart/'):
-                result = extract_body_text(part)
-                if result:
-                    return result
-    else:
-        data = payload.get('body', {}).get('data', '')
-        if data:
-            return base64.urlsafe_b64decode(data).decode('utf-8', errors='ignore')
-    return ''
-
-
-def has_real_attachment(payload):
-    """실제 첨부파일 존재 여부 (multipart 구조 ≠ 첨부파일)"""
-    for part in payload.get('parts', []):
-        if part.get('filename'):
-            return True
-        if part['mimeType'].startswith('multipart/') and has_real_attachment(part):
-            return True
-    return False
-
-
 def get_gmail_service():
-    """Gmail API 서비스 생성"""
-    if not GMAIL_AVAILABLE:
+    """Gmail API 서비스 생성 (처리 완료 시 읽음 표시용 - 수집은 동기화 서비스가 담당)"""
+    try:
+        return load_gmail_service('token.json', 'credentials.json')
+    except Exception as e:
+        logger.error(f"Token refresh failed: {e}")
+        st.error(f"⚠️ Gmail 토큰 갱신 실패: {e}")
         return None
-    
-    creds = None
-    if os.path.exists('token.json'):
-        try:
-            creds = Credentials.from_authorized_user_file('token.json', SCOPES)
-        except Exception as e:
-            logger.error(f"Token load error: {e}")
-    
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            try:
-                creds.refresh(Request())
-            except Exception as e:
-                logger.error(f"Token refresh failed: {e}")
-                st.error(f"⚠️ Gmail 토큰 갱신 실패: {e}")
-                return None
-        else:
-            if not os.path.exists('credentials.json'):
-                return None
-            flow = InstalledAppFlow.from_client_secrets_file('credentials.json', SCOPES)
-            creds = flow.run_local_server(port=0)
-        
-        with open('token.json', 'w') as token:
-            token.write(creds.to_json())
-    
-    return build('gmail', 'v1', credentials=creds)
 
 
 def mark_as_read(service, msg_id):
@@ -173,71 +117,6 @@ def mark_as_read(service, msg_id):
     return False
 
 
-def fetch_emails_from_gmail(service, max_results=50, date_range=None, mode="개수 기준"):
-    """Gmail에서 메일 수집"""
-    if not service:
-        return []
-    
-    query = "is:unread"
-
-    if mode != "개수 기준" and date_range and len(date_range) >= 1:
-        # 날짜 1개만 선택된 경우(종료일 미선택) → 해당 날짜 하루만 조회
-        if len(date_range) == 2:
-            start_date, end_date = date_range
-        else:
-            start_date = end_date = date_range[0]
-
-        # KST(UTC+9) 자정 기준 epoch 초로 변환 → UTC 기반 오프셋 문제 방지
-        start_epoch = int(datetime(start_date.year, start_date.month, start_date.day, tzinfo=KST).timestamp())
-        end_epoch = int(datetime(end_date.year, end_date.month, end_date.day, tzinfo=KST).timestamp()) + 86400
-        query += f" after:{start_epoch} before:{end_epoch}"
-    
-    fetch_limit = 500 if mode == "날짜 기준" else max_results
-    
-    try:
-        results = service.users().messages().list(
-            userId='me', maxResults=fetch_limit, q=query
-        ).execute()
-        
-        messages = results.get('messages', [])
-        emails = []
-        
-        for msg in messages:
-            m = service.users().messages().get(userId='me', id=msg['id']).execute()
-            
-            date_raw = int(m['internalDate']) / 1000
-            dt_obj = datetime.fromtimestamp(date_raw, tz=KST)
-            
-            headers = m['payload'].get('headers', [])
-            subject = next((h['value'] for h in headers if h['name'] == 'Subject'), "No Subject")
-            sender = next((h['value'] for h in headers if h['name'] == 'From'), "Unknown")
-            
-            email_match = re.search(r'<(.+?)>', sender)
-            sender_email = email_match.group(1) if email_match else sender
-            
-            # 본문 전체 추출 (snippet 대신 실제 body)
-            body_text = extract_body_text(m['payload']) or m.get('snippet', '')
-
-            emails.append({
-                'id': msg['id'],
-                'subject': subject,
-                'sender': sender,
-                'sender_email': sender_email,
-                'body': body_text,
-                'snippet': m.get('snippet', ''),
-                'has_attachment': has_real_attachment(m['payload']),
-                'mail_date': dt_obj.strftime('%m-%d %H:%M'),
-                'full_date': dt_obj.strftime('%Y-%m-%d')
-            })
-        
-        return emails
-        
-    except Exception as e:
-        logger.error(f"Fetch error: {e}")
-        st.error(f"❌ 메일 수집 중 오류 발생: {e}")
-        return []
-
-
 def get_demo_emails():
     """데모용 샘플 메일"""
     return [
@@ -356,6 +235,103 @@ Thanks''',
     ]
 
 
+# ==============================================================================
+# 분석 및 저장
+# ==============================================================================
+def analyze_and_store(emails, db, analyzer):
+    """수집한 메일을 배치 분석하여 DB에 일괄 저장 (진행률 표시)"""
+    totals = {'inserted': 0, 'updated': 0, 'skipped': 0}
+    if not emails:
+        return totals
+    
+    progress = st.progress(0)
+    status = st.empty()
+    near_dup = NearDuplicateIndex(db)
+    
+    # 청크 단위 배치 분석 (유사 메일은 대표 메일 결과 재사용) → 일괄 저장
+    # 이미 저장된 메일은 분석 캐시 적중 + insert_emails_bulk에서 건너뜀 (건별 존재 확인 불필요)
+    for start in range(0, len(emails), ANALYZE_CHUNK):
+        chunk = emails[start:start + ANALYZE_CHUNK]
+        counts = db.insert_emails_bulk(analyze_rows(analyzer, chunk, near_dup, reputation=db))
+        for key in totals:
+            totals[key] += counts[key]
+        
+        done = start + len(chunk)
+        status.text(f"분석 중: {done}/{len(emails)}")
+        progress.progress(done / len(emails))
+    
+    progress.empty()
+    status.empty()
+    logger.info(f"Stored: {totals} / analysis cache: hits={analyzer.cache_stats['hits']} "
+                f"misses={analyzer.cache_stats['misses']} / near-duplicates: {near_dup.stats['duplicates']}")
+    return totals
+
+
+def render_sync_status(db: DBManager):
+    """동기화 서비스 상태 + 마지막 동기화 결과"""
+    state = read_sync_state(db)
+    last = state['last']
+    
+    if state['running']:
+        st.info("🔄 동기화 진행 중...")
+    elif state['pending']:
+        st.info("⏳ 동기화 요청 대기 중")
+    
+    if last is None:
+        st.caption("아직 동기화 기록이 없습니다.")
+    elif last['error']:
+        st.error(f"❌ 마지막 동기화 실패 ({last['finished_at'][:16].replace('T', ' ')}): {last['error']}")
+    else:
+        minutes = int((datetime.now() - datetime.fromisoformat(last['finished_at'])).total_seconds() // 60)
+        ago = "방금 전" if minutes < 1 else f"{minutes}분 전" if minutes < 60 else f"{minutes // 60}시간 전"
+        mode_label = {'full': "전체", 'incremental': "증분", 'range': "기간"}.get(last['mode'], last['mode'])
+        st.caption(f"🕒 마지막 동기화: {last['finished_at'][:16].replace('T', ' ')} ({ago}) · {mode_label} · "
+                   f"신규 {last['added']}건, 삭제 {last.get('deleted', 0)}건, 처리 완료 {last.get('archived', 0)}건")
+        rates = last.get('rates')
+        if rates:
+            st.caption(f"⏱️ 처리량 (msg/s) - 수집 {rates['fetch']} · 분석 {rates['analyze']} · 저장 {rates['store']}")
+    
+    if not state['service_alive']:
+        st.warning("⚠️ 동기화 서비스가 실행 중이 아닙니다.\n\n`python -m engine.sync_service`")
+
+
+# 키워드 필터 기간 (오늘 기준 일수, None이면 전체)
+FACET_PERIODS = {"전체 기간": None, "오늘": 0, "최근 7일": 6, "최근 30일": 29}
+
+
+def render_keyword_filter(db: DBManager) -> dict:
+    """키워드 facet 필터 (email_keywords 인덱스 집계 건수 표시) → list_emails 필터 인자"""
+    st.markdown("### 🏷️ 키워드 필터")
+    
+    def reset_pages():
+        st.session_state.list_page_cursors = [None]
+    
+    period = st.selectbox("메일 기간", list(FACET_PERIODS), key="facet_period", on_change=reset_pages)
+    days = FACET_PERIODS[period]
+    date_from = (datetime.now().date() - timedelta(days=days)).isoformat() if days is not None else None
+    
+    category_counts = db.category_facets(date_from=date_from)
+    category = st.selectbox(
+        "카테고리",
+        [None, *DBManager.KEYWORD_CATEGORIES],
+        format_func=lambda c: "전체" if c is None else f"{DBManager.KEYWORD_CATEGORIES[c]} ({category_counts.get(c, 0)})",
+        key="facet_category",
+        on_change=reset_pages
+    )
+    
+    keyword_counts = {f['keyword']: f['count'] for f in db.keyword_facets(category=category, date_from=date_from)}
+    if st.session_state.get('facet_keyword') not in (None, *keyword_counts):
+        st.session_state.facet_keyword = None         # 기간 / 카테고리 변경으로 목록에서 빠진 키워드
+    keyword = st.selectbox(
+        "키워드",
+        [None, *keyword_counts],
+        format_func=lambda k: "전체" if k is None else f"{k} ({keyword_counts[k]})",
+        key="facet_keyword",
+        on_change=reset_pages
+    )
+    return {'keyword': keyword, 'category': category, 'date_from': date_from}
+
+
 # ==============================================================================
 # Streamlit UI
 # ==============================================================================
@@ -424,14 +400,18 @@ def main():
     st.caption("무역 인콰이어리 분석 + AI 답장 초안 자동 생성")
     
     # 서비스 초기화 (__file__ 기준 절대 경로로 config 참조)
+    # 수집 / 분석 / 저장은 동기화 서비스(python -m engine.sync_service)가 담당하고 화면은 읽기 전용으로 조회
+    # 엔진 객체는 registry에서 프로세스당 1개씩 공유 (재실행 / 세션마다 DDL, 설정 로드, 클라이언트 생성 안 함)
     _BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    db = DBManager(os.path.join(_BASE_DIR, "data", "trade_emails.db"))
-    analyzer = InquiryAnalyzer(
-        openai_api_key=OPENAI_API_KEY,
-        keywords_path=os.path.join(_BASE_DIR, "config", "keywords.json"),
-        jargon_path=os.path.join(_BASE_DIR, "config", "jargon_map.json")
+    db_path = os.path.join(_BASE_DIR, "data", "trade_emails.db")
+    store = registry.get_db(db_path)                     # 사용자 작업(처리 완료 / 답장 초안 / 동기화 요청)만 기록
+    db = registry.get_db(db_path, read_only=True)        # 목록 / 검색 / 통계 (동기화 서비스의 쓰기를 막지 않음)
+    reply_generator = registry.get_reply_generator(
+        api_key=OPENAI_API_KEY,
+        base_url=OPENAI_BASE_URL,
+        max_concurrency=REPLY_CONCURRENCY,
+        cache=store
     )
-    reply_generator = ReplyGenerator(api_key=OPENAI_API_KEY)
     
     # Session State 초기화
     if 'reply_drafts' not in st.session_state:
@@ -443,14 +423,13 @@ def main():
     with st.sidebar:
         # 수집 모드
         st.markdown("### 📬 메일 수집")
-        collect_mode = st.selectbox(
-            "수집 모드",
-            ["개수 기준", "날짜 기준", "기간 내 개수 기준"]
-        )
+        render_sync_status(db)
+        
+        collect_mode = st.selectbox("수집 모드", MODES)
         
         analysis_limit = st.slider("분석할 메일 수", 10, 100, 30)
         
-        if collect_mode != "개수 기준":
+        if collect_mode != MODE_COUNT:
             selected_period = st.date_input(
                 "기간 선택",
                 value=(datetime.now().date() - timedelta(days=7), datetime.now().date()),
@@ -461,54 +440,38 @@ def main():
         else:
             selected_period = None
         
-        # 동기화 버튼
-        if st.button("🔄 데이터 동기화 및 AI 분석", use_container_width=True):
-            # 기존 데이터 자동 초기화 (이전 메일이 남아있는 문제 방지)
-            db.clear_all()
-            st.session_state.reply_drafts = {}
-
-            with st.spinner("메일 수집 및 분석 중..."):
-                if not GMAIL_AVAILABLE:
-                    st.warning("⚠️ Gmail API 라이브러리가 설치되지 않아 데모 데이터를 표시합니다.")
-                    emails = get_demo_emails()
-                else:
-                    service = get_gmail_service()
-                    if service:
-                        emails = fetch_emails_from_gmail(service, analysis_limit, selected_period, collect_mode)
-                        if not emails:
-                            st.warning("⚠️ 조건에 맞는 읽지 않은 메일이 없습니다.")
-                    else:
-                        st.error("❌ Gmail 연결 실패 - 데모 데이터를 표시합니다. 토큰을 확인해주세요.")
-                        emails = get_demo_emails()
-                
-                if emails:
-                    progress = st.progress(0)
-                    status = st.empty()
-                    
-                    for i, email in enumerate(emails):
-                        if not db.email_exists(email['id']):
-                            status.text(f"분석 중: {i+1}/{len(emails)}")
-                            result = analyzer.calculate_score(email)
-                            
-                            db.insert_email_full({
-                                **email,
-                                'score': result['total'],
-                                'clarity_score': result['clarity'],
-                                'intent_score': result['intent'],
-                                'terms_score': result['terms'],
-                                'reason': result['reason'],
-                                'keywords': result['keywords'],
-                                'language': result['language'],
-                                'is_spam': result['is_spam'],
-                                'status': 'Active'
-                            })
-                        
-                        progress.progress((i + 1) / len(emails))
-                    
-                    progress.empty()
-                    status.empty()
-                    st.success(f"✅ {len(emails)}개 메일 분석 완료!")
-                    st.rerun()
+        # 동기화 요청 (서비스가 다음 확인 주기에 실행 - 여러 사용자가 눌러도 수집은 1회)
+        col_sync, col_refresh = st.columns([0.75, 0.25])
+        with col_sync:
+            if st.button("🔄 동기화 요청", use_container_width=True):
+                period = [d.isoformat() for d in selected_period] if selected_period else [None]
+                request_sync(store, collect_mode, analysis_limit, period[0], period[-1])
+                st.session_state.list_page_cursors = [None]
+                st.toast("동기화를 요청했습니다.")
+                st.rerun()
+        with col_refresh:
+            if st.button("🔃", help="새로고침", use_container_width=True):
+                st.rerun()
+        
+        # 데모: Gmail 라이브러리가 없으면 샘플 메일을 화면에서 직접 분석
+        if not GMAIL_AVAILABLE:
+            st.caption("⚠️ Gmail API 라이브러리가 설치되지 않았습니다.")
+            if st.button("🧪 데모 데이터 불러오기", use_container_width=True):
+                store.clear_all()
+                st.session_state.reply_drafts = {}
+                st.session_state.list_page_cursors = [None]
+                analyzer = registry.get_analyzer(
+                    keywords_path=os.path.join(_BASE_DIR, "config", "keywords.json"),
+                    jargon_path=os.path.join(_BASE_DIR, "config", "jargon_map.json"),
+                    workers=ANALYZER_WORKERS,
+                    openai_api_key=OPENAI_API_KEY,
+                    cache=store,
+                    lead_model_path=os.path.join(_BASE_DIR, "data", "lead_model")
+                )
+                emails = get_demo_emails()
+                analyze_and_store(emails, store, analyzer)
+                st.success(f"✅ {len(emails)}개 메일 분석 완료!")
+                st.rerun()
         
         st.divider()
         
@@ -521,28 +484,49 @@ def main():
         
         st.divider()
         
+        filters = render_keyword_filter(db)
+        
+        st.divider()
+        
         if st.button("🗑️ 전체 초기화", use_container_width=True):
-            db.clear_all()
+            store.clear_all()
             st.session_state.reply_drafts = {}
+            st.session_state.list_page_cursors = [None]
             st.rerun()
     
     # 메인 영역
-    all_emails = db.get_active_emails(sort_by="score", limit=100)
+    # 전문 검색 (FTS5)
+    search_query = st.text_input(
+        "🔍 메일 검색",
+        placeholder='예: FOB Busan MOQ  /  "letter of credit"  /  FOB OR CIF'
+    )
+    if search_query.strip():
+        render_search_results(db, search_query)
+        st.divider()
+    
+    # 목록은 필요한 컬럼만 keyset 페이지 단위로 조회 (본문은 답장 생성 시 별도 조회)
+    # 사이드바 키워드 필터는 모든 탭에 적용
+    top_emails, _ = db.list_emails(sort_by="score", limit=10, **filters)
+    load_saved_drafts(top_emails, reply_generator)
     
     # ✨ 탭 텍스트 수정: "🔥 Hot Lead" → "🔥 Hot Lead 순"
-    tab1, tab2, tab3 = st.tabs(["🏆 종합 TOP 10", "🔥 Hot Lead 순", "📋 전체"])
+    tab1, tab2, tab3, tab4 = st.tabs(["🏆 종합 TOP 10", "🔥 Hot Lead 순", "📋 전체", "💬 대화별"])
     
     with tab1:
-        if not all_emails:
-            st.info("📬 '데이터 동기화 및 AI 분석' 버튼을 클릭하여 시작하세요.")
+        if not top_emails and any(filters.values()):
+            st.info("🏷️ 키워드 필터에 맞는 메일이 없습니다.")
+        elif not top_emails:
+            st.info("📬 동기화 서비스가 메일을 수집하면 여기에 표시됩니다. ('동기화 요청'으로 바로 수집)")
         else:
-            top_emails = sorted(all_emails, key=lambda x: x['score'], reverse=True)[:10]
             for idx, mail in enumerate(top_emails):
-                render_email_card(mail, idx + 1, db, reply_generator)
+                render_email_card(mail, idx + 1, db, store, reply_generator)
     
     with tab2:
-        if all_emails:
-            hot_leads = sorted(all_emails, key=lambda x: x['intent_score'], reverse=True)[:20]
+        if top_emails:
+            hot_leads, _ = db.list_emails(sort_by="intent_score", limit=20, **filters)
+            load_saved_drafts(hot_leads, reply_generator)
+            render_batch_drafting(hot_leads, db, reply_generator)
+            
             for mail in hot_leads:
                 score = int(mail['intent_score'])
                 cls = "bg-high" if score >= 70 else "bg-medium" if score >= 40 else "bg-low"
@@ -551,28 +535,167 @@ def main():
                 with col1:
                     st.markdown(f"""
                     🎯 <span class="score-box {cls}">{score}점</span>
-                    **{mail['subject'][:50]}** ({mail['mail_date']})
+                    **{mail['subject'][:50]}** ({mail['mail_date']}){dup_suffix(mail)}
                     """, unsafe_allow_html=True)
                 with col2:
                     gmail_url = f"https://mail.google.com/mail/u/0/#inbox/{mail['id']}"
                     st.link_button("🌐", gmail_url)
+                
+                if mail['id'] in st.session_state.reply_drafts:
+                    with st.expander("📝 답장 초안"):
+                        st.text(st.session_state.reply_drafts[mail['id']])
     
     with tab3:
-        if all_emails:
-            for mail in all_emails:
-                st.write(f"[{int(mail['score'])}점] {mail['subject'][:60]} ({mail['mail_date']})")
+        if top_emails:
+            render_email_list_page(db, filters)
+    
+    with tab4:
+        render_thread_list(db)
+
+
+def dup_suffix(mail: dict) -> str:
+    """유사 메일 묶음 표시 (대표 메일 목록 행)"""
+    dup_count = mail.get('dup_count') or 1
+    return f" · 🧬 유사 {dup_count - 1}건" if dup_count > 1 else ""
 
 
-def render_email_card(mail: dict, rank: int, db: DBManager, reply_gen: ReplyGenerator):
-    """이메일 카드 렌더링 (답장 초안 기능 포함)"""
+def load_saved_drafts(emails: list, reply_gen: ReplyGenerator):
+    """DB에 저장된 답장 초안을 세션으로 불러오기 (세션에서 편집 중인 초안은 유지)"""
+    missing = [m['id'] for m in emails if m['id'] not in st.session_state.reply_drafts]
+    for email_id, draft in reply_gen.cached_drafts(missing).items():
+        st.session_state.reply_drafts[email_id] = draft.body
+
+
+def render_batch_drafting(leads: list, db: DBManager, reply_gen: ReplyGenerator):
+    """Hot Lead 답장 초안 일괄 생성 (동시 요청 + 토큰 스트리밍 표시)"""
+    pending = [m for m in leads if m['id'] not in st.session_state.reply_drafts]
+    if not pending:
+        return
+    
+    if not st.button(f"✍️ 답장 초안 일괄 생성 ({len(pending)}건)", key="batch_drafts", use_container_width=True):
+        return
+    
+    bodies = db.get_email_bodies([m['id'] for m in pending])
+    targets = [{**m, 'body_text': bodies.get(m['id'], '')} for m in pending]
+    progress = st.progress(0.0, text="답장 초안 작성 중...")
+    placeholders = {m['id']: st.empty() for m in targets}
+    subjects = {m['id']: m['subject'][:50] for m in targets}
+    partial = {m['id']: "" for m in targets}
+    done = []
+    
+    def on_token(email_id, token):
+        partial[email_id] += token
+        placeholders[email_id].text(f"✍️ {subjects[email_id]}\n{partial[email_id]}▌")
+    
+    def on_complete(email_id, draft):
+        st.session_state.reply_drafts[email_id] = draft.body
+        done.append(email_id)
+        mark = "📄 (템플릿)" if draft.fallback else "✅"
+        placeholders[email_id].text(f"{mark} {subjects[email_id]}\n{draft.body}")
+        progress.progress(len(done) / len(targets), text=f"답장 초안 작성 중... {len(done)}/{len(targets)}")
+    
+    drafts = reply_gen.generate_replies(targets, on_token=on_token, on_complete=on_complete)
+    fallbacks = sum(1 for d in drafts.values() if d.fallback)
+    logger.info(f"Batch drafting: {len(drafts)} drafts ({fallbacks} template fallbacks)")
+    st.rerun()
+
+
+def render_email_list_page(db: DBManager, filters: dict, page_size: int = 50):
+    """전체 목록 (keyset 커서 기반 페이지 이동, 키워드 필터 적용)"""
+    # list_page_cursors[i] = i번째 페이지 시작 커서 (첫 페이지는 None)
+    if 'list_page_cursors' not in st.session_state:
+        st.session_state.list_page_cursors = [None]
+    cursors = st.session_state.list_page_cursors
+    page = len(cursors) - 1
+    
+    emails, next_cursor = db.list_emails(sort_by="score", limit=page_size, cursor=cursors[-1], **filters)
+    for mail in emails:
+        st.write(f"[{int(mail['score'])}점] {mail['subject'][:60]} ({mail['mail_date']}){dup_suffix(mail)}")
+    
+    col_prev, col_page, col_next = st.columns([1, 1, 1])
+    with col_prev:
+        if page > 0 and st.button("◀ 이전", key="list_prev", use_container_width=True):
+            cursors.pop()
+            st.rerun()
+    with col_page:
+        st.caption(f"{page + 1} 페이지")
+    with col_next:
+        if next_cursor and st.button("다음 ▶", key="list_next", use_container_width=True):
+            cursors.append(next_cursor)
+            st.rerun()
+
+
+def render_thread_list(db: DBManager, page_size: int = 30):
+    """대화별 목록 (스레드 1건 = 카드 1장, 대화 안 최고 점수 순 - 집계는 email_threads, 메일은 펼칠 때만 조회)"""
+    threads, _ = db.list_threads(limit=page_size)
+    if not threads:
+        st.info("💬 처리할 대화가 없습니다.")
+        return
+    st.caption("처리 안 된 메일이 남은 대화 (사이드바 키워드 필터 미적용)")
+    
+    for rank, thread in enumerate(threads, 1):
+        score = int(thread['score'] or 0)
+        label = (f"Rank {rank}: [{score}점] {(thread['subject'] or '')[:50]} · 💬 {thread['message_count']}통 "
+                 f"({(thread['last_date'] or '')[:10]})")
+        with st.expander(label, expanded=False):
+            c1, c2, c3 = st.columns(3)
+            c1.metric("최고 종합 점수", f"{score}점")
+            c2.metric("구매 의도 (최고 / 평균)", f"{thread['intent_score']:.0f} / {thread['avg_intent']:.0f}점")
+            c3.metric("미처리 메일", f"{thread['active_count']} / {thread['message_count']}통")
+            
+            # expander 내용은 접혀 있어도 실행되므로 토글을 켤 때만 대화 메일 조회
+            if st.toggle("📨 대화 메일 보기", key=f"thread_{thread['thread_id']}"):
+                for mail in db.get_thread_messages(thread['thread_id']):
+                    done = " · 처리 완료" if mail['status'] == 'Archived' else ""
+                    st.write(f"- [{int(mail['score'])}점 · 의도 {int(mail['intent_score'])}점] "
+                             f"{mail['sender'] or mail['sender_email']} · {(mail['subject'] or '')[:50]} "
+                             f"({mail['mail_date']}{done})")
+            
+            gmail_url = f"https://mail.google.com/mail/u/0/#inbox/{thread['latest_id']}"
+            st.link_button("🌐 Gmail에서 대화 열기", gmail_url)
+
+
+def render_search_results(db: DBManager, query: str):
+    """검색 결과 렌더링 (BM25 순위 + 본문 하이라이트)"""
+    # 본문의 HTML을 이스케이프한 뒤 하이라이트 표시만 <mark>로 변환
+    mark_start, mark_end = '\x02', '\x03'
+    results = db.search_emails(query, limit=30, mark=(mark_start, mark_end))
+    
+    st.markdown(f"**검색 결과: {len(results)}건**")
+    if not results:
+        st.caption("일치하는 메일이 없습니다.")
+        return
+    
+    for mail in results:
+        snippet = html.escape(mail.get('match_snippet') or '').replace('\n', ' ')
+        snippet = snippet.replace(mark_start, '<mark>').replace(mark_end, '</mark>')
+        score = int(mail['score'] or 0)
+        cls = "bg-high" if score >= 70 else "bg-medium" if score >= 40 else "bg-low"
+        archived = " · 처리 완료" if mail['status'] == 'Archived' else ""
+        
+        col1, col2 = st.columns([0.88, 0.12])
+        with col1:
+            st.markdown(f"""
+            <span class="score-box {cls}">{score}점</span>
+            <strong>{html.escape(mail['subject'] or '')[:60]}</strong> ({mail['mail_date']}{archived})<br>
+            <small>{snippet}</small>
+            """, unsafe_allow_html=True)
+        with col2:
+            gmail_url = f"https://mail.google.com/mail/u/0/#inbox/{mail['id']}"
+            st.link_button("🌐", gmail_url)
+
+
+def render_email_card(mail: dict, rank: int, db: DBManager, store: DBManager, reply_gen: ReplyGenerator):
+    """이메일 카드 렌더링 (답장 초안 기능 포함, 유사 메일 묶음은 카드 1장 / 조회는 db, 처리 완료는 store)"""
     score = mail['score']
     cls = "bg-high" if score >= 70 else "bg-medium" if score >= 40 else "bg-low"
+    dup_count = mail.get('dup_count') or 1
     
     # ✨ 카드 라벨 수정: 점수를 빨간색 볼드체로, 날짜를 볼드체로
     card_label = f"**Rank {rank}:** <span class='rank-score'>[{int(score)}점]</span> {mail['subject'][:50]}... <span class='rank-date'>({mail['mail_date']})</span>"
     
     # ⚠️ st.expander는 HTML을 지원하지 않으므로, 순수 텍스트로 변경
-    card_label_text = f"Rank {rank}: [{int(score)}점] {mail['subject'][:50]}... ({mail['mail_date']})"
+    card_label_text = f"Rank {rank}: [{int(score)}점] {mail['subject'][:50]}... ({mail['mail_date']}){dup_suffix(mail)}"
     
     with st.expander(card_label_text, expanded=False):
         # ✨ 확장 시 내부에서 점수와 날짜 강조 스타일 적용
@@ -588,11 +711,18 @@ def render_email_card(mail: dict, rank: int, db: DBManager, reply_gen: ReplyGene
         # 점수 표시
         has_attach = mail.get('has_attachment') == 1 or mail.get('has_attachment') is True
         attach_badge = "📎 첨부파일 포함" if has_attach else ""
+        reputation_adj = mail.get('reputation_adj') or 0
+        reputation_badge = (f"⭐ 기존 거래처 +{reputation_adj:.0f}" if reputation_adj > 0
+                            else f"⚠️ 스팸 이력 발신자 {reputation_adj:.0f}" if reputation_adj < 0 else "")
+        # 처리 이력 학습 점수 (python -m engine.lead_model train 이후 저장된 메일만)
+        ml_badge = f"🤖 답장 가능성 {mail['ml_score']:.0f}점" if mail.get('ml_score') is not None else ""
         
         st.markdown(f"""
         <div style="display:flex; align-items:center; gap:15px; margin-bottom:15px;">
             <span class="score-box {cls}">종합 {score:.0f}점</span>
+            <span>{ml_badge}</span>
             <span>{attach_badge}</span>
+            <span>{reputation_badge}</span>
         </div>
         """, unsafe_allow_html=True)
         
@@ -606,6 +736,22 @@ def render_email_card(mail: dict, rank: int, db: DBManager, reply_gen: ReplyGene
         lang_map = {'EN': '🇺🇸 영어', 'KO': '🇰🇷 한국어', 'OTHER': '🌐 기타'}
         st.caption(f"언어: {lang_map.get(mail.get('language', 'EN'), '🌐')}")
         
+        # 발신자 이력 (트리거로 유지되는 평판 집계 - 이 메일 포함)
+        sender_key, _ = db.reputation_keys(mail.get('sender_email'))
+        history = db.get_sender_reputations([mail.get('sender_email')]).get(sender_key) if sender_key else None
+        if history and history['messages'] > 1:
+            st.caption(f"발신자 이력: {history['messages']}건 · 평균 {history['avg_score']:.0f}점 · "
+                       f"최고 {history['max_score'] or 0:.0f}점 · 스팸 {history['spam']}건 · "
+                       f"최근 {(history['last_seen'] or '')[:10]}")
+        
+        # 유사 메일 묶음 (같은 문의 반복 발송 - 분석은 이 메일 결과를 공유)
+        if dup_count > 1:
+            members = db.get_cluster_members(mail['id'])
+            lines = "\n".join(f"- {m['sender'] or m['sender_email']} · {(m['subject'] or '')[:50]} ({m['mail_date']})"
+                              for m in members)
+            more = f"\n- ... 외 {dup_count - 1 - len(members)}건" if dup_count - 1 > len(members) else ""
+            st.warning(f"🧬 **유사 메일 {dup_count - 1}건 묶음** (분석 결과 공유)\n{lines}{more}")
+        
         st.divider()
         
         # AI 분석
@@ -614,6 +760,12 @@ def render_email_card(mail: dict, rank: int, db: DBManager, reply_gen: ReplyGene
         if mail['keywords']:
             st.success(f"🔑 **판단 키워드:** {mail['keywords']}")
         
+        # 본문 (expander 내용은 접혀 있어도 실행되므로 토글을 켤 때만 압축 해제)
+        if st.toggle("📄 본문 보기", key=f"body_{mail['id']}"):
+            st.text(db.get_email_body(mail['id']))
+        elif mail.get('body_preview'):
+            st.caption(mail['body_preview'])
+        
         # Gmail 링크
         gmail_url = f"https://mail.google.com/mail/u/0/#inbox/{mail['id']}"
         st.markdown(f'<a href="{gmail_url}" target="_blank" class="gmail-btn">🔗 Gmail 원본 메일 확인하기</a>', unsafe_allow_html=True)
@@ -625,11 +777,13 @@ def render_email_card(mail: dict, rank: int, db: DBManager, reply_gen: ReplyGene
         
         with col1:
             if st.button("✅ 처리 완료", key=f"done_{mail['id']}", use_container_width=True):
-                db.update_status(mail['id'], 'Archived')
+                # 유사 메일 묶음 전체를 함께 처리
+                archived_ids = store.update_cluster_status(mail['id'], 'Archived')
                 if not mail['id'].startswith('demo_'):
                     service = get_gmail_service()
                     if service:
-                        mark_as_read(service, mail['id'])
+                        for email_id in archived_ids:
+                            mark_as_read(service, email_id)
                 st.toast("보관함으로 이동되었습니다.")
                 st.rerun()
         
@@ -637,7 +791,7 @@ def render_email_card(mail: dict, rank: int, db: DBManager, reply_gen: ReplyGene
             if st.button("📧 답장하기", key=f"reply_{mail['id']}", use_container_width=True):
                 # AI 답장 초안 생성
                 with st.spinner("AI가 답장 초안을 작성 중..."):
-                    draft = reply_gen.generate_reply(mail)
+                    draft = reply_gen.generate_reply({**mail, 'body_text': db.get_email_body(mail['id'])})
                     st.session_state.reply_drafts[mail['id']] = draft.body
                 st.rerun()
         
@@ -690,7 +844,8 @@ def render_email_card(mail: dict, rank: int, db: DBManager, reply_gen: ReplyGene
             with col_send2:
                 if st.button("🔄 초안 재생성", key=f"regen_{mail['id']}", use_container_width=True):
                     with st.spinner("초안 재생성 중..."):
-                        draft = reply_gen.generate_reply(mail)
+                        draft = reply_gen.generate_reply({**mail, 'body_text': db.get_email_body(mail['id'])},
+                                                         use_cache=False)
                         st.session_state.reply_drafts[mail['id']] = draft.body
                     st.rerun()
             
@@ -698,6 +853,13 @@ def render_email_card(mail: dict, rank: int, db: DBManager, reply_gen: ReplyGene
                 if st.button("❌ 초안 닫기", key=f"close_{mail['id']}", use_container_width=True):
                     del st.session_state.reply_drafts[mail['id']]
                     st.rerun()
+            
+            # 발송 후 기록 (학습 리드 모델의 '답장함' 라벨 - 처리 완료도 함께)
+            if st.button("📨 답장 발송 완료", key=f"replied_{mail['id']}", use_container_width=True):
+                store.mark_replied(mail['id'])
+                del st.session_state.reply_drafts[mail['id']]
+                st.toast("답장 완료로 기록되었습니다.")
+                st.rerun()
 
 
 if __name__ == "__main__":